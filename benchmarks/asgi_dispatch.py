@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""
+ASGI Dispatch Microbenchmark
+
+Measures the time the ASGI worker spends on a request outside of the
+application: parsing, building the scope, starting the request task and
+writing the response. Keep-alive requests are fed to an ``ASGIProtocol``
+through an in-memory transport, one after the other, and answered by a
+tiny JSON endpoint, so that no socket or kernel time is counted.
+
+The time the HTTP parser alone takes for the same request is measured
+apart, the rest is the dispatch: what the protocol does around the
+application. Times are CPU times of the process.
+
+Usage:
+    python benchmarks/asgi_dispatch.py
+    python benchmarks/asgi_dispatch.py --requests 200000 --parser python
+    python3.12 benchmarks/asgi_dispatch.py --eager
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from gunicorn.asgi.protocol import ASGIProtocol  # noqa: E402
+from gunicorn.config import Config  # noqa: E402
+from gunicorn.scoreboard import private_slot  # noqa: E402
+
+REQUEST = (
+    b"GET /api/items?limit=10 HTTP/1.1\r\n"
+    b"Host: localhost:8000\r\n"
+    b"User-Agent: bench/1.0\r\n"
+    b"Accept: application/json\r\n"
+    b"Accept-Encoding: gzip, deflate\r\n"
+    b"Accept-Language: en-US,en;q=0.9\r\n"
+    b"Cookie: session=0123456789abcdef\r\n"
+    b"X-Request-Id: 5f2b6c1e-0d5e-4d7f-9a3c-2b1e0f9d8c7b\r\n"
+    b"\r\n"
+)
+
+BODY = b'{"items": [], "count": 0}'
+
+
+async def app(scope, receive, send):
+    """A tiny JSON endpoint."""
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", b"%d" % len(BODY))],
+    })
+    await send({"type": "http.response.body", "body": BODY})
+
+
+class Log:
+    """Logger discarding everything, as with the access log disabled."""
+
+    access_log_enabled = False
+
+    def _discard(self, *args, **kwargs):
+        pass
+
+    debug = info = warning = error = exception = access = _discard
+
+
+class Transport(asyncio.Transport):
+    """In-memory transport resolving a future when a response is written."""
+
+    def __init__(self):
+        super().__init__()
+        self.written = None
+        self.closed = False
+
+    def get_extra_info(self, name, default=None):
+        return {"peername": ("127.0.0.1", 50000),
+                "sockname": ("127.0.0.1", 8000)}.get(name, default)
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def write(self, data):
+        if self.written is not None and not self.written.done():
+            self.written.set_result(data)
+
+    def close(self):
+        self.closed = True
+
+    def is_closing(self):
+        return self.closed
+
+
+def make_worker(args, loop):
+    cfg = Config()
+    cfg.set("http_parser", args.parser)
+    cfg.set("keepalive", 60)
+    cfg.set("accesslog", None)
+    return types.SimpleNamespace(
+        cfg=cfg, log=Log(), loop=loop, asgi=app, state={}, alive=True,
+        nr=0, nr_conns=0, max_requests=sys.maxsize, score=private_slot())
+
+
+async def run(args):
+    loop = asyncio.get_running_loop()
+    if args.eager:
+        loop.set_task_factory(asyncio.eager_task_factory)
+    worker = make_worker(args, loop)
+    protocol = ASGIProtocol(worker)
+    transport = Transport()
+    protocol.connection_made(transport)
+
+    async def serve(n):
+        for _ in range(n):
+            transport.written = loop.create_future()
+            protocol.data_received(REQUEST)
+            response = await transport.written
+            if not response.endswith(BODY):
+                raise RuntimeError("unexpected response: %r" % response)
+
+    await serve(min(1000, args.requests))
+    rounds = []
+    for _ in range(args.rounds):
+        started = time.process_time()
+        await serve(args.requests)
+        rounds.append((time.process_time() - started) / args.requests)
+    parser_class = type(protocol._callback_parser)
+    protocol.connection_lost(None)
+    return rounds, parser_class
+
+
+def parse_time(args, parser_class):
+    """CPU time the parser takes for a request, with no-op callbacks."""
+    parser = parser_class(on_headers_complete=lambda: False)
+    best = None
+    for _ in range(args.rounds):
+        started = time.process_time()
+        for _ in range(args.requests):
+            parser.feed(REQUEST)
+            parser.reset()
+        elapsed = (time.process_time() - started) / args.requests
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--parser", default="auto",
+                        choices=["auto", "fast", "python"])
+    parser.add_argument("--eager", action="store_true",
+                        help="run the tasks with asyncio.eager_task_factory "
+                             "(Python 3.12+)")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+    if args.eager and not hasattr(asyncio, "eager_task_factory"):
+        parser.error("--eager requires Python 3.12 or later")
+
+    rounds, parser_class = asyncio.run(run(args))
+    best = min(rounds)
+    parsing = parse_time(args, parser_class)
+    result = {
+        "python": sys.version.split()[0],
+        "parser": parser_class.__name__,
+        "eager": args.eager,
+        "usec_per_request": round(best * 1e6, 2),
+        "usec_median": round(statistics.median(rounds) * 1e6, 2),
+        "usec_parsing": round(parsing * 1e6, 2),
+        "usec_dispatch": round((best - parsing) * 1e6, 2),
+        "requests_per_sec": round(1 / best),
+    }
+    print("python %s, parser %s, eager tasks %s" % (
+        result["python"], result["parser"], "on" if args.eager else "off"))
+    print("%.2f us per request (median %.2f), %d requests/s" % (
+        result["usec_per_request"], result["usec_median"],
+        result["requests_per_sec"]))
+    print("%.2f us parsing, %.2f us dispatch" % (
+        result["usec_parsing"], result["usec_dispatch"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "result": result}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""
+ASGI Idle Connections Benchmark
+
+Measures the memory an ASGI worker holds for each idle connection:
+
+- keepalive: an HTTP/1.1 connection that served one request and waits
+  for the next one
+- websocket: an accepted WebSocket connection waiting for a message
+
+A single worker is started, N connections of the given kind are opened
+and left idle, and the growth of the worker's RSS and USS is divided by N.
+
+Usage:
+    python benchmarks/asgi_idle_connections.py
+    python benchmarks/asgi_idle_connections.py --connections 20000
+    python benchmarks/asgi_idle_connections.py --modes websocket \
+        --output results.json
+"""
+
+import argparse
+import base64
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+BENCHMARK_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+from gunicorn.util import memory_usage  # noqa: E402
+
+MODES = ("keepalive", "websocket")
+
+
+async def app(scope, receive, send):
+    """Answer HTTP requests with the pid of the worker, and accept
+    WebSocket connections until they are closed."""
+    if scope["type"] == "http":
+        body = str(os.getpid()).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+    elif scope["type"] == "websocket":
+        await receive()
+        await send({"type": "websocket.accept"})
+        while (await receive())["type"] != "websocket.disconnect":
+            pass
+
+
+def raise_nofile(n):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = n + 1024
+    if hard != resource.RLIM_INFINITY:
+        wanted = min(wanted, hard)
+    if soft == resource.RLIM_INFINITY or soft >= wanted:
+        return soft
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+    return wanted
+
+
+def start_gunicorn(args):
+    cmd = [
+        sys.executable, "-m", "gunicorn",
+        "--worker-class", "asgi",
+        "--workers", "1",
+        "--worker-connections", str(args.connections + 100),
+        "--keep-alive", "600",
+        "--timeout", "600",
+        "--backlog", "4096",
+        "--bind", "%s:%d" % (args.host, args.port),
+        "--log-level", "warning",
+        "asgi_idle_connections:app",
+    ]
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(BENCHMARK_DIR.parent)
+    proc = subprocess.Popen(cmd, cwd=BENCHMARK_DIR, env=env,
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            sock = connect(args)
+            try:
+                return proc, http_request(sock)
+            finally:
+                sock.close()
+        except OSError:
+            time.sleep(0.1)
+    stop_gunicorn(proc)
+    raise RuntimeError("gunicorn did not start: %s"
+                       % proc.stderr.read().decode(errors="replace"))
+
+
+def stop_gunicorn(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def connect(args):
+    return socket.create_connection((args.host, args.port), timeout=10)
+
+
+def read_response(sock):
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise OSError("connection closed")
+        data += chunk
+    head, _, body = data.partition(b"\r\n\r\n")
+    return head, body
+
+
+def http_request(sock):
+    """Send a keep-alive request and return the pid in the response."""
+    sock.sendall(b"GET / HTTP/1.1\r\nHost: bench\r\n\r\n")
+    head, body = read_response(sock)
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+            break
+    while len(body) < length:
+        body += sock.recv(4096)
+    return int(body)
+
+
+def websocket_handshake(sock):
+    key = base64.b64encode(os.urandom(16))
+    sock.sendall(b"GET / HTTP/1.1\r\nHost: bench\r\nUpgrade: websocket\r\n"
+                 b"Connection: Upgrade\r\nSec-WebSocket-Version: 13\r\n"
+                 b"Sec-WebSocket-Key: " + key + b"\r\n\r\n")
+    head, _ = read_response(sock)
+    if not head.startswith(b"HTTP/1.1 101"):
+        raise OSError("handshake refused: %r" % head[:40])
+
+
+def open_connections(args, mode, n):
+    opener = http_request if mode == "keepalive" else websocket_handshake
+    socks = []
+    for _ in range(n):
+        sock = connect(args)
+        opener(sock)
+        socks.append(sock)
+    return socks
+
+
+def settle(pid, seconds=1.0):
+    """Return the memory of the worker once it stopped changing."""
+    time.sleep(seconds)
+    return memory_usage(pid)
+
+
+def run_mode(args, mode):
+    proc, pid = start_gunicorn(args)
+    try:
+        # let the worker reach its steady state before the baseline
+        warmup = open_connections(args, mode, min(100, args.connections))
+        for sock in warmup:
+            sock.close()
+        before = settle(pid)
+        socks = open_connections(args, mode, args.connections)
+        after = settle(pid)
+        # the worker is still holding every connection
+        sel = selectors.DefaultSelector()
+        for sock in socks:
+            sel.register(sock, selectors.EVENT_READ)
+        closed = len(sel.select(timeout=0))
+        sel.close()
+        for sock in socks:
+            sock.close()
+    finally:
+        stop_gunicorn(proc)
+
+    n = args.connections
+    return {
+        "mode": mode,
+        "connections": n,
+        "closed_by_server": closed,
+        "rss_per_connection": round((after["rss"] - before["rss"]) / n),
+        "uss_per_connection": round((after["uss"] - before["uss"]) / n),
+        "rss_before": before["rss"],
+        "rss_after": after["rss"],
+    }
+
+
+def print_results(results):
+    print("%-10s %11s %10s %10s %12s" % ("mode", "connections", "rss/conn",
+                                          "uss/conn", "worker rss"))
+    for result in results:
+        print("%-10s %11d %9dB %9dB %11.1fM" % (
+            result["mode"], result["connections"],
+            result["rss_per_connection"], result["uss_per_connection"],
+            result["rss_after"] / 1024 / 1024))
+        if result["closed_by_server"]:
+            print("  warning: %d connections were closed by the server"
+                  % result["closed_by_server"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help="comma separated modes (default: all)")
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8643)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    limit = raise_nofile(args.connections)
+    if limit != resource.RLIM_INFINITY and limit < args.connections + 100:
+        parser.error("the open files limit (%d) is too low for %d connections"
+                     % (limit, args.connections))
+    if memory_usage(os.getpid()) is None:
+        parser.error("the memory of the worker cannot be read on this platform")
+
+    results = []
+    for mode in args.modes.split(","):
+        if mode not in MODES:
+            parser.error("unknown mode: %s" % mode)
+        results.append(run_mode(args, mode))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""
+ASGI WebSocket Throughput Microbenchmark
+
+Measures how fast the ASGI worker's WebSocket protocol reads and writes
+messages of a few sizes:
+
+- receive: masked client frames are fed to a ``WebSocketProtocol`` and
+  read back as unmasked messages
+- send: messages are framed and handed to an in-memory transport
+
+No socket or kernel time is counted. Times are CPU times of the process,
+the best of a few rounds.
+
+Usage:
+    python benchmarks/asgi_websocket.py
+    python benchmarks/asgi_websocket.py --sizes 1024,1048576 --output ws.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from gunicorn.asgi.websocket import OPCODE_BINARY, WebSocketProtocol  # noqa: E402
+
+SIZES = (128, 4096, 65536, 1048576)
+MASKING_KEY = b"\x37\xfa\x21\x3d"
+
+
+class Log:
+    """Logger discarding everything."""
+
+    def _discard(self, *args, **kwargs):
+        pass
+
+    debug = info = warning = error = exception = _discard
+
+
+class Transport:
+    """Transport counting the bytes written to it."""
+
+    def __init__(self):
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+
+    def writelines(self, list_of_data):
+        for data in list_of_data:
+            self.written += len(data)
+
+
+def masked_frame(payload):
+    """A client frame carrying payload."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | OPCODE_BINARY, 0x80 | length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | OPCODE_BINARY, 0x80 | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | OPCODE_BINARY, 0x80 | 127, length)
+    mask = (MASKING_KEY * (length // 4 + 1))[:length]
+    masked = (int.from_bytes(payload, "little")
+              ^ int.from_bytes(mask, "little")).to_bytes(length, "little")
+    return header + MASKING_KEY + masked
+
+
+def messages_for(size, total):
+    """Number of messages of the size making up about total bytes."""
+    return max(10, total // size)
+
+
+async def receive(size, count):
+    protocol = WebSocketProtocol(Transport(), {}, None, Log())
+    payload = os.urandom(size)
+    frame = masked_frame(payload)
+    started = time.process_time()
+    for _ in range(count):
+        protocol.feed_data(frame)
+        opcode, data = await protocol._read_frame()
+    elapsed = time.process_time() - started
+    if opcode != OPCODE_BINARY or data != payload:
+        raise RuntimeError("unexpected message")
+    return elapsed
+
+
+async def send(size, count):
+    transport = Transport()
+    protocol = WebSocketProtocol(transport, {}, None, Log())
+    payload = os.urandom(size)
+    started = time.process_time()
+    for _ in range(count):
+        await protocol._send_frame(OPCODE_BINARY, payload)
+    elapsed = time.process_time() - started
+    if transport.written < size * count:
+        raise RuntimeError("payload not written")
+    return elapsed
+
+
+def best_of(args, direction, size):
+    count = messages_for(size, args.total)
+    fn = receive if direction == "receive" else send
+    best = min(asyncio.run(fn(size, count)) for _ in range(args.rounds))
+    return {
+        "direction": direction,
+        "size": size,
+        "messages": count,
+        "usec_per_message": round(best / count * 1e6, 2),
+        "mb_per_sec": round(size * count / best / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma separated message sizes in bytes")
+    parser.add_argument("--total", type=int, default=64 * 1024 * 1024,
+                        help="bytes to transfer per size and round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    print("%-8s %9s %10s %12s %10s" % ("", "size", "messages", "us/message",
+                                       "MB/s"))
+    for direction in ("receive", "send"):
+        for size in map(int, args.sizes.split(",")):
+            result = best_of(args, direction, size)
+            results.append(result)
+            print("%-8s %9d %10d %12.2f %10.1f" % (
+                direction, size, result["messages"],
+                result["usec_per_message"], result["mb_per_sec"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
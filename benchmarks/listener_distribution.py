@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""
+Listener Distribution Benchmark
+
+Measures how the connections are spread over the workers with each way of
+sharing the listening sockets:
+
+- shared: all the workers accept on the arbiter's listeners
+- exclusive: shared listeners registered with EPOLLEXCLUSIVE
+- reuseport: a SO_REUSEPORT listener per worker, hashed by the kernel
+- cbpf: a SO_REUSEPORT listener per worker, steered by receiving CPU
+
+Each request is sent on a new connection and answered with the pid of the
+worker that accepted it.
+
+Usage:
+    python benchmarks/listener_distribution.py
+    python benchmarks/listener_distribution.py --workers 8 --requests 20000
+    python benchmarks/listener_distribution.py --modes shared,exclusive \
+        --worker-class asgi --output results.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+BENCHMARK_DIR = Path(__file__).parent
+
+MODES = {
+    "shared": [],
+    "exclusive": ["--epoll-exclusive"],
+    "reuseport": ["--reuse-port"],
+    "cbpf": ["--reuse-port", "--reuse-port-cbpf"],
+}
+
+
+def app(environ, start_response):
+    """WSGI application answering with the pid of the worker."""
+    delay = environ.get("QUERY_STRING", "")
+    if delay:
+        time.sleep(float(delay) / 1000)
+    body = str(os.getpid()).encode()
+    start_response("200 OK", [("Content-Length", str(len(body)))])
+    return [body]
+
+
+async def asgi_app(scope, receive, send):
+    """ASGI application answering with the pid of the worker."""
+    if scope["type"] != "http":
+        return
+    body = str(os.getpid()).encode()
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def start_gunicorn(args, mode):
+    module = "asgi_app" if args.worker_class == "asgi" else "app"
+    cmd = [
+        sys.executable, "-m", "gunicorn",
+        "--worker-class", args.worker_class,
+        "--workers", str(args.workers),
+        "--threads", str(args.threads),
+        "--bind", "%s:%d" % (args.host, args.port),
+        "--log-level", "warning",
+    ] + MODES[mode] + ["listener_distribution:%s" % module]
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(BENCHMARK_DIR.parent)
+    proc = subprocess.Popen(cmd, cwd=BENCHMARK_DIR, env=env,
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            request(args.host, args.port, "")
+            # let the remaining workers boot
+            time.sleep(1)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    stop_gunicorn(proc)
+    raise RuntimeError("gunicorn did not start: %s"
+                       % proc.stderr.read().decode(errors="replace"))
+
+
+def stop_gunicorn(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def request(host, port, query):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        conn.request("GET", "/?" + query if query else "/",
+                     headers={"Connection": "close"})
+        return int(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def run_mode(args, mode):
+    proc = start_gunicorn(args, mode)
+    try:
+        query = str(args.delay) if args.delay else ""
+        started = time.monotonic()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            pids = list(pool.map(
+                lambda _: request(args.host, args.port, query),
+                range(args.requests)))
+        elapsed = time.monotonic() - started
+    finally:
+        stop_gunicorn(proc)
+
+    counts = sorted(Counter(pids).values(), reverse=True)
+    # workers that got no connection at all
+    counts += [0] * (args.workers - len(counts))
+    mean = statistics.mean(counts)
+    return {
+        "mode": mode,
+        "requests_per_sec": round(args.requests / elapsed, 1),
+        "per_worker": counts,
+        "max_over_mean": round(max(counts) / mean, 2),
+        "cv": round(statistics.pstdev(counts) / mean, 3),
+    }
+
+
+def print_results(results):
+    print("%-10s %10s %8s %8s  %s" % ("mode", "req/s", "max/avg", "cv",
+                                      "connections per worker"))
+    for result in results:
+        print("%-10s %10.1f %8.2f %8.3f  %s" % (
+            result["mode"], result["requests_per_sec"],
+            result["max_over_mean"], result["cv"],
+            " ".join(str(c) for c in result["per_worker"])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help="comma separated modes (default: all)")
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--delay", type=int, default=0,
+                        help="milliseconds each request takes (WSGI only)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8642)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes.split(","):
+        if mode not in MODES:
+            parser.error("unknown mode: %s" % mode)
+        results.append(run_mode(args, mode))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""
+Worker Spawn Latency Benchmark
+
+Measures how long a new worker takes to be ready to serve, with workers
+forked from the arbiter and from the zygote (``--zygote``).
+
+The application simulates a slow import. For each mode, gunicorn is
+started, then sent ``TTIN`` repeatedly; the time from the signal until the
+new worker reports ready on the control socket is recorded.
+
+Usage:
+    python benchmarks/spawn_benchmark.py
+    python benchmarks/spawn_benchmark.py --import-time 2.0 --spawns 20
+"""
+
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+
+from gunicorn.ctl.client import ControlClient, ControlClientError
+
+APP = """\
+import time
+time.sleep({import_time})
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Length', '2')])
+    return [b'ok']
+"""
+
+
+def ready_workers(ctl):
+    # the arbiter restarts its control server around every fork
+    try:
+        with ControlClient(ctl) as client:
+            workers = client.send_command("show workers")["workers"]
+    except (ControlClientError, OSError):
+        return set()
+    return {w["pid"] for w in workers if w["booted"]}
+
+
+def more_workers(ctl, known):
+    """Return the ready workers once there is one not in ``known``."""
+    ready = ready_workers(ctl)
+    return ready if ready - known else None
+
+
+def wait_for(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.005)
+    raise TimeoutError("gave up waiting")
+
+
+def run_mode(tmpdir, zygote, args):
+    ctl = os.path.join(tmpdir, "zygote.ctl" if zygote else "fork.ctl")
+    cmd = [sys.executable, "-m", "gunicorn", "--chdir", tmpdir,
+           "-b", "127.0.0.1:0", "-w", "1", "--control-socket", ctl,
+           "--log-level", "warning", "slow_app:app"]
+    if zygote:
+        cmd.insert(3, "--zygote")
+    proc = subprocess.Popen(cmd)
+    timeout = args.import_time * 4 + 10
+    try:
+        wait_for(lambda: os.path.exists(ctl), timeout)
+        latencies = []
+        known = wait_for(lambda: ready_workers(ctl), timeout)
+        for _ in range(args.spawns):
+            start = time.perf_counter()
+            os.kill(proc.pid, signal.SIGTTIN)
+            known = wait_for(lambda: more_workers(ctl, known), timeout)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def report(name, latencies):
+    print(f"{name:<10} mean {statistics.mean(latencies):9.1f} ms   "
+          f"median {statistics.median(latencies):9.1f} ms   "
+          f"max {max(latencies):9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--import-time", type=float, default=0.5,
+                        help="seconds the application takes to import")
+    parser.add_argument("--spawns", type=int, default=10,
+                        help="workers spawned per mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(os.path.join(tmpdir, "slow_app.py"), "w") as f:
+            f.write(textwrap.dedent(APP.format(import_time=args.import_time)))
+
+        print(f"Application import time: {args.import_time * 1000:.0f} ms, "
+              f"{args.spawns} spawns per mode\n")
+        fork = run_mode(tmpdir, False, args)
+        report("fork", fork)
+        zygote = run_mode(tmpdir, True, args)
+        report("zygote", zygote)
+        print(f"\nzygote spawns are {statistics.median(fork) / statistics.median(zygote):.1f}x "
+              f"faster (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,14 @@ import time
 import traceback
 import socket
 
+from gunicorn.autoscale import Autoscaler
 from gunicorn.errors import HaltServer, AppImportError
 from gunicorn.pidfile import Pidfile
+from gunicorn.scoreboard import Scoreboard
+from gunicorn.watcher import Watcher, pidfd_supported
+from gunicorn.workers.workertmp import SharedHeartbeat, WorkerTmp
+from gunicorn.zygote import (StateError, Zygote, ZygoteError,
+                             set_child_subreaper)
 from gunicorn import sock, systemd, util
 
 from gunicorn import __version__, SERVER_SOFTWARE
@@ -77,6 +83,32 @@ class Arbiter:
         # Control socket server
         self._control_server = None
 
+        # Directory of the workers' WebSocket broadcast sockets
+        self.broadcast_dir = None
+
+        # What the workers are doing, written by the workers themselves
+        self.scoreboard = Scoreboard()
+
+        # Rolling reload: age of the youngest worker to replace, None when
+        # no reload is in progress, and the old workers told to stop
+        self.reload_cutoff = None
+        self.retiring = set()
+
+        # Process forking the workers with the application imported,
+        # whether this process can adopt them (None until tried), and
+        # whether the zygote failed and workers are forked from here
+        self.zygote = None
+        self.subreaper = None
+        self.zygote_disabled = False
+
+        # Selector watching the workers through pidfds, None where pidfds
+        # are not supported: the main loop then polls every second
+        self.watcher = None
+
+        # Listeners opened here for the workers when their connections are
+        # steered by CPU, None otherwise
+        self.steering = None
+
         # Stats tracking
         self._stats = {
             'start_time': None,
@@ -144,9 +176,20 @@ class Arbiter:
 
         self.worker_class = self.cfg.worker_class
         self.address = self.cfg.address
-        self.num_workers = self.cfg.workers
+        if self.cfg.autoscale:
+            self.autoscaler = Autoscaler(self)
+            low, high = self.autoscaler.bounds()
+            self.num_workers = min(high, max(low, self.cfg.workers))
+        else:
+            self.autoscaler = None
+            self.num_workers = self.cfg.workers
         self.timeout = self.cfg.timeout
         self.proc_name = self.cfg.proc_name
+        self.cpu_sets = util.cpu_sets(self.cfg.cpu_affinity,
+                                      self.cfg.cpu_affinity_cpus)
+        if self.cfg.cpu_affinity != "off" and not self.cpu_sets:
+            self.log.warning("CPU affinity is not supported on this "
+                             "platform, workers run on any CPU")
 
         self.log.debug('Current configuration:\n{0}'.format(
             '\n'.join(
@@ -162,6 +205,8 @@ class Arbiter:
 
         if self.cfg.preload_app:
             self.app.wsgi()
+            if self.cfg.gc_freeze:
+                util.freeze_gc()
 
     def start(self):
         """\
@@ -186,6 +231,8 @@ class Arbiter:
             self.pidfile.create(self.pid)
         self.cfg.on_starting(self)
 
+        if pidfd_supported():
+            self.watcher = Watcher()
         self.init_signals()
 
         if not self.LISTENERS:
@@ -203,6 +250,7 @@ class Arbiter:
 
             if not (self.cfg.reuse_port and hasattr(socket, 'SO_REUSEPORT')):
                 self.LISTENERS = sock.create_sockets(self.cfg, self.log, fds)
+        self.setup_steering()
 
         listeners_str = ",".join([str(lnr) for lnr in self.LISTENERS])
         self.log.debug("Arbiter booted")
@@ -218,6 +266,9 @@ class Arbiter:
         if self.cfg.dirty_workers > 0 and self.cfg.dirty_apps:
             self.spawn_dirty_arbiter()
 
+        if self.cfg.websocket_broadcast:
+            self.create_broadcast_dir()
+
         # Note: control socket server is started after initial workers spawn
         # to avoid fork deadlocks with asyncio
 
@@ -238,6 +289,8 @@ class Arbiter:
     def signal(self, sig, frame):
         """Signal handler - NO LOGGING, just queue the signal."""
         self.SIG_QUEUE.put_nowait(sig)
+        if self.watcher is not None:
+            self.watcher.wake()
 
     def run(self):
         "Main master loop."
@@ -255,7 +308,7 @@ class Arbiter:
                 self.maybe_promote_master()
 
                 # Wait for and process signals
-                for sig in self.wait_for_signals(timeout=1.0):
+                for sig in self.wait_for_signals(timeout=self.loop_timeout()):
                     if sig not in self.SIG_NAMES:
                         self.log.info("Ignoring unknown signal: %s", sig)
                         continue
@@ -271,6 +324,8 @@ class Arbiter:
                     handler()
 
                 self.murder_workers()
+                if self.autoscaler is not None:
+                    self.autoscaler.tick()
                 self.manage_workers()
                 self.manage_dirty_arbiter()
         except (StopIteration, KeyboardInterrupt):
@@ -290,6 +345,8 @@ class Arbiter:
     def signal_chld(self, sig, frame):
         """SIGCHLD signal handler - NO LOGGING, just queue the signal."""
         self.SIG_QUEUE.put_nowait(sig)
+        if self.watcher is not None:
+            self.watcher.wake()
 
     def handle_chld(self):
         """SIGCHLD handling - called from main loop, safe to log."""
@@ -397,6 +454,29 @@ class Arbiter:
     def wakeup(self):
         """Wake up the arbiter's main loop."""
         self.SIG_QUEUE.put_nowait(self.WAKEUP_REQUEST)
+        if self.watcher is not None:
+            self.watcher.wake()
+
+    def loop_timeout(self):
+        """\
+        Seconds the main loop can sleep for, None for as long as nothing
+        happens.
+
+        Without a watcher, or while waiting for something only polling
+        tells, the loop runs every second. Otherwise it sleeps until a
+        heartbeat is due.
+        """
+        if self.watcher is None or self.master_pid \
+                or self.reload_cutoff is not None \
+                or len(self.WORKERS) != self.num_workers \
+                or self.cfg.max_worker_memory \
+                or self.cfg.enable_backlog_metric \
+                or self.autoscaler is not None:
+            return 1.0
+        deadline = self.watcher.next_deadline()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
 
     def halt(self, reason=None, exit_status=0):
         """ halt arbiter """
@@ -412,6 +492,9 @@ class Arbiter:
 
         if self.pidfile is not None:
             self.pidfile.unlink()
+        if self.broadcast_dir is not None:
+            from gunicorn.asgi import broadcast
+            broadcast.remove_directory(self.broadcast_dir)
         self.cfg.on_exit(self)
         sys.exit(exit_status)
 
@@ -421,9 +504,15 @@ class Arbiter:
         Returns a list of signals that were received.
         """
         signals = []
+        if self.watcher is not None:
+            if self.SIG_QUEUE.empty():
+                # signal handlers wake the watcher up
+                for pid in self.watcher.wait(timeout):
+                    self.reap_worker(pid)
+            timeout = 0
         try:
             # Block until we get a signal or timeout
-            sig = self.SIG_QUEUE.get(block=True, timeout=timeout)
+            sig = self.SIG_QUEUE.get(block=timeout != 0, timeout=timeout)
             if sig != self.WAKEUP_REQUEST:
                 signals.append(sig)
             # Drain any additional queued signals
@@ -464,6 +553,8 @@ class Arbiter:
         if self.dirty_arbiter_pid:
             self.kill_dirty_arbiter(sig)
 
+        self.stop_zygote()
+
         # instruct the workers to exit
         self.kill_workers(sig)
         # wait until the graceful timeout
@@ -551,6 +642,11 @@ class Arbiter:
         self.app.reload()
         self.setup(self.app)
 
+        # the next workers are forked from a zygote importing the new code
+        self.stop_zygote()
+        self.zygote_disabled = False
+        self.setup_steering()
+
         # reopen log files
         self.log.reopen_files()
 
@@ -579,18 +675,35 @@ class Arbiter:
         # set new proc_name
         util._setproctitle("master [%s]" % self.proc_name)
 
+        if self.cfg.reload_strategy == "rolling":
+            # replace the workers from the main loop, as new ones get ready
+            self.reload_cutoff = self.worker_age
+            self.log.info("Rolling reload of %s workers, %s at a time",
+                          self.num_workers, self.reload_surge())
+            self.manage_workers()
+            return
+        self.reload_cutoff = None
+
         # Remember current worker age before spawning new workers
         last_worker_age = self.worker_age
 
-        # spawn new workers
-        for _ in range(self.cfg.workers):
-            self.spawn_worker()
+        # spawn new workers, polling like for the old workers below while
+        # the zygote importing the new code boots
+        deadline = time.monotonic() + self.cfg.graceful_timeout
+        pending = self.cfg.workers
+        while pending:
+            if self.spawn_worker() is not None:
+                pending -= 1
+                continue
+            if time.monotonic() >= deadline:
+                break
+            self.reap_workers()
+            time.sleep(0.1)
 
         # manage workers - this will kill old workers beyond num_workers
         self.manage_workers()
 
         # wait for old workers to terminate to prevent double SIGTERM
-        deadline = time.monotonic() + self.cfg.graceful_timeout
         while time.monotonic() < deadline:
             if not self.WORKERS:
                 break
@@ -604,17 +717,35 @@ class Arbiter:
     def murder_workers(self):
         """\
         Kill unused/idle workers
+
+        With a watcher, only the workers whose heartbeat is due are checked.
         """
         if not self.timeout:
             return
-        workers = list(self.WORKERS.items())
-        for (pid, worker) in workers:
+        if self.watcher is not None:
+            now = time.monotonic()
+            pids = self.watcher.expired(now)
+        else:
+            pids = list(self.WORKERS)
+        for pid in pids:
+            worker = self.WORKERS.get(pid)
+            if worker is None:
+                continue
             try:
-                if time.monotonic() - worker.tmp.last_update() <= self.timeout:
-                    continue
+                deadline = worker.tmp.last_update() + self.timeout
             except (OSError, ValueError):
+                deadline = None
+            if deadline is None or time.monotonic() <= deadline:
+                if self.watcher is not None:
+                    # checked again when due, and at least once per timeout
+                    if deadline is None or deadline > now + self.timeout:
+                        deadline = now + self.timeout
+                    self.watcher.schedule(pid, deadline)
                 continue
 
+            if self.watcher is not None:
+                # killed if it is still stuck a second later
+                self.watcher.schedule(pid, now + 1.0)
             if not worker.aborted:
                 self.log.critical("WORKER TIMEOUT (pid:%s)", pid)
                 worker.aborted = True
@@ -637,76 +768,109 @@ class Arbiter:
                     # Normally claimed by reap_dirty_arbiter(), but it can exit
                     # while this loop is running.
                     self.handle_dirty_arbiter_exit(wpid, status)
+                elif self.zygote is not None and self.zygote.pid == wpid:
+                    self.handle_zygote_exit(wpid, status)
                 else:
-                    # waitpid(-1) reaps every child, and when gunicorn runs as
-                    # PID 1 the kernel reparents orphans onto it. Those are not
-                    # ours: reap them so they do not linger as zombies, but do
-                    # not report them as workers or let them halt the server.
-                    worker = self.WORKERS.pop(wpid, None)
-                    if worker is None:
-                        self.log.debug(
-                            "Reaped unknown child process (pid:%s, status:%s)",
-                            wpid, status)
-                        continue
-
-                    # A worker was terminated. If the termination reason was
-                    # that it could not boot, we'll shut it down to avoid
-                    # infinite start/stop cycles.
-                    exitcode = None
-                    if os.WIFEXITED(status):
-                        exitcode = os.WEXITSTATUS(status)
-                    elif os.WIFSIGNALED(status):
-                        sig = os.WTERMSIG(status)
-                        try:
-                            sig_name = signal.Signals(sig).name
-                        except ValueError:
-                            sig_name = "signal {}".format(sig)
-                        msg = "Worker (pid:%s) was sent %s!"
-                        msg_args = [wpid, sig_name]
-
-                        # SIGKILL suggests OOM, log as error
-                        if sig == signal.SIGKILL:
-                            msg += " Perhaps out of memory?"
-                            self.log.error(msg, *msg_args)
-                        elif sig == signal.SIGTERM:
-                            # SIGTERM is expected during graceful shutdown
-                            self.log.info(msg, *msg_args)
-                        else:
-                            # Other signals are unexpected
-                            self.log.warning(msg, *msg_args)
-
-                    if exitcode is not None and exitcode != 0:
-                        self.log.error("Worker (pid:%s) exited with code %s.",
-                                       wpid, exitcode)
-
-                    if exitcode == self.WORKER_BOOT_ERROR:
-                        reason = "Worker failed to boot."
-                        raise HaltServer(reason, self.WORKER_BOOT_ERROR)
-                    if exitcode == self.APP_LOAD_ERROR:
-                        reason = "App failed to load."
-                        raise HaltServer(reason, self.APP_LOAD_ERROR)
-
-                    worker.tmp.close()
-                    self.cfg.child_exit(self, worker)
+                    self.handle_worker_exit(wpid, status)
         except OSError as e:
             if e.errno != errno.ECHILD:
                 raise
 
+    def reap_worker(self, pid):
+        """\
+        Reap the worker ``pid``, which the watcher saw exit.
+        """
+        try:
+            wpid, status = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            # forked by the zygote and not handed over to the arbiter yet
+            return
+        if wpid:
+            self.handle_worker_exit(wpid, status)
+
+    def handle_worker_exit(self, wpid, status):
+        """\
+        Forget the worker ``wpid``, reaped with exit status ``status``.
+        """
+        # waitpid(-1) reaps every child, and when gunicorn runs as
+        # PID 1 the kernel reparents orphans onto it. Those are not
+        # ours: reap them so they do not linger as zombies, but do
+        # not report them as workers or let them halt the server.
+        worker = self.WORKERS.pop(wpid, None)
+        if worker is None:
+            self.log.debug(
+                "Reaped unknown child process (pid:%s, status:%s)",
+                wpid, status)
+            return
+        if self.watcher is not None:
+            self.watcher.remove(wpid)
+
+        # A worker was terminated. If the termination reason was
+        # that it could not boot, we'll shut it down to avoid
+        # infinite start/stop cycles.
+        exitcode = None
+        if os.WIFEXITED(status):
+            exitcode = os.WEXITSTATUS(status)
+        elif os.WIFSIGNALED(status):
+            sig = os.WTERMSIG(status)
+            try:
+                sig_name = signal.Signals(sig).name
+            except ValueError:
+                sig_name = "signal {}".format(sig)
+            msg = "Worker (pid:%s) was sent %s!"
+            msg_args = [wpid, sig_name]
+
+            # SIGKILL suggests OOM, log as error
+            if sig == signal.SIGKILL:
+                msg += " Perhaps out of memory?"
+                self.log.error(msg, *msg_args)
+            elif sig == signal.SIGTERM:
+                # SIGTERM is expected during graceful shutdown
+                self.log.info(msg, *msg_args)
+            else:
+                # Other signals are unexpected
+                self.log.warning(msg, *msg_args)
+
+        if exitcode is not None and exitcode != 0:
+            self.log.error("Worker (pid:%s) exited with code %s.",
+                           wpid, exitcode)
+
+        if exitcode == self.WORKER_BOOT_ERROR:
+            reason = "Worker failed to boot."
+            raise HaltServer(reason, self.WORKER_BOOT_ERROR)
+        if exitcode == self.APP_LOAD_ERROR:
+            reason = "App failed to load."
+            raise HaltServer(reason, self.APP_LOAD_ERROR)
+
+        worker.tmp.close()
+        self.scoreboard.release(worker.score)
+        if self.broadcast_dir is not None:
+            from gunicorn.asgi import broadcast
+            broadcast.remove_socket(self.broadcast_dir, wpid)
+        self.cfg.child_exit(self, worker)
+
     def manage_workers(self):
         """\
         Maintain the number of workers by spawning or killing
         as required.
         """
-        if len(self.WORKERS) < self.num_workers:
-            self.spawn_workers()
-
-        workers = self.WORKERS.items()
-        workers = sorted(workers, key=lambda w: w[1].age)
-        while len(workers) > self.num_workers:
-            (pid, _) = workers.pop(0)
-            self.kill_worker(pid, signal.SIGTERM)
+        if self.reload_cutoff is not None:
+            self.manage_rolling_reload()
+            active_worker_count = len(self.WORKERS) - len(self.retiring)
+        else:
+            self.manage_recycling()
+            workers = [(pid, w) for (pid, w) in self.WORKERS.items()
+                       if pid not in self.retiring and not w.score.recycling]
+            if len(workers) < self.num_workers:
+                self.spawn_workers(self.num_workers - len(workers))
+
+            workers = sorted(workers, key=lambda w: w[1].age)
+            while len(workers) > self.num_workers:
+                (pid, _) = workers.pop(0)
+                self.kill_worker(pid, signal.SIGTERM)
+            active_worker_count = len(workers)
+        self.steer_connections()
 
-        active_worker_count = len(workers)
         if self._last_logged_active_worker_count != active_worker_count:
             self._last_logged_active_worker_count = active_worker_count
             self.log.debug("{0} workers".format(active_worker_count),
@@ -724,31 +888,307 @@ class Arbiter:
                                       "value": backlog,
                                       "mtype": "histogram"})
 
+    def manage_recycling(self):
+        """\
+        Replace the workers over ``max_worker_memory``.
+
+        Such a worker keeps serving until a worker started in its place is
+        ready, then it is stopped gracefully.
+        """
+        self.retiring &= set(self.WORKERS)
+        active = [w for w in self.WORKERS.values()
+                  if w.pid not in self.retiring]
+        recycling = sorted((w for w in active if w.score.recycling),
+                           key=lambda w: w.age)
+        if not recycling:
+            return
+        ready = sum(1 for w in active
+                    if not w.score.recycling and self.worker_ready(w))
+
+        while recycling and ready + len(recycling) > self.num_workers:
+            worker = recycling.pop(0)
+            self.log.info("Replacing worker over max_worker_memory "
+                          "(pid: %s)", worker.pid)
+            self.retiring.add(worker.pid)
+            self.kill_worker(worker.pid, signal.SIGTERM)
+
+    def reload_surge(self):
+        """Number of workers a rolling reload starts at a time."""
+        return max(1, (self.num_workers * self.cfg.reload_surge + 99) // 100)
+
+    @staticmethod
+    def worker_ready(worker):
+        # a worker without a scoreboard slot cannot tell, it is taken as
+        # ready once started
+        return worker.score.index is None or worker.score.ready
+
+    def manage_rolling_reload(self):
+        """\
+        Replace the workers older than the reload a few at a time.
+
+        An old worker is stopped each time a new one is ready to serve, and
+        at most ``reload_surge()`` new workers are starting at any time.
+        """
+        self.retiring &= set(self.WORKERS)
+        old = sorted((w for w in self.WORKERS.values()
+                      if w.age <= self.reload_cutoff
+                      and w.pid not in self.retiring),
+                     key=lambda w: w.age)
+        new = [w for w in self.WORKERS.values() if w.age > self.reload_cutoff]
+        ready = sum(1 for w in new if self.worker_ready(w))
+
+        while old and len(old) + ready > self.num_workers:
+            worker = old.pop(0)
+            self.retiring.add(worker.pid)
+            self.kill_worker(worker.pid, signal.SIGTERM)
+
+        if not old and not self.retiring:
+            self.reload_cutoff = None
+            self.log.info("Rolling reload complete")
+            self.manage_workers()
+            return
+
+        starting = len(new) - ready
+        count = min(self.num_workers - len(new),
+                    self.reload_surge() - starting)
+        for _ in range(count):
+            self.spawn_worker()
+
+    def reload_progress(self):
+        """Return the progress of a rolling reload, or None."""
+        if self.reload_cutoff is None:
+            return None
+        new = [w for w in self.WORKERS.values() if w.age > self.reload_cutoff]
+        ready = sum(1 for w in new if self.worker_ready(w))
+        return {
+            "ready": ready,
+            "starting": len(new) - ready,
+            "retiring": len(self.retiring),
+            "target": self.num_workers,
+        }
+
     def spawn_worker(self):
+        if self.zygote_booting():
+            # spawned from the main loop once the zygote is ready
+            return None
         self.worker_age += 1
         worker = self.worker_class(self.worker_age, self.pid, self.LISTENERS,
                                    self.app, self.timeout / 2.0,
                                    self.cfg, self.log)
+        before = dict(vars(worker))
         self.cfg.pre_fork(self, worker)
-
-        pid = os.fork()
+        attrs = {k: v for k, v in vars(worker).items()
+                 if k not in before or before[k] is not v}
+
+        worker.score = self.scoreboard.acquire()
+        if isinstance(worker.tmp, SharedHeartbeat):
+            if worker.score.index is None:
+                # the arbiter cannot read a private slot
+                worker.tmp = WorkerTmp(self.cfg)
+            else:
+                worker.tmp = SharedHeartbeat(worker.score)
+        if self.steering is not None:
+            worker.sockets = self.steering.get(self.steering_key(worker))
+        try:
+            pid = self.fork_worker(worker, attrs)
+        except OSError:
+            self.scoreboard.release(worker.score)
+            raise
         if pid != 0:
             worker.pid = pid
             self.WORKERS[pid] = worker
+            if self.watcher is not None and self.watcher.add(pid) \
+                    and self.timeout:
+                self.watcher.schedule(pid, time.monotonic() + self.timeout)
             self._stats['workers_spawned'] += 1
+            self.steer_connections()
             return pid
 
+        self.boot_worker(worker)
+
+    def fork_worker(self, worker, attrs=None):
+        """\
+        Fork ``worker``, from the zygote when there is one. Return its pid,
+        or 0 in the worker process.
+
+        ``attrs`` are the attributes the ``pre_fork`` hook set on ``worker``,
+        which the zygote sets on its own copy of the worker.
+        """
+        zygote = self.get_zygote()
+        if zygote is not None:
+            try:
+                return zygote.spawn(worker, attrs)
+            except StateError as e:
+                self.log.warning("Forking worker %s from the arbiter: %s",
+                                 worker.age, e)
+            except ZygoteError as e:
+                self.disable_zygote("could not spawn a worker: %s" % e)
+        return os.fork()
+
+    def zygote_booting(self):
+        """\
+        Whether spawning waits for the zygote to import the application.
+
+        Checks without blocking: the zygote's socket wakes the main loop up
+        once it is ready. A zygote not ready within the worker timeout is
+        given up on.
+        """
+        zygote = self.get_zygote()
+        if zygote is None or zygote.ready:
+            return False
+        try:
+            if zygote.poll_ready():
+                self.unwatch_zygote()
+                return False
+        except ZygoteError:
+            # exited while booting: reaping it tells whether the application
+            # failed to load
+            self.unwatch_zygote()
+        if self.timeout and time.monotonic() - zygote.started > self.timeout:
+            self.disable_zygote("did not boot in %s seconds" % self.timeout)
+            return False
+        return True
+
+    def disable_zygote(self, reason):
+        self.log.warning("Zygote %s, forking workers from the arbiter until "
+                         "the next reload", reason)
+        self.stop_zygote()
+        self.zygote_disabled = True
+
+    def unwatch_zygote(self):
+        if self.watcher is not None and self.zygote.sock is not None:
+            self.watcher.remove_fd(self.zygote.sock.fileno())
+
+    def setup_steering(self):
+        """\
+        Open the listeners of the workers here when their connections are
+        steered by CPU, so that the index of a worker's listeners in their
+        ``SO_REUSEPORT`` group is known and kept across its replacement.
+        """
+        steer = (self.cfg.reuse_port and self.cfg.reuse_port_cbpf
+                 and sock.PLATFORM == "linux"
+                 and hasattr(socket, "SO_REUSEPORT"))
+        if self.steering is not None and (
+                not steer or self.steering.address != self.cfg.address):
+            # the running workers keep their listeners until they exit
+            self.steering.close()
+            self.steering = None
+        if steer and self.steering is None:
+            self.steering = sock.SteeringGroup(self.cfg, self.log)
+
+    def steering_key(self, worker):
+        """Return the key of the listeners of ``worker``: its slot."""
+        index = worker.score.index
+        if index is None:
+            return -worker.age
+        return index
+
+    def steer_connections(self):
+        """\
+        Steer the connections by CPU to the running workers, and close the
+        listeners of no worker once none is missing.
+        """
+        if self.steering is None:
+            return
+        used = set()
+        live = {}
+        for pid, worker in self.WORKERS.items():
+            key = self.steering_key(worker)
+            used.add(key)
+            if pid not in self.retiring:
+                live[key] = self.worker_cpus(worker)
+        if len(self.WORKERS) >= self.num_workers:
+            for key in list(self.steering.listeners):
+                if key not in used:
+                    self.steering.remove(key)
+        self.steering.steer(live)
+
+    def get_zygote(self):
+        """Return the running zygote, starting it if needed, or None."""
+        if not self.cfg.zygote or self.zygote_disabled:
+            return None
+        if self.subreaper is None:
+            self.subreaper = set_child_subreaper()
+            if not self.subreaper:
+                self.log.warning("zygote needs Linux child subreapers, "
+                                 "forking workers from the arbiter")
+        if not self.subreaper:
+            return None
+        if self.zygote is None:
+            self.zygote = Zygote(self)
+            self.zygote.start()
+            if self.watcher is not None:
+                self.watcher.add_fd(self.zygote.sock.fileno())
+        return self.zygote
+
+    def stop_zygote(self):
+        if self.zygote is not None:
+            self.unwatch_zygote()
+            self.zygote.stop()
+            self.zygote = None
+
+    def handle_zygote_exit(self, wpid, status):
+        self.zygote.pid = None
+        self.stop_zygote()
+        if os.WIFEXITED(status) and os.WEXITSTATUS(status) == self.APP_LOAD_ERROR:
+            raise HaltServer("App failed to load.", self.APP_LOAD_ERROR)
+        self.log.warning("Zygote (pid:%s) exited, starting a new one for the "
+                         "next worker", wpid)
+
+    def worker_cpus(self, worker):
+        """\
+        Return the CPU set of ``worker``, taken in turn by scoreboard slot so
+        that a replacement runs where the worker it replaces did, or None
+        when workers are not pinned.
+        """
+        if not self.cpu_sets:
+            return None
+        index = worker.score.index
+        if index is None:
+            index = worker.age
+        return self.cpu_sets[index % len(self.cpu_sets)]
+
+    def pin_worker(self, worker):
+        """\
+        Pin the process forked for ``worker`` to its CPU set. Return the
+        CPUs, or None when workers are not pinned.
+        """
+        cpus = self.worker_cpus(worker)
+        if cpus is None:
+            return None
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            self.log.warning("Cannot pin worker %s to CPUs %s: %s",
+                             worker.pid, cpus, e)
+            return None
+        self.log.debug("Worker %s pinned to CPUs %s", worker.pid, cpus)
+        return cpus
+
+    def boot_worker(self, worker):
+        """\
+        Run ``worker`` in the process forked for it. Does not return.
+        """
         # Do not inherit the temporary files of other workers
         for sibling in self.WORKERS.values():
             sibling.tmp.close()
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
 
         # Process Child
         worker.pid = os.getpid()
         try:
             util._setproctitle("worker [%s]" % self.proc_name)
             self.log.info("Booting worker with pid: %s", worker.pid)
-            if self.cfg.reuse_port:
+            cpus = self.pin_worker(worker)
+            if self.steering is not None:
+                # worker.sockets are the listeners opened for its slot
+                self.steering.close(keep=self.steering_key(worker))
+            elif self.cfg.reuse_port:
                 worker.sockets = sock.create_sockets(self.cfg, self.log)
+                if cpus is not None and len(cpus) == 1:
+                    sock.set_incoming_cpu(worker.sockets, cpus[0])
             self.cfg.post_fork(self, worker)
             worker.init_process()
             sys.exit(0)
@@ -776,17 +1216,20 @@ class Arbiter:
                 self.log.warning("Exception during worker exit:\n%s",
                                  traceback.format_exc())
 
-    def spawn_workers(self):
+    def spawn_workers(self, count=None):
         """\
-        Spawn new workers as needed.
+        Spawn new workers as needed, or ``count`` workers.
 
         This is where a worker process leaves the main loop
         of the master process.
         """
+        if count is None:
+            count = self.num_workers - len(self.WORKERS)
 
-        for _ in range(self.num_workers - len(self.WORKERS)):
+        for _ in range(count):
             self.spawn_worker()
-            time.sleep(0.1 * random.random())
+            if self.zygote is None:
+                time.sleep(0.1 * random.random())
 
     def kill_workers(self, sig):
         """\
@@ -813,7 +1256,10 @@ class Arbiter:
             if e.errno == errno.ESRCH:
                 try:
                     worker = self.WORKERS.pop(pid)
+                    if self.watcher is not None:
+                        self.watcher.remove(pid)
                     worker.tmp.close()
+                    self.scoreboard.release(worker.score)
                     self.cfg.worker_exit(self, worker)
                     return
                 except (KeyError, OSError):
@@ -875,6 +1321,21 @@ class Arbiter:
         except OSError:
             pass
 
+    def create_broadcast_dir(self):
+        """\
+        Create the directory in which the ASGI workers bind the sockets
+        they broadcast WebSocket messages to each other through.
+        """
+        # Lazy import, only the ASGI worker uses it
+        from gunicorn.asgi import broadcast
+
+        self.broadcast_dir = broadcast.create_directory()
+        # the workers bind their sockets in it once they dropped privileges
+        if self.cfg.uid != os.geteuid() or self.cfg.gid != os.getegid():
+            util.chown(self.broadcast_dir, self.cfg.uid, self.cfg.gid)
+        os.environ[broadcast.ENV_DIR] = self.broadcast_dir
+        self.log.debug("WebSocket broadcast directory: %s", self.broadcast_dir)
+
     def spawn_dirty_arbiter(self):
         """\
         Spawn the dirty arbiter process.
@@ -912,6 +1373,8 @@ class Arbiter:
             return pid
 
         # Child process - run the dirty arbiter
+        if self.steering is not None:
+            self.steering.close()
         try:
             self.dirty_arbiter.run()
             sys.exit(0)
@@ -12,6 +12,7 @@ Components:
 - AsyncUnreader: Async socket reading with pushback buffer
 - ASGIProtocol: asyncio.Protocol implementation for HTTP handling
 - WebSocketProtocol: WebSocket protocol handler (RFC 6455)
+- PerMessageDeflate: permessage-deflate WebSocket extension (RFC 7692)
 - LifespanManager: ASGI lifespan protocol support
 
 Usage:
@@ -0,0 +1,214 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""
+Broadcast of WebSocket messages across the ASGI workers of a host.
+
+The arbiter creates a directory in which each worker binds a Unix datagram
+socket named after its pid. A message published in a worker is written to
+the worker's own subscribers of the topic, and sent once to the socket of
+every other worker, which writes it to its subscribers. A worker encodes
+the frame of a message once for all its subscribers.
+
+Applications use it through the ``gunicorn.broadcast`` scope extension:
+
+- ``{"type": "gunicorn.broadcast.subscribe", "topic": ...}`` and
+  ``{"type": "gunicorn.broadcast.unsubscribe", "topic": ...}``, sent on an
+  accepted WebSocket, add it to or remove it from the subscribers of the
+  topic.
+- ``{"type": "gunicorn.broadcast.publish", "topic": ..., "text": ...}``, or
+  with ``"bytes"``, sent on a WebSocket or an HTTP request, publishes a
+  message to the subscribers of the topic on all the workers.
+
+Delivery is best effort: a worker too busy to drain its socket misses the
+messages sent to it meanwhile.
+"""
+
+import errno
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import time
+
+from gunicorn.asgi.websocket import OPCODE_BINARY, OPCODE_TEXT, encode_frame_header
+
+# Environment variable the arbiter passes the directory in
+ENV_DIR = "GUNICORN_BROADCAST_DIR"
+
+EXTENSION = "gunicorn.broadcast"
+PUBLISH = "gunicorn.broadcast.publish"
+
+MAX_TOPIC_SIZE = 1024
+# Fits the default socket buffers of Linux with room to spare
+MAX_MESSAGE_SIZE = 65536
+
+# opcode and topic length, followed by the topic and the payload
+_HEADER = struct.Struct("!BH")
+_MAX_DATAGRAM = _HEADER.size + MAX_TOPIC_SIZE + MAX_MESSAGE_SIZE
+
+# How long a listing of the other workers' sockets is trusted when the
+# directory does not seem to have changed, filesystem timestamps can be
+# coarser than the time between two workers starting
+_PEERS_TTL = 1.0
+
+
+def create_directory():
+    """Create the directory of the workers' sockets, in the arbiter."""
+    return tempfile.mkdtemp(prefix="gunicorn-broadcast-")
+
+
+def remove_directory(directory):
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def socket_path(directory, pid):
+    return os.path.join(directory, "%d.sock" % pid)
+
+
+def remove_socket(directory, pid):
+    """Remove the socket of a worker that exited without removing it."""
+    try:
+        os.unlink(socket_path(directory, pid))
+    except FileNotFoundError:
+        pass
+
+
+def encode_message(topic, opcode, payload):
+    topic = topic.encode("utf-8")
+    if len(topic) > MAX_TOPIC_SIZE:
+        raise ValueError("broadcast topic longer than %d bytes" % MAX_TOPIC_SIZE)
+    if len(payload) > MAX_MESSAGE_SIZE:
+        raise ValueError("broadcast message larger than %d bytes"
+                         % MAX_MESSAGE_SIZE)
+    return b"".join((_HEADER.pack(opcode, len(topic)), topic, payload))
+
+
+def decode_message(data):
+    """Return the (topic, opcode, payload) of a datagram."""
+    opcode, length = _HEADER.unpack_from(data)
+    end = _HEADER.size + length
+    return data[_HEADER.size:end].decode("utf-8"), opcode, data[end:]
+
+
+class BroadcastChannel:
+    """Broadcast channel of a worker."""
+
+    def __init__(self, directory, pid, log):
+        self.directory = directory
+        self.path = socket_path(directory, pid)
+        self.log = log
+        self.sock = None
+        self._loop = None
+        self._topics = {}  # topic -> set of WebSocketProtocol
+
+        # sockets of the other workers, and when they were listed
+        self._peers = []
+        self._peers_mtime = None
+        self._peers_listed = 0
+
+    def start(self, loop):
+        """Bind the worker's socket and read it in ``loop``."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.setblocking(False)
+            if os.path.exists(self.path):
+                # left by a previous process with the same pid
+                os.unlink(self.path)
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self._loop = loop
+        loop.add_reader(sock.fileno(), self._read)
+
+    def close(self):
+        if self.sock is None:
+            return
+        self._loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+        self.sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def subscribe(self, topic, websocket):
+        self._topics.setdefault(topic, set()).add(websocket)
+
+    def unsubscribe(self, topic, websocket):
+        subscribers = self._topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self._topics[topic]
+
+    def publish_message(self, message):
+        """Publish the gunicorn.broadcast.publish message of an application."""
+        topic = message["topic"]
+        text = message.get("text")
+        if text is not None:
+            self.publish(topic, OPCODE_TEXT, text.encode("utf-8"))
+        else:
+            self.publish(topic, OPCODE_BINARY, message.get("bytes") or b"")
+
+    def publish(self, topic, opcode, payload):
+        """Send a message to the subscribers of ``topic`` of all workers."""
+        data = encode_message(topic, opcode, payload)
+        self.deliver(topic, opcode, payload)
+        for path in self._peer_paths():
+            try:
+                self.sock.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # the worker exited, the arbiter removes its socket
+                self._peers.remove(path)
+            except BlockingIOError:
+                self.log.warning("Broadcast to %s dropped: the worker is "
+                                 "not reading its socket", path)
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                self.log.warning("Broadcast to %s dropped: %s", path, e)
+
+    def deliver(self, topic, opcode, payload):
+        """Write a message to the subscribers of ``topic`` of this worker."""
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return
+        frame = encode_frame_header(opcode, len(payload)) + payload
+        for websocket in tuple(subscribers):
+            websocket.write_frame(frame)
+
+    def _read(self):
+        while True:
+            try:
+                data = self.sock.recv(_MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                topic, opcode, payload = decode_message(data)
+            except (struct.error, UnicodeDecodeError):
+                self.log.warning("Invalid broadcast datagram ignored")
+                continue
+            self.deliver(topic, opcode, payload)
+
+    def _peer_paths(self):
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return ()
+        now = time.monotonic()
+        if mtime != self._peers_mtime or now - self._peers_listed > _PEERS_TTL:
+            try:
+                with os.scandir(self.directory) as entries:
+                    self._peers = [entry.path for entry in entries
+                                   if entry.name.endswith(".sock")
+                                   and entry.path != self.path]
+            except OSError:
+                return ()
+            self._peers_mtime = mtime
+            self._peers_listed = now
+        return tuple(self._peers)
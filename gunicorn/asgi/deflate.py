@@ -0,0 +1,244 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""
+permessage-deflate WebSocket extension (RFC 7692).
+
+Negotiates the extension in the WebSocket handshake and compresses and
+decompresses the messages of a connection with zlib.
+"""
+
+import zlib
+
+EXTENSION_NAME = "permessage-deflate"
+
+# zlib cannot produce a raw deflate stream with a 256 bytes window
+MIN_WINDOW_BITS = 9
+MAX_WINDOW_BITS = 15
+
+# Removed from the end of a compressed message, added back before it is
+# decompressed (RFC 7692 section 7.2.1)
+_TAIL = b"\x00\x00\xff\xff"
+
+# What zlib's inflate state takes beside its window
+_INFLATE_STATE = 7 * 1024
+
+
+class MessageTooBig(Exception):
+    """A compressed message inflates past the largest message size."""
+
+
+def _mem_level(window_bits):
+    # zlib's default of 8 for a 32 KiB window, smaller windows get
+    # proportionally smaller hash tables
+    return max(1, window_bits - 7)
+
+
+def memory_usage(server_window_bits, client_window_bits):
+    """Bytes of zlib state a connection compressing with
+    ``server_window_bits`` and decompressing with ``client_window_bits``
+    holds, from the figures of zlib's documentation."""
+    deflate = ((1 << (server_window_bits + 2))
+               + (1 << (_mem_level(server_window_bits) + 9)))
+    inflate = (1 << client_window_bits) + _INFLATE_STATE
+    return deflate + inflate
+
+
+def parse_offers(header):
+    """Parse a Sec-WebSocket-Extensions header value.
+
+    Returns a list of ``(name, params)``, ``params`` being a list of
+    ``(name, value)`` with ``None`` values for the parameters without one.
+    """
+    offers = []
+    for offer in header.split(","):
+        name, *params = offer.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        parsed = []
+        for param in params:
+            key, sep, value = param.partition("=")
+            value = value.strip().strip('"') if sep else None
+            parsed.append((key.strip().lower(), value))
+        offers.append((name, parsed))
+    return offers
+
+
+def _window_bits(value):
+    if value is None or not value.isdigit():
+        return None
+    bits = int(value)
+    if not 8 <= bits <= MAX_WINDOW_BITS:
+        return None
+    return bits
+
+
+class PerMessageDeflate:
+    """permessage-deflate state of a WebSocket connection.
+
+    The compressor and decompressor are kept between messages only when the
+    peers agreed to use context takeover in that direction; without it a
+    connection holds no zlib state while it is idle.
+    """
+
+    __slots__ = (
+        'threshold', 'server_no_context_takeover',
+        'client_no_context_takeover', 'server_window_bits',
+        'client_window_bits', 'max_size', '_compressor', '_decompressor',
+    )
+
+    def __init__(self, threshold=0, server_no_context_takeover=False,
+                 client_no_context_takeover=False,
+                 server_window_bits=MAX_WINDOW_BITS,
+                 client_window_bits=MAX_WINDOW_BITS, max_size=0):
+        self.threshold = threshold
+        self.server_no_context_takeover = server_no_context_takeover
+        self.client_no_context_takeover = client_no_context_takeover
+        self.server_window_bits = server_window_bits
+        self.client_window_bits = client_window_bits
+        self.max_size = max_size
+        self._compressor = None
+        self._decompressor = None
+
+    @classmethod
+    def negotiate(cls, cfg, headers):
+        """Accept the first acceptable permessage-deflate offer of the
+        handshake request.
+
+        Args:
+            cfg: gunicorn configuration
+            headers: the ASGI headers of the handshake request
+
+        Returns:
+            tuple: (PerMessageDeflate, Sec-WebSocket-Extensions value of the
+            response), or (None, None) when no offer is acceptable
+        """
+        values = [value.decode("latin-1") for name, value in headers
+                  if name == b"sec-websocket-extensions"]
+        if not values:
+            return None, None
+        for name, params in parse_offers(",".join(values)):
+            if name != EXTENSION_NAME:
+                continue
+            accepted = cls._accept(cfg, params)
+            if accepted is not None:
+                return accepted
+        return None, None
+
+    @classmethod
+    def _accept(cls, cfg, params):  # pylint: disable=too-many-branches
+        server_nct = client_nct = cfg.websocket_compression_no_context_takeover
+        server_bits = cfg.websocket_compression_window_bits
+        client_bits = MAX_WINDOW_BITS
+        server_bits_requested = False
+        client_bits_supported = False
+
+        seen = set()
+        for key, value in params:
+            if key in seen:
+                return None
+            seen.add(key)
+            if key == "server_no_context_takeover":
+                if value is not None:
+                    return None
+                server_nct = True
+            elif key == "client_no_context_takeover":
+                if value is not None:
+                    return None
+                client_nct = True
+            elif key == "server_max_window_bits":
+                bits = _window_bits(value)
+                if bits is None or bits < MIN_WINDOW_BITS:
+                    return None
+                server_bits = min(server_bits, bits)
+                server_bits_requested = True
+            elif key == "client_max_window_bits":
+                bits = MAX_WINDOW_BITS if value is None else _window_bits(value)
+                if bits is None:
+                    return None
+                client_bits = min(bits, cfg.websocket_compression_window_bits)
+                client_bits_supported = True
+            else:
+                return None
+
+        # Shrink the windows, the largest first, until the zlib state fits
+        # in the memory cap. The client's can only be shrunk when it
+        # offered to limit it.
+        max_memory = cfg.websocket_compression_max_memory
+        while max_memory and memory_usage(server_bits, client_bits) > max_memory:
+            if (client_bits_supported and client_bits > MIN_WINDOW_BITS
+                    and client_bits >= server_bits):
+                client_bits -= 1
+            elif server_bits > MIN_WINDOW_BITS:
+                server_bits -= 1
+            else:
+                return None
+
+        response = [EXTENSION_NAME]
+        if server_nct:
+            response.append("server_no_context_takeover")
+        if client_nct:
+            response.append("client_no_context_takeover")
+        if server_bits_requested or server_bits < MAX_WINDOW_BITS:
+            response.append("server_max_window_bits=%d" % server_bits)
+        if client_bits_supported and client_bits < MAX_WINDOW_BITS:
+            response.append("client_max_window_bits=%d" % client_bits)
+
+        extension = cls(
+            threshold=cfg.websocket_compression_threshold,
+            server_no_context_takeover=server_nct,
+            client_no_context_takeover=client_nct,
+            server_window_bits=server_bits,
+            client_window_bits=client_bits,
+            max_size=cfg.websocket_max_message_size,
+        )
+        return extension, "; ".join(response)
+
+    def compress(self, payload):
+        """Compress the payload of a message."""
+        compressor = self._compressor
+        if compressor is None:
+            compressor = zlib.compressobj(
+                zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED,
+                -self.server_window_bits, _mem_level(self.server_window_bits))
+            if not self.server_no_context_takeover:
+                self._compressor = compressor
+        data = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data[:-4] if data.endswith(_TAIL) else data
+
+    def decompress(self, payload):
+        """Decompress the payload of a message.
+
+        With a ``max_size``, the payload is inflated in chunks and no
+        further than that size.
+
+        Raises:
+            zlib.error: the payload is not valid compressed data
+            MessageTooBig: the message inflates past ``max_size`` bytes
+        """
+        decompressor = self._decompressor
+        if decompressor is None:
+            # a larger window than the client's can always decompress it
+            decompressor = zlib.decompressobj(
+                -max(self.client_window_bits, MIN_WINDOW_BITS))
+            if not self.client_no_context_takeover:
+                self._decompressor = decompressor
+        max_size = self.max_size
+        if not max_size:
+            return decompressor.decompress(payload) + decompressor.decompress(_TAIL)
+
+        chunks = []
+        size = 0
+        for data in (payload, _TAIL):
+            while data:
+                # one byte over the limit tells a message of max_size bytes
+                # from a larger one
+                chunk = decompressor.decompress(data, max_size - size + 1)
+                size += len(chunk)
+                if size > max_size:
+                    raise MessageTooBig()
+                chunks.append(chunk)
+                data = decompressor.unconsumed_tail
+        return b"".join(chunks)
@@ -919,35 +919,31 @@ class CallbackRequest:
         # Use asgi_headers (lowercase names) if available (fast parser >= 0.6.2),
         # otherwise fall back to headers (Python parser already uses lowercase)
         req.headers_bytes = list(getattr(parser, 'asgi_headers', None) or parser.headers)
-        req.headers = [
-            (n.decode('latin-1').upper(), v.decode('latin-1'))
-            for n, v in parser.headers
-        ]
+        req.scheme = 'https' if is_ssl else 'http'
+        req.content_length = parser.content_length or 0
+        req.chunked = parser.is_chunked
+        req.must_close = not parser.should_keep_alive
 
+        # A single pass over the headers builds their string form and checks
+        # the singletons and Expect: 100-continue.
+        #
         # RFC 9110 section 5.3, enforced here because this is where both
         # parsers converge. Both reject these on their own now (PythonProtocol
         # in _finalize_headers(), H1CProtocol since 0.6.6), so this is a
         # backstop: the pip requirement is not enforced at runtime, and an
         # older gunicorn_h1c would otherwise let duplicates through.
+        headers = req.headers = []
         seen_singletons = set()
-        for name, _value in parser.headers:
+        for name, value in parser.headers:
+            headers.append((name.decode('latin-1').upper(), value.decode('latin-1')))
             lowered = name.lower()
             if lowered in RFC9110_5_3_SINGLETON_FIELDS:
                 if lowered in seen_singletons:
                     raise InvalidHeader(
                         "Duplicate %s header" % lowered.decode('latin-1'))
                 seen_singletons.add(lowered)
-
-        req.scheme = 'https' if is_ssl else 'http'
-        req.content_length = parser.content_length or 0
-        req.chunked = parser.is_chunked
-        req.must_close = not parser.should_keep_alive
-
-        # Check for Expect: 100-continue
-        for name, value in parser.headers:
-            if name == b'expect' and value.lower() == b'100-continue':
+            elif name == b'expect' and value.lower() == b'100-continue':
                 req._expect_100_continue = True
-                break
 
         return req
 
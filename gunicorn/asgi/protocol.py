@@ -12,6 +12,7 @@ and dispatch to ASGI applications.
 import asyncio
 import errno
 import ipaddress
+import os
 import time
 
 from gunicorn.asgi.unreader import AsyncUnreader
@@ -82,12 +83,20 @@ _CHUNK_PREFIXES = {i: f"{i:x}\r\n".encode("latin-1") for i in range(16384)}
 # High water mark for write buffer backpressure (64KB)
 HIGH_WATER_LIMIT = 65536
 
+# Bytes read at once when a file cannot be sent with sendfile (TLS)
+FILE_CHUNK_SIZE = 65536
+
+# ASGI http_version of the common HTTP versions
+_HTTP_VERSIONS = {(1, 1): "1.1", (1, 0): "1.0"}
+
 
 class FlowControl:
     """Manage transport-level write flow control.
 
     Blocks send() when transport buffer exceeds high water mark,
-    preventing memory issues with large streaming responses.
+    preventing memory issues with large streaming responses. The event
+    waited on is only created while writing is paused, most connections
+    never need one.
     """
     __slots__ = ('_transport', 'read_paused', 'write_paused', '_is_writable_event')
 
@@ -95,11 +104,14 @@ class FlowControl:
         self._transport = transport
         self.read_paused = False
         self.write_paused = False
-        self._is_writable_event = asyncio.Event()
-        self._is_writable_event.set()
+        self._is_writable_event = None
 
     async def drain(self):
         """Wait until transport is writable."""
+        if not self.write_paused:
+            return
+        if self._is_writable_event is None:
+            self._is_writable_event = asyncio.Event()
         await self._is_writable_event.wait()
 
     def pause_reading(self):
@@ -115,12 +127,14 @@ class FlowControl:
     def pause_writing(self):
         if not self.write_paused:
             self.write_paused = True
-            self._is_writable_event.clear()
 
     def resume_writing(self):
         if self.write_paused:
             self.write_paused = False
-            self._is_writable_event.set()
+            if self._is_writable_event is not None:
+                # Wakes the waiters, which do not need the event any more
+                self._is_writable_event.set()
+                self._is_writable_event = None
 
 
 def _get_cached_date_header():
@@ -336,14 +350,185 @@ class BodyReceiver:
             self._closed = True
 
 
+class HTTPResponder:
+    """ASGI send callable for an HTTP/1.x request.
+
+    The response state lives in slots of one object per request rather
+    than in closure cells of a function built for each request. A new one
+    is made for each request: an application may keep ``send`` past its
+    response, and must not reach the next request on the connection.
+    """
+
+    __slots__ = ('protocol', 'request', 'started', 'complete', 'exc',
+                 'status', 'headers', 'sent', 'chunked', 'omits_body',
+                 'omits_body_warned')
+
+    def __init__(self, protocol, request):
+        self.protocol = protocol
+        self.request = request
+        self.started = False
+        self.complete = False
+        self.exc = None  # raised once the application returns
+
+        # Response tracking for access logging
+        self.status = 500
+        self.headers = []
+        self.sent = 0
+
+        self.chunked = False
+        self.omits_body = False
+        self.omits_body_warned = False
+
+    async def __call__(self, message):
+        protocol = self.protocol
+
+        msg_type = message["type"]
+
+        # If client disconnected, silently ignore send attempts
+        # This allows apps to finish cleanup without errors. What they
+        # publish is not for this client.
+        if protocol._closed and msg_type != "gunicorn.broadcast.publish":
+            return
+
+        if msg_type == "http.response.body":
+            if not self.started:
+                self.exc = RuntimeError("Response not started")
+                return
+            if self.complete:
+                self.exc = RuntimeError("Response already complete")
+                return
+
+            body = message.get("body", b"")
+
+            # RFC 9110: HEAD/1xx/204/304 responses must not carry a body,
+            # even if the framework emits one.  Drop body bytes;
+            # chunked has already been forced False in _start() so no
+            # terminator will be written either.  Warn once per request
+            # so framework bugs surface in logs without spamming on
+            # multi-chunk streams.
+            if self.omits_body:
+                if body and not self.omits_body_warned:
+                    protocol.log.warning(
+                        "ASGI app sent body bytes on a no-body response "
+                        "(method=%s status=%s); dropping per RFC 9110.",
+                        self.request.method, self.status,
+                    )
+                    self.omits_body_warned = True
+                body = b""
+
+            if body:
+                protocol._send_body(body, chunked=self.chunked)
+                self.sent += len(body)
+                # Apply write backpressure for streaming responses
+                if protocol._flow_control:
+                    await protocol._flow_control.drain()
+
+            if not message.get("more_body", False):
+                protocol._finish_response(self.chunked)
+                self.complete = True
+
+        elif msg_type == "http.response.start":
+            if self.started:
+                self.exc = RuntimeError("Response already started")
+                return
+            self._start(message)
+
+        elif msg_type == "http.response.informational":
+            # Handle informational responses (1xx) like 103 Early Hints
+            protocol._send_informational(
+                message.get("status"), message.get("headers", []),
+                self.request)
+
+        elif msg_type in ("http.response.pathsend", "http.response.zerocopy"):
+            if not self.started:
+                self.exc = RuntimeError("Response not started")
+                return
+            if self.complete:
+                self.exc = RuntimeError("Response already complete")
+                return
+
+            more_body = (msg_type == "http.response.zerocopy"
+                         and message.get("more_body", False))
+            if not self.omits_body:
+                self.sent += await protocol._send_file_message(
+                    message, self.chunked)
+            if not more_body:
+                protocol._finish_response(self.chunked)
+                self.complete = True
+
+        elif msg_type == "gunicorn.broadcast.publish":
+            broadcast = getattr(protocol.worker, 'broadcast', None)
+            if broadcast is None:
+                raise RuntimeError("WebSocket broadcast is not enabled")
+            broadcast.publish_message(message)
+
+    def _start(self, message):
+        protocol = self.protocol
+        request = self.request
+        self.started = True
+        status = self.status = message["status"]
+        headers = message.get("headers", [])
+
+        # Check if Content-Length or Transfer-Encoding is present
+        has_content_length = False
+        has_transfer_encoding = False
+        for name, _ in headers:
+            name_lower = name.lower()
+            if name_lower in (b"content-length", "content-length"):
+                has_content_length = True
+            elif name_lower in (b"transfer-encoding", "transfer-encoding"):
+                has_transfer_encoding = True
+                self.chunked = True  # Framework already set chunked encoding
+
+        # No-body responses (HEAD/1xx/204/304) must not carry a body.
+        # Always drop Transfer-Encoding (no chunked terminator without
+        # a body); Content-Length is dropped only for statuses that
+        # forbid it per RFC 9110 §6.4.2 (1xx, 204).  HEAD and 304 keep
+        # an app-supplied Content-Length.
+        self.omits_body = protocol._response_omits_body(request.method, status)
+        if self.omits_body and (has_content_length or has_transfer_encoding):
+            headers = protocol._strip_body_framing_headers(headers, status)
+            if protocol._response_forbids_content_length(status):
+                has_content_length = False
+            has_transfer_encoding = False
+            self.chunked = False
+
+        # Use chunked encoding for HTTP/1.1 streaming responses without Content-Length.
+        # Skip when the response cannot carry a body or when Transfer-Encoding was
+        # already set by the framework.
+        if (not has_content_length
+                and not has_transfer_encoding
+                and request.version >= (1, 1)
+                and not self.omits_body):
+            self.chunked = True
+            headers = list(headers) + [(b"transfer-encoding", b"chunked")]
+
+        self.headers = headers
+        protocol._send_response_start(status, headers, request)
+
+
 class ASGIProtocol(asyncio.Protocol):
     """HTTP/1.1 protocol handler for ASGI applications.
 
     Handles connection lifecycle, request parsing, and ASGI app invocation.
     Uses callback-based parsing (H1CProtocol/PythonProtocol) for efficient
     incremental parsing in data_received().
+
+    A worker can hold tens of thousands of idle keep-alive and WebSocket
+    connections, so the per-connection state is kept small: the instance
+    has slots, and the request task, body receiver and keep-alive timer
+    only exist while a request is in flight or awaited.
     """
 
+    __slots__ = (
+        'worker', 'cfg', 'log', 'app', 'transport', 'reader', 'writer',
+        '_h2c_buffer', '_h2c_timer', '_h2_conn', '_task', 'req_count',
+        '_closed', '_conn_lost_handled', '_body_receiver', '_response_buffer',
+        '_reading_paused', '_keepalive_handle', '_callback_parser',
+        '_current_request', '_is_ssl', '_flow_control', '_websocket',
+        '_scope_cache',
+    )
+
     # Class-level cache for H1CProtocol availability
     _h1c_available = None
     _h1c_protocol_class = None
@@ -352,6 +537,8 @@ class ASGIProtocol(asyncio.Protocol):
     _h1c_limit_request_headers = None  # Exception class from gunicorn_h1c >= 0.4.1
     _h1c_invalid_chunk_extension = None  # Exception class from gunicorn_h1c >= 0.6.3
 
+    _max_buffer_size = 65536 * 4  # 256KB max buffer (HTTP/2 only)
+
     def __init__(self, worker):
         self.worker = worker
         self.cfg = worker.cfg
@@ -382,14 +569,12 @@ class ASGIProtocol(asyncio.Protocol):
 
         # Backpressure control
         self._reading_paused = False
-        self._max_buffer_size = 65536 * 4  # 256KB max buffer (HTTP/2 only)
 
         # Keep-alive timer
         self._keepalive_handle = None
 
         # Callback parser state
         self._callback_parser = None
-        self._request_ready = None  # Event signaling headers complete
         self._current_request = None  # Request built from parser state
         self._is_ssl = False
 
@@ -399,10 +584,14 @@ class ASGIProtocol(asyncio.Protocol):
         # WebSocket protocol (set during upgrade, receives data via callbacks)
         self._websocket = None
 
+        # (sockname, peername, scope entries) of the connection's requests
+        self._scope_cache = None
+
     def connection_made(self, transport):
         """Called when a connection is established."""
         self.transport = transport
         self.worker.nr_conns += 1
+        self.worker.score.connection_opened()
 
         # Check if HTTP/2 was negotiated via ALPN
         ssl_object = transport.get_extra_info('ssl_object')
@@ -439,10 +628,11 @@ class ASGIProtocol(asyncio.Protocol):
         self._flow_control = FlowControl(transport)
         transport.set_write_buffer_limits(high=HIGH_WATER_LIMIT)
 
-        # Setup callback parser with request ready event
-        self._request_ready = asyncio.Event()
+        # Setup callback parser, the task handling the requests is started
+        # by data_received() when one arrives
         self._setup_callback_parser()
-        self._task = self.worker.loop.create_task(self._handle_connection())
+        if getattr(self.cfg, 'protocol', 'http') == 'uwsgi':
+            self._task = self.worker.loop.create_task(self._serve_uwsgi())
 
     @classmethod
     def _check_h1c_protocol_available(cls):
@@ -566,13 +756,10 @@ class ASGIProtocol(asyncio.Protocol):
             self._callback_parser, is_ssl=self._is_ssl
         )
 
-        # Create body receiver for this request
+        # Create body receiver for this request, data_received() starts
+        # the task handling it
         self._body_receiver = BodyReceiver(self._current_request, self)
 
-        # Signal that request is ready for processing
-        if self._request_ready:
-            self._request_ready.set()
-
         # Return True for HEAD to skip body parsing
         return self._callback_parser.method == b'HEAD'
 
@@ -625,6 +812,13 @@ class ASGIProtocol(asyncio.Protocol):
             # HTTP/1.x path - feed directly to callback parser
             if not self._feed_callback_parser(data):
                 return
+            # Handle a request whose headers were parsed, unless a task is
+            # still busy with it. Started once the parser is done with the
+            # data: with eager tasks the handler runs within create_task().
+            if (self._current_request is not None and not self._closed
+                    and (self._task is None or self._task.done())):
+                self._task = self.worker.loop.create_task(
+                    self._handle_connection())
 
         # Backpressure: pause reading if buffer is too large
         if not self._reading_paused and self._is_buffer_full():
@@ -762,6 +956,7 @@ class ASGIProtocol(asyncio.Protocol):
         self._h2c_buffer = None
         self._h2c_cancel_timer()
         self.worker.nr_conns -= 1
+        self.worker.score.connection_closed()
 
         # Cancel keepalive timer
         self._cancel_keepalive_timer()
@@ -824,94 +1019,100 @@ class ASGIProtocol(asyncio.Protocol):
             pass
 
     async def _handle_connection(self):
-        """Main request handling loop using callback-based parser.
+        """Handle the request parsed by the callback parser.
 
-        Uses synchronous parsing in data_received(), avoiding the async
-        overhead of pull-based parsing. The parser fires callbacks when
-        headers and body data are available, and this loop waits on
-        events rather than actively parsing.
+        Started by data_received() once the request headers are parsed;
+        body data keeps arriving through the parser callbacks. The
+        task ends with the response: between keep-alive requests the
+        connection holds no task, coroutine frame or request objects, and
+        the next request starts a new task.
         """
+        idle = False
         try:
-            peername = self.transport.get_extra_info('peername')
-            sockname = self.transport.get_extra_info('sockname')
-
-            # Check protocol type - use separate path for uWSGI
-            protocol_type = getattr(self.cfg, 'protocol', 'http')
-            if protocol_type == 'uwsgi':
-                await self._handle_connection_uwsgi(peername, sockname)
+            request = self._current_request
+            if self._closed or request is None:
                 return
 
-            while not self._closed:
-                self.req_count += 1
-                self._cancel_keepalive_timer()
-
-                # Wait for headers to be parsed (callback sets the event and _current_request)
-                # Don't clear if request already arrived (data_received ran before us)
-                if not self._request_ready.is_set():
-                    try:
-                        await self._request_ready.wait()
-                    except asyncio.CancelledError:
-                        break
-
-                if self._closed or self._current_request is None:
-                    break
+            peername = self.transport.get_extra_info('peername')
+            sockname = self.transport.get_extra_info('sockname')
 
-                request = self._current_request
+            self.req_count += 1
+            self._cancel_keepalive_timer()
 
-                # If PROXY protocol provided a real client address, use it.
-                effective_peer = self._effective_peername(peername)
+            # If PROXY protocol provided a real client address, use it.
+            effective_peer = self._effective_peername(peername)
 
-                # Check for WebSocket upgrade
-                if self._is_websocket_upgrade(request):
-                    await self._handle_websocket(request, sockname, effective_peer)
-                    break  # WebSocket takes over the connection
+            # Check for WebSocket upgrade
+            if self._is_websocket_upgrade(request):
+                # WebSocket takes over the connection, which keeps only the
+                # scope of the handshake request
+                scope = self._build_websocket_scope(
+                    request, sockname, effective_peer)
+                del request
+                self._current_request = None
+                self._body_receiver = None
+                await self._handle_websocket(scope)
+                return
 
-                # Handle HTTP request
-                keepalive = await self._handle_http_request(
-                    request, sockname, effective_peer
-                )
+            # Handle HTTP request
+            keepalive = await self._handle_http_request(
+                request, sockname, effective_peer
+            )
 
-                # Increment worker request count
-                self.worker.nr += 1
+            # Increment worker request count
+            self.worker.nr += 1
 
-                # Check max_requests
-                if self.worker.nr >= self.worker.max_requests:
-                    self.log.info("Autorestarting worker after current request.")
-                    self.worker.alive = False
-                    keepalive = False
+            # Check max_requests
+            if self.worker.nr >= self.worker.max_requests:
+                self.log.info("Autorestarting worker after current request.")
+                self.worker.alive = False
+                keepalive = False
 
-                if not keepalive or not self.worker.alive:
-                    break
+            # _handle_http_request() already refused keepalive when it is
+            # disabled
+            if not keepalive or not self.worker.alive or self._closed:
+                return
 
-                # Check connection limits for keepalive
-                if not self.cfg.keepalive:
-                    break
+            # Refuse keepalive if the previous request body was not fully
+            # framed: residual bytes in the transport stream would be parsed
+            # as the start of the next request (smuggling).  Only _complete
+            # signals a cleanly framed message; _closed is set on transport
+            # disconnect *and* on receive timeout, neither of which means
+            # the body finished framing.
+            receiver = self._body_receiver
+            if receiver is not None and not receiver._complete:
+                return
 
-                # Refuse keepalive if the previous request body was not fully
-                # framed: residual bytes in the transport stream would be parsed
-                # as the start of the next request (smuggling).  Only _complete
-                # signals a cleanly framed message; _closed is set on transport
-                # disconnect *and* on receive timeout, neither of which means
-                # the body finished framing.
-                receiver = self._body_receiver
-                if receiver is not None and not receiver._complete:
-                    break
+            # Resume reading if paused during body consumption
+            self._resume_reading()
 
-                # Resume reading if paused during body consumption
-                self._resume_reading()
+            # Reset parser for next request
+            if self._callback_parser:
+                self._callback_parser.reset()
 
-                # Reset parser for next request
-                if self._callback_parser:
-                    self._callback_parser.reset()
+            # Release the request state until the next one arrives
+            self._current_request = None
+            self._body_receiver = None
+            self._response_buffer = None
 
-                # Clear request state for next iteration
-                self._current_request = None
-                self._body_receiver = None
-                self._request_ready.clear()
+            # Arm keepalive timer between requests
+            self._arm_keepalive_timer()
+            idle = True
 
-                # Arm keepalive timer between requests
-                self._arm_keepalive_timer()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.log.exception("Error handling connection: %s", e)
+        finally:
+            if not idle:
+                self._close_transport()
 
+    async def _serve_uwsgi(self):
+        """Serve a uWSGI connection for its whole lifetime."""
+        try:
+            await self._handle_connection_uwsgi(
+                self.transport.get_extra_info('peername'),
+                self.transport.get_extra_info('sockname'))
         except asyncio.CancelledError:
             pass
         except Exception as e:
@@ -941,7 +1142,8 @@ class ASGIProtocol(asyncio.Protocol):
 
             # Check for WebSocket upgrade
             if self._is_websocket_upgrade(request):
-                await self._handle_websocket(request, sockname, peername)
+                await self._handle_websocket(
+                    self._build_websocket_scope(request, sockname, peername))
                 break
 
             # Handle HTTP request
@@ -987,16 +1189,16 @@ class ASGIProtocol(asyncio.Protocol):
                 connection = value.lower()
         return upgrade == "websocket" and connection and "upgrade" in connection
 
-    async def _handle_websocket(self, request, sockname, peername):
+    async def _handle_websocket(self, scope):
         """Handle WebSocket upgrade request."""
         from gunicorn.asgi.websocket import WebSocketProtocol
 
         # Stop callback parser - WebSocket uses its own data handling
         self._callback_parser = None
 
-        scope = self._build_websocket_scope(request, sockname, peername)
         ws_protocol = WebSocketProtocol(
-            self.transport, scope, self.app, self.log
+            self.transport, scope, self.app, self.log, cfg=self.cfg,
+            broadcast=getattr(self.worker, 'broadcast', None)
         )
 
         # Store reference so data_received() forwards to WebSocket
@@ -1007,156 +1209,31 @@ class ASGIProtocol(asyncio.Protocol):
     async def _handle_http_request(self, request, sockname, peername):
         """Handle a single HTTP request."""
         scope = self._build_http_scope(request, sockname, peername)
-        response_started = False
-        response_complete = False
-        exc_to_raise = None
-        use_chunked = False
-        omits_body = False
-        omits_body_warned = False
 
         # Reset response buffer for write batching
         self._response_buffer = None
 
-        # Response tracking for access logging
-        response_status = 500
-        response_headers = []
-        response_sent = 0
-
         # Use body receiver created in _on_headers_complete (receives data via callbacks)
         body_receiver = self._body_receiver
-
-        async def send(message):
-            nonlocal response_started, response_complete, exc_to_raise
-            nonlocal response_status, response_headers, response_sent, use_chunked, omits_body
-            nonlocal omits_body_warned
-
-            # If client disconnected, silently ignore send attempts
-            # This allows apps to finish cleanup without errors
-            if self._closed:
-                return
-
-            msg_type = message["type"]
-
-            if msg_type == "http.response.informational":
-                # Handle informational responses (1xx) like 103 Early Hints
-                info_status = message.get("status")
-                info_headers = message.get("headers", [])
-                self._send_informational(info_status, info_headers, request)
-                return
-
-            if msg_type == "http.response.start":
-                if response_started:
-                    exc_to_raise = RuntimeError("Response already started")
-                    return
-                response_started = True
-                response_status = message["status"]
-                response_headers = message.get("headers", [])
-
-                # Check if Content-Length or Transfer-Encoding is present
-                has_content_length = False
-                has_transfer_encoding = False
-                for name, _ in response_headers:
-                    name_lower = name.lower() if isinstance(name, str) else name.lower()
-                    if name_lower in (b"content-length", "content-length"):
-                        has_content_length = True
-                    elif name_lower in (b"transfer-encoding", "transfer-encoding"):
-                        has_transfer_encoding = True
-                        use_chunked = True  # Framework already set chunked encoding
-
-                # No-body responses (HEAD/1xx/204/304) must not carry a body.
-                # Always drop Transfer-Encoding (no chunked terminator without
-                # a body); Content-Length is dropped only for statuses that
-                # forbid it per RFC 9110 §6.4.2 (1xx, 204).  HEAD and 304 keep
-                # an app-supplied Content-Length.
-                omits_body = self._response_omits_body(request.method, response_status)
-                if omits_body and (has_content_length or has_transfer_encoding):
-                    response_headers = self._strip_body_framing_headers(
-                        response_headers, response_status
-                    )
-                    if self._response_forbids_content_length(response_status):
-                        has_content_length = False
-                    has_transfer_encoding = False
-                    use_chunked = False
-
-                # Use chunked encoding for HTTP/1.1 streaming responses without Content-Length.
-                # Skip when the response cannot carry a body or when Transfer-Encoding was
-                # already set by the framework.
-                needs_chunked = (
-                    not has_content_length
-                    and not has_transfer_encoding
-                    and request.version >= (1, 1)
-                    and not omits_body
-                )
-                if needs_chunked:
-                    use_chunked = True
-                    response_headers = list(response_headers) + [(b"transfer-encoding", b"chunked")]
-
-                self._send_response_start(response_status, response_headers, request)
-
-            elif msg_type == "http.response.body":
-                if not response_started:
-                    exc_to_raise = RuntimeError("Response not started")
-                    return
-                if response_complete:
-                    exc_to_raise = RuntimeError("Response already complete")
-                    return
-
-                body = message.get("body", b"")
-                more_body = message.get("more_body", False)
-
-                # RFC 9110: HEAD/1xx/204/304 responses must not carry a body,
-                # even if the framework emits one.  Drop body bytes;
-                # use_chunked has already been forced False above so no
-                # terminator will be written either.  Warn once per request
-                # so framework bugs surface in logs without spamming on
-                # multi-chunk streams.
-                if omits_body:
-                    if body and not omits_body_warned:
-                        self.log.warning(
-                            "ASGI app sent body bytes on a no-body response "
-                            "(method=%s status=%s); dropping per RFC 9110.",
-                            request.method, response_status,
-                        )
-                        omits_body_warned = True
-                    body = b""
-
-                if body:
-                    self._send_body(body, chunked=use_chunked)
-                    response_sent += len(body)
-                    # Apply write backpressure for streaming responses
-                    if self._flow_control:
-                        await self._flow_control.drain()
-
-                if not more_body:
-                    if use_chunked:
-                        # Send terminal chunk, combined with any buffered headers
-                        if self._response_buffer:
-                            self._safe_write(self._response_buffer + b"0\r\n\r\n")
-                            self._response_buffer = None
-                        else:
-                            self._safe_write(b"0\r\n\r\n")
-                    elif self._response_buffer:
-                        # Non-chunked empty response - flush headers
-                        self._safe_write(self._response_buffer)
-                        self._response_buffer = None
-                    response_complete = True
+        response = HTTPResponder(self, request)
 
         # Only build environ for logging if access logging is enabled
         access_log_enabled = self.log.access_log_enabled
 
+        score_start = self.worker.score.request_started()
         try:
             request_start = time.monotonic()
             self.cfg.pre_request(self.worker, request)
 
-            await self.app(scope, body_receiver.receive, send)
+            await self.app(scope, body_receiver.receive, response)
 
-            if exc_to_raise is not None:
-                raise exc_to_raise
+            if response.exc is not None:
+                raise response.exc
 
             # Ensure response was sent
-            if not response_started:
+            if not response.started:
                 self._send_error_response(500, "Internal Server Error")
-                response_status = 500
+                response.status = 500
 
         except asyncio.CancelledError:
             # Client disconnected - don't log as error, this is normal
@@ -1165,13 +1242,13 @@ class ASGIProtocol(asyncio.Protocol):
         except Exception:
             # If response was already completely sent, this is likely a
             # disconnect-related exception (e.g. Django's RequestAborted)
-            if response_complete:
+            if response.complete:
                 self.log.debug("Exception after response complete (client disconnected)")
             else:
                 self.log.exception("Error in ASGI application")
-                if not response_started:
+                if not response.started:
                     self._send_error_response(500, "Internal Server Error")
-                    response_status = 500
+                    response.status = 500
             return False
         finally:
             # NOTE: do NOT clear self._body_receiver here.  _handle_connection
@@ -1179,12 +1256,15 @@ class ASGIProtocol(asyncio.Protocol):
             # smuggling guard (refuse keepalive when the body was not framed
             # complete).  The connection loop clears the reference itself
             # after the gate has run.
+            self.worker.score.request_finished(
+                score_start, response.status, response.sent)
             try:
                 request_time = _RequestTime(time.monotonic() - request_start)
                 # Only build log data if access logging is enabled
                 if access_log_enabled:
                     environ = self._build_environ(request, sockname, peername)
-                    resp = ASGIResponseInfo(response_status, response_headers, response_sent)
+                    resp = ASGIResponseInfo(
+                        response.status, response.headers, response.sent)
                     self.log.access(resp, request, environ, request_time)
                 else:
                     environ = None
@@ -1211,39 +1291,61 @@ class ASGIProtocol(asyncio.Protocol):
             for name, value in request.headers:
                 headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
 
-        server = _normalize_sockaddr(sockname)
-        client = _normalize_sockaddr(peername)
-
-        scope = {
-            "type": "http",
-            "asgi": {"version": "3.0", "spec_version": "2.4"},
-            "http_version": f"{request.version[0]}.{request.version[1]}",
-            "method": request.method,
-            "scheme": request.scheme,
-            "path": request.path,
-            "raw_path": request.raw_path if request.raw_path else b"",
-            "query_string": request.query.encode("latin-1") if request.query else b"",
-            "root_path": self.cfg.root_path or "",
-            "headers": headers,
-            "server": server,
-            "client": client,
+        scope = self._scope_constants(sockname, peername).copy()
+        # a fresh dict: an application may modify it
+        scope["asgi"] = {"version": "3.0", "spec_version": "2.4"}
+        version = request.version
+        scope["http_version"] = (_HTTP_VERSIONS.get(version)
+                                 or f"{version[0]}.{version[1]}")
+        scope["method"] = request.method
+        scope["scheme"] = request.scheme
+        scope["path"] = request.path
+        scope["raw_path"] = request.raw_path if request.raw_path else b""
+        scope["query_string"] = request.query.encode("latin-1") if request.query else b""
+        scope["headers"] = headers
+
+        # Files are sent with sendfile where the transport allows it
+        scope["extensions"] = {
+            "http.response.pathsend": {},
+            "http.response.zerocopy": {},
         }
 
-        # Add state dict for lifespan sharing
-        if hasattr(self.worker, 'state'):
-            scope["state"] = self.worker.state
+        # Messages can be published to the WebSocket subscribers of all
+        # the workers
+        if getattr(self.worker, 'broadcast', None) is not None:
+            scope["extensions"]["gunicorn.broadcast"] = {}
 
         # Add HTTP/2 priority extension if available
         if hasattr(request, 'priority_weight'):
-            scope["extensions"] = {
-                "http.response.priority": {
-                    "weight": request.priority_weight,
-                    "depends_on": request.priority_depends_on,
-                }
+            scope["extensions"]["http.response.priority"] = {
+                "weight": request.priority_weight,
+                "depends_on": request.priority_depends_on,
             }
 
         return scope
 
+    def _scope_constants(self, sockname, peername):
+        """Return the scope entries shared by the requests of the
+        connection, computed on its first request."""
+        cached = self._scope_cache
+        if (cached is not None and cached[0] is sockname
+                and cached[1] is peername):
+            return cached[2]
+
+        constants = {
+            "type": "http",
+            "root_path": self.cfg.root_path or "",
+            "server": _normalize_sockaddr(sockname),
+            "client": _normalize_sockaddr(peername),
+        }
+
+        # Add state dict for lifespan sharing
+        if hasattr(self.worker, 'state'):
+            constants["state"] = self.worker.state
+
+        self._scope_cache = (sockname, peername, constants)
+        return constants
+
     def _build_environ(self, request, sockname, peername):
         """Build minimal WSGI-like environ dict for access logging."""
         environ = {
@@ -1298,6 +1400,9 @@ class ASGIProtocol(asyncio.Protocol):
         if hasattr(self.worker, 'state'):
             scope["state"] = self.worker.state
 
+        if getattr(self.worker, 'broadcast', None) is not None:
+            scope["extensions"] = {"gunicorn.broadcast": {}}
+
         return scope
 
     def _send_informational(self, status, headers, request):
@@ -1472,6 +1577,91 @@ class ASGIProtocol(asyncio.Protocol):
             elif body:
                 self._safe_write(body)
 
+    def _finish_response(self, chunked):
+        """Complete the response: send the terminal chunk, or the headers of
+        an empty response still buffered."""
+        if chunked:
+            # Send terminal chunk, combined with any buffered headers
+            if self._response_buffer:
+                self._safe_write(self._response_buffer + b"0\r\n\r\n")
+                self._response_buffer = None
+            else:
+                self._safe_write(b"0\r\n\r\n")
+        elif self._response_buffer:
+            # Non-chunked empty response - flush headers
+            self._safe_write(self._response_buffer)
+            self._response_buffer = None
+
+    async def _send_file_message(self, message, chunked):
+        """Send the file of an ``http.response.pathsend`` or
+        ``http.response.zerocopy`` message. Return the bytes sent."""
+        if message["type"] == "http.response.pathsend":
+            # opening may wait for the disk, off the event loop
+            loop = asyncio.get_running_loop()
+            f = await loop.run_in_executor(None, open, message["path"], "rb")
+            with f:
+                return await self._send_file(f, 0, None, chunked)
+        return await self._send_file(message["file"], message.get("offset"),
+                                     message.get("count"), chunked)
+
+    async def _send_file(self, f, offset, count, chunked):
+        """Send ``count`` bytes of file ``f`` from ``offset``, by default
+        from its current position to its end."""
+        fd = f.fileno()
+        if offset is None:
+            offset = os.lseek(fd, 0, os.SEEK_CUR)
+        # a chunk must be as long as announced
+        loop = asyncio.get_running_loop()
+        size = (await loop.run_in_executor(None, os.fstat, fd)).st_size
+        available = max(size - offset, 0)
+        count = available if count is None else min(count, available)
+        if count == 0:
+            return 0
+
+        head = self._response_buffer or b""
+        self._response_buffer = None
+        if chunked:
+            head += _CHUNK_PREFIXES.get(count) or f"{count:x}\r\n".encode("latin-1")
+        if head:
+            self._safe_write(head)
+        sent = await self._sendfile(f, offset, count)
+        if chunked:
+            self._safe_write(b"\r\n")
+        return sent
+
+    async def _sendfile(self, f, offset, count):
+        """Copy the file to the socket in the kernel on plain TCP
+        transports, read it in chunks otherwise."""
+        loop = asyncio.get_running_loop()
+        if self.transport.get_extra_info("sslcontext") is None:
+            try:
+                return await loop.sendfile(self.transport, f, offset, count,
+                                           fallback=False)
+            except (NotImplementedError, asyncio.SendfileNotAvailableError):
+                # uvloop, or a socket sendfile does not support
+                pass
+            except (ConnectionError, RuntimeError):
+                if self.transport.is_closing():
+                    # the client is gone
+                    return 0
+                raise
+
+        # reads may wait for the disk, off the event loop
+        fd = f.fileno()
+        sent = 0
+        while sent < count and not self.transport.is_closing():
+            chunk = await loop.run_in_executor(
+                None, os.pread, fd, min(FILE_CHUNK_SIZE, count - sent),
+                offset + sent)
+            if not chunk:
+                break
+            self._safe_write(chunk)
+            sent += len(chunk)
+            if self._flow_control:
+                await self._flow_control.drain()
+        os.lseek(fd, offset + sent, os.SEEK_SET)
+        return sent
+
     def _send_error_response(self, status, message):
         """Send an error response."""
         body = message.encode("utf-8")
@@ -1776,6 +1966,7 @@ class ASGIProtocol(asyncio.Protocol):
         # Only build environ for logging if access logging is enabled
         access_log_enabled = self.log.access_log_enabled
         request_start = time.monotonic()
+        score_start = self.worker.score.request_started()
 
         try:
             self.cfg.pre_request(self.worker, request)
@@ -1807,6 +1998,8 @@ class ASGIProtocol(asyncio.Protocol):
                 await h2_conn.send_error(stream_id, 500, "Internal Server Error")
                 response_status = 500
         finally:
+            self.worker.score.request_finished(
+                score_start, response_status, response_sent)
             try:
                 request_time = _RequestTime(time.monotonic() - request_start)
                 # Only build log data if access logging is enabled
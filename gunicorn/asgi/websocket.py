@@ -12,6 +12,9 @@ import asyncio
 import base64
 import hashlib
 import struct
+import zlib
+
+from gunicorn.asgi.deflate import MessageTooBig, PerMessageDeflate
 
 
 # WebSocket frame opcodes
@@ -38,15 +41,92 @@ CLOSE_INTERNAL_ERROR = 1011
 # WebSocket handshake GUID (RFC 6455)
 WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
 
+# Payload size from which a frame's header and payload are written
+# separately rather than joined
+WRITELINES_THRESHOLD = 16384
+
+
+def encode_frame_header(opcode, length, compressed=False):
+    """Header of an unmasked, unfragmented frame carrying ``length`` bytes.
+
+    RSV1 is set on compressed frames (RFC 7692).
+    """
+    # FIN + RSV1 + opcode, then the length (no mask bit for server)
+    first_byte = (0xC0 if compressed else 0x80) | opcode
+    if length < 126:
+        return struct.pack("!BB", first_byte, length)
+    if length < 65536:
+        return struct.pack("!BBH", first_byte, 126, length)
+    return struct.pack("!BBQ", first_byte, 127, length)
+
+
+class _MessageQueue:
+    """Unbounded queue of the messages for the application.
+
+    asyncio.Queue allocates three deques and an Event up front, a few
+    kilobytes for every idle WebSocket. This keeps a list, and a future
+    for each receive() call waiting on it.
+    """
+
+    __slots__ = ('_items', '_waiters')
+
+    def __init__(self):
+        self._items = []
+        self._waiters = None
+
+    def put_nowait(self, item):
+        self._items.append(item)
+        self._wake_next()
+
+    async def put(self, item):
+        self.put_nowait(item)
+
+    async def get(self):
+        while not self._items:
+            waiter = asyncio.get_running_loop().create_future()
+            if self._waiters is None:
+                self._waiters = []
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass a wakeup we may have been given on to the next getter
+                if not waiter.cancelled():
+                    self._wake_next()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        return self._items.pop(0)
+
+    def _wake_next(self):
+        if not self._items or not self._waiters:
+            return
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
 
 class WebSocketProtocol:
     """WebSocket connection handler for ASGI applications.
 
     Uses callback-based data feeding instead of StreamReader for efficiency.
     Data is fed via feed_data() from the parent protocol's data_received().
+    Futures to wait on are only created while a task waits, keeping an idle
+    connection small.
     """
 
-    def __init__(self, transport, scope, app, log):
+    __slots__ = (
+        'transport', 'scope', 'app', 'log', 'cfg', 'deflate', 'broadcast',
+        'accepted', 'closed', 'close_code', 'close_reason',
+        '_close_sent', '_close_received', '_close_event',
+        '_fragments', '_fragment_opcode', '_fragment_compressed',
+        '_receive_queue', '_topics',
+        '_buffer', '_data_waiter', '_eof',
+    )
+
+    def __init__(self, transport, scope, app, log, cfg=None, broadcast=None):
         """Initialize WebSocket protocol handler.
 
         Args:
@@ -54,11 +134,17 @@ class WebSocketProtocol:
             scope: ASGI WebSocket scope dict
             app: ASGI application callable
             log: Logger instance
+            cfg: gunicorn configuration, extensions are only negotiated
+                with one
+            broadcast: the worker's BroadcastChannel, if any
         """
         self.transport = transport
         self.scope = scope
         self.app = app
         self.log = log
+        self.cfg = cfg
+        self.deflate = None  # PerMessageDeflate once negotiated
+        self.broadcast = broadcast
 
         self.accepted = False
         self.closed = False
@@ -68,18 +154,22 @@ class WebSocketProtocol:
         # Close handshake state (RFC 6455 Section 7.1.1)
         self._close_sent = False
         self._close_received = False
-        self._close_event = asyncio.Event()
+        self._close_event = None  # Created when a task waits for the close
 
         # Message reassembly state
         self._fragments = []
         self._fragment_opcode = None
+        self._fragment_compressed = False
 
         # Receive queue for incoming messages
-        self._receive_queue = asyncio.Queue()
+        self._receive_queue = _MessageQueue()
+
+        # Broadcast topics subscribed to, created on the first subscription
+        self._topics = None
 
         # Callback-based data reception (replaces StreamReader)
         self._buffer = bytearray()
-        self._data_event = asyncio.Event()
+        self._data_waiter = None  # Future of a _read_exact() waiting for data
         self._eof = False
 
     def feed_data(self, data):
@@ -90,12 +180,17 @@ class WebSocketProtocol:
         """
         if data:
             self._buffer.extend(data)
-            self._data_event.set()
+            self._wake_reader()
 
     def feed_eof(self):
         """Signal that the connection has been closed."""
         self._eof = True
-        self._data_event.set()
+        self._wake_reader()
+
+    def _wake_reader(self):
+        waiter = self._data_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
 
     async def run(self):
         """Run the WebSocket ASGI application."""
@@ -114,9 +209,7 @@ class WebSocketProtocol:
             if not self.closed and self.accepted and not self._close_sent:
                 await self._send_close(CLOSE_INTERNAL_ERROR, "Application error")
                 # Wait for client's close response
-                try:
-                    await asyncio.wait_for(self._close_event.wait(), timeout=5.0)
-                except asyncio.TimeoutError:
+                if not await self._wait_for_close(5.0):
                     self.closed = True
 
             read_task.cancel()
@@ -125,6 +218,11 @@ class WebSocketProtocol:
             except asyncio.CancelledError:
                 pass
 
+            if self._topics:
+                for topic in self._topics:
+                    self.broadcast.unsubscribe(topic, self)
+                self._topics = None
+
     async def _receive(self):
         """ASGI receive callable."""
         return await self._receive_queue.get()
@@ -149,9 +247,9 @@ class WebSocketProtocol:
             text = message.get("text")
             bytes_data = message.get("bytes")
             if text is not None:
-                await self._send_frame(OPCODE_TEXT, text.encode("utf-8"))
+                await self._send_message(OPCODE_TEXT, text.encode("utf-8"))
             elif bytes_data is not None:
-                await self._send_frame(OPCODE_BINARY, bytes_data)
+                await self._send_message(OPCODE_BINARY, bytes_data)
 
         elif msg_type == "websocket.close":
             code = message.get("code", CLOSE_NORMAL)
@@ -159,16 +257,46 @@ class WebSocketProtocol:
             await self._send_close(code, reason)
 
             # Wait for client's close frame (RFC 6455 close handshake)
-            try:
-                await asyncio.wait_for(self._close_event.wait(), timeout=5.0)
-            except asyncio.TimeoutError:
+            if not await self._wait_for_close(5.0):
                 self.log.debug("WebSocket close handshake timeout")
                 self.closed = True
-                self._close_event.set()
+                self._set_close_event()
 
             # Close the transport after close handshake
             self.transport.close()
 
+        elif msg_type == "gunicorn.broadcast.subscribe":
+            self._check_broadcast()
+            if self._topics is None:
+                self._topics = set()
+            self._topics.add(message["topic"])
+            self.broadcast.subscribe(message["topic"], self)
+
+        elif msg_type == "gunicorn.broadcast.unsubscribe":
+            self._check_broadcast()
+            if self._topics is not None:
+                self._topics.discard(message["topic"])
+            self.broadcast.unsubscribe(message["topic"], self)
+
+        elif msg_type == "gunicorn.broadcast.publish":
+            if self.broadcast is None:
+                raise RuntimeError("WebSocket broadcast is not enabled")
+            self.broadcast.publish_message(message)
+
+    def _check_broadcast(self):
+        if self.broadcast is None:
+            raise RuntimeError("WebSocket broadcast is not enabled")
+        if not self.accepted:
+            raise RuntimeError("WebSocket not accepted")
+        if self.closed:
+            raise RuntimeError("WebSocket closed")
+
+    def write_frame(self, frame):
+        """Write a frame encoded for many connections, unless the
+        connection is closing."""
+        if not self._close_sent and not self.closed:
+            self.transport.write(frame)
+
     async def _send_accept(self, message):
         """Send WebSocket handshake accept response."""
         # Get Sec-WebSocket-Key from headers
@@ -199,6 +327,13 @@ class WebSocketProtocol:
         if subprotocol:
             headers.append(f"Sec-WebSocket-Protocol: {subprotocol}\r\n")
 
+        # Accept permessage-deflate if the client offered it
+        if self.cfg is not None and self.cfg.websocket_compression:
+            self.deflate, extensions = PerMessageDeflate.negotiate(
+                self.cfg, self.scope["headers"])
+            if extensions:
+                headers.append(f"Sec-WebSocket-Extensions: {extensions}\r\n")
+
         # Add any extra headers from message
         extra_headers = message.get("headers", [])
         for name, value in extra_headers:
@@ -278,8 +413,11 @@ class WebSocketProtocol:
         rsv3 = (first_byte >> 4) & 1
         opcode = first_byte & 0x0F
 
-        # RSV bits must be 0 (no extensions)
-        if rsv1 or rsv2 or rsv3:
+        # RSV bits must be 0, but RSV1 marking the first frame of a
+        # message compressed with permessage-deflate
+        if rsv2 or rsv3 or (rsv1 and (
+                self.deflate is None
+                or opcode not in (OPCODE_TEXT, OPCODE_BINARY))):
             await self._send_close(CLOSE_PROTOCOL_ERROR, "RSV bits set")
             return None
 
@@ -303,19 +441,27 @@ class WebSocketProtocol:
                 return None
             payload_len = struct.unpack("!Q", ext_len)[0]
 
+        # Refuse a data message larger than the limit before reading it
+        max_size = self.cfg.websocket_max_message_size if self.cfg else 0
+        if max_size and opcode in (OPCODE_CONTINUATION, OPCODE_TEXT,
+                                   OPCODE_BINARY):
+            size = payload_len
+            if opcode == OPCODE_CONTINUATION:
+                size += sum(map(len, self._fragments))
+            if size > max_size:
+                await self._send_close(CLOSE_MESSAGE_TOO_BIG, "Message too big")
+                return None
+
         # Read masking key
         masking_key = await self._read_exact(4)
         if not masking_key:
             return None
 
-        # Read payload
-        payload = await self._read_exact(payload_len)
+        # Read the payload, unmasked straight out of the receive buffer
+        payload = await self._read_exact(payload_len, masking_key)
         if payload is None:
             return None
 
-        # Unmask payload
-        payload = self._unmask(payload, masking_key)
-
         # Handle fragmented messages
         if opcode == OPCODE_CONTINUATION:
             if self._fragment_opcode is None:
@@ -326,48 +472,87 @@ class WebSocketProtocol:
                 # Reassemble complete message
                 full_payload = b"".join(self._fragments)
                 final_opcode = self._fragment_opcode
+                compressed = self._fragment_compressed
                 self._fragments = []
                 self._fragment_opcode = None
+                self._fragment_compressed = False
+                if compressed:
+                    full_payload = await self._decompress(full_payload)
+                    if full_payload is None:
+                        return None
                 return (final_opcode, full_payload)
             return (OPCODE_CONTINUATION, b"")  # Fragment received, wait for more
         elif opcode in (OPCODE_TEXT, OPCODE_BINARY):
             if not fin:
                 # Start of fragmented message
                 self._fragment_opcode = opcode
+                self._fragment_compressed = bool(rsv1)
                 self._fragments = [payload]
                 return (OPCODE_CONTINUATION, b"")  # Fragment started, wait for more
+            if rsv1:
+                payload = await self._decompress(payload)
+                if payload is None:
+                    return None
             return (opcode, payload)
         else:
             # Control frames
             return (opcode, payload)
 
-    async def _read_exact(self, n):
+    async def _read_exact(self, n, masking_key=None):
         """Read exactly n bytes from internal buffer.
 
         Waits for data via the callback-fed buffer instead of StreamReader.
+        With a masking key, the bytes are unmasked as they are copied out of
+        the buffer.
         """
         while len(self._buffer) < n:
             if self._eof:
                 return None
-            self._data_event.clear()
-            # Critical: check buffer AGAIN after clearing to avoid race
-            # condition where data arrives between clear() and wait()
-            if len(self._buffer) >= n:
-                break
-            await self._data_event.wait()
+            # feed_data() and feed_eof() resolve the future, and cannot run
+            # between the length check and the wait
+            self._data_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._data_waiter
+            finally:
+                self._data_waiter = None
             if self._eof and len(self._buffer) < n:
                 return None
 
-        data = bytes(self._buffer[:n])
+        # a view, so that the bytes are copied once; it must be released
+        # before the buffer can be resized
+        with memoryview(self._buffer) as view:
+            if masking_key is None:
+                data = bytes(view[:n])
+            else:
+                data = self._unmask(view[:n], masking_key)
         del self._buffer[:n]
         return data
 
     def _unmask(self, payload, masking_key):
-        """Unmask WebSocket payload data."""
-        if not payload:
-            return payload
-        # XOR each byte with corresponding mask byte
-        return bytes(b ^ masking_key[i % 4] for i, b in enumerate(payload))
+        """Unmask WebSocket payload data.
+
+        The payload and the mask repeated to its length are XORed as two
+        integers rather than byte by byte.
+        """
+        length = len(payload)
+        if not length:
+            return b""
+        mask = (masking_key * (length // 4 + 1))[:length]
+        return (int.from_bytes(payload, "little")
+                ^ int.from_bytes(mask, "little")).to_bytes(length, "little")
+
+    async def _decompress(self, payload):
+        """Decompress a message, or fail the connection and return None
+        when it is not valid compressed data or inflates past the largest
+        message size."""
+        try:
+            return self.deflate.decompress(payload)
+        except zlib.error:
+            await self._send_close(CLOSE_INVALID_DATA, "Invalid compressed data")
+            return None
+        except MessageTooBig:
+            await self._send_close(CLOSE_MESSAGE_TOO_BIG, "Message too big")
+            return None
 
     async def _handle_close(self, payload):
         """Handle incoming close frame."""
@@ -385,13 +570,40 @@ class WebSocketProtocol:
             await self._send_close(self.close_code, self.close_reason)
 
         self.closed = True
-        self._close_event.set()
+        self._set_close_event()
+
+    async def _wait_for_close(self, timeout):
+        """Wait for the close handshake to complete, return False when it
+        did not within ``timeout`` seconds."""
+        if self._close_received:
+            return True
+        if self._close_event is None:
+            self._close_event = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._close_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _set_close_event(self):
+        if self._close_event is not None:
+            self._close_event.set()
 
     async def _handle_continuation(self, payload):  # pylint: disable=unused-argument
         """Handle continuation frame (already processed in _read_frame)."""
         # This is called for partial fragments, nothing to do here
 
-    async def _send_frame(self, opcode, payload):
+    async def _send_message(self, opcode, payload):
+        """Send a data message, compressed if permessage-deflate was
+        negotiated and the message is large enough."""
+        deflate = self.deflate
+        if deflate is not None and len(payload) >= deflate.threshold:
+            await self._send_frame(opcode, deflate.compress(payload),
+                                   compressed=True)
+        else:
+            await self._send_frame(opcode, payload)
+
+    async def _send_frame(self, opcode, payload, compressed=False):
         """Send a WebSocket frame.
 
         Server frames are not masked (RFC 6455).
@@ -400,25 +612,12 @@ class WebSocketProtocol:
             payload = payload.encode("utf-8")
 
         length = len(payload)
-        frame = bytearray()
-
-        # First byte: FIN + opcode
-        frame.append(0x80 | opcode)
-
-        # Second byte: length (no mask bit for server)
-        if length < 126:
-            frame.append(length)
-        elif length < 65536:
-            frame.append(126)
-            frame.extend(struct.pack("!H", length))
+        header = encode_frame_header(opcode, length, compressed)
+        if length < WRITELINES_THRESHOLD:
+            self.transport.write(header + payload)
         else:
-            frame.append(127)
-            frame.extend(struct.pack("!Q", length))
-
-        # Payload
-        frame.extend(payload)
-
-        self.transport.write(bytes(frame))
+            # Large payloads are not copied into the frame
+            self.transport.writelines([header, payload])
 
     async def _send_close(self, code, reason=""):
         """Send a close frame."""
@@ -434,4 +633,4 @@ class WebSocketProtocol:
         # If we already received a close, handshake is complete
         if self._close_received:
             self.closed = True
-            self._close_event.set()
+            self._set_close_event()
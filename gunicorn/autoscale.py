@@ -0,0 +1,143 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+# Load-driven autoscaling of the HTTP workers. The arbiter samples how busy
+# the workers are from the scoreboard, along with the listen backlog, and
+# sets the number of workers so that their utilization stays near a target.
+
+import math
+import time
+
+# Seconds between two scaling decisions
+INTERVAL = 5.0
+
+
+class Autoscaler:
+
+    def __init__(self, arbiter):
+        self.arbiter = arbiter
+        self.last_up = None
+        self.last_change = None
+        self.utilization = None
+        self.last_decision = None
+        self.reset(time.monotonic())
+
+    def reset(self, now):
+        """Start a new sampling window."""
+        self.window_start = now
+        self.samples = 0
+        self.in_flight = 0.0
+        self.backlog = 0
+        self.latency = {pid: w.score.snapshot()["latency_total"]
+                        for pid, w in self.arbiter.WORKERS.items()}
+
+    def capacity(self):
+        """Requests a worker handles at once."""
+        capacity = getattr(self.arbiter.worker_class, "capacity", None)
+        if capacity is None:
+            return 1
+        return max(1, capacity(self.arbiter.cfg))
+
+    def bounds(self):
+        cfg = self.arbiter.cfg
+        low = max(1, cfg.autoscale_min_workers)
+        high = cfg.autoscale_max_workers or 2 * cfg.workers
+        return low, max(low, high)
+
+    def tick(self):
+        """Sample the load, and scale once per ``INTERVAL``. Called from the
+        arbiter's main loop."""
+        now = time.monotonic()
+        if self.arbiter.reload_cutoff is not None:
+            # the workers are being replaced, their counters mean little
+            self.reset(now)
+            return
+
+        self.sample()
+        if now - self.window_start >= INTERVAL:
+            self.scale(now)
+            self.reset(now)
+
+    def sample(self):
+        workers = list(self.arbiter.WORKERS.values())
+        if workers:
+            capacity = self.capacity()
+            busy = sum(min(w.score.snapshot()["in_flight"], capacity)
+                       for w in workers)
+            self.in_flight += busy / (len(workers) * capacity)
+        self.samples += 1
+
+        backlog = sum(max(lnr.get_backlog() or 0, 0)
+                      for lnr in self.arbiter.LISTENERS)
+        self.backlog = max(self.backlog, backlog)
+
+    def measure(self, now):
+        """Return the utilization of the workers over the window, from 0 to 1:
+        the time they spent handling requests, or the requests they had in
+        flight for requests longer than the window."""
+        workers = self.arbiter.WORKERS
+        if not workers or not self.samples:
+            return 0.0
+        capacity = self.capacity()
+        busy_time = sum(w.score.snapshot()["latency_total"]
+                        - self.latency.get(pid, 0.0)
+                        for pid, w in workers.items())
+        elapsed = max(now - self.window_start, 1e-3)
+        served = busy_time / (elapsed * len(workers) * capacity)
+        return min(1.0, max(served, self.in_flight / self.samples))
+
+    def desired(self, utilization, backlog):
+        """Number of workers that would bring the utilization to the target,
+        with enough of them to take the backlog."""
+        cfg = self.arbiter.cfg
+        load = (utilization * len(self.arbiter.WORKERS)
+                + backlog / self.capacity())
+        low, high = self.bounds()
+        return min(high, max(low, math.ceil(load / cfg.autoscale_target)))
+
+    def scale(self, now):
+        cfg = self.arbiter.cfg
+        self.utilization = self.measure(now)
+        current = self.arbiter.num_workers
+        desired = self.desired(self.utilization, self.backlog)
+
+        if desired > current:
+            if (self.last_up is not None
+                    and now - self.last_up < cfg.autoscale_cooldown_up):
+                return
+            self.last_up = now
+        elif desired < current:
+            if (self.last_change is not None
+                    and now - self.last_change < cfg.autoscale_cooldown_down):
+                return
+        else:
+            return
+
+        self.last_change = now
+        self.last_decision = {
+            "time": time.time(),
+            "from": current,
+            "to": desired,
+            "utilization": round(self.utilization, 3),
+            "backlog": self.backlog,
+        }
+        self.arbiter.log.info(
+            "Autoscaling from %s to %s workers (utilization %.0f%%, "
+            "backlog %s)", current, desired, self.utilization * 100,
+            self.backlog, extra={"metric": "gunicorn.autoscale.workers",
+                                 "value": desired, "mtype": "gauge"})
+        self.arbiter.num_workers = desired
+
+    def status(self):
+        """Return the state of autoscaling, for ``show stats``."""
+        low, high = self.bounds()
+        return {
+            "min": low,
+            "max": high,
+            "target": self.arbiter.cfg.autoscale_target,
+            "utilization": (None if self.utilization is None
+                            else round(self.utilization, 3)),
+            "backlog": self.backlog,
+            "last_decision": self.last_decision,
+        }
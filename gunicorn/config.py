@@ -606,6 +606,88 @@ def validate_statsd_address(val):
     return address
 
 
+def validate_statsd_sample_rate(val):
+    val = float(val)
+    if not 0 < val <= 1:
+        raise ValueError("Value must be above 0 and at most 1: %s" % val)
+    return val
+
+
+def validate_autoscale_target(val):
+    val = float(val)
+    if not 0 < val <= 1:
+        raise ValueError("Value must be above 0 and at most 1: %s" % val)
+    return val
+
+
+def validate_reload_strategy(val):
+    if not isinstance(val, str):
+        raise TypeError("Invalid type for casting: %s" % val)
+    val = val.lower().strip()
+    if val not in ("all", "rolling"):
+        raise ValueError("Invalid reload strategy: %s" % val)
+    return val
+
+
+def validate_warmup_requests(val):
+    if val is None:
+        return []
+    if isinstance(val, (str, dict)):
+        val = [val]
+    if not isinstance(val, (list, tuple)):
+        raise TypeError("Not a list of requests: %r" % val)
+    for request in val:
+        if not isinstance(request, (str, dict)):
+            raise TypeError("Warm-up request must be a string or a dict: %r"
+                            % request)
+    return list(val)
+
+
+def validate_worker_heartbeat(val):
+    if not isinstance(val, str):
+        raise TypeError("Invalid type for casting: %s" % val)
+    val = val.lower().strip()
+    if val not in ("memory", "file"):
+        raise ValueError("Invalid worker heartbeat: %s" % val)
+    return val
+
+
+def validate_cpu_affinity(val):
+    if not isinstance(val, str):
+        raise TypeError("Invalid type for casting: %s" % val)
+    val = val.lower().strip()
+    if val not in ("off", "cpu", "numa"):
+        raise ValueError("Invalid CPU affinity: %s" % val)
+    return val
+
+
+def validate_cpu_list(val):
+    if val is None:
+        return None
+    if isinstance(val, str):
+        val = util.parse_cpu_list(val)
+    if not isinstance(val, (list, tuple, set)):
+        raise TypeError("Not a list of CPUs: %r" % val)
+    return sorted(validate_pos_int(v) for v in val) or None
+
+
+def validate_gc_threshold(val):
+    if val is None:
+        return None
+    if isinstance(val, str):
+        val = [v for v in val.replace(",", " ").split() if v]
+    if not isinstance(val, (list, tuple)) or not 1 <= len(val) <= 3:
+        raise TypeError("Not a list of 1 to 3 thresholds: %r" % val)
+    return tuple(validate_pos_int(v) for v in val)
+
+
+def validate_websocket_window_bits(val):
+    val = validate_pos_int(val)
+    if not 9 <= val <= 15:
+        raise ValueError("Value must be between 9 and 15: %s" % val)
+    return val
+
+
 def validate_reload_engine(val):
     if val not in reloader_engines:
         raise ConfigError("Invalid reload_engine: %r" % val)
@@ -848,6 +930,167 @@ class MaxRequestsJitter(Setting):
         """
 
 
+class MaxWorkerMemory(Setting):
+    name = "max_worker_memory"
+    section = "Worker Processes"
+    cli = ["--max-worker-memory"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The maximum memory, in megabytes, a worker uses before it is
+        replaced.
+
+        Workers check the memory private to them (their USS, which leaves
+        out the pages shared with the arbiter and the other workers) on
+        their heartbeat, at most once a second. A worker over the limit
+        asks the arbiter to replace it and keeps serving; once the worker
+        started in its place is ready, the arbiter stops it gracefully,
+        letting it finish the requests in flight. A worker the arbiter
+        cannot track, because all the scoreboard slots are taken, exits
+        gracefully at once.
+
+        Requires ``/proc/<pid>/smaps_rollup`` (Linux). If this is set to zero
+        (the default) then the memory of the workers is not checked.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class MaxWorkerMemoryJitter(Setting):
+    name = "max_worker_memory_jitter"
+    section = "Worker Processes"
+    cli = ["--max-worker-memory-jitter"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The maximum jitter, in megabytes, to add to the *max_worker_memory*
+        setting.
+
+        The limit of each worker is raised by
+        ``randint(0, max_worker_memory_jitter)``, so that workers growing at
+        the same pace are not all replaced at the same time.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class Autoscale(Setting):
+    name = "autoscale"
+    section = "Worker Processes"
+    cli = ["--autoscale"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Adjust the number of workers to the load.
+
+        Every few seconds the arbiter measures how busy the workers are,
+        from the time they spent handling requests and the requests they
+        have in flight, along with the connections waiting in the listen
+        backlog. It then sets the number of workers between
+        :ref:`autoscale-min-workers` and :ref:`autoscale-max-workers` so
+        that their utilization stays near :ref:`autoscale-target`.
+
+        :ref:`workers` is the number of workers started with. The ``TTIN``
+        and ``TTOU`` signals still change the number of workers, until the
+        next scaling decision overrides them.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class AutoscaleMinWorkers(Setting):
+    name = "autoscale_min_workers"
+    section = "Worker Processes"
+    cli = ["--autoscale-min-workers"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 1
+    desc = """\
+        The fewest workers :ref:`autoscale` runs.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class AutoscaleMaxWorkers(Setting):
+    name = "autoscale_max_workers"
+    section = "Worker Processes"
+    cli = ["--autoscale-max-workers"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The most workers :ref:`autoscale` runs.
+
+        ``0`` means twice :ref:`workers`.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class AutoscaleTarget(Setting):
+    name = "autoscale_target"
+    section = "Worker Processes"
+    cli = ["--autoscale-target"]
+    meta = "FLOAT"
+    validator = validate_autoscale_target
+    type = float
+    default = 0.7
+    desc = """\
+        The utilization of the workers :ref:`autoscale` aims for, above 0
+        and at most 1.
+
+        A worker is fully used when it handles as many requests as it can
+        at once: one for sync workers, :ref:`threads` for gthread workers
+        and :ref:`worker-connections` for the asynchronous ones. A lower
+        target leaves more headroom for bursts.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class AutoscaleCooldownUp(Setting):
+    name = "autoscale_cooldown_up"
+    section = "Worker Processes"
+    cli = ["--autoscale-cooldown-up"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 10
+    desc = """\
+        The seconds :ref:`autoscale` waits after adding workers before
+        adding more.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class AutoscaleCooldownDown(Setting):
+    name = "autoscale_cooldown_down"
+    section = "Worker Processes"
+    cli = ["--autoscale-cooldown-down"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 60
+    desc = """\
+        The seconds :ref:`autoscale` waits after changing the number of
+        workers before removing some.
+
+        Longer than :ref:`autoscale-cooldown-up`, so that a short lull does
+        not stop workers that are needed again right after.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class Timeout(Setting):
     name = "timeout"
     section = "Worker Processes"
@@ -887,6 +1130,76 @@ class GracefulTimeout(Setting):
         """
 
 
+class ReloadStrategy(Setting):
+    name = "reload_strategy"
+    section = "Worker Processes"
+    cli = ["--reload-strategy"]
+    meta = "STRING"
+    validator = validate_reload_strategy
+    default = "all"
+    desc = """\
+        How workers are replaced when the arbiter receives ``HUP``.
+
+        * ``all`` - start a new worker for every old one at once, then stop
+          the old workers.
+        * ``rolling`` - start at most :ref:`reload-surge` percent of the
+          workers at a time, and stop an old worker each time a new one has
+          loaded the application and is ready to serve requests. Memory use
+          and capacity stay close to those of a single generation of workers.
+
+        Progress of a rolling reload is shown by ``gunicornc`` ``show stats``.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class ReloadSurge(Setting):
+    name = "reload_surge"
+    section = "Worker Processes"
+    cli = ["--reload-surge"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 25
+    desc = """\
+        Workers started at a time by a ``rolling`` :ref:`reload-strategy`, as
+        a percentage of :ref:`workers`.
+
+        At least one worker is started at a time.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WarmupRequests(Setting):
+    name = "warmup_requests"
+    action = "append"
+    section = "Worker Processes"
+    cli = ["--warmup-request"]
+    meta = "REQUEST"
+    validator = validate_warmup_requests
+    default = []
+    desc = """\
+        Requests each worker runs against its application before accepting
+        connections.
+
+        A request is a request line such as ``'GET /health'`` or
+        ``'/search?q=a'``. In a configuration file it may also be a dict of
+        WSGI environ keys, or of ASGI scope keys for the ``asgi`` worker,
+        updating those of ``GET /``. The environ has ``gunicorn.warmup`` set,
+        the scope has a ``gunicorn.warmup`` extension.
+
+        Workers run them after :ref:`post-worker-init` (and after the ASGI
+        lifespan startup), so that caches, lazy imports and connection pools
+        are ready when the first client arrives. Responses are discarded and
+        errors are logged. The time spent is logged when the worker boots
+        and reported as the ``gunicorn.worker.warmup`` metric. It counts
+        against :ref:`timeout`.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class Keepalive(Setting):
     name = "keepalive"
     section = "Worker Processes"
@@ -909,6 +1222,111 @@ class Keepalive(Setting):
         """
 
 
+class RequestBuffering(Setting):
+    name = "request_buffering"
+    section = "Worker Processes"
+    cli = ["--request-buffering"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Read whole requests in the main loop before handing them to a thread.
+
+        By default a ``gthread`` worker commits a thread to a connection as
+        soon as its first bytes arrive, and that thread then blocks reading
+        the headers and body from the client. A few slow uploads can occupy
+        every thread of the pool.
+
+        When enabled, the main loop reads the request headers and body
+        without blocking and only submits the request to the thread pool once
+        it has been received completely, much like nginx's
+        ``proxy_request_buffering``. Requests up to
+        :ref:`request-buffer-size` bytes are kept in memory, larger ones are
+        spooled to a temporary file in :ref:`tmp-upload-dir`.
+
+        A client that stays silent for more than :ref:`timeout` seconds while
+        its request is being buffered is disconnected.
+
+        Requests are handed to a thread unbuffered when buffering cannot tell
+        where they end: TLS connections, the ``uwsgi`` protocol, PROXY
+        protocol, HTTP/2 prior knowledge, ``Expect: 100-continue``,
+        ``Upgrade`` requests and malformed framing, which the regular parser
+        rejects as before.
+
+        This setting only affects the ``gthread`` worker type.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class RequestBufferSize(Setting):
+    name = "request_buffer_size"
+    section = "Worker Processes"
+    cli = ["--request-buffer-size"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 65536
+    desc = """\
+        The maximum size in bytes of a buffered request kept in memory.
+
+        Requests buffered by :ref:`request-buffering` that grow beyond this
+        size, headers included, are spooled to a temporary file in
+        :ref:`tmp-upload-dir`.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class ResponseBuffering(Setting):
+    name = "response_buffering"
+    section = "Worker Processes"
+    cli = ["--response-buffering"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Let the main loop finish writing responses to slow clients.
+
+        By default a ``gthread`` worker thread keeps blocking in ``sendall``
+        until the client has read the whole response, long after the
+        application returned. When enabled, response bytes the client is not
+        ready to receive are queued and written by the main loop without
+        blocking, so the thread returns to the pool as soon as the
+        application's iterator is exhausted.
+
+        Queued bytes are bounded per worker by :ref:`response-buffer-size`.
+        Once it is reached, threads block on their writes as they would
+        without this setting. A client that reads nothing for more than
+        :ref:`timeout` seconds while its response is being written is
+        disconnected.
+
+        TLS connections are always written by their thread.
+
+        This setting only affects the ``gthread`` worker type.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class ResponseBufferSize(Setting):
+    name = "response_buffer_size"
+    section = "Worker Processes"
+    cli = ["--response-buffer-size"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 16 * 1024 * 1024
+    desc = """\
+        The maximum number of response bytes a worker queues for slow clients.
+
+        Shared by all the connections of a worker when
+        :ref:`response-buffering` is enabled.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class LimitRequestLine(Setting):
     name = "limit_request_line"
     section = "Security"
@@ -1114,6 +1532,107 @@ class PreloadApp(Setting):
         """
 
 
+class Zygote(Setting):
+    name = "zygote"
+    section = "Server Mechanics"
+    cli = ["--zygote"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Fork workers from a zygote process that has imported the application.
+
+        The arbiter starts the zygote, which imports the application (or
+        only the modules listed in :ref:`zygote-imports`) and then forks each
+        worker on the arbiter's behalf. Spawning a worker takes milliseconds
+        instead of a full import, and the imported modules are shared by the
+        workers. Unlike :ref:`preload-app`, the arbiter itself never imports
+        the application: on ``HUP`` only the zygote is replaced, and the new
+        workers get the new code.
+
+        The workers remain children of the arbiter, which relies on Linux
+        child subreapers. Elsewhere workers are forked from the arbiter as
+        usual.
+
+        Workers are spawned once the zygote has imported the application,
+        without blocking the arbiter meanwhile. A zygote not ready within
+        :ref:`timeout` is given up on, and workers are forked from the
+        arbiter until the next reload.
+
+        The :ref:`pre-fork` hook runs in the arbiter, on the arbiter's copy
+        of the worker: the attributes it sets are pickled and set again on
+        the zygote's copy, and a worker whose attributes cannot be pickled is
+        forked from the arbiter. The ``WORKERS`` of the arbiter seen by the
+        other hooks in a worker are those at the time the zygote started.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class ZygoteImports(Setting):
+    name = "zygote_imports"
+    action = "append"
+    section = "Server Mechanics"
+    cli = ["--zygote-import"]
+    meta = "MODULE"
+    validator = validate_list_string
+    default = []
+    desc = """\
+        Modules the :ref:`zygote` imports instead of the application.
+
+        List the application's dependencies, such as a framework or a large
+        library, to share them between workers while the application modules
+        themselves are still imported by every worker.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class GcFreeze(Setting):
+    name = "gc_freeze"
+    section = "Server Mechanics"
+    cli = ["--gc-freeze"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Freeze the objects imported before the workers are forked.
+
+        With :ref:`preload-app` or :ref:`zygote`, the workers share the
+        pages of the objects imported before they were forked until they
+        write to them. The garbage collector writes to every object it
+        visits, so the first collections in a worker copy most of those
+        pages. When set, a full collection is run and ``gc.freeze()`` moves
+        the objects left to a permanent generation the collector ignores,
+        in the arbiter after preloading the application and in the zygote
+        after its imports.
+
+        ``gunicornc -c "show memory"`` reports how much memory each worker
+        shares.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WorkerGcThreshold(Setting):
+    name = "worker_gc_threshold"
+    section = "Server Mechanics"
+    cli = ["--worker-gc-threshold"]
+    meta = "INT[,INT[,INT]]"
+    validator = validate_gc_threshold
+    default = None
+    desc = """\
+        The garbage collection thresholds of the workers.
+
+        Passed to ``gc.set_threshold()`` in each worker once it is forked,
+        for instance ``50000,20,20`` to collect less often than the default
+        of ``700,10,10``. Fewer collections also copy fewer shared pages.
+        When not set, the interpreter's thresholds are kept.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class Sendfile(Setting):
     name = "sendfile"
     section = "Server Mechanics"
@@ -1148,10 +1667,67 @@ class ReusePort(Setting):
     desc = """\
         Set the ``SO_REUSEPORT`` flag on the listening socket.
 
+        Each worker then opens listening sockets of its own, among which
+        the kernel spreads the connections by hashing their addresses.
+
         .. versionadded:: 19.8
         """
 
 
+class ReusePortCbpf(Setting):
+    name = "reuse_port_cbpf"
+    section = "Server Mechanics"
+    cli = ["--reuse-port-cbpf"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Steer connections to the workers by the CPU receiving them.
+
+        With :ref:`reuse-port`, the arbiter opens the sockets of each
+        scoreboard slot and hands them to the worker running in it, and a
+        classic BPF program (``SO_ATTACH_REUSEPORT_CBPF``) picks the socket
+        of a connection by the CPU receiving it, rather than by hashing its
+        addresses. The connections handled by the network queue of a CPU
+        then all go to the same worker.
+
+        With :ref:`cpu-affinity`, a CPU is steered to a worker pinned to it,
+        and the CPUs of a set shared by several workers are spread among
+        them. The other CPUs are spread over all the running workers. The
+        program is attached again as workers start and exit, and the sockets
+        of a worker being replaced are kept for its replacement: the
+        connections they hold wait for it.
+
+        Linux only, ignored elsewhere.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class EpollExclusive(Setting):
+    name = "epoll_exclusive"
+    section = "Server Mechanics"
+    cli = ["--epoll-exclusive"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Wake up a single worker per connection on the shared listeners.
+
+        Without :ref:`reuse-port`, all the workers wait on the same
+        listening sockets and a new connection wakes all of those idle,
+        only one of which accepts it. When set, the gthread and ASGI
+        workers register the listeners with ``EPOLLEXCLUSIVE``, so that
+        the kernel wakes up one of them, or a few.
+
+        The worker woken up is not the least busy: the connections can
+        concentrate on a few workers while the load is low. Linux 4.5 and
+        later, ignored elsewhere and with uvloop.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class Chdir(Setting):
     name = "chdir"
     section = "Server Mechanics"
@@ -1231,7 +1807,9 @@ class WorkerTmpDir(Setting):
     desc = """\
         A directory to use for the worker heartbeat temporary file.
 
-        If not set, the default temporary directory will be used.
+        If not set, the default temporary directory will be used. Only used
+        with ``worker_heartbeat = "file"``, or for workers spawned while the
+        scoreboard is full.
 
         .. note::
            The current heartbeat system involves calling ``os.fchmod`` on
@@ -1243,6 +1821,80 @@ class WorkerTmpDir(Setting):
         """
 
 
+class WorkerHeartbeat(Setting):
+    name = "worker_heartbeat"
+    section = "Server Mechanics"
+    cli = ["--worker-heartbeat"]
+    meta = "STRING"
+    validator = validate_worker_heartbeat
+    default = "file"
+    desc = """\
+        How workers tell the arbiter they are alive.
+
+        - ``file`` -- a worker updates the modification time of a temporary
+          file in :ref:`worker-tmp-dir`, which the arbiter reads with
+          ``fstat``: two system calls per worker and heartbeat, which can
+          write to the disk where the directory lives.
+        - ``memory`` -- a worker stores the time of its heartbeat in its slot
+          of the memory map shared with the arbiter. A heartbeat is a store
+          to memory, the arbiter checks the workers without any system call.
+
+        ``memory`` is planned to become the default in a later release.
+
+        Workers spawned while all the slots of the shared memory map are
+        taken fall back to a file. Dirty workers always use a file.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class CpuAffinity(Setting):
+    name = "cpu_affinity"
+    section = "Server Mechanics"
+    cli = ["--cpu-affinity"]
+    meta = "STRING"
+    validator = validate_cpu_affinity
+    default = "off"
+    desc = """\
+        Pin each worker to a set of CPUs.
+
+        - ``off`` -- workers run on any CPU.
+        - ``cpu`` -- each worker runs on a single CPU.
+        - ``numa`` -- each worker runs on the CPUs of a NUMA node, as read
+          from ``/sys/devices/system/node``, so that the memory it allocates
+          stays local to the node.
+
+        The CPUs are taken from :ref:`cpu-affinity-cpus` in turn: HTTP
+        workers by the slot they hold in the scoreboard, which a
+        replacement worker takes over, and dirty workers by age.
+
+        With :ref:`reuse-port`, each worker pinned to a single CPU also
+        sets ``SO_INCOMING_CPU`` on its listening sockets, so that on Linux
+        6.1 and later the kernel hands a connection to the worker running
+        on the CPU that received it.
+
+        Requires ``os.sched_setaffinity`` (Linux).
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class CpuAffinityCpus(Setting):
+    name = "cpu_affinity_cpus"
+    section = "Server Mechanics"
+    cli = ["--cpu-affinity-cpus"]
+    meta = "CPUS"
+    validator = validate_cpu_list
+    default = None
+    desc = """\
+        The CPUs :ref:`cpu-affinity` pins workers to, such as ``0-7,16-23``.
+
+        By default, the CPUs the arbiter may run on.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class User(Setting):
     name = "user"
     section = "Server Mechanics"
@@ -1442,6 +2094,30 @@ class AccessLog(Setting):
         """
 
 
+class AccessLogQueueSize(Setting):
+    name = "access_log_queue_size"
+    section = "Logging"
+    cli = ["--access-log-queue-size"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Write the access log from a background thread.
+
+        When set above 0, workers queue access log records, up to this many,
+        and a thread of each worker formats and writes them in batches, many
+        lines per write when the access log goes to :ref:`accesslog`. A
+        slow disk or pipe then no longer holds up requests. Records that do
+        not fit in a full queue are dropped and counted in a warning of the
+        error log.
+
+        The default of 0 writes every record from the request, as it comes.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class DisableRedirectAccessToSyslog(Setting):
     name = "disable_redirect_access_to_syslog"
     section = "Logging"
@@ -1771,6 +2447,67 @@ class StatsdPrefix(Setting):
     """
 
 
+class StatsdFlushInterval(Setting):
+    name = "statsd_flush_interval"
+    section = "Logging"
+    cli = ["--statsd-flush-interval"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+    Aggregate statsd metrics and send them every INT milliseconds.
+
+    Counters are summed and gauges keep their last value over the interval.
+    Timer and histogram samples are all kept. Everything is packed in as
+    few datagrams as :ref:`statsd-max-packet-size` allows.
+
+    The default of 0 sends every metric in a datagram of its own, as it is
+    recorded.
+
+    .. versionadded:: 26.2.0
+    """
+
+
+class StatsdMaxPacketSize(Setting):
+    name = "statsd_max_packet_size"
+    section = "Logging"
+    cli = ["--statsd-max-packet-size"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 1432
+    desc = """\
+    The largest datagram in bytes sent to statsd when metrics are aggregated
+    by :ref:`statsd-flush-interval`.
+
+    The default fits the payload of a UDP datagram on a network with a
+    1500 bytes MTU. Unix domain sockets accept larger datagrams, 8192 is
+    safe with most servers.
+
+    .. versionadded:: 26.2.0
+    """
+
+
+class StatsdTimerSampleRate(Setting):
+    name = "statsd_timer_sample_rate"
+    section = "Logging"
+    cli = ["--statsd-timer-sample-rate"]
+    meta = "FLOAT"
+    validator = validate_statsd_sample_rate
+    type = float
+    default = 1.0
+    desc = """\
+    The fraction of request timers sent to statsd.
+
+    Each request duration is sent with this probability, tagged with the
+    sample rate so that the server can scale the counts it derives from
+    them.
+
+    .. versionadded:: 26.2.0
+    """
+
+
 class BacklogMetric(Setting):
     name = "enable_backlog_metric"
     section = "Logging"
@@ -2953,6 +3690,181 @@ class ASGIDisconnectGracePeriod(Setting):
         """
 
 
+class ASGIEagerTasks(Setting):
+    name = "asgi_eager_tasks"
+    section = "Worker Processes"
+    cli = ["--asgi-eager-tasks"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Start the tasks of the ASGI worker eagerly.
+
+        Sets ``asyncio.eager_task_factory`` on the worker's event loop: a new
+        task runs at once, up to its first suspension, instead of waiting for
+        the next iteration of the loop. A request whose application answers
+        without awaiting anything that blocks is handled without being
+        scheduled, which cuts the dispatch overhead of small requests.
+
+        Applications that start background tasks may see them run earlier
+        than they expect, before the ``create_task()`` call returns. Python
+        3.12 and later, ignored with a warning on older versions.
+
+        This setting only affects the ``asgi`` worker type.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WebSocketMaxMessageSize(Setting):
+    name = "websocket_max_message_size"
+    section = "Worker Processes"
+    cli = ["--websocket-max-message-size"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 16777216
+    desc = """\
+        Largest WebSocket message a client may send, in bytes.
+
+        The connection is closed with code 1009 when a message, or the
+        decompressed content of a :ref:`websocket-compression` message,
+        grows past this size. A compressed message is inflated no further
+        than the limit, so that a small message expanding to gigabytes
+        cannot exhaust the memory of the worker. 0 sets no limit.
+
+        This setting only affects the ``asgi`` worker type.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WebSocketCompression(Setting):
+    name = "websocket_compression"
+    section = "Worker Processes"
+    cli = ["--websocket-compression"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Compress WebSocket messages with permessage-deflate (RFC 7692).
+
+        When a client offers the extension in its handshake, the ASGI worker
+        accepts it and compresses the messages it sends with zlib, from
+        :ref:`websocket-compression-threshold` bytes, and decompresses those
+        the client compressed. Repetitive payloads such as JSON streams take
+        several times less bandwidth, for some CPU and the memory of the
+        zlib state of each connection, see
+        :ref:`websocket-compression-max-memory`.
+
+        This setting only affects the ``asgi`` worker type.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WebSocketCompressionThreshold(Setting):
+    name = "websocket_compression_threshold"
+    section = "Worker Processes"
+    cli = ["--websocket-compression-threshold"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 128
+    desc = """\
+        Size in bytes under which WebSocket messages are sent uncompressed.
+
+        Compressing small messages costs more CPU than it saves bandwidth.
+        Only applies with :ref:`websocket-compression`.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WebSocketCompressionWindowBits(Setting):
+    name = "websocket_compression_window_bits"
+    section = "Worker Processes"
+    cli = ["--websocket-compression-window-bits"]
+    meta = "INT"
+    validator = validate_websocket_window_bits
+    type = int
+    default = 12
+    desc = """\
+        Base-2 logarithm of the largest permessage-deflate window, 9 to 15.
+
+        The window of the messages the server compresses is at most this
+        size, and so is the window of those the client compresses when it
+        lets the server limit it. A larger window compresses better, a
+        smaller one takes less memory: 15 is the 32 KiB zlib default.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WebSocketCompressionNoContextTakeover(Setting):
+    name = "websocket_compression_no_context_takeover"
+    section = "Worker Processes"
+    cli = ["--websocket-compression-no-context-takeover"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Compress each WebSocket message on its own.
+
+        By default the compression context is kept from a message to the
+        next in both directions, so that a message can refer to what the
+        previous ones contained. When set, the server and the client start
+        each message afresh: the compression ratio of small messages drops,
+        but an idle connection holds no zlib state.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WebSocketCompressionMaxMemory(Setting):
+    name = "websocket_compression_max_memory"
+    section = "Worker Processes"
+    cli = ["--websocket-compression-max-memory"]
+    meta = "INT"
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Bytes of zlib state a compressed WebSocket connection may take.
+
+        The windows of :ref:`websocket-compression-window-bits` are narrowed
+        until the compressor and decompressor of a connection fit in this
+        size. A client that does not let the server limit its window needs
+        about 40 KiB for the decompressor alone; it gets no compression when
+        that does not fit. 0 sets no limit.
+
+        .. versionadded:: 26.2.0
+        """
+
+
+class WebSocketBroadcast(Setting):
+    name = "websocket_broadcast"
+    section = "Worker Processes"
+    cli = ["--websocket-broadcast"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Let ASGI applications broadcast WebSocket messages across workers.
+
+        The scopes get the ``gunicorn.broadcast`` extension. An accepted
+        WebSocket subscribes to a topic with a
+        ``gunicorn.broadcast.subscribe`` message, and a WebSocket or an HTTP
+        request publishes to the subscribers of a topic in all the workers
+        with a ``gunicorn.broadcast.publish`` message. The workers send the
+        messages to each other through Unix sockets, in a directory the
+        arbiter creates. Delivery is best effort, and messages are limited
+        to 64 KiB.
+
+        .. versionadded:: 26.2.0
+        """
+
+
 class HttpParser(Setting):
     name = "http_parser"
     section = "Worker Processes"
@@ -11,6 +11,7 @@ Interactive and single-command modes for controlling Gunicorn instances.
 import argparse
 import json
 import os
+import time
 import sys
 
 from gunicorn.config import _get_default_control_socket
@@ -24,8 +25,10 @@ def format_workers(data: dict) -> str:
         return "No workers running"
 
     lines = []
-    lines.append(f"{'PID':<10} {'AGE':<6} {'BOOTED':<8} {'LAST_BEAT'}")
-    lines.append("-" * 40)
+    lines.append(f"{'PID':<10} {'AGE':<6} {'BOOTED':<8} {'LAST_BEAT':<12} "
+                 f"{'REQUESTS':<10} {'CONNS':<6} {'ACTIVE':<7} "
+                 f"{'LAST':<5} {'AVG_MS'}")
+    lines.append("-" * 80)
 
     for w in workers:
         pid = w.get("pid", "?")
@@ -33,8 +36,16 @@ def format_workers(data: dict) -> str:
         booted = "yes" if w.get("booted") else "no"
         hb = w.get("last_heartbeat")
         hb_str = f"{hb}s ago" if hb is not None else "n/a"
+        requests = w.get("requests", 0)
+        conns = w.get("connections", 0)
+        active = w.get("in_flight", 0)
+        last = w.get("last_status") or "-"
+        avg = "-"
+        if requests:
+            avg = f"{w.get('latency_total', 0) * 1000 / requests:.1f}"
 
-        lines.append(f"{pid:<10} {age:<6} {booted:<8} {hb_str}")
+        lines.append(f"{pid:<10} {age:<6} {booted:<8} {hb_str:<12} "
+                     f"{requests:<10} {conns:<6} {active:<7} {last:<5} {avg}")
 
     lines.append("")
     lines.append(f"Total: {data.get('count', len(workers))} workers")
@@ -110,6 +121,28 @@ def format_stats(data: dict) -> str:
     lines.append(f"Workers killed:   {data.get('workers_killed', 0)}")
     lines.append(f"Reloads:          {data.get('reloads', 0)}")
 
+    reload = data.get("reload")
+    if reload:
+        lines.append(f"Rolling reload:   {reload['ready']}/{reload['target']} "
+                     f"ready, {reload['starting']} starting, "
+                     f"{reload['retiring']} stopping")
+
+    autoscale = data.get("autoscale")
+    if autoscale:
+        utilization = autoscale["utilization"]
+        utilization = "-" if utilization is None else f"{utilization:.0%}"
+        lines.append(f"Autoscaling:      {autoscale['min']}-{autoscale['max']} "
+                     f"workers, utilization {utilization} "
+                     f"(target {autoscale['target']:.0%}), "
+                     f"backlog {autoscale['backlog']}")
+        decision = autoscale.get("last_decision")
+        if decision:
+            ago = int(time.time() - decision["time"])
+            lines.append(f"Last scaling:     {decision['from']} -> "
+                         f"{decision['to']} workers {ago}s ago "
+                         f"(utilization {decision['utilization']:.0%}, "
+                         f"backlog {decision['backlog']})")
+
     dirty_pid = data.get("dirty_arbiter_pid")
     if dirty_pid:
         lines.append(f"Dirty arbiter:    {dirty_pid}")
@@ -139,6 +172,36 @@ def format_listeners(data: dict) -> str:
     return "\n".join(lines)
 
 
+def format_size(size: int) -> str:
+    """Format a number of bytes in MiB."""
+    return f"{size / (1024 * 1024):.1f}M"
+
+
+def format_memory(data: dict) -> str:
+    """Format memory output for display."""
+    processes = data.get("processes", [])
+    if not processes:
+        return "No memory information (requires /proc/<pid>/smaps_rollup)"
+
+    lines = []
+    lines.append(f"{'PID':<10} {'TYPE':<8} {'AGE':<5} {'RSS':>10} {'PSS':>10} "
+                 f"{'USS':>10} {'SHARED':>10} {'SWAP':>10}")
+    lines.append("-" * 80)
+
+    for proc in processes:
+        age = proc.get("age", "-")
+        lines.append(
+            f"{proc['pid']:<10} {proc['type']:<8} {age:<5} "
+            f"{format_size(proc['rss']):>10} {format_size(proc['pss']):>10} "
+            f"{format_size(proc['uss']):>10} {format_size(proc['shared']):>10} "
+            f"{format_size(proc['swap']):>10}")
+
+    lines.append("")
+    lines.append(f"Total PSS: {format_size(data.get('total_pss', 0))}")
+
+    return "\n".join(lines)
+
+
 def format_config(data: dict) -> str:
     """Format config output for display."""
     lines = []
@@ -255,6 +318,8 @@ def format_response(command: str, data: dict) -> str:  # pylint: disable=too-man
         return format_stats(data)
     elif cmd_lower == "show listeners":
         return format_listeners(data)
+    elif cmd_lower == "show memory":
+        return format_memory(data)
     elif cmd_lower == "show config":
         return format_config(data)
     elif cmd_lower == "help":
@@ -13,6 +13,8 @@ import signal
 import socket
 import time
 
+from gunicorn import util
+
 
 class CommandHandlers:
     """
@@ -39,12 +41,24 @@ class CommandHandlers:
             Dictionary with workers list containing:
             - pid: Worker process ID
             - age: Worker age (spawn order)
-            - requests: Number of requests handled (if available)
-            - booted: Whether worker has finished booting
+            - booted: Whether worker has loaded the application
             - last_heartbeat: Seconds since last heartbeat
+            - requests: Number of requests handled
+            - connections: Open client connections
+            - in_flight: Requests being handled
+            - request_age: Seconds since the latest request in flight started
+            - last_status: Status code of the last response
+            - bytes_sent: Response body bytes sent
+            - latency_total: Seconds spent handling requests
+            - recycling: Whether the worker, over max_worker_memory, is
+              waiting for its replacement
+
+        The request counters are read from the scoreboard the workers
+        write to, without asking them.
         """
         workers = []
         now = time.monotonic()
+        wall_now = time.time()
 
         for pid, worker in self.arbiter.WORKERS.items():
             try:
@@ -53,13 +67,19 @@ class CommandHandlers:
             except (OSError, ValueError):
                 last_heartbeat = None
 
-            workers.append({
+            score = worker.score.snapshot()
+            info = {
                 "pid": pid,
                 "age": worker.age,
-                "booted": worker.booted,
+                "booted": worker.booted or score.pop("ready"),
                 "aborted": worker.aborted,
                 "last_heartbeat": last_heartbeat,
-            })
+            }
+            request_start = score.pop("request_start")
+            score["request_age"] = (round(wall_now - request_start, 2)
+                                    if request_start else None)
+            info.update(score)
+            workers.append(info)
 
         # Sort by age (oldest first)
         workers.sort(key=lambda w: w["age"])
@@ -173,6 +193,12 @@ class CommandHandlers:
             - workers_spawned: Total workers spawned
             - workers_killed: Total workers killed (if tracked)
             - reloads: Number of reloads (if tracked)
+            - reload: Progress of a rolling reload, None when none is
+              running: new workers ready and starting, old workers
+              stopping, and the number of workers wanted
+            - autoscale: None unless autoscaling: the bounds and target,
+              the utilization and backlog measured last, and the last
+              scaling decision
         """
         stats = getattr(self.arbiter, '_stats', {})
         start_time = stats.get('start_time')
@@ -189,9 +215,17 @@ class CommandHandlers:
             "workers_spawned": stats.get('workers_spawned', 0),
             "workers_killed": stats.get('workers_killed', 0),
             "reloads": stats.get('reloads', 0),
+            "reload": self.arbiter.reload_progress(),
+            "autoscale": self._autoscale_status(),
             "dirty_arbiter_pid": self.arbiter.dirty_arbiter_pid or None,
         }
 
+    def _autoscale_status(self):
+        autoscaler = getattr(self.arbiter, 'autoscaler', None)
+        if autoscaler is None:
+            return None
+        return autoscaler.status()
+
     def show_listeners(self) -> dict:
         """
         Return bound socket information.
@@ -224,6 +258,50 @@ class CommandHandlers:
 
         return {"listeners": listeners, "count": len(listeners)}
 
+    def show_memory(self) -> dict:
+        """
+        Return the memory of the arbiter, the zygote and the HTTP workers.
+
+        Returns:
+            Dictionary with processes list containing, in bytes:
+            - pid: Process ID
+            - type: arbiter, zygote or worker
+            - rss: Resident memory
+            - pss: Resident memory, shared pages divided between the
+              processes sharing them
+            - uss: Memory private to the process
+            - shared: Resident memory shared with other processes
+            - swap: Swapped out memory
+            and the total PSS of those processes, the memory they use
+            together.
+
+        The values are read from ``/proc/<pid>/smaps_rollup``, processes
+        it cannot be read for are left out.
+        """
+        procs = [(self.arbiter.pid, "arbiter", None)]
+        zygote = getattr(self.arbiter, 'zygote', None)
+        if zygote is not None and zygote.pid:
+            procs.append((zygote.pid, "zygote", None))
+        for pid, worker in sorted(self.arbiter.WORKERS.items(),
+                                  key=lambda item: item[1].age):
+            procs.append((pid, "worker", worker.age))
+
+        processes = []
+        for pid, ptype, age in procs:
+            usage = util.memory_usage(pid)
+            if usage is None:
+                continue
+            info = {"pid": pid, "type": ptype}
+            if age is not None:
+                info["age"] = age
+            info.update(usage)
+            processes.append(info)
+
+        return {
+            "processes": processes,
+            "total_pss": sum(p["pss"] for p in processes),
+        }
+
     def worker_add(self, count: int = 1) -> dict:
         """
         Increase worker count.
@@ -483,7 +561,7 @@ class CommandHandlers:
                 "pid": pid,
                 "type": "web",
                 "age": worker.age,
-                "booted": worker.booted,
+                "booted": worker.booted or worker.score.ready,
                 "last_heartbeat": last_heartbeat,
             })
 
@@ -572,6 +650,7 @@ class CommandHandlers:
             "show config": "Show current effective configuration",
             "show stats": "Show server statistics",
             "show listeners": "Show bound sockets",
+            "show memory": "Show memory shared and private to each process",
             "worker add [N]": "Spawn N workers (default 1)",
             "worker remove [N]": "Remove N workers (default 1)",
             "worker kill <PID>": "Gracefully terminate specific worker",
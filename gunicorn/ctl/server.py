@@ -360,7 +360,7 @@ class ControlSocketServer:
     def _handle_show(self, args: list) -> dict:
         """Handle 'show' commands."""
         if not args:
-            raise ValueError("Missing show target (all|workers|dirty|config|stats|listeners)")
+            raise ValueError("Missing show target (all|workers|dirty|config|stats|listeners|memory)")
 
         target = args[0].lower()
 
@@ -376,6 +376,8 @@ class ControlSocketServer:
             return self.handlers.show_stats()
         elif target == "listeners":
             return self.handlers.show_listeners()
+        elif target == "memory":
+            return self.handlers.show_memory()
         else:
             raise ValueError(f"Unknown show target: {target}")
 
@@ -94,6 +94,8 @@ class DirtyArbiter:
         self.worker_age = 0
         self.alive = True
         self.num_workers = self.cfg.dirty_workers  # Dynamic count for TTIN/TTOU
+        # CPU sets the workers are pinned to in turn, by age; set in run()
+        self.cpu_sets = []
 
         self._server = None
         self._loop = None
@@ -247,6 +249,9 @@ class DirtyArbiter:
         # Set socket path env var for dirty workers (enables stash access)
         os.environ['GUNICORN_DIRTY_SOCKET'] = self.socket_path
 
+        self.cpu_sets = util.cpu_sets(self.cfg.cpu_affinity,
+                                      self.cfg.cpu_affinity_cpus)
+
         # Call hook
         self.cfg.on_dirty_starting(self)
 
@@ -994,6 +999,7 @@ class DirtyArbiter:
         worker.pid = os.getpid()
         try:
             util._setproctitle(f"dirty-worker [{self.cfg.proc_name}]")
+            self.pin_worker(worker)
             worker.init_process()
             os._exit(0)
         except SystemExit as e:
@@ -1004,6 +1010,17 @@ class DirtyArbiter:
                 os._exit(self.WORKER_BOOT_ERROR)
             os._exit(1)
 
+    def pin_worker(self, worker):
+        """Pin the process forked for ``worker`` to its CPU set."""
+        if not self.cpu_sets:
+            return
+        cpus = self.cpu_sets[(worker.age - 1) % len(self.cpu_sets)]
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            self.log.warning("Cannot pin dirty worker %s to CPUs %s: %s",
+                             worker.pid, cpus, e)
+
     def kill_worker(self, pid, sig):
         """Kill a worker by PID."""
         try:
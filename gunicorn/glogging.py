@@ -2,6 +2,7 @@
 # This file is part of gunicorn released under the MIT license.
 # See the NOTICE for more information.
 
+import atexit
 import base64
 import binascii
 import json
@@ -11,6 +12,8 @@ logging.Logger.manager.emittedNoHandlerWarning = 1  # noqa
 from logging.config import dictConfig
 from logging.config import fileConfig
 import os
+import queue
+import re
 import socket
 import sys
 import threading
@@ -115,6 +118,203 @@ class SafeAtoms(dict):
             return '-'
 
 
+def _status_atom(resp):
+    status = resp.status
+    if isinstance(status, str):
+        status = status.split(None, 1)[0]
+    return status
+
+
+def _header_atom(headers, name):
+    if hasattr(headers, "items"):
+        headers = headers.items()
+    value = None
+    for k, v in headers:
+        if k.lower() == name:
+            value = v
+    return value
+
+
+# Getters for the single letter atoms, taking the logger and the arguments
+# of Logger.access. They return what Logger.atoms puts under the same key.
+ATOM_GETTERS = {
+    'h': lambda log, resp, req, environ, rt: environ.get('REMOTE_ADDR', '-'),
+    'l': lambda log, resp, req, environ, rt: '-',
+    'u': lambda log, resp, req, environ, rt: log._get_user(environ) or '-',
+    't': lambda log, resp, req, environ, rt: log.now(),
+    'r': lambda log, resp, req, environ, rt: "%s %s %s" % (
+        environ['REQUEST_METHOD'], environ['RAW_URI'],
+        environ["SERVER_PROTOCOL"]),
+    's': lambda log, resp, req, environ, rt: _status_atom(resp),
+    'm': lambda log, resp, req, environ, rt: environ.get('REQUEST_METHOD'),
+    'U': lambda log, resp, req, environ, rt: environ.get('PATH_INFO'),
+    'q': lambda log, resp, req, environ, rt: environ.get('QUERY_STRING'),
+    'H': lambda log, resp, req, environ, rt: environ.get('SERVER_PROTOCOL'),
+    'b': lambda log, resp, req, environ, rt: (
+        getattr(resp, 'sent', None) is not None and str(resp.sent) or '-'),
+    'B': lambda log, resp, req, environ, rt: getattr(resp, 'sent', None),
+    'f': lambda log, resp, req, environ, rt: environ.get('HTTP_REFERER', '-'),
+    'a': lambda log, resp, req, environ, rt: environ.get('HTTP_USER_AGENT', '-'),
+    'T': lambda log, resp, req, environ, rt: rt.seconds,
+    'D': lambda log, resp, req, environ, rt: (
+        (rt.seconds * 1000000) + rt.microseconds),
+    'M': lambda log, resp, req, environ, rt: (
+        (rt.seconds * 1000) + int(rt.microseconds / 1000)),
+    'L': lambda log, resp, req, environ, rt: "%d.%06d" % (
+        rt.seconds, rt.microseconds),
+    'p': lambda log, resp, req, environ, rt: "<%s>" % os.getpid(),
+}
+
+ATOM_RE = re.compile(r"%%|%\(([^)]*)\)")
+
+
+class AccessLogFormatter:
+    """An access log format parsed once, computing only the atoms it uses.
+
+    ``atoms`` returns the same values as ``SafeAtoms(Logger.atoms(...))``
+    for the keys the format references, without building every header and
+    environ atom of the request. They are only enough to render the
+    message: records that handlers or filters other than gunicorn's own
+    may read carry all the atoms.
+    """
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.getters = []
+        for match in ATOM_RE.finditer(fmt):
+            key = match.group(1)
+            if key is not None:
+                self.getters.append((key, self._getter(key)))
+
+    @staticmethod
+    def _getter(key):
+        if key.startswith("{") and key[-2:-1] == "}":
+            name, kind = key[1:-2].lower(), key[-1].lower()
+            if kind == "i":
+                def get_request_header(log, resp, req, environ, rt):
+                    return _header_atom(getattr(req, 'headers', req), name)
+                return get_request_header
+            if kind == "o":
+                def get_response_header(log, resp, req, environ, rt):
+                    return _header_atom(resp.headers, name)
+                return get_response_header
+            if kind == "e":
+                def get_environ(log, resp, req, environ, rt):
+                    return _header_atom(environ, name)
+                return get_environ
+            return None
+        return ATOM_GETTERS.get(key)
+
+    def atoms(self, log, resp, req, environ, request_time):
+        atoms = {}
+        for key, getter in self.getters:
+            value = None
+            if getter is not None:
+                value = getter(log, resp, req, environ, request_time)
+            if value is None and (getter is None or key.startswith("{")):
+                value = '-'
+            elif isinstance(value, str):
+                value = value.replace('"', '\\"')
+            atoms[key] = value
+        return atoms
+
+
+# Most access log records the writer thread takes from its queue at once.
+ACCESS_LOG_BATCH_SIZE = 256
+
+
+class AccessLogWriter:
+    """Emits the records of the access logger from a background thread.
+
+    Records are queued by the request, up to ``maxsize`` of them; the
+    others are dropped and reported to the error log. When the access
+    logger only has gunicorn's own stream or file handler, the records
+    taken from the queue together are written with a single write.
+    """
+
+    def __init__(self, logger, maxsize):
+        self.logger = logger
+        self.queue = queue.Queue(maxsize)
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       name="gunicorn-access-log")
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def close(self):
+        """Write the queued records and stop the thread."""
+        if self.pid != os.getpid() or not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        while True:
+            records = [self.queue.get()]
+            while len(records) < ACCESS_LOG_BATCH_SIZE:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = records[-1] is None
+            records = [r for r in records if r is not None]
+            if records:
+                self.emit(records)
+
+            if self.dropped:
+                with self.lock:
+                    dropped, self.dropped = self.dropped, 0
+                self.logger.warning("Access log queue full, dropped %d "
+                                    "records", dropped)
+            if stop:
+                return
+
+    def emit(self, records):
+        log = self.logger.access_log
+        handlers = log.handlers
+        if log.propagate or not all(
+                type(h) in (logging.StreamHandler, logging.FileHandler)
+                and getattr(h, "_gunicorn", False) for h in handlers):
+            for record in records:
+                log.handle(record)
+            return
+
+        if log.disabled:
+            return
+        records = [r for r in records if log.filter(r)]
+        for h in handlers:
+            lines = []
+            for record in records:
+                if record.levelno < h.level or not h.filter(record):
+                    continue
+                try:
+                    lines.append(h.format(record) + h.terminator)
+                except Exception:
+                    h.handleError(record)
+            if not lines:
+                continue
+            h.acquire()
+            try:
+                # reopen_files swaps the stream under this same lock
+                if h.stream is None:
+                    h.stream = h._open()
+                h.stream.write("".join(lines))
+                h.flush()
+            except Exception:
+                h.handleError(records[-1])
+            finally:
+                h.release()
+
+
 def parse_syslog_address(addr):
 
     # unix domain socket type depends on backend
@@ -180,6 +380,13 @@ class Logger:
 
     atoms_wrapper_class = SafeAtoms
 
+    # access_log_format compiled by access(), and the timestamp of now()
+    # for the current second
+    _access_formatter = None
+    _now_cache = (None, None)
+    # background writer of the access log, see access_log_queue_size
+    _access_writer = None
+
     def __init__(self, cfg):
         self.error_log = logging.getLogger("gunicorn.error")
         self.error_log.propagate = False
@@ -371,21 +578,65 @@ class Logger:
         if not self.access_log_enabled:
             return
 
-        # wrap atoms:
-        # - make sure atoms will be test case insensitively
-        # - if atom doesn't exist replace it by '-'
-        safe_atoms = self.atoms_wrapper_class(
-            self.atoms(resp, req, environ, request_time)
-        )
+        fmt = self.cfg.access_log_format
+        if (type(self).atoms is Logger.atoms
+                and self.atoms_wrapper_class is SafeAtoms
+                and self._access_only_rendered()):
+            formatter = self._access_formatter
+            if formatter is None or formatter.fmt != fmt:
+                formatter = self._access_formatter = AccessLogFormatter(fmt)
+            safe_atoms = formatter.atoms(self, resp, req, environ,
+                                         request_time)
+        else:
+            # wrap atoms:
+            # - make sure atoms will be test case insensitively
+            # - if atom doesn't exist replace it by '-'
+            safe_atoms = self.atoms_wrapper_class(
+                self.atoms(resp, req, environ, request_time)
+            )
 
         try:
-            self.access_log.info(self.cfg.access_log_format, safe_atoms)
+            if self.cfg.access_log_queue_size > 0:
+                self._queue_access(fmt, safe_atoms)
+            else:
+                self.access_log.info(fmt, safe_atoms)
         except Exception:
             self.error(traceback.format_exc())
 
+    def _access_only_rendered(self):
+        """Whether access records only go to gunicorn's own handlers, which
+        use nothing of them but the message."""
+        log = self.access_log
+        if log.propagate or log.filters:
+            return False
+        return all(getattr(h, "_gunicorn", False) and not h.filters
+                   for h in log.handlers)
+
+    def _queue_access(self, fmt, atoms):
+        if not self.access_log.isEnabledFor(logging.INFO):
+            return
+        writer = self._access_writer
+        if writer is None or writer.pid != os.getpid():
+            with self.lock:
+                writer = self._access_writer
+                if writer is None or writer.pid != os.getpid():
+                    writer = AccessLogWriter(
+                        self, self.cfg.access_log_queue_size)
+                    self._access_writer = writer
+        # the record is made here to keep the time and thread of the request
+        writer.put(self.access_log.makeRecord(
+            self.access_log.name, logging.INFO, "(unknown file)", 0, fmt,
+            (atoms,), None))
+
     def now(self):
         """ return date in Apache Common Log Format """
-        return time.strftime('[%d/%b/%Y:%H:%M:%S %z]')
+        second, formatted = self._now_cache
+        now = int(time.time())
+        if now != second:
+            formatted = time.strftime('[%d/%b/%Y:%H:%M:%S %z]',
+                                      time.localtime(now))
+            self._now_cache = (now, formatted)
+        return formatted
 
     def reopen_files(self):
         if self.cfg.capture_output and self.cfg.errorlog != "-":
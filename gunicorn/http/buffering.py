@@ -0,0 +1,167 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+# Request buffering: find where an HTTP/1.x request ends without blocking,
+# so a worker can collect it before committing a thread to it.
+#
+# This is only a framing scanner. It never validates a request: whenever it
+# cannot tell where a request ends (oversized or malformed headers, framing
+# it does not understand, Expect, Upgrade) it reports the request as ready
+# and the regular parser takes over, rejecting it or reading the rest from
+# the socket exactly as it would without buffering.
+
+import tempfile
+
+# Header blocks larger than this are handed to the parser unbuffered.
+MAX_BUFFERED_HEADERS = 65536
+
+HEX_DIGITS = b"0123456789abcdefABCDEF"
+
+
+class RequestBuffer:
+
+    def __init__(self, cfg, data=b""):
+        self.spool = tempfile.SpooledTemporaryFile(
+            max_size=cfg.request_buffer_size, dir=cfg.tmp_upload_dir)
+        self.ready = False
+        # bytes received but not yet scanned
+        self._pending = bytearray()
+        # body framing: None while reading the headers, then "length" or
+        # "chunked"
+        self._framing = None
+        # bytes of body (or current chunk, CRLF included) still expected
+        self._remaining = 0
+        # chunked only: the last chunk was seen, the trailers follow
+        self._trailers = False
+        if data:
+            self.feed(data)
+
+    def feed(self, data):
+        """Append bytes received from the client and scan them.
+
+        Sets ``ready`` once a whole request has been received or when the
+        request has to be handed to the parser as is. Bytes past the end of
+        the request (a pipelined request) are kept for the parser too.
+        """
+        self.spool.write(data)
+        if self.ready:
+            return
+        self._pending.extend(data)
+        self._scan()
+
+    def detach(self):
+        """Return the buffered bytes as a file positioned at its start."""
+        spool, self.spool = self.spool, None
+        spool.seek(0)
+        return spool
+
+    def close(self):
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+    def _scan(self):
+        progress = True
+        while progress and not self.ready:
+            if self._framing is None:
+                progress = self._scan_headers()
+            elif self._framing == "length":
+                progress = self._scan_length()
+            else:
+                progress = self._scan_chunked()
+        if self.ready:
+            # the parser reads everything back from the spool
+            self._pending = None
+
+    def _scan_headers(self):
+        idx = self._pending.find(b"\r\n\r\n")
+        if idx < 0:
+            if len(self._pending) > MAX_BUFFERED_HEADERS:
+                self.ready = True
+            return False
+
+        lines = bytes(self._pending[:idx]).split(b"\r\n")
+        del self._pending[:idx + 4]
+
+        content_length = None
+        chunked = False
+        for line in lines[1:]:
+            name, sep, value = line.partition(b":")
+            if not sep:
+                self.ready = True
+                return False
+            name = name.lower()
+            value = value.strip(b" \t")
+            if name == b"content-length":
+                if content_length is not None or not value.isdigit():
+                    self.ready = True
+                    return False
+                content_length = int(value)
+            elif name == b"transfer-encoding":
+                if chunked or value.lower() != b"chunked":
+                    self.ready = True
+                    return False
+                chunked = True
+            elif name in (b"expect", b"upgrade"):
+                # the client waits for an answer before sending the body,
+                # or the connection leaves HTTP/1.x after this request
+                self.ready = True
+                return False
+
+        if chunked:
+            if content_length is not None:
+                self.ready = True
+                return False
+            self._framing = "chunked"
+        elif content_length:
+            self._framing = "length"
+            self._remaining = content_length
+        else:
+            self.ready = True
+            return False
+        return True
+
+    def _scan_length(self):
+        consumed = min(self._remaining, len(self._pending))
+        self._remaining -= consumed
+        del self._pending[:consumed]
+        if self._remaining == 0:
+            self.ready = True
+        return False
+
+    def _scan_chunked(self):
+        if self._remaining:
+            consumed = min(self._remaining, len(self._pending))
+            self._remaining -= consumed
+            del self._pending[:consumed]
+            return self._remaining == 0
+
+        if self._trailers:
+            if self._pending[:2] == b"\r\n":
+                self.ready = True
+                return False
+            if self._pending.find(b"\r\n\r\n") >= 0:
+                self.ready = True
+                return False
+            if len(self._pending) > MAX_BUFFERED_HEADERS:
+                self.ready = True
+            return False
+
+        idx = self._pending.find(b"\r\n")
+        if idx < 0:
+            if len(self._pending) > MAX_BUFFERED_HEADERS:
+                self.ready = True
+            return False
+        size = bytes(self._pending[:idx]).split(b";", 1)[0].rstrip(b" \t")
+        del self._pending[:idx + 2]
+        if not size or size.strip(HEX_DIGITS):
+            self.ready = True
+            return False
+        size = int(size, 16)
+        if size == 0:
+            self._trailers = True
+        else:
+            # the chunk data and its terminating CRLF
+            self._remaining = size + 2
+        return True
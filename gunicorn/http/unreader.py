@@ -60,10 +60,39 @@ class SocketUnreader(Unreader):
         super().__init__()
         self.sock = sock
         self.mxchunk = max_chunk
+        # bytes read ahead from the socket, served before reading it again
+        self.spool = None
 
     def chunk(self):
+        if self.spool is not None:
+            data = self.spool.read(self.mxchunk)
+            if data:
+                return data
+            self.spool.close()
+            self.spool = None
         return self.sock.recv(self.mxchunk)
 
+    def set_spool(self, spool):
+        """Serve the content of the file *spool* before reading the socket."""
+        self.spool = spool
+
+    def buffered(self):
+        """Return the bytes read from the socket but not consumed yet,
+        leaving them to be read."""
+        if self.spool is not None:
+            self.unread(self.take_buffered())
+        return self.buf.getvalue()
+
+    def take_buffered(self):
+        """Return and forget the bytes read from the socket but not consumed."""
+        data = self.buf.getvalue()
+        self.buf = io.BytesIO()
+        if self.spool is not None:
+            data += self.spool.read()
+            self.spool.close()
+            self.spool = None
+        return data
+
 
 class IterUnreader(Unreader):
     def __init__(self, iterable):
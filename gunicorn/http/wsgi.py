@@ -17,6 +17,11 @@ from gunicorn import util
 # with sending files in blocks over 2GB.
 BLKSIZE = 0x3FFFFFFF
 
+# Body writes of a response of known length are collected up to this many
+# bytes or buffers, then sent along with the header block in a single write.
+WRITE_BATCH_SIZE = 65536
+WRITE_BATCH_BUFFERS = 64
+
 # RFC9110 5.5: field-vchar = VCHAR / obs-text
 # RFC4234 B.1: VCHAR = 0x21-x07E = printable ASCII
 HEADER_VALUE_RE = re.compile(r'[ \t\x21-\x7e\x80-\xff]*')
@@ -311,6 +316,12 @@ class Response:
         self.cfg = cfg
         self._omits_body = False
         self._omits_body_warned = False
+        # header block and body buffers not written yet; headers_sent is
+        # only set once the header block was written
+        self._batch = []
+        self._batch_size = 0
+        self._headers_batched = False
+        self._batching = False
 
     def force_close(self):
         self.must_close = True
@@ -333,6 +344,11 @@ class Response:
                     util.reraise(exc_info[0], exc_info[1], exc_info[2])
             finally:
                 exc_info = None
+            # nothing was written: the new status replaces what was batched
+            self._batch = []
+            self._batch_size = 0
+            self._headers_batched = False
+            self.sent = 0
         elif self.status is not None:
             raise AssertionError("Response headers already set!")
 
@@ -443,18 +459,34 @@ class Response:
     def send_headers(self):
         if self.headers_sent:
             return
+        if not self._headers_batched:
+            self._batch_headers()
+        self._flush()
+
+    def _batch_headers(self):
         tosend = self.default_headers()
         tosend.extend(["%s: %s\r\n" % (k, v) for k, v in self.headers])
 
         header_str = "%s\r\n" % "".join(tosend)
-        util.write(self.sock, util.to_bytestring(header_str, "latin-1"))
-        self.headers_sent = True
+        self._batch.append(util.to_bytestring(header_str, "latin-1"))
+        self._headers_batched = True
+
+    def _flush(self):
+        """Write the header block and body buffers collected so far."""
+        if self._batch:
+            buffers = self._batch
+            self._batch = []
+            self._batch_size = 0
+            util.write_buffers(self.sock, buffers)
+            if self._headers_batched:
+                self.headers_sent = True
 
     def write(self, arg):
-        self.send_headers()
         if not isinstance(arg, bytes):
+            self.send_headers()
             raise TypeError('%r is not a byte' % arg)
         if self._omits_body:
+            self.send_headers()
             if arg and not self._omits_body_warned:
                 log.warning(
                     "WSGI app sent body bytes on a no-body response "
@@ -468,6 +500,7 @@ class Response:
         if self.response_length is not None:
             if self.sent >= self.response_length:
                 # Never write more than self.response_length bytes
+                self.send_headers()
                 return
 
             tosend = min(self.response_length - self.sent, tosend)
@@ -477,18 +510,43 @@ class Response:
         # Sending an empty chunk signals the end of the
         # response and prematurely closes the response
         if self.chunked and tosend == 0:
+            self.send_headers()
             return
 
         self.sent += tosend
         self._emit_body(arg)
 
+    def batch_writes(self, respiter):
+        """Collect the writes of the response iterable ``respiter`` into
+        batches when its blocks are all available already, as in a list or
+        a tuple. The blocks of other iterables go out before the next one is
+        asked for, PEP 3333 does not let a server hold them back."""
+        self._batching = isinstance(respiter, (list, tuple))
+
     def _emit_body(self, data):
         """Put body bytes on the wire.
 
         The one place body framing happens, so a subclass can frame it
-        differently without reimplementing write()'s bookkeeping.
+        differently without reimplementing write()'s bookkeeping. The header
+        block has not been sent yet on the first call.
+
+        The header block goes out with the first body bytes. While
+        batching, writes are collected up to WRITE_BATCH_SIZE bytes or
+        WRITE_BATCH_BUFFERS buffers; otherwise they are written at once.
         """
-        util.write(self.sock, data, self.chunked)
+        if not self._headers_batched:
+            self._batch_headers()
+        if self.chunked:
+            self._batch.extend(util.chunk_buffers(data))
+        else:
+            self._batch.append(data)
+        self._batch_size += len(data)
+        if (not self._batching
+                or (self.response_length is not None
+                    and self.sent >= self.response_length)
+                or self._batch_size >= WRITE_BATCH_SIZE
+                or len(self._batch) >= WRITE_BATCH_BUFFERS):
+            self._flush()
 
     def can_sendfile(self):
         return self.cfg.sendfile is not False
@@ -524,11 +582,12 @@ class Response:
                 self._omits_body_warned = True
             return True
 
-        self.send_headers()
-
+        if not self._headers_batched:
+            self._batch_headers()
         if self.is_chunked():
             chunk_size = "%X\r\n" % nbytes
-            self.sock.sendall(chunk_size.encode('utf-8'))
+            self._batch.append(chunk_size.encode('utf-8'))
+        self._flush()
         if nbytes > 0:
             self.sock.sendfile(respiter.filelike, offset=offset, count=nbytes)
 
@@ -545,7 +604,8 @@ class Response:
                 self.write(item)
 
     def close(self):
-        if not self.headers_sent:
-            self.send_headers()
+        if not self._headers_batched:
+            self._batch_headers()
         if self.chunked:
-            util.write_chunk(self.sock, b"")
+            self._batch.extend(util.chunk_buffers(b""))
+        self._flush()
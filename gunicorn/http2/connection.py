@@ -10,14 +10,17 @@ Uses the hyper-h2 library for HTTP/2 protocol handling.
 """
 
 import collections
+import functools
 import selectors
+import ssl
+import threading
 from io import BytesIO
 
 from .errors import (
     HTTP2Error, HTTP2ProtocolError, HTTP2ConnectionError,
     HTTP2NotAvailable, HTTP2ErrorCode,
 )
-from .stream import HTTP2Stream
+from .stream import HTTP2Stream, StreamState
 from .request import HTTP2Request
 
 
@@ -46,6 +49,15 @@ def _import_h2():
         raise HTTP2NotAvailable()
 
 
+def _locked(method):
+    """Run ``method`` holding the connection lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class HTTP2ServerConnection:
     """HTTP/2 server-side connection handler.
 
@@ -57,6 +69,14 @@ class HTTP2ServerConnection:
     # Default buffer size for socket reads
     READ_BUFFER_SIZE = 65536
 
+    # Bytes of queued output past which streams wait for it to be written
+    # (see use_output_queue())
+    OUTPUT_QUEUE_LIMIT = 262144
+
+    # Seconds a stream waits for the client to open its flow-control window
+    # before it is reset
+    WINDOW_UPDATE_TIMEOUT = 5.0
+
     def __init__(self, cfg, sock, client_addr):
         """Initialize an HTTP/2 server connection.
 
@@ -104,6 +124,17 @@ class HTTP2ServerConnection:
         self._closed = False
         self._initialized = False
 
+        # h2 is not thread-safe: streams answered from several threads
+        # take turns driving it.
+        self._lock = threading.RLock()
+        # Signalled when queued output was written or frames were received
+        self._changed = threading.Condition(self._lock)
+        # Frames waiting for flush_output(), once use_output_queue() is called
+        self._output = None
+        self._output_ready = None
+        self._flush_requested = False
+
+    @_locked
     def initiate_connection(self):
         """Send initial HTTP/2 settings to client.
 
@@ -125,6 +156,73 @@ class HTTP2ServerConnection:
         self._send_pending_data()
         self._initialized = True
 
+    def use_output_queue(self, output_ready):
+        """Leave the socket I/O to an event loop, streams being answered
+        from other threads.
+
+        Frames are queued instead of being written, and ``output_ready`` is
+        called, from any thread, when the queue needs a flush_output(). The
+        socket must then be read with receive_available() only: threads
+        waiting on a flow-control window or for room in the queue are woken
+        up by these two calls.
+        """
+        with self._lock:
+            self._output = bytearray()
+            self._output_ready = output_ready
+
+    @_locked
+    def receive_available(self):
+        """Read what the non-blocking socket has and process it.
+
+        Returns:
+            list: List of HTTP2Request objects for completed requests
+        """
+        try:
+            data = self.sock.recv(self.READ_BUFFER_SIZE)
+            # TLS records decrypted along with the last ones do not make
+            # the socket poll readable again
+            pending = getattr(self.sock, "pending", None)
+            while data and pending is not None and pending():
+                data += self.sock.recv(self.READ_BUFFER_SIZE)
+        except (BlockingIOError, InterruptedError,
+                ssl.SSLWantReadError, ssl.SSLWantWriteError):
+            return []
+        except OSError as e:
+            self._closed = True
+            self._changed.notify_all()
+            raise HTTP2ConnectionError(f"Socket read error: {e}")
+
+        try:
+            return self.receive_data(data)
+        finally:
+            self._changed.notify_all()
+
+    @_locked
+    def flush_output(self):
+        """Write queued frames to the non-blocking socket.
+
+        Returns:
+            bool: True once the queue is empty
+        """
+        self._flush_requested = False
+        try:
+            while self._output:
+                try:
+                    sent = self.sock.send(
+                        bytes(self._output[:self.READ_BUFFER_SIZE]))
+                except (BlockingIOError, InterruptedError,
+                        ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                    return False
+                except OSError as e:
+                    self._closed = True
+                    self._output.clear()
+                    raise HTTP2ConnectionError(f"Socket write error: {e}")
+                del self._output[:sent]
+            return True
+        finally:
+            self._changed.notify_all()
+
+    @_locked
     def receive_data(self, data=None):
         """Process received data and return completed requests.
 
@@ -366,6 +464,7 @@ class HTTP2ServerConnection:
                 exclusive=event.exclusive
             )
 
+    @_locked
     def send_informational(self, stream_id, status, headers):
         """Send an informational response (1xx) on a stream.
 
@@ -398,6 +497,7 @@ class HTTP2ServerConnection:
         self.h2_conn.send_headers(stream_id, response_headers, end_stream=False)
         self._send_pending_data()
 
+    @_locked
     def send_response_headers(self, stream_id, status, headers,
                               end_stream=False):
         """Send response headers on a stream without ending it.
@@ -423,6 +523,7 @@ class HTTP2ServerConnection:
         self._send_pending_data()
         return True
 
+    @_locked
     def end_stream(self, stream_id, trailers=None):
         """Close the sending half of a stream, with trailers if given."""
         if self.streams.get(stream_id) is None:
@@ -447,6 +548,7 @@ class HTTP2ServerConnection:
             return False
         return True
 
+    @_locked
     def send_response(self, stream_id, status, headers, body=None):
         """Send a response on a stream.
 
@@ -485,6 +587,8 @@ class HTTP2ServerConnection:
         Returns:
             int: Available window size, or -1 if waiting failed
         """
+        if self._output is not None:
+            return self._wait_for_window_update(stream_id)
 
         max_wait_attempts = 50  # ~5 seconds at 100ms per attempt
         try:
@@ -542,6 +646,39 @@ class HTTP2ServerConnection:
 
         return result
 
+    def _wait_for_window_update(self, stream_id):
+        """Wait for the event loop to receive a WINDOW_UPDATE.
+
+        Returns:
+            int: Available window size, or -1 if the stream or connection
+            went away
+        """
+        def window():
+            stream = self.streams.get(stream_id)
+            if (self._closed or stream is None
+                    or stream.state == StreamState.CLOSED):
+                return -1
+            return self.h2_conn.local_flow_control_window(stream_id)
+
+        self._changed.wait_for(lambda: window() != 0,
+                               timeout=self.WINDOW_UPDATE_TIMEOUT)
+        return window()
+
+    def _wait_for_output_room(self):
+        """Wait for queued output to drain below OUTPUT_QUEUE_LIMIT.
+
+        Returns:
+            bool: False if the connection closed or the client did not read
+            within the worker timeout
+        """
+        def has_room():
+            return self._closed or len(self._output) <= self.OUTPUT_QUEUE_LIMIT
+
+        timeout = self.cfg.timeout or None
+        self._changed.wait_for(has_room, timeout=timeout)
+        return not self._closed and len(self._output) <= self.OUTPUT_QUEUE_LIMIT
+
+    @_locked
     def send_data(self, stream_id, data, end_stream=False):
         """Send data on a stream.
 
@@ -567,7 +704,12 @@ class HTTP2ServerConnection:
                     # Wait for WINDOW_UPDATE per RFC 7540 Section 6.9.2
                     self._send_pending_data()
                     available = self._wait_for_flow_control_window(stream_id)
-                    if available <= 0:
+                    if available == 0:
+                        # The client never opened the window: end the stream
+                        # instead of leaving it without END_STREAM
+                        self.reset_stream(stream_id)
+                        return False
+                    if available < 0:
                         return False
                     chunk_size = min(available, self.max_frame_size, len(data_to_send))
 
@@ -577,6 +719,8 @@ class HTTP2ServerConnection:
 
                 self.h2_conn.send_data(stream_id, chunk, end_stream=is_final)
                 self._send_pending_data()
+                if self._output is not None and not self._wait_for_output_room():
+                    return False
 
             stream.send_data(data, end_stream=end_stream)
             return True
@@ -586,6 +730,7 @@ class HTTP2ServerConnection:
             self.cleanup_stream(stream_id)
             return False
 
+    @_locked
     def send_trailers(self, stream_id, trailers):
         """Send trailing headers on a stream.
 
@@ -645,6 +790,7 @@ class HTTP2ServerConnection:
 
         self.send_response(stream_id, status_code, headers, body)
 
+    @_locked
     def reset_stream(self, stream_id, error_code=0x8):
         """Reset a stream with RST_STREAM.
 
@@ -659,6 +805,7 @@ class HTTP2ServerConnection:
         self.h2_conn.reset_stream(stream_id, error_code=error_code)
         self._send_pending_data()
 
+    @_locked
     def close(self, error_code=0x0, last_stream_id=None):
         """Close the connection gracefully with GOAWAY.
 
@@ -680,11 +827,18 @@ class HTTP2ServerConnection:
             self._send_pending_data()
         except Exception:
             pass  # Best effort
+        finally:
+            self._changed.notify_all()
 
     def _send_pending_data(self):
         """Send any pending data from h2 to the socket."""
         data = self.h2_conn.data_to_send()
-        if data:
+        if data and self._output is not None:
+            self._output += data
+            if not self._flush_requested:
+                self._flush_requested = True
+                self._output_ready()
+        elif data:
             try:
                 self.sock.sendall(data)
             except (OSError, IOError) as e:
@@ -696,6 +850,7 @@ class HTTP2ServerConnection:
         """Check if connection is closed."""
         return self._closed
 
+    @_locked
     def cleanup_stream(self, stream_id):
         """Remove a stream after processing is complete.
 
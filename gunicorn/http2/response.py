@@ -45,6 +45,7 @@ class HTTP2Response(Response):
         self.headers_sent = True
 
     def _emit_body(self, data):
+        self.send_headers()
         if not data:
             return
         self.h2_conn.send_data(self.stream_id, data, end_stream=False)
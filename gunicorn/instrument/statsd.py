@@ -4,8 +4,13 @@
 
 "Bare-bones implementation of statsD's protocol, client-side"
 
+import atexit
 import logging
+import os
+import random
 import socket
+import threading
+import time
 from re import sub
 
 from gunicorn.glogging import Logger
@@ -39,6 +44,24 @@ class Statsd(Logger):
             self.sock = None
 
         self.dogstatsd_tags = cfg.dogstatsd_tags
+        # http://docs.datadoghq.com/guides/dogstatsd/#datagram-format
+        self.tags_suffix = b""
+        if self.dogstatsd_tags:
+            self.tags_suffix = b"|#" + self.dogstatsd_tags.encode('ascii')
+
+        self.timer_sample_rate = cfg.statsd_timer_sample_rate
+        self.flush_interval = cfg.statsd_flush_interval / 1000.0
+        self.max_packet_size = cfg.statsd_max_packet_size
+        # metrics aggregated until the next flush: counters are summed,
+        # gauges replaced, and the lines of timers and histograms kept
+        self.metrics_lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.samples = []
+        # the process the flusher thread runs in
+        self.flusher_pid = None
+        if self.flush_interval:
+            os.register_at_fork(after_in_child=self._after_fork)
 
     # Log errors and warnings
     def critical(self, msg, *args, **kwargs):
@@ -111,30 +134,120 @@ class Statsd(Logger):
     # statsD methods
     # you can use those directly if you want
     def gauge(self, name, value):
+        if self.flush_interval:
+            with self.metrics_lock:
+                self._start_flusher()
+                self.gauges[name] = value
+            return
         self._sock_send("{0}{1}:{2}|g".format(self.prefix, name, value))
 
     def increment(self, name, value, sampling_rate=1.0):
+        if self.flush_interval:
+            self._count(name, value, sampling_rate)
+            return
         self._sock_send("{0}{1}:{2}|c|@{3}".format(self.prefix, name, value, sampling_rate))
 
     def decrement(self, name, value, sampling_rate=1.0):
+        if self.flush_interval:
+            self._count(name, -value, sampling_rate)
+            return
         self._sock_send("{0}{1}:-{2}|c|@{3}".format(self.prefix, name, value, sampling_rate))
 
     def timer(self, name, value):
-        self._sock_send("{0}{1}:{2}|ms".format(self.prefix, name, value))
+        rate = self.timer_sample_rate
+        if rate < 1.0:
+            if random.random() >= rate:
+                return
+            self._sample("{0}{1}:{2}|ms|@{3}".format(self.prefix, name, value, rate))
+        else:
+            self._sample("{0}{1}:{2}|ms".format(self.prefix, name, value))
 
     def histogram(self, name, value):
-        self._sock_send("{0}{1}:{2}|h".format(self.prefix, name, value))
+        self._sample("{0}{1}:{2}|h".format(self.prefix, name, value))
+
+    def flush(self):
+        """Send the aggregated metrics, packed in as few datagrams as
+        statsd_max_packet_size allows."""
+        with self.metrics_lock:
+            counters, self.counters = self.counters, {}
+            gauges, self.gauges = self.gauges, {}
+            samples, self.samples = self.samples, []
+
+        lines = ["{0}{1}:{2}|c".format(self.prefix, name, value)
+                 for name, value in counters.items()]
+        lines.extend("{0}{1}:{2}|g".format(self.prefix, name, value)
+                     for name, value in gauges.items())
+        lines.extend(samples)
+
+        try:
+            suffix = self.tags_suffix
+            packet = []
+            size = 0
+            for line in lines:
+                line = line.encode("ascii") + suffix
+                if packet and size + 1 + len(line) > self.max_packet_size:
+                    self._send_packet(b"\n".join(packet))
+                    packet = []
+                    size = -1
+                packet.append(line)
+                size += 1 + len(line)
+            if packet:
+                self._send_packet(b"\n".join(packet))
+        except Exception:
+            Logger.warning(self, "Error sending message to statsd", exc_info=True)
+
+    def _count(self, name, value, sampling_rate):
+        if sampling_rate != 1.0:
+            # the estimate of the full count
+            value = value / sampling_rate
+        with self.metrics_lock:
+            self._start_flusher()
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _sample(self, msg):
+        if self.flush_interval:
+            with self.metrics_lock:
+                self._start_flusher()
+                self.samples.append(msg)
+            return
+        self._sock_send(msg)
+
+    def _start_flusher(self):
+        # called with the lock held
+        pid = os.getpid()
+        if self.flusher_pid == pid:
+            return
+        self.flusher_pid = pid
+        threading.Thread(target=self._run_flusher, daemon=True,
+                         name="gunicorn-statsd").start()
+        atexit.register(self._flush_at_exit)
+
+    def _after_fork(self):
+        # the parent sends what it aggregated itself, and its flusher may
+        # have held the lock while forking
+        self.metrics_lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.samples = []
+        self.flusher_pid = None
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _flush_at_exit(self):
+        if self.flusher_pid == os.getpid():
+            self.flush()
+
+    def _send_packet(self, packet):
+        if self.sock:
+            self.sock.send(packet)
 
     def _sock_send(self, msg):
         try:
             if isinstance(msg, str):
                 msg = msg.encode("ascii")
-
-            # http://docs.datadoghq.com/guides/dogstatsd/#datagram-format
-            if self.dogstatsd_tags:
-                msg = msg + b"|#" + self.dogstatsd_tags.encode('ascii')
-
-            if self.sock:
-                self.sock.send(msg)
+            self._send_packet(msg + self.tags_suffix)
         except Exception:
             Logger.warning(self, "Error sending message to statsd", exc_info=True)
@@ -0,0 +1,155 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+# Worker scoreboard: a memory map shared by the arbiter and its workers, with
+# a fixed-size slot per worker. Workers store what they are doing in their
+# slot as they go, the arbiter reads every slot without asking the workers.
+
+import mmap
+import time
+
+# Slot fields, 8 bytes each, read and written through an int64 and a double
+# view of the same slot.
+REQUESTS = 0
+CONNECTIONS = 1
+IN_FLIGHT = 2
+LAST_STATUS = 3
+BYTES_SENT = 4
+REQUEST_START = 5
+LATENCY = 6
+STATE = 7
+HEARTBEAT = 8
+
+# Worker states
+STARTING = 0
+SERVING = 1
+RECYCLING = 2  # serving, waiting to be replaced
+
+# two cache lines per slot, so that workers do not write to a shared one
+SLOT_SIZE = 128
+
+# Slots of the arbiter's scoreboard. Workers spawned while all of them are
+# taken get a private slot and are not reported.
+MAX_SLOTS = 1024
+
+
+class ScoreboardSlot:
+    """The counters of one worker.
+
+    Only the worker writes to its slot. The counters are updated without
+    a lock, threads of a worker updating them at the same instant may lose
+    an update.
+    """
+
+    __slots__ = ("index", "_ints", "_floats")
+
+    def __init__(self, buf, index=None):
+        self.index = index
+        self._ints = buf.cast("q")
+        self._floats = buf.cast("d")
+
+    def reset(self):
+        for i in range(len(self._ints)):
+            self._ints[i] = 0
+
+    def set_ready(self):
+        """Tell the arbiter the application is loaded and the worker is
+        about to serve requests."""
+        self._ints[STATE] = SERVING
+
+    @property
+    def ready(self):
+        return self._ints[STATE] != STARTING
+
+    def set_recycling(self):
+        """Ask the arbiter to replace the worker."""
+        self._ints[STATE] = RECYCLING
+
+    @property
+    def recycling(self):
+        return self._ints[STATE] == RECYCLING
+
+    def heartbeat(self):
+        self._floats[HEARTBEAT] = time.monotonic()
+
+    @property
+    def last_heartbeat(self):
+        """Monotonic time of the latest heartbeat."""
+        return self._floats[HEARTBEAT]
+
+    def connection_opened(self):
+        self._ints[CONNECTIONS] += 1
+
+    def connection_closed(self):
+        self._ints[CONNECTIONS] -= 1
+
+    def set_connections(self, count):
+        self._ints[CONNECTIONS] = count
+
+    def request_started(self):
+        """Count a request in flight and return its start, to be passed to
+        request_finished."""
+        self._ints[IN_FLIGHT] += 1
+        self._floats[REQUEST_START] = time.time()
+        return time.monotonic()
+
+    def request_finished(self, started, status, sent):
+        latency = time.monotonic() - started
+        ints = self._ints
+        ints[IN_FLIGHT] -= 1
+        if ints[IN_FLIGHT] <= 0:
+            self._floats[REQUEST_START] = 0.0
+        ints[REQUESTS] += 1
+        ints[LAST_STATUS] = status or 0
+        ints[BYTES_SENT] += sent or 0
+        self._floats[LATENCY] += latency
+
+    def snapshot(self):
+        """Return the counters of the slot as a dict."""
+        ints = self._ints
+        floats = self._floats
+        request_start = floats[REQUEST_START]
+        return {
+            "requests": ints[REQUESTS],
+            "connections": ints[CONNECTIONS],
+            "in_flight": ints[IN_FLIGHT],
+            "request_start": request_start or None,
+            "last_status": ints[LAST_STATUS] or None,
+            "bytes_sent": ints[BYTES_SENT],
+            "latency_total": round(floats[LATENCY], 6),
+            "ready": ints[STATE] != STARTING,
+            "recycling": ints[STATE] == RECYCLING,
+        }
+
+
+def private_slot():
+    """Return a slot nobody else reads, for workers without a scoreboard."""
+    return ScoreboardSlot(memoryview(bytearray(SLOT_SIZE)))
+
+
+class Scoreboard:
+    """Slots in an anonymous shared memory map, created by the arbiter
+    before it forks the workers."""
+
+    def __init__(self, nslots=MAX_SLOTS):
+        self.nslots = nslots
+        self.mem = mmap.mmap(-1, nslots * SLOT_SIZE)
+        self.view = memoryview(self.mem)
+        self.free = list(range(nslots - 1, -1, -1))
+
+    def slot(self, index):
+        start = index * SLOT_SIZE
+        return ScoreboardSlot(self.view[start:start + SLOT_SIZE], index)
+
+    def acquire(self):
+        """Return a zeroed slot, or a private slot when all are taken."""
+        if not self.free:
+            return private_slot()
+        slot = self.slot(self.free.pop())
+        slot.reset()
+        return slot
+
+    def release(self, slot):
+        if slot.index is not None:
+            self.free.append(slot.index)
@@ -2,8 +2,11 @@
 # This file is part of gunicorn released under the MIT license.
 # See the NOTICE for more information.
 
+import ctypes
 import errno
 import os
+import select
+import selectors
 import socket
 import ssl
 import stat
@@ -15,6 +18,22 @@ from gunicorn import util
 
 PLATFORM = sys.platform
 
+# exposed by the socket module from Python 3.11
+SO_INCOMING_CPU = getattr(socket, "SO_INCOMING_CPU",
+                          49 if PLATFORM == "linux" else None)
+
+# include/uapi/asm-generic/socket.h
+SO_ATTACH_REUSEPORT_CBPF = 51
+
+# classic BPF opcodes, include/uapi/linux/filter.h
+BPF_LD_W_ABS = 0x20
+BPF_ALU_MOD_K = 0x94
+BPF_JEQ_K = 0x15
+BPF_RET_K = 0x06
+BPF_MAXINSNS = 4096
+# ancillary load of the CPU handling the packet
+SKF_AD_CPU = 0xfffff000 + 36
+
 
 class BaseSocket:
 
@@ -235,6 +254,159 @@ def close_sockets(listeners, unlink=True):
             os.unlink(sock_name)
 
 
+def set_incoming_cpu(listeners, cpu):
+    """Have the kernel hand these TCP listeners the connections received on
+    ``cpu``, among the listeners sharing their port with ``SO_REUSEPORT``."""
+    if SO_INCOMING_CPU is None:
+        return
+    for lnr in listeners:
+        if not isinstance(lnr, TCPSocket):
+            continue
+        try:
+            lnr.sock.setsockopt(socket.SOL_SOCKET, SO_INCOMING_CPU, cpu)
+        except OSError:
+            pass
+
+
+def cpu_steering_program(cpus, indexes):
+    """Return a classic BPF program, as a list of ``(code, jt, jf, k)``,
+    picking in a ``SO_REUSEPORT`` group the listener of index ``cpus[cpu]``
+    for the CPU receiving a connection, or else the listener of index
+    ``indexes[cpu % len(indexes)]``."""
+    program = [(BPF_LD_W_ABS, 0, 0, SKF_AD_CPU)]
+    for cpu, index in sorted(cpus.items()):
+        program += [(BPF_JEQ_K, 0, 1, cpu), (BPF_RET_K, 0, 0, index)]
+    program.append((BPF_ALU_MOD_K, 0, 0, len(indexes)))
+    for i, index in enumerate(indexes[:-1]):
+        program += [(BPF_JEQ_K, 0, 1, i), (BPF_RET_K, 0, 0, index)]
+    program.append((BPF_RET_K, 0, 0, indexes[-1]))
+    return program
+
+
+def attach_cpu_steering(listeners, program, log):
+    """Steer the connections of the ``SO_REUSEPORT`` groups of these TCP
+    listeners with ``program``. The program applies to the whole group, the
+    last listener to attach one replaces it."""
+    filters = b"".join(struct.pack("HBBI", *insn) for insn in program)
+    buf = ctypes.create_string_buffer(filters, len(filters))
+    # struct sock_fprog
+    fprog = struct.pack("HP", len(program), ctypes.addressof(buf))
+    for lnr in listeners:
+        if not isinstance(lnr, TCPSocket):
+            continue
+        try:
+            lnr.sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_REUSEPORT_CBPF,
+                                fprog)
+        except OSError as e:
+            log.warning("Cannot steer the connections of %s by CPU: %s",
+                        lnr, e)
+
+
+class SteeringGroup:
+    """The ``SO_REUSEPORT`` listeners the arbiter opens for the workers, a
+    set per key (the scoreboard slot of a worker), and the connections
+    steered among them by CPU.
+
+    The index of a listener in its group is the order it joined the group
+    in, and the arbiter holding the listeners keeps it while their worker
+    is replaced. Once a listener is closed, the last one of the group takes
+    its index."""
+
+    def __init__(self, conf, log):
+        self.conf = conf
+        self.log = log
+        self.address = list(conf.address)
+        self.listeners = {}
+        self.order = []
+        self.program = None
+
+    def get(self, key):
+        """Return the listeners of ``key``, opening them if needed."""
+        listeners = self.listeners.get(key)
+        if listeners is None:
+            listeners = create_sockets(self.conf, self.log)
+            for lnr in listeners:
+                # not inherited by a re-executed arbiter
+                lnr.sock.set_inheritable(False)
+            self.listeners[key] = listeners
+            self.order.append(key)
+        return listeners
+
+    def remove(self, key):
+        """Close the listeners of ``key``, which no process uses anymore."""
+        for lnr in self.listeners.pop(key):
+            lnr.close()
+        pos = self.order.index(key)
+        last = self.order.pop()
+        if last != key:
+            self.order[pos] = last
+
+    def close(self, keep=None):
+        """Close the listeners but those of ``keep``, in a process that is
+        done with the group."""
+        for key, listeners in self.listeners.items():
+            if key != keep:
+                for lnr in listeners:
+                    lnr.close()
+        self.listeners = {}
+        self.order = []
+        self.program = None
+
+    def steer(self, live):
+        """Steer the connections received on each CPU to the listeners of a
+        running worker. ``live`` maps the keys of the running workers to the
+        CPUs they are pinned to, or None: a CPU goes to a worker pinned to
+        it, the others are spread over all the workers."""
+        indexes = {key: i for i, key in enumerate(self.order)}
+        live = {key: cpus for key, cpus in live.items() if key in indexes}
+        if not live:
+            return
+        owners = {}
+        for key, cpus in live.items():
+            for cpu in cpus or ():
+                owners.setdefault(cpu, []).append(indexes[key])
+        cpus = {cpu: sorted(idx)[cpu % len(idx)]
+                for cpu, idx in owners.items()}
+        targets = sorted(indexes[key] for key in live)
+        program = cpu_steering_program(cpus, targets)
+        if len(program) > BPF_MAXINSNS:
+            program = cpu_steering_program({}, targets)
+        if program != self.program:
+            attach_cpu_steering(self.listeners[self.order[0]], program,
+                                self.log)
+            self.program = program
+
+
+if hasattr(select, "EPOLLEXCLUSIVE"):
+    class ExclusiveSelector(selectors.EpollSelector):
+        """An epoll selector registering the given listeners with
+        ``EPOLLEXCLUSIVE``: a connection wakes up one of the workers waiting
+        on a shared listener, rather than all of them."""
+
+        def __init__(self, listeners):
+            super().__init__()
+            self.exclusive = {lnr.fileno() for lnr in listeners}
+
+        def register(self, fileobj, events, data=None):
+            key = super().register(fileobj, events, data)
+            if key.fd in self.exclusive and events == selectors.EVENT_READ:
+                # the flag can only be given when the fd is added
+                self._selector.unregister(key.fd)
+                self._selector.register(
+                    key.fd, select.EPOLLIN | select.EPOLLEXCLUSIVE)
+            return key
+else:
+    ExclusiveSelector = None
+
+
+def listener_selector(conf, listeners):
+    """Return the selector a worker waits on its listeners with."""
+    if (conf.epoll_exclusive and ExclusiveSelector is not None
+            and not conf.reuse_port):
+        return ExclusiveSelector(listeners)
+    return selectors.DefaultSelector()
+
+
 def _get_alpn_protocols(conf):
     """Get ALPN protocol list from configuration.
 
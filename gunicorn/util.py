@@ -5,6 +5,7 @@ import ast
 import email.utils
 import errno
 import fcntl
+import gc
 import html
 import importlib
 import inspect
@@ -32,6 +33,14 @@ import urllib.parse
 
 REDIRECT_TO = getattr(os, 'devnull', '/dev/null')
 
+# Most buffers a single sendmsg call accepts.
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = -1
+if IOV_MAX <= 0:
+    IOV_MAX = 1024
+
 # Characters that make a path a glob pattern rather than a literal path.
 # glob.has_magic() does the same thing but is absent from glob.__all__.
 GLOB_MAGIC_RE = re.compile(r'[*?[]')
@@ -334,12 +343,17 @@ except ImportError:
                 pass
 
 
-def write_chunk(sock, data):
+def chunk_buffers(data):
+    """Return the buffers framing ``data`` as one chunk of a chunked body."""
     if isinstance(data, str):
         data = data.encode('utf-8')
-    chunk_size = "%X\r\n" % len(data)
-    chunk = b"".join([chunk_size.encode('utf-8'), data, b"\r\n"])
-    sock.sendall(chunk)
+    if not data:
+        return [b"0\r\n\r\n"]
+    return [b"%X\r\n" % len(data), data, b"\r\n"]
+
+
+def write_chunk(sock, data):
+    write_buffers(sock, chunk_buffers(data))
 
 
 def write(sock, data, chunked=False):
@@ -348,6 +362,35 @@ def write(sock, data, chunked=False):
     sock.sendall(data)
 
 
+def write_buffers(sock, buffers):
+    """Write ``buffers`` to ``sock`` in order, without joining them when the
+    socket supports ``sendmsg``."""
+    if len(buffers) == 1:
+        sock.sendall(buffers[0])
+        return
+    try:
+        sendmsg_all(sock, buffers)
+    except (AttributeError, NotImplementedError):
+        # TLS sockets have no sendmsg
+        sock.sendall(b"".join(buffers))
+
+
+def sendmsg_all(sock, buffers):
+    """Write all of ``buffers`` to ``sock`` with as few ``sendmsg`` calls as
+    the socket allows."""
+    buffers = [data for data in buffers if len(data)]
+    i = 0
+    while i < len(buffers):
+        sent = sock.sendmsg(buffers[i:i + IOV_MAX])
+        while sent:
+            size = len(buffers[i])
+            if sent < size:
+                buffers[i] = memoryview(buffers[i])[sent:]
+                break
+            sent -= size
+            i += 1
+
+
 def write_nonblock(sock, data, chunked=False):
     timeout = sock.gettimeout()
     if timeout != 0.0:
@@ -611,6 +654,98 @@ def seed():
         random.seed('%s.%s' % (time.time(), os.getpid()))
 
 
+def freeze_gc():
+    """Collect garbage, then move the objects left to the permanent
+    generation so that the collectors of the processes forked afterwards
+    leave their pages shared."""
+    gc.collect()
+    gc.freeze()
+
+
+def memory_usage(pid):
+    """Return the memory of process ``pid`` in bytes, from
+    ``/proc/<pid>/smaps_rollup``, or None where it cannot be read.
+
+    ``pss`` counts each shared page divided by the number of processes
+    mapping it, ``uss`` the pages only this process maps and ``shared``
+    the pages it maps along with other processes.
+    """
+    fields = {}
+    try:
+        with open("/proc/%d/smaps_rollup" % pid) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                value = value.split()
+                if len(value) == 2 and value[1] == "kB":
+                    fields[name] = int(value[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    if "Rss" not in fields:
+        return None
+    return {
+        "rss": fields["Rss"],
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "swap": fields.get("Swap", 0),
+    }
+
+
+def parse_cpu_list(val):
+    """Parse a CPU list such as ``0-3,8,10-11``, the format of
+    ``/sys/devices/system/node/node*/cpulist``, into a sorted list."""
+    cpus = set()
+    for part in val.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        first = int(first)
+        last = int(last) if last else first
+        if first < 0 or last < first:
+            raise ValueError("Invalid CPU range: %r" % part)
+        cpus.update(range(first, last + 1))
+    return sorted(cpus)
+
+
+def numa_nodes(cpus):
+    """Return the CPUs of ``cpus`` grouped by NUMA node, as read from
+    ``/sys/devices/system/node``. A single group where the topology cannot
+    be read."""
+    cpus = set(cpus)
+    nodes = []
+    try:
+        names = os.listdir("/sys/devices/system/node")
+    except OSError:
+        names = []
+    names = sorted((name for name in names
+                    if name.startswith("node") and name[4:].isdigit()),
+                   key=lambda name: int(name[4:]))
+    for name in names:
+        try:
+            with open("/sys/devices/system/node/%s/cpulist" % name) as f:
+                node = set(parse_cpu_list(f.read().strip()))
+        except (OSError, ValueError):
+            continue
+        if node & cpus:
+            nodes.append(sorted(node & cpus))
+    return nodes or [sorted(cpus)]
+
+
+def cpu_sets(mode, cpus=None):
+    """Return the CPU sets the workers are pinned to in turn: one per CPU
+    in ``cpu`` mode, one per NUMA node in ``numa`` mode, none when the
+    workers are not pinned or pinning is not supported. ``cpus`` defaults
+    to the CPUs this process may run on."""
+    if mode == "off" or not hasattr(os, "sched_setaffinity"):
+        return []
+    if not cpus:
+        cpus = os.sched_getaffinity(0)
+    cpus = sorted(cpus)
+    if mode == "numa":
+        return numa_nodes(cpus)
+    return [[cpu] for cpu in cpus]
+
+
 def check_is_writable(path):
     try:
         with open(path, 'a') as f:
@@ -0,0 +1,131 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+# Warm-up requests, run by a worker against its application after loading
+# it and before accepting connections. Responses are discarded.
+
+import io
+import sys
+
+from gunicorn import SERVER_SOFTWARE, util
+from gunicorn.http.wsgi import FileWrapper
+
+
+def parse_request(request):
+    """Return the method, path and query string of ``"METHOD /path?query"``
+    or ``"/path?query"``."""
+    method, _, target = request.strip().rpartition(" ")
+    path, _, query = target.partition("?")
+    return (method or "GET").upper(), path or "/", query
+
+
+def wsgi_environ(cfg, request):
+    """Return the environ of a warm-up request.
+
+    ``request`` is a request line, or a dict of environ keys updating
+    the environ of ``GET /``.
+    """
+    overrides = {}
+    if isinstance(request, dict):
+        overrides = request
+        request = "GET /"
+    method, path, query = parse_request(request)
+    environ = {
+        "REQUEST_METHOD": method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": util.unquote_to_wsgi_str(path),
+        "QUERY_STRING": query,
+        "RAW_URI": "%s?%s" % (path, query) if query else path,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "SERVER_SOFTWARE": SERVER_SOFTWARE,
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_HOST": "localhost",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": cfg.threads > 1,
+        "wsgi.multiprocess": cfg.workers > 1,
+        "wsgi.run_once": False,
+        "wsgi.file_wrapper": FileWrapper,
+        "gunicorn.warmup": True,
+    }
+    environ.update(overrides)
+    return environ
+
+
+def run_wsgi(app, environ):
+    """Run a warm-up request through a WSGI application and return the
+    response status."""
+    status = []
+
+    def start_response(value, headers, exc_info=None):
+        status[:] = [value]
+        return lambda data: None
+
+    body = app(environ, start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+    return status[0] if status else None
+
+
+def asgi_scope(cfg, request, state=None):
+    """Return the HTTP scope of a warm-up request.
+
+    ``request`` is a request line, or a dict of scope keys updating the
+    scope of ``GET /``.
+    """
+    overrides = {}
+    if isinstance(request, dict):
+        overrides = request
+        request = "GET /"
+    method, path, query = parse_request(request)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": util.unquote_to_wsgi_str(path).encode("latin-1").decode(
+            "utf-8", "replace"),
+        "raw_path": path.encode("latin-1"),
+        "query_string": query.encode("latin-1"),
+        "root_path": cfg.root_path or "",
+        "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 0),
+        "extensions": {"gunicorn.warmup": {}},
+    }
+    if state is not None:
+        scope["state"] = state
+    scope.update(overrides)
+    return scope
+
+
+async def run_asgi(app, scope):
+    """Run a warm-up request through an ASGI application and return the
+    response status."""
+    status = None
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            return {"type": "http.disconnect"}
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
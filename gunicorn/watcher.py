@@ -0,0 +1,126 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+# Event-driven wait for the arbiter: a selector watching a pidfd per worker,
+# a pipe the signal handlers write to and the sockets the arbiter expects a
+# message on, along with a heap of the times
+# the workers' heartbeats are due. The arbiter sleeps until a worker exits,
+# a signal arrives or a heartbeat is due, and reaps exactly the workers
+# that exited.
+
+import heapq
+import os
+import selectors
+
+from gunicorn import util
+
+
+def pidfd_supported():
+    """Whether processes can be watched through pidfds (Linux 5.3+)."""
+    if not hasattr(os, "pidfd_open"):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return False
+    return True
+
+
+class Watcher:
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.pidfds = {}
+        self.fds = set()
+        self.deadlines = []
+
+        self.wake_r, self.wake_w = os.pipe()
+        for fd in (self.wake_r, self.wake_w):
+            util.set_non_blocking(fd)
+            util.close_on_exec(fd)
+        self.selector.register(self.wake_r, selectors.EVENT_READ)
+
+    def wake(self):
+        """Interrupt ``wait``. Safe to call from a signal handler or another
+        thread."""
+        try:
+            os.write(self.wake_w, b".")
+        except (BlockingIOError, OSError):
+            # the pipe is full, a wake-up is pending anyway
+            pass
+
+    def add(self, pid):
+        """Watch ``pid``. Return False if it is already reaped."""
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return False
+        util.close_on_exec(fd)
+        self.pidfds[pid] = fd
+        self.selector.register(fd, selectors.EVENT_READ, pid)
+        return True
+
+    def remove(self, pid):
+        fd = self.pidfds.pop(pid, None)
+        if fd is not None:
+            self.selector.unregister(fd)
+            os.close(fd)
+
+    def add_fd(self, fd):
+        """Have ``wait`` return once ``fd`` is readable, until it is
+        removed."""
+        if fd not in self.fds:
+            self.selector.register(fd, selectors.EVENT_READ)
+            self.fds.add(fd)
+
+    def remove_fd(self, fd):
+        if fd in self.fds:
+            self.fds.discard(fd)
+            self.selector.unregister(fd)
+
+    def schedule(self, pid, deadline):
+        """Have ``expired`` return ``pid`` once the monotonic clock passes
+        ``deadline``."""
+        heapq.heappush(self.deadlines, (deadline, pid))
+
+    def expired(self, now):
+        """Return the watched pids whose deadline passed, removing those
+        deadlines."""
+        pids = []
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, pid = heapq.heappop(self.deadlines)
+            if pid in self.pidfds:
+                pids.append(pid)
+        return pids
+
+    def next_deadline(self):
+        """Return the earliest deadline of a watched pid, or None."""
+        while self.deadlines and self.deadlines[0][1] not in self.pidfds:
+            heapq.heappop(self.deadlines)
+        return self.deadlines[0][0] if self.deadlines else None
+
+    def wait(self, timeout):
+        """Wait up to ``timeout`` seconds, None for no limit, and return the
+        pids of the watched processes that exited."""
+        exited = []
+        for key, _ in self.selector.select(timeout):
+            if key.fd == self.wake_r:
+                try:
+                    while os.read(self.wake_r, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+            elif key.data is not None:
+                exited.append(key.data)
+        return exited
+
+    def close(self):
+        for fd in self.pidfds.values():
+            os.close(fd)
+        self.pidfds.clear()
+        self.fds.clear()
+        self.deadlines = []
+        self.selector.close()
+        os.close(self.wake_r)
+        os.close(self.wake_w)
@@ -2,6 +2,7 @@
 # This file is part of gunicorn released under the MIT license.
 # See the NOTICE for more information.
 
+import gc
 import io
 import os
 import signal
@@ -12,7 +13,7 @@ from datetime import datetime
 from random import randint
 from ssl import SSLError
 
-from gunicorn import util
+from gunicorn import util, warmup
 from gunicorn.http.errors import (
     ForbiddenProxyRequest, InvalidHeader,
     InvalidHeaderName, InvalidHTTPVersion,
@@ -25,7 +26,8 @@ from gunicorn.http.errors import (
 )
 from gunicorn.http.wsgi import Response, default_environ
 from gunicorn.reloader import reloader_engines
-from gunicorn.workers.workertmp import WorkerTmp
+from gunicorn.scoreboard import private_slot
+from gunicorn.workers.workertmp import SharedHeartbeat, WorkerTmp
 
 
 class Worker:
@@ -36,6 +38,13 @@ class Worker:
 
     PIPE = []
 
+    # where the worker counts its requests, replaced with a slot of the
+    # arbiter's scoreboard when it is spawned
+    score = private_slot()
+
+    # seconds between two reads of the worker's memory
+    MEMORY_CHECK_INTERVAL = 1.0
+
     def __init__(self, age, ppid, sockets, app, timeout, cfg, log):
         """\
         This is called pre-fork so it shouldn't do anything to the
@@ -61,9 +70,20 @@ class Worker:
         else:
             self.max_requests = sys.maxsize
 
+        if cfg.max_worker_memory > 0:
+            jitter = randint(0, cfg.max_worker_memory_jitter)
+            self.max_memory = (cfg.max_worker_memory + jitter) * 1024 * 1024
+        else:
+            self.max_memory = 0
+        self.memory_checked = 0.0
+
         self.alive = True
         self.log = log
-        self.tmp = WorkerTmp(cfg)
+        if cfg.worker_heartbeat == "file":
+            self.tmp = WorkerTmp(cfg)
+        else:
+            # moved to the worker's scoreboard slot when it is spawned
+            self.tmp = SharedHeartbeat(private_slot())
 
     def __str__(self):
         return "<Worker %s>" % self.pid
@@ -75,6 +95,34 @@ class Worker:
         this task, the master process will murder your workers.
         """
         self.tmp.notify()
+        if self.max_memory:
+            self.check_memory()
+
+    def check_memory(self):
+        """Ask to be replaced once over ``max_worker_memory``."""
+        now = time.monotonic()
+        if now - self.memory_checked < self.MEMORY_CHECK_INTERVAL:
+            return
+        self.memory_checked = now
+        if self.score.recycling:
+            return
+
+        usage = util.memory_usage(os.getpid())
+        if usage is None:
+            self.log.warning("Cannot read the memory of the worker, "
+                             "max_worker_memory is ignored")
+            self.max_memory = 0
+            return
+        if usage["uss"] <= self.max_memory:
+            return
+
+        self.log.info("Worker using %d MB, over max_worker_memory "
+                      "(pid: %s)", usage["uss"] // (1024 * 1024), self.pid)
+        if self.score.index is None:
+            # not on the scoreboard, the arbiter cannot replace it
+            self.alive = False
+        else:
+            self.score.set_recycling()
 
     def run(self):
         """\
@@ -102,6 +150,9 @@ class Worker:
         # Reseed the random number generator
         util.seed()
 
+        if self.cfg.worker_gc_threshold:
+            gc.set_threshold(*self.cfg.worker_gc_threshold)
+
         # For waking ourselves up
         self.PIPE = os.pipe()
         for p in self.PIPE:
@@ -111,7 +162,8 @@ class Worker:
         # Prevent fd inheritance
         for s in self.sockets:
             util.close_on_exec(s)
-        util.close_on_exec(self.tmp.fileno())
+        if self.tmp.fileno() is not None:
+            util.close_on_exec(self.tmp.fileno())
 
         self.wait_fds = self.sockets + [self.PIPE[0]]
 
@@ -139,11 +191,37 @@ class Worker:
             self.reloader.start()
 
         self.cfg.post_worker_init(self)
+        self.warm_up()
 
         # Enter main run loop
         self.booted = True
         self.run()
 
+    def warm_up(self):
+        """Run the warm-up requests, then tell the arbiter the worker is
+        ready."""
+        requests = self.cfg.warmup_requests
+        if requests:
+            started = time.monotonic()
+            for request in requests:
+                # a long warm-up must not get the worker killed as hung
+                self.notify()
+                try:
+                    status = warmup.run_wsgi(
+                        self.wsgi, warmup.wsgi_environ(self.cfg, request))
+                    self.log.debug("Warm-up request %r: %s", request, status)
+                except Exception:
+                    self.log.exception("Warm-up request %r failed", request)
+            self.log_warm_up(started, len(requests))
+        self.score.set_ready()
+
+    def log_warm_up(self, started, count):
+        duration = (time.monotonic() - started) * 1000
+        self.log.info("Worker warmed up in %.1f ms (%d requests)",
+                      duration, count,
+                      extra={"metric": "gunicorn.worker.warmup",
+                             "value": duration, "mtype": "timer"})
+
     def load_wsgi(self):
         try:
             self.wsgi = self.app.wsgi()
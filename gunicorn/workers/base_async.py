@@ -26,6 +26,11 @@ class AsyncWorker(base.Worker):
         super().__init__(*args, **kwargs)
         self.worker_connections = self.cfg.worker_connections
 
+    @classmethod
+    def capacity(cls, cfg):
+        """Requests handled at once, for autoscaling."""
+        return cfg.worker_connections
+
     def timeout_ctx(self):
         raise NotImplementedError()
 
@@ -35,6 +40,7 @@ class AsyncWorker(base.Worker):
 
     def handle(self, listener, client, addr):
         req = None
+        self.score.connection_opened()
         try:
             # Complete the handshake to ensure ALPN negotiation is done
             # (needed if do_handshake_on_connect is False)
@@ -115,6 +121,7 @@ class AsyncWorker(base.Worker):
             self.handle_error(req, client, addr, e)
         finally:
             util.close(client)
+            self.score.connection_closed()
 
     def handle_http2(self, listener, client, addr, preface=b""):
         """Handle an HTTP/2 connection.
@@ -171,6 +178,7 @@ class AsyncWorker(base.Worker):
         request_start = datetime.now()
         environ = {}
         resp = None
+        score_start = self.score.request_started()
 
         try:
             self.cfg.pre_request(self, req)
@@ -211,6 +219,9 @@ class AsyncWorker(base.Worker):
             self.log.exception("Error handling HTTP/2 request")
             raise
         finally:
+            self.score.request_finished(
+                score_start, getattr(resp, "status_code", None),
+                getattr(resp, "sent", 0))
             try:
                 self.cfg.post_request(self, req, environ, resp)
             except Exception:
@@ -220,6 +231,7 @@ class AsyncWorker(base.Worker):
         request_start = datetime.now()
         environ = {}
         resp = None
+        score_start = self.score.request_started()
         try:
             self.cfg.pre_request(self, req)
             resp, environ = wsgi.create(req, sock, addr,
@@ -241,6 +253,7 @@ class AsyncWorker(base.Worker):
                 if isinstance(respiter, environ['wsgi.file_wrapper']):
                     resp.write_file(respiter)
                 else:
+                    resp.batch_writes(respiter)
                     for item in respiter:
                         resp.write(item)
                 resp.close()
@@ -270,6 +283,9 @@ class AsyncWorker(base.Worker):
                 raise StopIteration()
             raise
         finally:
+            self.score.request_finished(
+                score_start, getattr(resp, "status_code", None),
+                getattr(resp, "sent", 0))
             try:
                 self.cfg.post_request(self, req, environ, resp)
             except Exception:
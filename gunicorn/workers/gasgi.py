@@ -13,8 +13,11 @@ import asyncio
 import os
 import signal
 import sys
+import time
 
+from gunicorn import sock, warmup
 from gunicorn.workers import base
+from gunicorn.asgi import broadcast
 from gunicorn.asgi.protocol import ASGIProtocol
 
 
@@ -28,6 +31,9 @@ class ASGIWorker(base.Worker):
     - Optional uvloop for improved performance
     """
 
+    # BroadcastChannel to the other workers, with websocket_broadcast
+    broadcast = None
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.worker_connections = self.cfg.worker_connections
@@ -38,6 +44,11 @@ class ASGIWorker(base.Worker):
         self.state = {}  # Shared state for lifespan
         self._quick_shutdown = False  # True for SIGINT/SIGQUIT (immediate), False for SIGTERM (graceful)
 
+    @classmethod
+    def capacity(cls, cfg):
+        """Requests handled at once, for autoscaling."""
+        return cfg.worker_connections
+
     @classmethod
     def check_config(cls, cfg, log):
         """Validate configuration for ASGI worker."""
@@ -67,15 +78,31 @@ class ASGIWorker(base.Worker):
                 import uvloop
                 self.loop = uvloop.new_event_loop()
                 self.log.debug("Using uvloop event loop")
+                if self.cfg.epoll_exclusive:
+                    self.log.warning("epoll_exclusive is not supported "
+                                     "by uvloop, ignored")
             except ImportError:
                 self.log.warning("uvloop not available, falling back to asyncio")
-                self.loop = asyncio.new_event_loop()
+                self.loop = self._new_asyncio_loop()
         else:
-            self.loop = asyncio.new_event_loop()
+            self.loop = self._new_asyncio_loop()
             self.log.debug("Using asyncio event loop")
 
+        if self.cfg.asgi_eager_tasks:
+            factory = getattr(asyncio, "eager_task_factory", None)
+            if factory is None:
+                self.log.warning("asgi_eager_tasks requires Python 3.12 "
+                                 "or later, ignored")
+            else:
+                self.loop.set_task_factory(factory)
+
         asyncio.set_event_loop(self.loop)
 
+    def _new_asyncio_loop(self):
+        # the listeners are registered by the loop's selector
+        selector = sock.listener_selector(self.cfg, self.sockets)
+        return asyncio.SelectorEventLoop(selector)
+
     def load_wsgi(self):
         """Load the ASGI application."""
         try:
@@ -86,6 +113,28 @@ class ASGIWorker(base.Worker):
             self.log.exception(e)
             self.asgi = self._make_error_app(str(e))
 
+    def warm_up(self):
+        # done by _serve(), once the lifespan startup ran
+        pass
+
+    async def _warm_up(self):
+        """Run the warm-up requests, then tell the arbiter the worker is
+        ready."""
+        requests = self.cfg.warmup_requests
+        if requests:
+            started = time.monotonic()
+            for request in requests:
+                # a long warm-up must not get the worker killed as hung
+                self.notify()
+                scope = warmup.asgi_scope(self.cfg, request, self.state)
+                try:
+                    status = await warmup.run_asgi(self.asgi, scope)
+                    self.log.debug("Warm-up request %r: %s", request, status)
+                except Exception:
+                    self.log.exception("Warm-up request %r failed", request)
+            self.log_warm_up(started, len(requests))
+        self.score.set_ready()
+
     def _make_error_app(self, error_msg):
         """Create an error ASGI app for syntax errors during reload."""
         async def error_app(scope, receive, send):
@@ -176,22 +225,26 @@ class ASGIWorker(base.Worker):
                     self.log.debug("ASGI lifespan not supported by app: %s", e)
                     self.lifespan = None
 
+        await self._warm_up()
+
+        self._start_broadcast()
+
         # Create servers for each listener socket
         ssl_context = self._get_ssl_context()
 
-        for sock in self.sockets:
+        for listener in self.sockets:
             try:
                 server = await self.loop.create_server(
                     lambda: ASGIProtocol(self),
-                    sock=sock.sock,
+                    sock=listener.sock,
                     ssl=ssl_context,
                     reuse_address=True,
                     start_serving=True,
                 )
                 self.servers.append(server)
-                self.log.info("ASGI server listening on %s", sock)
+                self.log.info("ASGI server listening on %s", listener)
             except Exception as e:
-                self.log.error("Failed to create server on %s: %s", sock, e)
+                self.log.error("Failed to create server on %s: %s", listener, e)
 
         if not self.servers:
             self.log.error("No servers could be started")
@@ -257,13 +310,26 @@ class ASGIWorker(base.Worker):
             except Exception as e:
                 self.log.error("ASGI lifespan shutdown error: %s", e)
 
+    def _start_broadcast(self):
+        """Join the broadcast channel of the workers, in the directory the
+        arbiter created for it."""
+        directory = os.environ.get(broadcast.ENV_DIR)
+        if not self.cfg.websocket_broadcast or not directory:
+            return
+        channel = broadcast.BroadcastChannel(directory, os.getpid(), self.log)
+        try:
+            channel.start(self.loop)
+        except OSError as e:
+            self.log.error("WebSocket broadcast unavailable: %s", e)
+            return
+        self.broadcast = channel
+
     def _get_ssl_context(self):
         """Get SSL context if configured."""
         if not self.cfg.is_ssl:
             return None
 
         try:
-            from gunicorn import sock
             return sock.ssl_context(self.cfg)
         except Exception as e:
             self.log.error("Failed to create SSL context: %s", e)
@@ -291,6 +357,8 @@ class ASGIWorker(base.Worker):
                 else:
                     self.loop.run_until_complete(gather)
 
+            if self.broadcast is not None:
+                self.broadcast.close()
             self.loop.close()
         except Exception as e:
             self.log.debug("Cleanup error: %s", e)
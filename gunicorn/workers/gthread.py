@@ -8,6 +8,13 @@
 # Keepalive connections are put back in the loop waiting for an event.
 # If no event happen after the keep alive timeout, the connection is
 # closed.
+# With request buffering, the main loop reads each request itself and only
+# hands complete requests to the thread pool. With response buffering, it
+# also writes what a slow client has not read yet once the thread is done.
+# Requests a client pipelined are served by the same thread without a round
+# trip through the loop, their responses written out together.
+# HTTP/2 connections stay in the loop, which reads and writes their frames,
+# and each of their streams is answered by the thread pool on its own.
 # pylint: disable=no-else-break
 
 from concurrent import futures
@@ -15,8 +22,10 @@ import errno
 import os
 import queue
 import selectors
+import socket
 import ssl
 import sys
+import threading
 import time
 from collections import deque
 from datetime import datetime
@@ -27,19 +36,41 @@ from .. import http
 from .. import util
 from .. import sock
 from ..http import wsgi
+from ..http.body import LengthReader
+from ..http.buffering import RequestBuffer
 from ..http.errors import InvalidH2CPreface
+from ..http.unreader import SocketUnreader
 from ..http2 import negotiation
+from ..http2.errors import HTTP2Error
 from ..http2.response import HTTP2Response
 
 
 # Sentinel value to indicate connection should be deferred back to poller
 _DEFER = object()
 
+# Sentinel value to indicate the next request is already in the parser's buffer
+_PIPELINED = object()
+
+# Sentinel value to indicate the connection negotiated HTTP/2
+_HTTP2 = object()
+
 # Default timeout (in seconds) for waiting for request data in worker thread.
 # If no data arrives within this timeout, the connection is deferred back to
 # the main poller to prevent thread pool exhaustion from slow clients.
 DEFAULT_WORKER_DATA_TIMEOUT = 5.0
 
+# Size of the reads done by the main loop when request buffering is on.
+BUFFERING_RECV_SIZE = 65536
+
+# Most requests a thread serves in a row from bytes a client pipelined,
+# before the connection goes back to the loop to let others in.
+MAX_PIPELINED_REQUESTS = 16
+
+# Pipelined responses are collected up to this many bytes or buffers
+# (well under IOV_MAX) before being written with a single sendmsg call.
+COALESCE_MAX_SIZE = 65536
+COALESCE_MAX_BUFFERS = 64
+
 
 class TConn:
 
@@ -55,6 +86,16 @@ class TConn:
         self.is_http2 = False
         # Track if we've already waited for data (to avoid waiting again after defer)
         self.data_ready = False
+        # Request being read by the main loop (request_buffering)
+        self.buffer = None
+        # Response bytes queued for the main loop (response_buffering)
+        self.response_buffer = None
+        # Responses to pipelined requests being collected
+        self.writer = None
+        # HTTP/2 streams being answered by the thread pool, and the events
+        # the connection is registered for with the poller
+        self.http2_streams = 0
+        self.http2_events = 0
 
         # set the socket to non blocking
         self.sock.setblocking(False)
@@ -146,6 +187,11 @@ class TConn:
             sel.close()
 
     def close(self, graceful=False):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self.response_buffer is not None:
+            self.response_buffer.discard()
         if graceful:
             self.sock.setblocking(True)
             util.close_graceful(self.sock)
@@ -153,6 +199,164 @@ class TConn:
             util.close(self.sock)
 
 
+class WriteBudget:
+    """Number of response bytes a worker may queue for slow clients."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size):
+        with self._lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.used -= size
+
+
+class ResponseBuffer:
+    """Socket wrapper queueing the response bytes a client is not ready for.
+
+    The worker thread sends what the socket accepts without blocking and
+    queues the rest, so it can go back to the pool as soon as the
+    application is done. The main loop then writes the queue out with
+    ``flush()``. When the worker's ``WriteBudget`` is exhausted, writes
+    block as they would on the bare socket.
+    """
+
+    def __init__(self, sock, budget):
+        self.sock = sock
+        self.budget = budget
+        self.pending = deque()
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+    def sendall(self, data):
+        if not self.pending:
+            try:
+                sent = self.sock.send(data, socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            if sent == len(data):
+                return
+            data = memoryview(data)[sent:]
+        self._queue(data)
+
+    def sendmsg(self, buffers):
+        """Send all of ``buffers``, queueing what the socket does not take."""
+        total = sum(len(data) for data in buffers)
+        sent = 0
+        if not self.pending:
+            try:
+                sent = self.sock.sendmsg(buffers[:util.IOV_MAX], [],
+                                         socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                pass
+        if sent < total:
+            self._queue(memoryview(b"".join(buffers))[sent:])
+        return total
+
+    def _queue(self, data):
+        if self.budget.reserve(len(data)):
+            self.pending.append(data)
+            return
+        self.flush_blocking()
+        self.sock.sendall(data)
+
+    def sendfile(self, *args, **kwargs):
+        self.flush_blocking()
+        return self.sock.sendfile(*args, **kwargs)
+
+    def flush_blocking(self):
+        """Write the queued bytes, blocking. Runs in a worker thread."""
+        while self.pending:
+            data = self.pending[0]
+            self.sock.sendall(data)
+            self.pending.popleft()
+            self.budget.release(len(data))
+
+    def flush(self):
+        """Write queued bytes without blocking. Runs in the main loop.
+
+        Returns True once the queue is empty.
+        """
+        while self.pending:
+            data = self.pending[0]
+            try:
+                sent = self.sock.send(data)
+            except (BlockingIOError, InterruptedError):
+                return False
+            self.budget.release(sent)
+            if sent < len(data):
+                self.pending[0] = memoryview(data)[sent:]
+                return False
+            self.pending.popleft()
+        return True
+
+    def discard(self):
+        while self.pending:
+            self.budget.release(len(self.pending.popleft()))
+
+
+class WriteCoalescer:
+    """Socket wrapper collecting the responses to pipelined requests.
+
+    While ``corked`` is set, writes are queued and go out together with one
+    ``sendmsg`` call once the batch is over or has grown large enough.
+    Otherwise they are passed through.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.corked = False
+        self.pending = []
+        self.size = 0
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+    def sendall(self, data):
+        self.sendmsg([data])
+
+    def sendmsg(self, buffers):
+        if self.corked:
+            # the application may reuse its buffer once the write returned
+            buffers = [data if isinstance(data, bytes) else bytes(data)
+                       for data in buffers]
+        size = sum(len(data) for data in buffers)
+        self.pending.extend(buffers)
+        self.size += size
+        if (not self.corked or self.size >= COALESCE_MAX_SIZE
+                or len(self.pending) >= COALESCE_MAX_BUFFERS):
+            self.flush()
+        return size
+
+    def send(self, data, *args):
+        self.flush()
+        return self.sock.send(data, *args)
+
+    def sendfile(self, *args, **kwargs):
+        self.flush()
+        return self.sock.sendfile(*args, **kwargs)
+
+    def flush(self):
+        if not self.pending:
+            return
+        buffers = self.pending
+        self.pending = []
+        self.size = 0
+        if len(buffers) == 1:
+            self.sock.sendall(buffers[0])
+        else:
+            util.sendmsg_all(self.sock, buffers)
+
+
 class PollableMethodQueue:
     """Thread-safe queue that can wake up a selector.
 
@@ -250,9 +454,41 @@ class ThreadWorker(base.Worker):
         self.keepalived_conns = deque()
         # Connections waiting for data (deferred from thread pool)
         self.pending_conns = deque()
+        # Connections whose request is being read by the main loop
+        self.buffering_conns = set()
+        # How many of them are keepalive connections, counted against
+        # max_keepalived along with keepalived_conns
+        self.nr_keepalive_buffering = 0
+        # Connections whose response is being written by the main loop
+        self.writing_conns = set()
+        # HTTP/2 connections, read and written by the main loop
+        self.http2_conns = set()
+        self._next_stalled_check = 0
         self.nr_conns = 0
         self._accepting = False
 
+        # Request buffering needs to know where a request ends, which
+        # excludes TLS (read in threads), uWSGI and PROXY protocol framing.
+        self.request_buffering = (
+            self.cfg.request_buffering and not self.cfg.is_ssl
+            and self.cfg.protocol == "http"
+            and self.cfg.proxy_protocol == "off"
+        )
+        # TLS sockets cannot be written without blocking from a thread
+        self.response_buffering = (
+            self.cfg.response_buffering and not self.cfg.is_ssl
+            and hasattr(socket, "MSG_DONTWAIT")
+        )
+        self.write_budget = WriteBudget(self.cfg.response_buffer_size)
+        # Pipelined requests are recognized by their HTTP/1.x framing;
+        # TLS sockets have no sendmsg to coalesce the responses with.
+        self.pipelining = self.cfg.protocol == "http" and not self.cfg.is_ssl
+
+    @classmethod
+    def capacity(cls, cfg):
+        """Requests handled at once, for autoscaling."""
+        return cfg.threads
+
     @classmethod
     def check_config(cls, cfg, log):
         max_keepalived = cfg.worker_connections - cfg.threads
@@ -263,7 +499,7 @@ class ThreadWorker(base.Worker):
 
     def init_process(self):
         self.tpool = self.get_thread_pool()
-        self.poller = selectors.DefaultSelector()
+        self.poller = sock.listener_selector(self.cfg, self.sockets)
         self.method_queue.init()
         super().init_process()
 
@@ -312,8 +548,13 @@ class ThreadWorker(base.Worker):
 
             conn = TConn(self.cfg, client_sock, client_addr, listener.getsockname())
 
-            # Submit directly to thread pool for processing
-            self.enqueue_req(conn)
+            if (self.request_buffering and
+                    not negotiation.prior_knowledge_allowed(self.cfg, client_addr)):
+                # Read the request here, the thread pool gets it once complete
+                self.buffer_request(conn)
+            else:
+                # Submit directly to thread pool for processing
+                self.enqueue_req(conn)
         except OSError as e:
             if e.errno not in (errno.EAGAIN, errno.ECONNABORTED, errno.EWOULDBLOCK):
                 raise
@@ -337,6 +578,105 @@ class ThreadWorker(base.Worker):
         # Submit to thread pool for processing
         self.enqueue_req(conn)
 
+    def buffer_request(self, conn, data=b""):
+        """Read the next request of a connection in the main loop.
+
+        ``data`` holds bytes of that request already read from the socket.
+        The connection is submitted to the thread pool once the request has
+        been received completely.
+        """
+        conn.buffer = RequestBuffer(self.cfg, data)
+        conn.data_ready = True
+        if conn.buffer.ready:
+            self.enqueue_req(conn)
+            return
+
+        conn.sock.setblocking(False)
+        if data:
+            self.set_progress_timeout(conn)
+        elif conn.initialized:
+            # Idle keepalive connection waiting for its next request
+            conn.set_timeout()
+        else:
+            conn.timeout = time.monotonic() + DEFAULT_WORKER_DATA_TIMEOUT
+        self.buffering_conns.add(conn)
+        if conn.initialized:
+            self.nr_keepalive_buffering += 1
+        self.poller.register(conn.sock, selectors.EVENT_READ,
+                             partial(self.on_buffering_socket_readable, conn))
+
+    def set_progress_timeout(self, conn):
+        """Give a client ``timeout`` seconds per read of its request or
+        response."""
+        if self.cfg.timeout:
+            conn.timeout = time.monotonic() + self.cfg.timeout
+        else:
+            conn.timeout = None
+
+    def on_buffering_socket_readable(self, conn, client):
+        """Handle a connection whose request is being buffered."""
+        try:
+            data = conn.sock.recv(BUFFERING_RECV_SIZE)
+            if data:
+                conn.buffer.feed(data)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            if e.errno not in (errno.EPIPE, errno.ECONNRESET, errno.ENOTCONN):
+                self.log.exception("Error buffering request.")
+            self.poller.unregister(client)
+            self.stop_buffering(conn)
+            self.nr_conns -= 1
+            conn.close()
+            return
+
+        if data and not conn.buffer.ready:
+            self.set_progress_timeout(conn)
+            return
+
+        # Complete, or closed by the client: let the parser sort it out
+        self.poller.unregister(client)
+        self.stop_buffering(conn)
+        self.enqueue_req(conn)
+
+    def stop_buffering(self, conn):
+        self.buffering_conns.discard(conn)
+        if conn.initialized:
+            self.nr_keepalive_buffering -= 1
+
+    def write_back(self, conn, fs):
+        """Write the rest of a response from the main loop.
+
+        ``fs`` is the future of the request, processed again by
+        ``finish_request`` once the client has read everything.
+        """
+        conn.sock.setblocking(False)
+        self.set_progress_timeout(conn)
+        self.writing_conns.add(conn)
+        self.poller.register(conn.sock, selectors.EVENT_WRITE,
+                             partial(self.on_socket_writable, conn, fs))
+
+    def on_socket_writable(self, conn, fs, client):
+        """Handle a connection whose response is being written back."""
+        try:
+            done = conn.response_buffer.flush()
+        except OSError as e:
+            if e.errno not in (errno.EPIPE, errno.ECONNRESET, errno.ENOTCONN):
+                self.log.exception("Error writing response.")
+            self.poller.unregister(client)
+            self.writing_conns.discard(conn)
+            self.nr_conns -= 1
+            conn.close()
+            return
+
+        if not done:
+            self.set_progress_timeout(conn)
+            return
+
+        self.poller.unregister(client)
+        self.writing_conns.discard(conn)
+        self.finish_request(conn, fs)
+
     def murder_keepalived(self):
         """Close expired keepalive connections."""
         now = time.monotonic()
@@ -373,6 +713,32 @@ class ThreadWorker(base.Worker):
             self.nr_conns -= 1
             conn.close()
 
+    def murder_stalled(self):
+        """Close connections whose request or response stopped moving.
+
+        Deadlines move with every read or write, so the connections are not
+        ordered by expiry; they are scanned at most once a second instead.
+        """
+        now = time.monotonic()
+        if now < self._next_stalled_check:
+            return
+        self._next_stalled_check = now + 1.0
+
+        for conns in (self.buffering_conns, self.writing_conns):
+            expired = [conn for conn in conns
+                       if conn.timeout is not None and conn.timeout <= now]
+            for conn in expired:
+                if conns is self.buffering_conns:
+                    self.stop_buffering(conn)
+                else:
+                    conns.discard(conn)
+                try:
+                    self.poller.unregister(conn.sock)
+                except (OSError, KeyError, ValueError):
+                    pass  # Already unregistered
+                self.nr_conns -= 1
+                conn.close()
+
     def is_parent_alive(self):
         # If our parent changed then we shut down.
         if self.ppid != os.getppid():
@@ -403,6 +769,7 @@ class ThreadWorker(base.Worker):
         while self.alive:
             # Notify the arbiter we are alive
             self.notify()
+            self.score.set_connections(self.nr_conns)
 
             # Check if we can accept more connections
             can_accept = self.nr_conns < self.worker_connections
@@ -415,12 +782,14 @@ class ThreadWorker(base.Worker):
             if not self.is_parent_alive():
                 break
 
-            # Handle keepalive and pending connection timeouts
+            # Handle keepalive, pending and stalled connection timeouts
             self.murder_keepalived()
             self.murder_pending()
+            self.murder_stalled()
 
         # Graceful shutdown: stop accepting but handle existing connections
         self.set_accept_enabled(False)
+        self.shutdown_http2()
 
         # Wait for in-flight connections within grace period
         graceful_timeout = time.monotonic() + self.cfg.graceful_timeout
@@ -431,6 +800,7 @@ class ThreadWorker(base.Worker):
             self.wait_for_and_dispatch_events(timeout=time_remaining)
             self.murder_keepalived()
             self.murder_pending()
+            self.murder_stalled()
 
         # Cleanup
         self.tpool.shutdown(wait=False)
@@ -445,7 +815,13 @@ class ThreadWorker(base.Worker):
         try:
             result = fs.result() if not fs.cancelled() else False
 
-            if result is _DEFER and self.alive:
+            if (self.response_buffering and conn.response_buffer is not None
+                    and conn.response_buffer.pending):
+                # The application is done but the client is still reading
+                self.write_back(conn, fs)
+            elif result is _HTTP2 and self.alive:
+                self.serve_http2(conn)
+            elif result is _DEFER and self.alive:
                 # Connection deferred - no data arrived within timeout.
                 # Put it on the poller to wait for data without consuming a thread.
                 conn.sock.setblocking(False)
@@ -454,6 +830,14 @@ class ThreadWorker(base.Worker):
                 self.pending_conns.append(conn)
                 self.poller.register(conn.sock, selectors.EVENT_READ,
                                      partial(self.on_pending_socket_readable, conn))
+            elif result is _PIPELINED and self.alive:
+                # The thread made way for other connections, the next
+                # request waits in the queue rather than on the poller
+                self.enqueue_req(conn)
+            elif result and self.alive and self.request_buffering:
+                # Keepalive - buffer the next request, starting with any
+                # pipelined bytes the parser has already read
+                self.buffer_request(conn, conn.parser.unreader.take_buffered())
             elif result and self.alive:
                 # Keepalive - put connection back in the poller
                 conn.sock.setblocking(False)
@@ -492,17 +876,30 @@ class ThreadWorker(base.Worker):
             # (ENOTCONN from ssl_wrap_socket would crash main thread otherwise)
             conn.init()
 
-            # HTTP/2 connections require special handling
+            # Hand the request buffered by the main loop to the parser
+            if conn.buffer is not None:
+                conn.parser.unreader.set_spool(conn.buffer.detach())
+                conn.buffer = None
+
+            # HTTP/2 connections are served by the main loop
             if conn.is_http2:
-                return self.handle_http2(conn)
+                return _HTTP2
 
             req = next(conn.parser)
             if not req:
                 return False
 
-            # Handle the request
-            keepalive = self.handle_request(req, conn)
-            if keepalive:
+            served = 0
+            while True:
+                served += 1
+                if self.pipelining:
+                    self.cork(conn, req)
+
+                # Handle the request
+                keepalive = self.handle_request(req, conn)
+                if not keepalive:
+                    break
+
                 # Discard any unread request body before keepalive to prevent
                 # the socket from appearing readable due to leftover bytes.
                 # Bound the drain by the worker data timeout: a stalled client
@@ -510,8 +907,22 @@ class ThreadWorker(base.Worker):
                 drain_deadline = time.monotonic() + DEFAULT_WORKER_DATA_TIMEOUT
                 if not conn.parser.finish_body(deadline=drain_deadline):
                     # Abandon keepalive when the body could not be fully drained.
-                    return False
-                return True
+                    break
+
+                # Serve a request the client pipelined right away: the
+                # socket will not poll readable for bytes already read.
+                pipelined = self.next_request_buffered(conn)
+                if (served >= MAX_PIPELINED_REQUESTS or not self.alive
+                        or not pipelined):
+                    if conn.writer is not None:
+                        conn.writer.flush()
+                    return _PIPELINED if pipelined else True
+
+                req = next(conn.parser)
+                if not req:
+                    break
+            if conn.writer is not None:
+                conn.writer.flush()
         except http.errors.NoMoreData as e:
             self.log.debug("Ignored premature client disconnection. %s", e)
         except StopIteration as e:
@@ -534,58 +945,169 @@ class ThreadWorker(base.Worker):
                 else:
                     self.log.debug("Ignoring connection epipe")
         except Exception as e:
+            self.flush_writes(conn)
             self.handle_error(req, conn.sock, conn.client, e)
 
         return False
 
-    def handle_http2(self, conn):
-        """Handle an HTTP/2 connection. Runs in a worker thread.
+    def next_request_buffered(self, conn):
+        """Whether the next request has been read along with the last one."""
+        unreader = conn.parser.unreader
+        if not self.pipelining or not isinstance(unreader, SocketUnreader):
+            return False
+        data = unreader.buffered()
+        if not data:
+            return False
+        if not self.request_buffering:
+            return b"\r\n\r\n" in data
+        # the whole request, as the main loop would have waited for it
+        buf = RequestBuffer(self.cfg, data)
+        buf.close()
+        return buf.ready
+
+    def cork(self, conn, req):
+        """Hold the response to ``req`` back if another request follows it.
+
+        It is then written out with the responses to the requests after it.
+        Only a request without a body can tell: its body is not read yet.
+        A chunked response uncorks as it starts, the application may be
+        streaming it.
+        """
+        reader = req.body.reader if req.body is not None else None
+        corked = (isinstance(reader, LengthReader) and reader.length == 0
+                  and self.next_request_buffered(conn))
+        if conn.writer is None:
+            if not corked:
+                return
+            conn.writer = WriteCoalescer(self.client_socket(conn))
+        conn.writer.corked = corked
+        if not corked:
+            # the client may wait for the previous responses to go on
+            conn.writer.flush()
+
+    def flush_writes(self, conn):
+        """Write out what is queued for ``conn``, before closing it or
+        writing to its socket directly. Runs in a worker thread."""
+        try:
+            if conn.writer is not None:
+                conn.writer.flush()
+            if conn.response_buffer is not None:
+                conn.response_buffer.flush_blocking()
+        except OSError:
+            pass
 
-        HTTP/2 connections are persistent and multiplex multiple streams.
-        We handle all streams until the connection is closed.
+    def client_socket(self, conn):
+        """Return the socket responses to ``conn`` are written to."""
+        if not self.response_buffering:
+            return conn.sock
+        if conn.response_buffer is None:
+            conn.response_buffer = ResponseBuffer(conn.sock, self.write_budget)
+        return conn.response_buffer
 
-        Returns:
-            False (HTTP/2 connections don't use keepalive polling)
-        """
-        h2_conn = conn.parser  # HTTP2ServerConnection
+    def serve_http2(self, conn):
+        """Serve an HTTP/2 connection from the main loop.
 
+        Frames are read and written here, and each stream is dispatched to
+        the thread pool as soon as its request is complete, so the streams
+        of a connection are answered concurrently.
+        """
+        conn.sock.setblocking(False)
+        conn.parser.use_output_queue(
+            partial(self.method_queue.defer, self.flush_http2, conn))
+        self.http2_conns.add(conn)
+        conn.http2_events = selectors.EVENT_READ
+        self.poller.register(conn.sock, selectors.EVENT_READ,
+                             partial(self.on_http2_socket_ready, conn))
+        # the client may have sent frames along with the handshake
+        self.on_http2_socket_ready(conn, conn.sock)
+
+    def on_http2_socket_ready(self, conn, client):
+        h2_conn = conn.parser
         try:
-            while not h2_conn.is_closed and self.alive:
-                # Receive data and get completed requests
-                requests = h2_conn.receive_data()
-
-                for req in requests:
-                    try:
-                        self.handle_http2_request(req, conn, h2_conn)
-                    except Exception as e:
-                        self.log.exception("Error handling HTTP/2 request")
-                        try:
-                            h2_conn.send_error(req.stream.stream_id, 500, str(e))
-                        except Exception:
-                            pass
-                    finally:
-                        # Cleanup stream after processing
-                        h2_conn.cleanup_stream(req.stream.stream_id)
-
-                # Check if we need to close
-                if not self.alive:
-                    h2_conn.close()
-                    break
-
-        except http.errors.NoMoreData:
-            self.log.debug("HTTP/2 connection closed by client")
-        except ssl.SSLError as e:
-            if e.args[0] == ssl.SSL_ERROR_EOF:
-                self.log.debug("HTTP/2 SSL connection closed")
-            else:
-                self.log.debug("HTTP/2 SSL error: %s", e)
-        except OSError as e:
-            if e.errno not in (errno.EPIPE, errno.ECONNRESET, errno.ENOTCONN):
-                self.log.exception("HTTP/2 socket error")
-        except Exception:
-            self.log.exception("HTTP/2 connection error")
+            requests = h2_conn.receive_available()
+        except HTTP2Error as e:
+            self.log.debug("HTTP/2 connection error: %s", e)
+            requests = []
+
+        for req in requests:
+            conn.http2_streams += 1
+            fs = self.tpool.submit(self.handle_http2_stream, conn, req)
+            fs.add_done_callback(
+                lambda fut: self.method_queue.defer(self.finish_http2_stream, conn))
+
+        self.flush_http2(conn)
+
+    def finish_http2_stream(self, conn):
+        """Account for an answered stream (called via method_queue on main
+        thread)."""
+        conn.http2_streams -= 1
+        self.flush_http2(conn)
+
+    def flush_http2(self, conn):
+        """Write the frames queued for an HTTP/2 connection and close it once
+        it is over."""
+        if conn not in self.http2_conns:
+            return
+        h2_conn = conn.parser
+        try:
+            flushed = h2_conn.flush_output()
+        except HTTP2Error as e:
+            self.log.debug("HTTP/2 connection error: %s", e)
+            flushed = True
+
+        if not h2_conn.is_closed:
+            events = selectors.EVENT_READ
+        elif flushed and conn.http2_streams == 0:
+            self.close_http2(conn)
+            return
+        else:
+            # nothing left to read, only the running streams to answer
+            events = 0
+        if not flushed:
+            events |= selectors.EVENT_WRITE
 
-        return False
+        if events == conn.http2_events:
+            return
+        if not events:
+            self.poller.unregister(conn.sock)
+        elif not conn.http2_events:
+            self.poller.register(conn.sock, events,
+                                 partial(self.on_http2_socket_ready, conn))
+        else:
+            self.poller.modify(conn.sock, events,
+                               partial(self.on_http2_socket_ready, conn))
+        conn.http2_events = events
+
+    def close_http2(self, conn):
+        self.http2_conns.discard(conn)
+        if conn.http2_events:
+            self.poller.unregister(conn.sock)
+            conn.http2_events = 0
+        self.nr_conns -= 1
+        conn.close()
+
+    def shutdown_http2(self):
+        """Send GOAWAY on the HTTP/2 connections, closing them as soon as
+        their streams are answered."""
+        for conn in list(self.http2_conns):
+            conn.parser.close()
+            self.flush_http2(conn)
+
+    def handle_http2_stream(self, conn, req):
+        """Answer one stream of an HTTP/2 connection. Runs in a worker
+        thread."""
+        h2_conn = conn.parser
+        try:
+            self.handle_http2_request(req, conn, h2_conn)
+        except Exception as e:
+            self.log.exception("Error handling HTTP/2 request")
+            try:
+                h2_conn.send_error(req.stream.stream_id, 500, str(e))
+            except Exception:
+                pass
+        finally:
+            # Cleanup stream after processing
+            h2_conn.cleanup_stream(req.stream.stream_id)
 
     def handle_http2_request(self, req, conn, h2_conn):
         """Handle a single HTTP/2 request/stream."""
@@ -593,6 +1115,7 @@ class ThreadWorker(base.Worker):
         resp = None
         stream_id = req.stream.stream_id
 
+        score_start = self.score.request_started()
         try:
             self.cfg.pre_request(self, req)
             request_start = datetime.now()
@@ -640,6 +1163,9 @@ class ThreadWorker(base.Worker):
             self.log.access(resp, req, environ, request_time)
 
         finally:
+            self.score.request_finished(
+                score_start, getattr(resp, "status_code", None),
+                getattr(resp, "sent", 0))
             try:
                 self.cfg.post_request(self, req, environ, resp)
             except Exception:
@@ -648,10 +1174,15 @@ class ThreadWorker(base.Worker):
     def handle_request(self, req, conn):
         environ = {}
         resp = None
+        score_start = self.score.request_started()
         try:
             self.cfg.pre_request(self, req)
             request_start = datetime.now()
-            resp, environ = wsgi.create(req, conn.sock, conn.client,
+            if conn.writer is not None:
+                client = conn.writer
+            else:
+                client = self.client_socket(conn)
+            resp, environ = wsgi.create(req, client, conn.client,
                                         conn.server, self.cfg)
             environ["wsgi.multithread"] = True
             self.nr += 1
@@ -663,7 +1194,8 @@ class ThreadWorker(base.Worker):
 
             if not self.alive or not self.cfg.keepalive:
                 resp.force_close()
-            elif len(self.keepalived_conns) >= self.max_keepalived:
+            elif (len(self.keepalived_conns) + self.nr_keepalive_buffering
+                  >= self.max_keepalived):
                 resp.force_close()
 
             respiter = self.wsgi(environ, resp.start_response)
@@ -671,7 +1203,12 @@ class ThreadWorker(base.Worker):
                 if isinstance(respiter, environ['wsgi.file_wrapper']):
                     resp.write_file(respiter)
                 else:
+                    resp.batch_writes(respiter)
                     for item in respiter:
+                        if (resp.chunked and conn.writer is not None
+                                and conn.writer.corked):
+                            # a streamed body goes out as it is produced
+                            conn.writer.corked = False
                         resp.write(item)
 
                 resp.close()
@@ -692,10 +1229,14 @@ class ThreadWorker(base.Worker):
                 # If the requests have already been sent, we should close the
                 # connection to indicate the error.
                 self.log.exception("Error handling request")
+                self.flush_writes(conn)
                 util.close_graceful(conn.sock)
                 raise StopIteration()
             raise
         finally:
+            self.score.request_finished(
+                score_start, getattr(resp, "status_code", None),
+                getattr(resp, "sent", 0))
             try:
                 self.cfg.post_request(self, req, environ, resp)
             except Exception:
@@ -32,6 +32,11 @@ class TornadoWorker(Worker):
         web.RequestHandler.clear = clear
         sys.modules["tornado.web"] = web
 
+    @classmethod
+    def capacity(cls, cfg):
+        """Requests handled at once, for autoscaling."""
+        return cfg.worker_connections
+
     def handle_exit(self, sig, frame):
         if self.alive:
             super().handle_exit(sig, frame)
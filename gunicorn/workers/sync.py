@@ -133,6 +133,7 @@ class SyncWorker(base.Worker):
 
     def handle(self, listener, client, addr):
         req = None
+        self.score.connection_opened()
         try:
             if self.cfg.is_ssl:
                 client = sock.ssl_wrap_socket(client, self.cfg)
@@ -164,10 +165,12 @@ class SyncWorker(base.Worker):
             self.handle_error(req, client, addr, e)
         finally:
             util.close_graceful(client)
+            self.score.connection_closed()
 
     def handle_request(self, listener, req, client, addr):
         environ = {}
         resp = None
+        score_start = self.score.request_started()
         try:
             self.cfg.pre_request(self, req)
             request_start = datetime.now()
@@ -186,6 +189,7 @@ class SyncWorker(base.Worker):
                 if isinstance(respiter, environ['wsgi.file_wrapper']):
                     resp.write_file(respiter)
                 else:
+                    resp.batch_writes(respiter)
                     for item in respiter:
                         resp.write(item)
                 resp.close()
@@ -206,6 +210,9 @@ class SyncWorker(base.Worker):
                 raise StopIteration()
             raise
         finally:
+            self.score.request_finished(
+                score_start, getattr(resp, "status_code", None),
+                getattr(resp, "sent", 0))
             try:
                 self.cfg.post_request(self, req, environ, resp)
             except Exception:
@@ -39,6 +39,14 @@ class WorkerTmp:
             os.close(fd)
             raise
 
+    @classmethod
+    def from_fd(cls, fd):
+        """Return the heartbeat file open as ``fd``, created by another
+        process."""
+        tmp = cls.__new__(cls)
+        tmp._tmp = os.fdopen(fd, 'w+b', 0)
+        return tmp
+
     def notify(self):
         new_time = time.monotonic()
         os.utime(self._tmp.fileno(), (new_time, new_time))
@@ -51,3 +59,28 @@ class WorkerTmp:
 
     def close(self):
         return self._tmp.close()
+
+
+class SharedHeartbeat:
+    """The heartbeat of a worker kept in its scoreboard slot.
+
+    Same interface as :class:`WorkerTmp`, but notifying is a store to
+    memory shared with the arbiter instead of a ``utime`` call, and reading
+    it does not ``fstat`` a file.
+    """
+
+    def __init__(self, slot):
+        self.slot = slot
+        slot.heartbeat()
+
+    def notify(self):
+        self.slot.heartbeat()
+
+    def last_update(self):
+        return self.slot.last_heartbeat
+
+    def fileno(self):
+        return None
+
+    def close(self):
+        pass
@@ -0,0 +1,253 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+# Zygote: a process forked from the arbiter that imports the application
+# once, then forks the workers on the arbiter's behalf. A worker forked
+# from it starts with the application already imported, and shares those
+# pages with its siblings.
+#
+# The arbiter is made a child subreaper, and the zygote forks every worker
+# through a short-lived intermediate process, so that the workers end up
+# children of the arbiter: it reaps them and they watch it as usual.
+
+import ctypes
+import ctypes.util
+import importlib
+import os
+import pickle
+import signal
+import socket
+import struct
+import sys
+import time
+
+from gunicorn import util
+from gunicorn.scoreboard import private_slot
+from gunicorn.sock import create_sockets
+from gunicorn.workers.workertmp import SharedHeartbeat, WorkerTmp
+
+PR_SET_CHILD_SUBREAPER = 36
+
+# request: age of the worker and its scoreboard slot followed by the
+# pickled state of the arbiter and the worker at spawn time, along with the
+# worker's heartbeat file unless it beats in its slot, then the listeners
+# the arbiter opened for it if any; reply: pid of the worker
+REQUEST = struct.Struct("!ii")
+REPLY = struct.Struct("!i")
+
+# Largest request, the zygote truncates longer ones
+MAX_REQUEST = 65536
+MAX_FDS = 64
+
+# Sent by the zygote once it has imported the application
+READY = REPLY.pack(0)
+
+# Seconds the arbiter waits for the zygote to fork a worker
+SPAWN_TIMEOUT = 10.0
+
+
+def set_child_subreaper():
+    """Adopt the orphaned descendants of this process. Return False where
+    it is not supported."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        return libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+class ZygoteError(Exception):
+    """The zygote could not fork a worker."""
+
+
+class StateError(ZygoteError):
+    """The state of a worker cannot be sent to the zygote."""
+
+
+class Zygote:
+
+    def __init__(self, arbiter):
+        self.arbiter = arbiter
+        self.pid = None
+        self.sock = None
+        self.ready = False
+        self.started = None
+
+    def start(self):
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        pid = os.fork()
+        if pid != 0:
+            child.close()
+            self.sock = parent
+            self.pid = pid
+            self.started = time.monotonic()
+            return pid
+
+        parent.close()
+        zygote_pid = os.getpid()
+        status = 1
+        try:
+            status = self.run(child)
+        except BaseException:
+            if os.getpid() != zygote_pid:
+                # a worker exiting: unwind like one forked by the arbiter
+                raise
+            self.arbiter.log.exception("Exception in zygote process")
+        os._exit(status)
+
+    def stop(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        if self.pid is not None:
+            try:
+                os.kill(self.pid, signal.SIGTERM)
+            except OSError:
+                pass
+            self.pid = None
+
+    def poll_ready(self):
+        """Return whether the zygote imported the application, without
+        blocking. Raise ZygoteError if it exited while booting."""
+        if self.ready:
+            return True
+        try:
+            reply = self.sock.recv(REPLY.size, socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return False
+        except OSError as e:
+            raise ZygoteError("zygote did not boot: %s" % e)
+        if reply != READY:
+            raise ZygoteError("zygote exited while booting")
+        self.sock.settimeout(SPAWN_TIMEOUT)
+        self.ready = True
+        return True
+
+    def spawn(self, worker, attrs=None):
+        """Have the zygote fork ``worker`` and return its pid. ``attrs`` are
+        the attributes the ``pre_fork`` hook set on ``worker``, set again on
+        the zygote's copy of it."""
+        if not self.ready:
+            raise ZygoteError("zygote is still booting")
+        index = worker.score.index
+        fds = []
+        if worker.tmp.fileno() is not None:
+            fds.append(worker.tmp.fileno())
+        sockets = []
+        if self.arbiter.steering is not None:
+            sockets = [lnr.fileno() for lnr in worker.sockets]
+        state = {"num_workers": self.arbiter.num_workers,
+                 "attrs": attrs or {}, "sockets": len(sockets)}
+        try:
+            state = pickle.dumps(state)
+        except Exception as e:
+            raise StateError("cannot pickle the worker attributes: %s" % e)
+        request = REQUEST.pack(worker.age, -1 if index is None else index)
+        request += state
+        if len(request) > MAX_REQUEST:
+            raise StateError("worker attributes take %s bytes" % len(state))
+        try:
+            socket.send_fds(self.sock, [request], fds + sockets)
+            reply = self.sock.recv(REPLY.size)
+        except OSError as e:
+            raise ZygoteError(str(e))
+        if len(reply) != REPLY.size:
+            raise ZygoteError("zygote exited")
+        (pid,) = REPLY.unpack(reply)
+        if pid <= 0:
+            raise ZygoteError("zygote could not fork")
+        return pid
+
+    def run(self, sock):
+        """Main loop of the zygote process."""
+        arbiter = self.arbiter
+        for sig in arbiter.SIGNALS + [signal.SIGCHLD]:
+            signal.signal(sig, signal.SIG_DFL)
+        for worker in arbiter.WORKERS.values():
+            worker.tmp.close()
+        if arbiter.watcher is not None:
+            arbiter.watcher.close()
+            arbiter.watcher = None
+        if arbiter.steering is not None:
+            # the workers get their listeners along with the requests
+            arbiter.steering.close()
+        util._setproctitle("zygote [%s]" % arbiter.proc_name)
+
+        started = time.monotonic()
+        try:
+            if arbiter.cfg.zygote_imports:
+                for name in arbiter.cfg.zygote_imports:
+                    importlib.import_module(name)
+            else:
+                arbiter.app.wsgi()
+        except Exception:
+            arbiter.log.exception("Zygote failed to import the application")
+            return arbiter.APP_LOAD_ERROR
+        if arbiter.cfg.gc_freeze:
+            util.freeze_gc()
+        arbiter.log.info("Zygote booted in %.1f ms (pid: %s)",
+                         (time.monotonic() - started) * 1000, os.getpid())
+        sock.send(READY)
+
+        while True:
+            msg, fds, _, _ = socket.recv_fds(sock, MAX_REQUEST, MAX_FDS)
+            if not msg:
+                # the arbiter went away
+                return 0
+            age, index = REQUEST.unpack_from(msg)
+            state = pickle.loads(msg[REQUEST.size:])
+            socket_fds = fds[len(fds) - state["sockets"]:]
+            tmp_fd = fds[0] if len(fds) > len(socket_fds) else None
+            try:
+                self.fork_worker(sock, age, index, tmp_fd, state, socket_fds)
+            except OSError:
+                arbiter.log.exception("Zygote could not fork a worker")
+                sock.send(REPLY.pack(-1))
+            for fd in fds:
+                os.close(fd)
+
+    def fork_worker(self, sock, age, index, tmp_fd, state, socket_fds=()):
+        pid = os.fork()
+        if pid != 0:
+            os.waitpid(pid, 0)
+            return
+
+        # Intermediate process: its exit hands the worker to the arbiter
+        try:
+            wpid = os.fork()
+            if wpid != 0:
+                sock.send(REPLY.pack(wpid))
+                os._exit(0)
+        except BaseException:
+            sock.send(REPLY.pack(-1))
+            os._exit(1)
+
+        sock.close()
+        arbiter = self.arbiter
+        deadline = time.monotonic() + 1.0
+        while os.getppid() != arbiter.pid and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        # as the arbiter was when it spawned the worker, without running the
+        # nworkers_changed hook again
+        arbiter._num_workers = state["num_workers"]
+        worker = arbiter.worker_class(age, arbiter.pid, arbiter.LISTENERS,
+                                      arbiter.app, arbiter.timeout / 2.0,
+                                      arbiter.cfg, arbiter.log)
+        vars(worker).update(state["attrs"])
+        if socket_fds:
+            worker.sockets = create_sockets(arbiter.cfg, arbiter.log,
+                                            socket_fds)
+        if index >= 0:
+            worker.score = arbiter.scoreboard.slot(index)
+        else:
+            worker.score = private_slot()
+        worker.tmp.close()
+        if tmp_fd is not None:
+            worker.tmp = WorkerTmp.from_fd(tmp_fd)
+        else:
+            worker.tmp = SharedHeartbeat(worker.score)
+        arbiter.boot_worker(worker)
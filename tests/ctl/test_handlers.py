@@ -4,11 +4,13 @@
 
 """Tests for control socket command handlers."""
 
+import os
 import signal
 import time
 from unittest.mock import MagicMock, patch
 
 from gunicorn.ctl.handlers import CommandHandlers
+from gunicorn.scoreboard import private_slot
 
 
 class MockWorker:
@@ -21,6 +23,7 @@ class MockWorker:
         self.aborted = aborted
         self.tmp = MagicMock()
         self.tmp.last_update.return_value = time.monotonic()
+        self.score = private_slot()
 
 
 class MockListener:
@@ -86,6 +89,9 @@ class MockArbiter:
     def wakeup(self):
         pass
 
+    def reload_progress(self):
+        return None
+
 
 class TestShowWorkers:
     """Tests for show workers command."""
@@ -126,6 +132,25 @@ class TestShowWorkers:
         assert "booted" in worker
         assert "last_heartbeat" in worker
 
+    def test_show_workers_reads_scoreboard(self):
+        """Test request counters come from the worker's scoreboard slot."""
+        arbiter = MockArbiter()
+        worker = MockWorker(1001, 1)
+        worker.score.connection_opened()
+        worker.score.request_finished(worker.score.request_started(), 200, 10)
+        worker.score.request_started()
+        arbiter.WORKERS = {1001: worker}
+        handlers = CommandHandlers(arbiter)
+
+        info = handlers.show_workers()["workers"][0]
+
+        assert info["requests"] == 1
+        assert info["connections"] == 1
+        assert info["in_flight"] == 1
+        assert info["last_status"] == 200
+        assert info["bytes_sent"] == 10
+        assert info["request_age"] >= 0
+
 
 class TestShowStats:
     """Tests for show stats command."""
@@ -149,6 +174,16 @@ class TestShowStats:
         assert result["reloads"] == 2
         assert result["uptime"] is not None
         assert result["uptime"] > 0
+        assert result["autoscale"] is None
+
+    def test_show_stats_autoscale(self):
+        """Test showing the state of autoscaling."""
+        arbiter = MockArbiter()
+        arbiter.autoscaler = MagicMock()
+        arbiter.autoscaler.status.return_value = {"min": 1, "max": 8}
+        handlers = CommandHandlers(arbiter)
+
+        assert handlers.show_stats()["autoscale"] == {"min": 1, "max": 8}
 
 
 class TestShowConfig:
@@ -195,6 +230,53 @@ class TestShowListeners:
         assert result["listeners"][0]["address"] == "127.0.0.1:8000"
 
 
+class TestShowMemory:
+    """Tests for show memory command."""
+
+    def test_show_memory(self):
+        """Test showing the memory of the arbiter, zygote and workers."""
+        arbiter = MockArbiter()
+        arbiter.zygote = MagicMock(pid=200)
+        arbiter.WORKERS = {
+            1002: MockWorker(1002, 2),
+            1001: MockWorker(1001, 1),
+            1003: MockWorker(1003, 3),
+        }
+        handlers = CommandHandlers(arbiter)
+
+        def usage(pid):
+            if pid == 1003:
+                return None  # exited meanwhile
+            return {"rss": 10, "pss": pid, "uss": 4, "shared": 6, "swap": 0}
+
+        with patch("gunicorn.util.memory_usage", side_effect=usage):
+            result = handlers.show_memory()
+
+        procs = result["processes"]
+        assert [(p["pid"], p["type"]) for p in procs] == [
+            (12345, "arbiter"), (200, "zygote"),
+            (1001, "worker"), (1002, "worker"),
+        ]
+        assert procs[2]["age"] == 1
+        assert "age" not in procs[0]
+        assert result["total_pss"] == 12345 + 200 + 1001 + 1002
+
+    def test_show_memory_own_process(self):
+        """Test reading the memory of a live process."""
+        arbiter = MockArbiter()
+        arbiter.pid = os.getpid()
+        handlers = CommandHandlers(arbiter)
+
+        result = handlers.show_memory()
+
+        if not os.path.exists("/proc/self/smaps_rollup"):
+            assert result["processes"] == []
+            return
+        proc = result["processes"][0]
+        assert proc["rss"] > 0
+        assert proc["uss"] + proc["shared"] == proc["rss"]
+
+
 class TestWorkerAdd:
     """Tests for worker add command."""
 
@@ -463,6 +545,7 @@ class TestHelp:
         commands = result["commands"]
         assert "show all" in commands
         assert "show workers" in commands
+        assert "show memory" in commands
         assert "worker add [N]" in commands
         assert "reload" in commands
         assert "shutdown [graceful|quick]" in commands
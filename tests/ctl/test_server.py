@@ -13,6 +13,7 @@ import pytest
 
 from gunicorn.ctl.server import ControlSocketServer
 from gunicorn.ctl.client import ControlClient
+from gunicorn.scoreboard import private_slot
 
 
 class MockWorker:
@@ -25,6 +26,7 @@ class MockWorker:
         self.aborted = aborted
         self.tmp = MagicMock()
         self.tmp.last_update.return_value = time.monotonic()
+        self.score = private_slot()
 
 
 class MockConfig:
@@ -94,6 +96,9 @@ class MockArbiter:
     def wakeup(self):
         pass
 
+    def reload_progress(self):
+        return None
+
 
 class TestControlSocketServerInit:
     """Tests for server initialization."""
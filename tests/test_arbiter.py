@@ -13,6 +13,7 @@ import gunicorn.app.base
 import gunicorn.arbiter
 import gunicorn.errors
 from gunicorn.config import ReusePort
+from gunicorn.workers.workertmp import SharedHeartbeat, WorkerTmp
 
 
 class DummyApplication(gunicorn.app.base.BaseApplication):
@@ -164,6 +165,42 @@ def test_arbiter_reap_workers(mock_os_waitpid):
     arbiter.cfg.child_exit.assert_called_with(arbiter, mock_worker)
 
 
+@mock.patch('os.waitpid')
+def test_arbiter_reap_workers_removes_broadcast_socket(mock_os_waitpid, tmp_path):
+    mock_os_waitpid.side_effect = [(42, 0), (0, 0)]
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    arbiter.broadcast_dir = str(tmp_path)
+    (tmp_path / "42.sock").touch()
+    (tmp_path / "43.sock").touch()
+    arbiter.WORKERS = {42: mock.Mock()}
+    arbiter.reap_workers()
+    assert sorted(os.listdir(tmp_path)) == ["43.sock"]
+
+
+@pytest.mark.parametrize("owner", [(0, 0), (1000, 1000)])
+def test_arbiter_broadcast_dir_belongs_to_the_workers(owner, monkeypatch):
+    from gunicorn.asgi import broadcast
+
+    monkeypatch.delenv(broadcast.ENV_DIR, raising=False)
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    uid, gid = owner
+    arbiter.cfg.set("user", uid)
+    arbiter.cfg.set("group", gid)
+    with mock.patch("os.geteuid", return_value=0), \
+            mock.patch("os.getegid", return_value=0), \
+            mock.patch("gunicorn.util.chown") as chown:
+        arbiter.create_broadcast_dir()
+    try:
+        assert os.environ[broadcast.ENV_DIR] == arbiter.broadcast_dir
+        if owner == (0, 0):
+            chown.assert_not_called()
+        else:
+            chown.assert_called_once_with(arbiter.broadcast_dir, uid, gid)
+    finally:
+        broadcast.remove_directory(arbiter.broadcast_dir)
+        monkeypatch.delenv(broadcast.ENV_DIR, raising=False)
+
+
 class PreloadedAppWithEnvSettings(DummyApplication):
     """
     Simple application that makes use of the 'preload' feature to
@@ -204,6 +241,68 @@ def test_env_vars_available_during_preload():
     gunicorn.arbiter.Arbiter(PreloadedAppWithEnvSettings())
 
 
+def spawn_worker(arbiter):
+    """Spawn a worker without forking and return it."""
+    arbiter.pid = os.getpid()
+    with mock.patch('os.fork', return_value=4321):
+        arbiter.spawn_worker()
+    return arbiter.WORKERS.pop(4321)
+
+
+def test_spawned_worker_beats_in_its_scoreboard_slot():
+    app = DummyApplication()
+    app.cfg.set('worker_heartbeat', 'memory')
+    arbiter = gunicorn.arbiter.Arbiter(app)
+    worker = spawn_worker(arbiter)
+    assert isinstance(worker.tmp, SharedHeartbeat)
+    assert worker.tmp.slot is worker.score
+    assert worker.score.index is not None
+
+
+def test_worker_beats_in_a_file_when_the_scoreboard_is_full():
+    app = DummyApplication()
+    app.cfg.set('worker_heartbeat', 'memory')
+    arbiter = gunicorn.arbiter.Arbiter(app)
+    arbiter.scoreboard = gunicorn.arbiter.Scoreboard(1)
+    arbiter.scoreboard.acquire()
+    worker = spawn_worker(arbiter)
+    assert isinstance(worker.tmp, WorkerTmp)
+    worker.tmp.close()
+
+
+def test_worker_heartbeat_file():
+    app = DummyApplication()
+    assert app.cfg.worker_heartbeat == 'file'
+    worker = spawn_worker(gunicorn.arbiter.Arbiter(app))
+    assert isinstance(worker.tmp, WorkerTmp)
+    worker.tmp.close()
+
+
+class PreloadedAppWithGcFreeze(DummyApplication):
+
+    def load_config(self):
+        self.cfg.set('preload_app', True)
+        self.cfg.set('gc_freeze', True)
+
+
+@mock.patch('gc.freeze')
+@mock.patch('gc.collect')
+def test_gc_freeze_after_preload(collect, freeze):
+    parent = mock.Mock()
+    parent.attach_mock(collect, 'collect')
+    parent.attach_mock(freeze, 'freeze')
+    gunicorn.arbiter.Arbiter(PreloadedAppWithGcFreeze())
+    assert parent.mock_calls == [mock.call.collect(), mock.call.freeze()]
+
+
+@mock.patch('gc.freeze')
+def test_no_gc_freeze_without_preload(freeze):
+    app = DummyApplication()
+    app.cfg.set('gc_freeze', True)
+    gunicorn.arbiter.Arbiter(app)
+    freeze.assert_not_called()
+
+
 # ============================================================================
 # Signal Handler Registration Tests
 # ============================================================================
@@ -758,6 +857,147 @@ class TestWorkerLifecycle:
         mock_kill.assert_called_once_with(42, signal.SIGKILL)
 
 
+class TestRollingReload:
+    """Tests for replacing the workers a few at a time on reload."""
+
+    def create_arbiter(self, workers=4, surge=25):
+        arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+        arbiter.cfg.set('reload_strategy', 'rolling')
+        arbiter.cfg.set('reload_surge', surge)
+        arbiter.num_workers = workers
+        arbiter.WORKERS = {}
+        arbiter.scoreboard = gunicorn.arbiter.Scoreboard(16)
+
+        def spawn_worker():
+            arbiter.worker_age += 1
+            worker = mock.Mock(age=arbiter.worker_age,
+                               pid=1000 + arbiter.worker_age)
+            worker.score = arbiter.scoreboard.acquire()
+            arbiter.WORKERS[worker.pid] = worker
+        arbiter.spawn_worker = spawn_worker
+
+        def kill_worker(pid, sig):
+            arbiter.killed.append(pid)
+        arbiter.killed = []
+        arbiter.kill_worker = kill_worker
+
+        for _ in range(workers):
+            spawn_worker()
+        arbiter.reload_cutoff = arbiter.worker_age
+        return arbiter
+
+    def new_workers(self, arbiter):
+        return [w for w in arbiter.WORKERS.values()
+                if w.age > arbiter.reload_cutoff]
+
+    def test_surge(self):
+        assert self.create_arbiter(workers=4, surge=25).reload_surge() == 1
+        assert self.create_arbiter(workers=10, surge=25).reload_surge() == 3
+        assert self.create_arbiter(workers=2, surge=1).reload_surge() == 1
+
+    def test_old_workers_stop_as_new_ones_get_ready(self):
+        arbiter = self.create_arbiter(workers=4, surge=50)
+        arbiter.manage_workers()
+        new = self.new_workers(arbiter)
+        assert len(new) == 2
+        assert arbiter.killed == []
+
+        # nothing happens until a new worker is ready
+        arbiter.manage_workers()
+        assert len(self.new_workers(arbiter)) == 2
+
+        new[0].score.set_ready()
+        arbiter.manage_workers()
+        assert arbiter.killed == [1001]
+        assert len(self.new_workers(arbiter)) == 3
+        assert arbiter.reload_progress() == {
+            "ready": 1, "starting": 2, "retiring": 1, "target": 4}
+
+        # a stopping worker is not signalled twice
+        arbiter.manage_workers()
+        assert arbiter.killed == [1001]
+
+    def test_reload_completes_once_old_workers_exit(self):
+        arbiter = self.create_arbiter(workers=2, surge=100)
+        arbiter.manage_workers()
+        for worker in self.new_workers(arbiter):
+            worker.score.set_ready()
+        arbiter.manage_workers()
+        assert sorted(arbiter.killed) == [1001, 1002]
+        assert arbiter.reload_cutoff is not None
+
+        for pid in arbiter.killed:
+            del arbiter.WORKERS[pid]
+        arbiter.manage_workers()
+        assert arbiter.reload_cutoff is None
+        assert arbiter.reload_progress() is None
+        assert sorted(arbiter.WORKERS) == [1003, 1004]
+
+    @mock.patch('gunicorn.sock.close_sockets')
+    def test_reload_starts_rolling_reload(self, close_sockets):
+        arbiter = self.create_arbiter(workers=2, surge=50)
+        arbiter.reload_cutoff = None
+        arbiter.LISTENERS = [mock.Mock()]
+        arbiter.pidfile = None
+        arbiter.app.reload = mock.Mock()
+        arbiter.setup = mock.Mock()
+
+        arbiter.reload()
+
+        assert arbiter.reload_cutoff == 2
+        assert len(self.new_workers(arbiter)) == 1
+        assert arbiter.killed == []
+
+
+
+class TestMemoryRecycling:
+    """Tests for replacing the workers over max_worker_memory."""
+
+    def create_arbiter(self, workers=2):
+        arbiter = TestRollingReload().create_arbiter(workers=workers)
+        arbiter.reload_cutoff = None
+        for worker in arbiter.WORKERS.values():
+            worker.score.set_ready()
+        return arbiter
+
+    def test_worker_is_stopped_once_replaced(self):
+        arbiter = self.create_arbiter(workers=2)
+        arbiter.WORKERS[1001].score.set_recycling()
+
+        arbiter.manage_workers()
+        assert sorted(arbiter.WORKERS) == [1001, 1002, 1003]
+        assert arbiter.killed == []
+
+        # the replacement is starting, no second one is spawned
+        arbiter.manage_workers()
+        assert len(arbiter.WORKERS) == 3
+        assert arbiter.killed == []
+
+        arbiter.WORKERS[1003].score.set_ready()
+        arbiter.manage_workers()
+        assert arbiter.killed == [1001]
+        assert len(arbiter.WORKERS) == 3
+
+        del arbiter.WORKERS[1001]
+        arbiter.manage_workers()
+        assert arbiter.killed == [1001]
+        assert sorted(arbiter.WORKERS) == [1002, 1003]
+        assert not arbiter.retiring
+
+    def test_dead_worker_is_replaced_while_recycling(self):
+        arbiter = self.create_arbiter(workers=2)
+        arbiter.WORKERS[1001].score.set_recycling()
+        arbiter.manage_workers()
+        arbiter.WORKERS[1003].score.set_ready()
+        arbiter.manage_workers()
+        assert arbiter.killed == [1001]
+
+        # a worker dies before the recycled one exits
+        del arbiter.WORKERS[1002]
+        arbiter.manage_workers()
+        assert sorted(arbiter.WORKERS) == [1001, 1003, 1004]
+
+
 # ============================================================================
 # Dirty Arbiter Orphan Cleanup Tests
 # ============================================================================
@@ -942,3 +1182,117 @@ class TestDirtyArbiterOrphanCleanup:
             mock_dirty_arbiter.assert_called_once()
             call_kwargs = mock_dirty_arbiter.call_args[1]
             assert call_kwargs.get('pidfile') == pidfile_path
+
+
+class TestCpuAffinity:
+    """Tests for pinning the workers to CPUs."""
+
+    def create_arbiter(self, mode, cpus="0-3"):
+        arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+        arbiter.cfg.set("cpu_affinity", mode)
+        arbiter.cfg.set("cpu_affinity_cpus", cpus)
+        with mock.patch("gunicorn.util.numa_nodes",
+                        return_value=[[0, 1], [2, 3]]):
+            arbiter.setup(arbiter.app)
+        return arbiter
+
+    def worker(self, index, age=1):
+        worker = mock.Mock(pid=42, age=age)
+        worker.score.index = index
+        return worker
+
+    @mock.patch("os.sched_setaffinity", create=True)
+    def test_off(self, setaffinity):
+        arbiter = self.create_arbiter("off")
+        assert arbiter.pin_worker(self.worker(0)) is None
+        setaffinity.assert_not_called()
+
+    @mock.patch("os.sched_setaffinity", create=True)
+    def test_round_robin_by_slot(self, setaffinity):
+        arbiter = self.create_arbiter("cpu")
+        assert arbiter.pin_worker(self.worker(1)) == [1]
+        assert arbiter.pin_worker(self.worker(5)) == [1]
+        # off the scoreboard, by age
+        assert arbiter.pin_worker(self.worker(None, age=7)) == [3]
+        setaffinity.assert_called_with(0, [3])
+
+    @mock.patch("os.sched_setaffinity", create=True)
+    def test_numa(self, setaffinity):
+        arbiter = self.create_arbiter("numa")
+        assert arbiter.pin_worker(self.worker(0)) == [0, 1]
+        assert arbiter.pin_worker(self.worker(3)) == [2, 3]
+
+    @mock.patch("os.sched_setaffinity", create=True,
+                side_effect=OSError(22, "Invalid argument"))
+    def test_failure(self, setaffinity):
+        arbiter = self.create_arbiter("cpu")
+        with mock.patch.object(arbiter.log, "warning") as warning:
+            assert arbiter.pin_worker(self.worker(0)) is None
+        warning.assert_called_once()
+
+
+class TestCpuSteering:
+    """Tests for steering connections to the workers by CPU."""
+
+    def create_arbiter(self, workers=2):
+        arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+        arbiter.cfg.set("reuse_port", True)
+        arbiter.cfg.set("reuse_port_cbpf", True)
+        arbiter.cfg.set("cpu_affinity", "cpu")
+        arbiter.cfg.set("cpu_affinity_cpus", "0-3")
+        arbiter.setup(arbiter.app)
+        arbiter.num_workers = workers
+        arbiter.WORKERS = {}
+        arbiter.steering = mock.Mock(listeners={})
+        return arbiter
+
+    def add_worker(self, arbiter, pid, index):
+        worker = mock.Mock(pid=pid, age=pid)
+        worker.score.index = index
+        arbiter.WORKERS[pid] = worker
+        arbiter.steering.listeners[index] = [mock.Mock()]
+        return worker
+
+    @pytest.mark.skipif(gunicorn.arbiter.sock.PLATFORM != "linux",
+                        reason="Linux only")
+    def test_setup(self):
+        arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+        arbiter.setup_steering()
+        assert arbiter.steering is None
+        arbiter.cfg.set("reuse_port", True)
+        arbiter.cfg.set("reuse_port_cbpf", True)
+        arbiter.setup_steering()
+        steering = arbiter.steering
+        assert steering is not None
+        arbiter.setup_steering()
+        assert arbiter.steering is steering
+        # a new address, new groups
+        arbiter.cfg.set("bind", ["127.0.0.1:9999"])
+        arbiter.setup_steering()
+        assert arbiter.steering is not steering
+
+    def test_steers_to_the_running_workers_by_slot(self):
+        arbiter = self.create_arbiter()
+        self.add_worker(arbiter, 100, 0)
+        self.add_worker(arbiter, 101, 5)
+        arbiter.retiring.add(100)
+        arbiter.steer_connections()
+        # slot 5 is pinned to CPU 1, the retiring worker gets nothing
+        arbiter.steering.steer.assert_called_once_with({5: [1]})
+
+    def test_keeps_the_listeners_of_a_worker_being_replaced(self):
+        arbiter = self.create_arbiter()
+        self.add_worker(arbiter, 100, 0)
+        self.add_worker(arbiter, 101, 1)
+        del arbiter.WORKERS[101]
+        arbiter.steer_connections()
+        arbiter.steering.remove.assert_not_called()
+        arbiter.steering.steer.assert_called_once_with({0: [0]})
+
+    def test_closes_the_listeners_no_worker_uses(self):
+        arbiter = self.create_arbiter(workers=1)
+        self.add_worker(arbiter, 100, 0)
+        self.add_worker(arbiter, 101, 1)
+        del arbiter.WORKERS[101]
+        arbiter.steer_connections()
+        arbiter.steering.remove.assert_called_once_with(1)
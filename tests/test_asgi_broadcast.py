@@ -0,0 +1,313 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for the broadcast of WebSocket messages across ASGI workers."""
+
+import asyncio
+import os
+from unittest import mock
+
+import pytest
+
+from gunicorn.asgi import broadcast
+from gunicorn.asgi.broadcast import BroadcastChannel
+from gunicorn.asgi.protocol import ASGIProtocol, HTTPResponder
+from gunicorn.asgi.websocket import OPCODE_BINARY, OPCODE_TEXT, WebSocketProtocol
+from gunicorn.config import Config
+
+
+def make_channel(directory, pid):
+    channel = BroadcastChannel(str(directory), pid, mock.Mock())
+    channel.start(asyncio.get_running_loop())
+    return channel
+
+
+def make_subscriber():
+    websocket = mock.Mock()
+    websocket.write_frame = mock.Mock()
+    return websocket
+
+
+def abandon(channel):
+    """Stop reading the socket of a channel, leaving it in the directory
+    like a worker that was killed."""
+    channel._loop.remove_reader(channel.sock.fileno())
+    channel.sock.close()
+    channel.sock = None
+
+
+async def wait_for_call(method):
+    for _ in range(100):
+        if method.called:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("not called")
+
+
+def make_websocket(channel):
+    headers = [(b"sec-websocket-key", b"dGhlIHNhbXBsZSBub25jZQ==")]
+    return WebSocketProtocol(
+        mock.Mock(), {"type": "websocket", "headers": headers},
+        mock.AsyncMock(), mock.Mock(), cfg=Config(), broadcast=channel)
+
+
+# ============================================================================
+# Messages and directory
+# ============================================================================
+
+class TestMessages:
+
+    def test_roundtrip(self):
+        data = broadcast.encode_message("chat/général", OPCODE_TEXT, b"hi")
+        assert broadcast.decode_message(data) == (
+            "chat/général", OPCODE_TEXT, b"hi")
+
+    def test_empty_payload(self):
+        data = broadcast.encode_message("t", OPCODE_BINARY, b"")
+        assert broadcast.decode_message(data) == ("t", OPCODE_BINARY, b"")
+
+    def test_size_limits(self):
+        with pytest.raises(ValueError):
+            broadcast.encode_message("t" * (broadcast.MAX_TOPIC_SIZE + 1),
+                                     OPCODE_TEXT, b"")
+        with pytest.raises(ValueError):
+            broadcast.encode_message(
+                "t", OPCODE_BINARY, b"x" * (broadcast.MAX_MESSAGE_SIZE + 1))
+
+    def test_directory(self):
+        directory = broadcast.create_directory()
+        try:
+            path = broadcast.socket_path(directory, 42)
+            assert path == os.path.join(directory, "42.sock")
+            open(path, "w").close()
+            broadcast.remove_socket(directory, 42)
+            assert not os.path.exists(path)
+            # already removed by the worker
+            broadcast.remove_socket(directory, 42)
+        finally:
+            broadcast.remove_directory(directory)
+        assert not os.path.exists(directory)
+
+
+# ============================================================================
+# Channel
+# ============================================================================
+
+class TestBroadcastChannel:
+
+    @pytest.mark.asyncio
+    async def test_start_and_close(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        assert os.path.exists(channel.path)
+        channel.close()
+        assert not os.path.exists(channel.path)
+        channel.close()
+
+    @pytest.mark.asyncio
+    async def test_start_replaces_stale_socket(self, tmp_path):
+        stale = make_channel(tmp_path, 1)
+        abandon(stale)
+        channel = make_channel(tmp_path, 1)
+        channel.close()
+
+    @pytest.mark.asyncio
+    async def test_local_delivery(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            subscriber, other = make_subscriber(), make_subscriber()
+            channel.subscribe("news", subscriber)
+            channel.subscribe("sports", other)
+            channel.publish("news", OPCODE_TEXT, b"hello")
+            subscriber.write_frame.assert_called_once_with(b"\x81\x05hello")
+            other.write_frame.assert_not_called()
+        finally:
+            channel.close()
+
+    @pytest.mark.asyncio
+    async def test_frame_is_encoded_once(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            subscribers = [make_subscriber() for _ in range(3)]
+            for subscriber in subscribers:
+                channel.subscribe("news", subscriber)
+            channel.publish("news", OPCODE_BINARY, b"x" * 200)
+            frames = [s.write_frame.call_args.args[0] for s in subscribers]
+            assert frames[0] == b"\x82\x7e\x00\xc8" + b"x" * 200
+            assert frames[1] is frames[0] and frames[2] is frames[0]
+        finally:
+            channel.close()
+
+    @pytest.mark.asyncio
+    async def test_delivery_to_other_workers(self, tmp_path):
+        first = make_channel(tmp_path, 1)
+        second = make_channel(tmp_path, 2)
+        try:
+            subscriber = make_subscriber()
+            second.subscribe("news", subscriber)
+            first.publish_message({"type": broadcast.PUBLISH,
+                                   "topic": "news", "bytes": b"data"})
+            await wait_for_call(subscriber.write_frame)
+            subscriber.write_frame.assert_called_once_with(b"\x82\x04data")
+        finally:
+            first.close()
+            second.close()
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            subscriber = make_subscriber()
+            channel.subscribe("news", subscriber)
+            channel.unsubscribe("news", subscriber)
+            channel.unsubscribe("news", subscriber)
+            assert channel._topics == {}
+            channel.publish("news", OPCODE_TEXT, b"hello")
+            subscriber.write_frame.assert_not_called()
+        finally:
+            channel.close()
+
+    @pytest.mark.asyncio
+    async def test_exited_worker_is_dropped(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            # a socket nobody reads any more
+            exited = make_channel(tmp_path, 2)
+            abandon(exited)
+            channel.publish("news", OPCODE_TEXT, b"hello")
+            assert channel._peers == []
+        finally:
+            channel.close()
+
+    @pytest.mark.asyncio
+    async def test_invalid_datagram_is_ignored(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            subscriber = make_subscriber()
+            channel.subscribe("news", subscriber)
+            channel.sock.sendto(b"\x01", channel.path)
+            channel.sock.sendto(
+                broadcast.encode_message("news", OPCODE_TEXT, b"ok"),
+                channel.path)
+            await wait_for_call(subscriber.write_frame)
+            subscriber.write_frame.assert_called_once_with(b"\x81\x02ok")
+            channel.log.warning.assert_called_once()
+        finally:
+            channel.close()
+
+
+# ============================================================================
+# Applications
+# ============================================================================
+
+class TestWebSocketProtocol:
+
+    @pytest.mark.asyncio
+    async def test_subscribe_and_publish(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            websocket = make_websocket(channel)
+            await websocket._send({"type": "websocket.accept"})
+            await websocket._send({"type": "gunicorn.broadcast.subscribe",
+                                   "topic": "news"})
+            await websocket._send({"type": broadcast.PUBLISH,
+                                   "topic": "news", "text": "hello"})
+            websocket.transport.write.assert_called_with(b"\x81\x05hello")
+
+            await websocket._send({"type": "gunicorn.broadcast.unsubscribe",
+                                   "topic": "news"})
+            assert channel._topics == {}
+            assert websocket._topics == set()
+        finally:
+            channel.close()
+
+    @pytest.mark.asyncio
+    async def test_subscribe_before_accept(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            websocket = make_websocket(channel)
+            with pytest.raises(RuntimeError):
+                await websocket._send({"type": "gunicorn.broadcast.subscribe",
+                                       "topic": "news"})
+        finally:
+            channel.close()
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        websocket = make_websocket(None)
+        await websocket._send({"type": "websocket.accept"})
+        for msg_type in ("gunicorn.broadcast.subscribe", broadcast.PUBLISH):
+            with pytest.raises(RuntimeError):
+                await websocket._send({"type": msg_type, "topic": "news",
+                                       "text": "hello"})
+
+    def test_closing_websocket_gets_no_frames(self):
+        websocket = make_websocket(None)
+        websocket.write_frame(b"frame")
+        websocket._close_sent = True
+        websocket.write_frame(b"frame")
+        websocket.transport.write.assert_called_once_with(b"frame")
+
+    @pytest.mark.asyncio
+    async def test_unsubscribed_when_done(self, tmp_path):
+        channel = make_channel(tmp_path, 1)
+        try:
+            websocket = make_websocket(channel)
+
+            async def app(scope, receive, send):
+                await send({"type": "websocket.accept"})
+                await send({"type": "gunicorn.broadcast.subscribe",
+                            "topic": "news"})
+                assert "news" in channel._topics
+                # the client goes away
+                websocket.closed = True
+
+            websocket.app = app
+            await websocket.run()
+            assert channel._topics == {}
+        finally:
+            channel.close()
+
+
+def make_protocol(channel):
+    worker = mock.Mock()
+    worker.cfg = Config()
+    worker.log = mock.Mock()
+    worker.broadcast = channel
+    return ASGIProtocol(worker)
+
+
+class TestHTTP:
+
+    def test_scope_extension(self):
+        request = mock.Mock()
+        request.method = "GET"
+        request.path = "/"
+        request.query = ""
+        request.version = (1, 1)
+        request.scheme = "http"
+        request.headers = []
+        address = ("127.0.0.1", 8000)
+
+        scope = make_protocol(mock.Mock())._build_http_scope(
+            request, address, address)
+        assert broadcast.EXTENSION in scope["extensions"]
+
+        scope = make_protocol(None)._build_http_scope(
+            request, address, address)
+        assert broadcast.EXTENSION not in scope["extensions"]
+
+    @pytest.mark.asyncio
+    async def test_publish(self):
+        channel = mock.Mock()
+        protocol = make_protocol(channel)
+        message = {"type": broadcast.PUBLISH, "topic": "news", "text": "hi"}
+        await HTTPResponder(protocol, mock.Mock())(message)
+        channel.publish_message.assert_called_once_with(message)
+
+    @pytest.mark.asyncio
+    async def test_publish_disabled(self):
+        protocol = make_protocol(None)
+        with pytest.raises(RuntimeError):
+            await HTTPResponder(protocol, mock.Mock())(
+                {"type": broadcast.PUBLISH, "topic": "news", "text": "hi"})
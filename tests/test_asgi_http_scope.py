@@ -643,6 +643,29 @@ class TestAddressHandling:
         assert scope["server"] is None
         assert scope["client"] is None
 
+    def test_scopes_of_a_connection_are_independent(self):
+        """Test that the requests of a connection get their own scope."""
+        protocol = self._create_protocol()
+        sockname = ("127.0.0.1", 8000)
+        peername = ("127.0.0.1", 12345)
+
+        first = protocol._build_http_scope(
+            self._create_mock_request(), sockname, peername)
+        first["asgi"]["custom"] = True
+        first["root_path"] = "/changed"
+        second = protocol._build_http_scope(
+            self._create_mock_request(), sockname, peername)
+
+        assert second is not first
+        assert second["asgi"] == {"version": "3.0", "spec_version": "2.4"}
+        assert second["root_path"] == ""
+        assert second["client"] == ("127.0.0.1", 12345)
+
+        # another connection's addresses are not reused
+        other = protocol._build_http_scope(
+            self._create_mock_request(), sockname, ("10.0.0.1", 2000))
+        assert other["client"] == ("10.0.0.1", 2000)
+
 
 # ============================================================================
 # Environ Building Tests (for access logging)
@@ -0,0 +1,145 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""State an ASGI connection keeps while it is idle.
+
+A worker may hold tens of thousands of idle keep-alive and WebSocket
+connections: between requests an HTTP/1.1 connection must not keep a task,
+the previous request or a write flow control event around.
+"""
+
+import asyncio
+import types
+from unittest import mock
+
+import pytest
+
+from gunicorn.asgi.protocol import ASGIProtocol, FlowControl
+from gunicorn.config import Config
+from gunicorn.scoreboard import private_slot
+
+REQUEST = b"GET / HTTP/1.1\r\nHost: example.com\r\n\r\n"
+
+
+class FakeTransport(asyncio.Transport):
+
+    def __init__(self):
+        super().__init__()
+        self.written = bytearray()
+        self.closed = False
+
+    def get_extra_info(self, name, default=None):
+        return {"peername": ("127.0.0.1", 12345),
+                "sockname": ("127.0.0.1", 8000)}.get(name, default)
+
+    def write(self, data):
+        self.written.extend(data)
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def is_closing(self):
+        return self.closed
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-length", b"2")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def make_protocol():
+    cfg = Config()
+    cfg.set("http_parser", "python")
+    worker = types.SimpleNamespace(
+        cfg=cfg, loop=asyncio.get_running_loop(), nr_conns=0, nr=0,
+        max_requests=1000, alive=True, asgi=app, state={},
+        log=mock.Mock(access_log_enabled=False), score=private_slot())
+    protocol = ASGIProtocol(worker)
+    transport = FakeTransport()
+    protocol.connection_made(transport)
+    return protocol, transport
+
+
+async def settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_no_task_until_a_request_arrives():
+    protocol, _ = make_protocol()
+    assert protocol._task is None
+    assert protocol._flow_control._is_writable_event is None
+    protocol.connection_lost(None)
+
+
+@pytest.mark.asyncio
+async def test_idle_keepalive_connection_releases_the_request():
+    protocol, transport = make_protocol()
+    protocol.data_received(REQUEST)
+    task = protocol._task
+    await settle()
+
+    assert task.done()
+    assert transport.written.count(b"HTTP/1.1 200") == 1
+    assert not transport.closed
+    assert protocol._current_request is None
+    assert protocol._body_receiver is None
+    timer = protocol._keepalive_handle
+    assert timer is not None
+
+    # the next request starts a new task on the same connection
+    protocol.data_received(REQUEST)
+    assert protocol._task is not task
+    await settle()
+    assert timer.cancelled()
+    assert transport.written.count(b"HTTP/1.1 200") == 2
+    assert protocol.req_count == 2
+    protocol.connection_lost(None)
+
+
+@pytest.mark.asyncio
+async def test_flow_control_event_only_while_paused():
+    flow = FlowControl(FakeTransport())
+    await flow.drain()
+    assert flow._is_writable_event is None
+
+    flow.pause_writing()
+    drain = asyncio.create_task(flow.drain())
+    await asyncio.sleep(0)
+    assert not drain.done()
+    assert flow._is_writable_event is not None
+
+    flow.resume_writing()
+    await asyncio.wait_for(drain, timeout=1.0)
+    assert flow._is_writable_event is None
+
+
+@pytest.mark.asyncio
+async def test_send_kept_past_the_response_does_not_reach_the_next_request():
+    protocol, transport = make_protocol()
+    sends = []
+
+    async def keeping_app(scope, receive, send):
+        sends.append(send)
+        if len(sends) == 2:
+            # the previous request's send, its response is complete
+            await sends[0]({"type": "http.response.start", "status": 500,
+                            "headers": []})
+        await app(scope, receive, send)
+
+    protocol.app = keeping_app
+    protocol.data_received(REQUEST)
+    await settle()
+    protocol.data_received(REQUEST)
+    await settle()
+
+    assert sends[0] is not sends[1]
+    assert transport.written.count(b"HTTP/1.1 200") == 2
+    assert b"HTTP/1.1 500" not in transport.written
+    protocol.connection_lost(None)
@@ -23,6 +23,7 @@ import pytest
 
 from gunicorn.config import Config
 from gunicorn.asgi.protocol import ASGIProtocol
+from gunicorn.scoreboard import private_slot
 
 
 class _FakeTransport(asyncio.Transport):
@@ -101,6 +102,7 @@ def _build_worker(loop, app, http_parser):
     w.nr = 0
     w.max_requests = 1000
     w.alive = True
+    w.score = private_slot()
     return w
 
 
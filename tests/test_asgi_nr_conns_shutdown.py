@@ -27,6 +27,7 @@ import pytest
 
 from gunicorn.asgi.protocol import ASGIProtocol
 from gunicorn.config import Config
+from gunicorn.scoreboard import private_slot
 from gunicorn.workers.gasgi import ASGIWorker
 
 
@@ -65,6 +66,7 @@ def make_worker(graceful_timeout=1):
         alive=True,
         log=logging.getLogger("test.asgi.nr_conns"),
         asgi=None,
+        score=private_slot(),
     )
 
 
@@ -142,13 +144,13 @@ async def test_server_initiated_close_still_runs_full_cleanup():
 
     proto.reader = mock.Mock()
     proto._body_receiver = mock.Mock()
-    proto._cancel_keepalive_timer = mock.Mock()
 
-    proto._close_transport()
-    proto.connection_lost(None)
+    with mock.patch.object(ASGIProtocol, "_cancel_keepalive_timer") as cancel:
+        proto._close_transport()
+        proto.connection_lost(None)
 
     assert worker.nr_conns == 0
-    assert proto._cancel_keepalive_timer.called, "keepalive timer left running"
+    assert cancel.called, "keepalive timer left running"
     assert proto.reader.feed_eof.called, "reader never got EOF"
     assert proto._body_receiver.signal_disconnect.called, (
         "app never told the peer disconnected"
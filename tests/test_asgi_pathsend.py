@@ -0,0 +1,220 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for the http.response.pathsend and http.response.zerocopy ASGI
+extensions."""
+
+import asyncio
+import os
+import socket
+import threading
+from unittest import mock
+
+import pytest
+
+from gunicorn.asgi.protocol import ASGIProtocol, BodyReceiver
+from gunicorn.config import Config
+
+CONTENT = bytes(range(256)) * 1024
+
+
+@pytest.fixture
+def path(tmp_path):
+    p = tmp_path / "file.bin"
+    p.write_bytes(CONTENT)
+    return p
+
+
+def make_protocol(app, tls=True):
+    worker = mock.Mock()
+    worker.cfg = Config()
+    worker.log = mock.Mock()
+    worker.log.access_log_enabled = False
+    worker.alive = True
+    worker.state = {}
+    worker.asgi = app
+
+    protocol = ASGIProtocol(worker)
+    protocol._closed = False
+    protocol._flow_control = mock.Mock()
+    protocol._flow_control.drain = mock.AsyncMock()
+    protocol.transport = mock.Mock()
+    protocol.transport.is_closing.return_value = False
+    # only TLS transports have an SSL context, they are read in chunks
+    protocol.transport.get_extra_info.return_value = (
+        object() if tls else None)
+    written = []
+    protocol.transport.write = mock.Mock(side_effect=written.append)
+    return protocol, written
+
+
+def make_request(method="GET"):
+    request = mock.Mock()
+    request.method = method
+    request.path = "/file"
+    request.raw_path = b"/file"
+    request.query = ""
+    request.version = (1, 1)
+    request.scheme = "http"
+    request.headers = []
+    request.uri = "/file"
+    request.should_close = mock.Mock(return_value=False)
+    request.content_length = 0
+    request.chunked = False
+    return request
+
+
+async def run(app, method="GET", tls=True):
+    protocol, written = make_protocol(app, tls=tls)
+    request = make_request(method)
+    protocol._body_receiver = BodyReceiver(request, protocol)
+    protocol._body_receiver.set_complete()
+    await protocol._handle_http_request(
+        request, ("127.0.0.1", 8000), ("127.0.0.1", 50000))
+    assert not protocol.worker.log.exception.called
+    return protocol, b"".join(written)
+
+
+def split(response):
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.lower(), body
+
+
+def start(length=None):
+    headers = [(b"content-type", b"application/octet-stream")]
+    if length is not None:
+        headers.append((b"content-length", str(length).encode()))
+    return {"type": "http.response.start", "status": 200, "headers": headers}
+
+
+@pytest.mark.asyncio
+async def test_extensions_are_advertised():
+    scopes = []
+
+    async def app(scope, receive, send):
+        scopes.append(scope)
+        await send(start(0))
+        await send({"type": "http.response.body"})
+
+    await run(app)
+    assert "http.response.pathsend" in scopes[0]["extensions"]
+    assert "http.response.zerocopy" in scopes[0]["extensions"]
+
+
+@pytest.mark.asyncio
+async def test_pathsend_reads_the_file_under_tls(path):
+    async def app(scope, receive, send):
+        await send(start(len(CONTENT)))
+        await send({"type": "http.response.pathsend", "path": str(path)})
+
+    _, response = await run(app)
+    head, body = split(response)
+    assert head.startswith(b"http/1.1 200")
+    assert b"transfer-encoding" not in head
+    assert body == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_pathsend_without_content_length_is_chunked(path):
+    async def app(scope, receive, send):
+        await send(start())
+        await send({"type": "http.response.pathsend", "path": str(path)})
+
+    _, response = await run(app)
+    head, body = split(response)
+    assert b"transfer-encoding: chunked" in head
+    assert body == b"%x\r\n" % len(CONTENT) + CONTENT + b"\r\n0\r\n\r\n"
+
+
+@pytest.mark.asyncio
+async def test_zerocopy_with_offset_and_count(path):
+    with open(path, "rb") as f:
+        async def app(scope, receive, send):
+            await send(start(300))
+            await send({"type": "http.response.zerocopy", "file": f,
+                        "offset": 10, "count": 100, "more_body": True})
+            # from the current position
+            await send({"type": "http.response.zerocopy", "file": f,
+                        "count": 200})
+
+        _, response = await run(app)
+    assert split(response)[1] == CONTENT[10:310]
+
+
+@pytest.mark.asyncio
+async def test_pathsend_opens_and_reads_off_the_event_loop(path):
+    loop_thread = threading.current_thread()
+    threads = []
+
+    def record(func):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return func(*args, **kwargs)
+        return wrapper
+
+    async def app(scope, receive, send):
+        await send(start(len(CONTENT)))
+        await send({"type": "http.response.pathsend", "path": str(path)})
+
+    with mock.patch("builtins.open", record(open)), \
+            mock.patch("os.pread", record(os.pread)):
+        _, response = await run(app)
+    assert split(response)[1] == CONTENT
+    assert threads
+    assert loop_thread not in threads
+
+
+@pytest.mark.asyncio
+async def test_head_sends_no_file(path):
+    async def app(scope, receive, send):
+        await send(start(len(CONTENT)))
+        await send({"type": "http.response.pathsend", "path": str(path)})
+
+    _, response = await run(app, method="HEAD")
+    assert split(response)[1] == b""
+
+
+@pytest.mark.asyncio
+async def test_plain_tcp_uses_sendfile(path):
+    loop = asyncio.get_running_loop()
+
+    async def app(scope, receive, send):
+        await send(start(len(CONTENT)))
+        await send({"type": "http.response.pathsend", "path": str(path)})
+
+    with mock.patch.object(loop, "sendfile", mock.AsyncMock(
+            return_value=len(CONTENT))) as sendfile:
+        protocol, response = await run(app, tls=False)
+    sendfile.assert_awaited_once()
+    args = sendfile.await_args.args
+    assert args[0] is protocol.transport
+    assert args[2:] == (0, len(CONTENT))
+    # only the headers went through transport.write
+    assert split(response)[1] == b""
+
+
+@pytest.mark.asyncio
+async def test_sendfile_on_a_socket_transport(path):
+    loop = asyncio.get_running_loop()
+    server, client = socket.socketpair()
+    transport, _ = await loop.connect_accepted_socket(asyncio.Protocol, server)
+    protocol, _ = make_protocol(None)
+    protocol.transport = transport
+    client.setblocking(False)
+
+    async def receive():
+        received = b""
+        while len(received) < len(CONTENT) - 5:
+            received += await loop.sock_recv(client, 65536)
+        return received
+
+    try:
+        with open(path, "rb") as f:
+            sent, received = await asyncio.gather(
+                protocol._send_file(f, 5, None, chunked=False), receive())
+        assert sent == len(CONTENT) - 5
+        assert received == CONTENT[5:]
+    finally:
+        transport.close()
+        client.close()
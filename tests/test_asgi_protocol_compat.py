@@ -621,11 +621,10 @@ class TestWebSocketBinaryMessages:
         large_data = bytes(range(256)) * 256  # 64KB
         await protocol._send({"type": "websocket.send", "bytes": large_data})
 
-        written = b"".join(
-            c.args[0] for c in protocol.transport.write.call_args_list
-        )
-
-        assert len(written) > 65536
+        # the payload is written along its header, without being copied
+        header, payload = protocol.transport.writelines.call_args.args[0]
+        assert header == b"\x82\x7f" + struct.pack("!Q", 65536)
+        assert payload is large_data
 
     @pytest.mark.asyncio
     async def test_binary_frame_opcode(self):
@@ -0,0 +1,371 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for the permessage-deflate WebSocket extension (RFC 7692)."""
+
+import asyncio
+import struct
+import zlib
+from unittest import mock
+
+import pytest
+
+from gunicorn.asgi.deflate import (
+    MessageTooBig,
+    PerMessageDeflate,
+    memory_usage,
+    parse_offers,
+)
+from gunicorn.asgi.websocket import (
+    CLOSE_INVALID_DATA,
+    CLOSE_MESSAGE_TOO_BIG,
+    CLOSE_PROTOCOL_ERROR,
+    OPCODE_BINARY,
+    OPCODE_CONTINUATION,
+    OPCODE_TEXT,
+    WebSocketProtocol,
+)
+from gunicorn.config import Config
+
+MESSAGE = b'{"user": "alice", "text": "hello", "room": "general"}' * 20
+
+# 32 KiB of compressed data inflating to 32 MiB
+BOMB_SIZE = 32 * 1024 * 1024
+
+
+def make_cfg(**settings):
+    cfg = Config()
+    cfg.set("websocket_compression", True)
+    for key, value in settings.items():
+        cfg.set(key, value)
+    return cfg
+
+
+def negotiate(offer, **settings):
+    headers = [(b"sec-websocket-extensions", offer.encode())]
+    return PerMessageDeflate.negotiate(make_cfg(**settings), headers)
+
+
+def client_compress(payload, window_bits=15):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED,
+                                  -window_bits)
+    data = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return data[:-4]
+
+
+def client_frame(opcode, payload, fin=True, rsv1=False):
+    """A masked client frame."""
+    mask = b"\x01\x02\x03\x04"
+    first = (0x80 if fin else 0) | (0x40 if rsv1 else 0) | opcode
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", first, 0x80 | length)
+    else:
+        header = struct.pack("!BBH", first, 0x80 | 126, length)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return header + mask + masked
+
+
+# ============================================================================
+# Negotiation
+# ============================================================================
+
+class TestNegotiation:
+
+    def test_parse_offers(self):
+        offers = parse_offers(
+            'permessage-deflate; client_max_window_bits; '
+            'server_max_window_bits="10", x-webkit-deflate-frame')
+        assert offers == [
+            ("permessage-deflate", [("client_max_window_bits", None),
+                                    ("server_max_window_bits", "10")]),
+            ("x-webkit-deflate-frame", []),
+        ]
+
+    def test_no_offer(self):
+        cfg = make_cfg()
+        assert PerMessageDeflate.negotiate(cfg, []) == (None, None)
+        assert negotiate("x-webkit-deflate-frame") == (None, None)
+
+    def test_plain_offer(self):
+        extension, response = negotiate("permessage-deflate")
+        # the server window is narrowed to the configured 12 bits, the
+        # client's cannot be without client_max_window_bits
+        assert response == "permessage-deflate; server_max_window_bits=12"
+        assert extension.server_window_bits == 12
+        assert extension.client_window_bits == 15
+        assert extension.threshold == 128
+
+    def test_client_window_is_limited_when_offered(self):
+        extension, response = negotiate(
+            "permessage-deflate; client_max_window_bits")
+        assert response == ("permessage-deflate; server_max_window_bits=12; "
+                            "client_max_window_bits=12")
+        assert extension.client_window_bits == 12
+
+    def test_client_requested_windows(self):
+        extension, response = negotiate(
+            "permessage-deflate; server_max_window_bits=10; "
+            "client_max_window_bits=9",
+            websocket_compression_window_bits=15)
+        assert response == ("permessage-deflate; server_max_window_bits=10; "
+                            "client_max_window_bits=9")
+        assert extension.server_window_bits == 10
+        assert extension.client_window_bits == 9
+
+    def test_full_windows_are_not_announced(self):
+        _, response = negotiate("permessage-deflate; client_max_window_bits",
+                                websocket_compression_window_bits=15)
+        assert response == "permessage-deflate"
+
+    def test_context_takeover(self):
+        extension, response = negotiate(
+            "permessage-deflate; server_no_context_takeover")
+        assert "server_no_context_takeover" in response
+        assert "client_no_context_takeover" not in response
+        assert extension.server_no_context_takeover
+        assert not extension.client_no_context_takeover
+
+        extension, response = negotiate(
+            "permessage-deflate",
+            websocket_compression_no_context_takeover=True)
+        assert "server_no_context_takeover" in response
+        assert "client_no_context_takeover" in response
+        assert extension.server_no_context_takeover
+        assert extension.client_no_context_takeover
+
+    @pytest.mark.parametrize("offer", [
+        "permessage-deflate; server_max_window_bits=8",
+        "permessage-deflate; server_max_window_bits=16",
+        "permessage-deflate; server_max_window_bits",
+        "permessage-deflate; client_max_window_bits=ten",
+        "permessage-deflate; server_no_context_takeover=1",
+        "permessage-deflate; unknown",
+        "permessage-deflate; server_no_context_takeover; "
+        "server_no_context_takeover",
+    ])
+    def test_invalid_offers_are_declined(self, offer):
+        assert negotiate(offer) == (None, None)
+
+    def test_first_acceptable_offer_wins(self):
+        extension, response = negotiate(
+            "permessage-deflate; unknown, "
+            "permessage-deflate; client_max_window_bits=10")
+        assert extension.client_window_bits == 10
+        assert response.endswith("client_max_window_bits=10")
+
+    def test_memory_cap_narrows_the_windows(self):
+        cap = memory_usage(10, 10)
+        extension, _ = negotiate(
+            "permessage-deflate; client_max_window_bits",
+            websocket_compression_window_bits=15,
+            websocket_compression_max_memory=cap)
+        assert memory_usage(extension.server_window_bits,
+                            extension.client_window_bits) <= cap
+        assert extension.server_window_bits == 10
+        assert extension.client_window_bits == 10
+
+    def test_memory_cap_declines_unlimited_client_window(self):
+        # the client's 32 KiB window alone does not fit
+        assert negotiate("permessage-deflate",
+                         websocket_compression_max_memory=32768) == (None, None)
+
+
+# ============================================================================
+# Compression
+# ============================================================================
+
+class TestCompression:
+
+    def test_roundtrip_with_context_takeover(self):
+        server = PerMessageDeflate(server_window_bits=12)
+        client = zlib.decompressobj(-12)
+        sizes = []
+        for _ in range(3):
+            data = server.compress(MESSAGE)
+            sizes.append(len(data))
+            assert client.decompress(data + b"\x00\x00\xff\xff") == MESSAGE
+        assert sizes[0] < len(MESSAGE)
+        # later messages refer to the previous ones
+        assert sizes[1] < sizes[0]
+        assert server._compressor is not None
+
+    def test_no_context_takeover_keeps_no_state(self):
+        server = PerMessageDeflate(server_no_context_takeover=True,
+                                   client_no_context_takeover=True)
+        first = server.compress(MESSAGE)
+        assert server.compress(MESSAGE) == first
+        assert server._compressor is None
+
+        assert server.decompress(client_compress(MESSAGE)) == MESSAGE
+        assert server.decompress(client_compress(MESSAGE)) == MESSAGE
+        assert server._decompressor is None
+
+    def test_decompress_with_context_takeover(self):
+        server = PerMessageDeflate()
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION,
+                                      zlib.DEFLATED, -15)
+        for _ in range(2):
+            data = (compressor.compress(MESSAGE)
+                    + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4]
+            assert server.decompress(data) == MESSAGE
+
+    def test_invalid_data(self):
+        with pytest.raises(zlib.error):
+            PerMessageDeflate().decompress(b"\xff\xff\xff\xff")
+
+    def test_max_size(self):
+        server = PerMessageDeflate(max_size=len(MESSAGE))
+        assert server.decompress(client_compress(MESSAGE)) == MESSAGE
+        with pytest.raises(MessageTooBig):
+            server.decompress(client_compress(MESSAGE + b"!"))
+
+    def test_bomb_is_inflated_no_further_than_max_size(self):
+        server = PerMessageDeflate(max_size=1024 * 1024)
+        bomb = client_compress(b"\x00" * BOMB_SIZE)
+        with pytest.raises(MessageTooBig):
+            server.decompress(bomb)
+        # the input left over was never inflated
+        assert server._decompressor.unconsumed_tail
+
+
+# ============================================================================
+# WebSocket protocol
+# ============================================================================
+
+def make_protocol(offer="permessage-deflate", **settings):
+    transport = mock.Mock()
+    headers = [(b"sec-websocket-key", b"dGhlIHNhbXBsZSBub25jZQ==")]
+    if offer:
+        headers.append((b"sec-websocket-extensions", offer.encode()))
+    return WebSocketProtocol(
+        transport, {"type": "websocket", "headers": headers},
+        mock.AsyncMock(), mock.Mock(), cfg=make_cfg(**settings))
+
+
+def handshake(protocol):
+    return protocol.transport.write.call_args_list[0].args[0]
+
+
+class TestWebSocketProtocol:
+
+    @pytest.mark.asyncio
+    async def test_accept_negotiates(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        assert (b"Sec-WebSocket-Extensions: permessage-deflate; "
+                b"server_max_window_bits=12\r\n") in handshake(protocol)
+        assert protocol.deflate is not None
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        protocol = make_protocol(websocket_compression=False)
+        await protocol._send({"type": "websocket.accept"})
+        assert b"Sec-WebSocket-Extensions" not in handshake(protocol)
+        assert protocol.deflate is None
+
+    @pytest.mark.asyncio
+    async def test_no_offer(self):
+        protocol = make_protocol(offer=None)
+        await protocol._send({"type": "websocket.accept"})
+        assert b"Sec-WebSocket-Extensions" not in handshake(protocol)
+        assert protocol.deflate is None
+
+    @pytest.mark.asyncio
+    async def test_send_compresses_from_the_threshold(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        await protocol._send({"type": "websocket.send", "text": "small"})
+        await protocol._send({"type": "websocket.send",
+                              "text": MESSAGE.decode()})
+
+        small = protocol.transport.write.call_args_list[1].args[0]
+        assert small == b"\x81\x05small"
+
+        large = protocol.transport.write.call_args_list[2].args[0]
+        assert large[0] == 0xC0 | OPCODE_TEXT
+        length = large[1]
+        assert length < len(MESSAGE)
+        client = zlib.decompressobj(-12)
+        assert client.decompress(large[2:] + b"\x00\x00\xff\xff") == MESSAGE
+
+    @pytest.mark.asyncio
+    async def test_receive_compressed(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        protocol.feed_data(client_frame(OPCODE_TEXT, client_compress(MESSAGE),
+                                        rsv1=True))
+        opcode, payload = await asyncio.wait_for(protocol._read_frame(), 1.0)
+        assert opcode == OPCODE_TEXT
+        assert payload == MESSAGE
+
+    @pytest.mark.asyncio
+    async def test_receive_uncompressed(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        protocol.feed_data(client_frame(OPCODE_BINARY, b"raw"))
+        assert await protocol._read_frame() == (OPCODE_BINARY, b"raw")
+
+    @pytest.mark.asyncio
+    async def test_receive_compressed_fragments(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        data = client_compress(MESSAGE)
+        half = len(data) // 2
+        protocol.feed_data(
+            client_frame(OPCODE_BINARY, data[:half], fin=False, rsv1=True)
+            + client_frame(OPCODE_CONTINUATION, data[half:]))
+        assert await protocol._read_frame() == (OPCODE_CONTINUATION, b"")
+        assert await protocol._read_frame() == (OPCODE_BINARY, MESSAGE)
+
+    @pytest.mark.asyncio
+    async def test_rsv1_without_negotiation(self):
+        protocol = make_protocol(offer=None)
+        await protocol._send({"type": "websocket.accept"})
+        protocol.feed_data(client_frame(OPCODE_TEXT, client_compress(MESSAGE),
+                                        rsv1=True))
+        assert await protocol._read_frame() is None
+        close = protocol.transport.write.call_args_list[-1].args[0]
+        assert struct.unpack("!H", close[2:4])[0] == CLOSE_PROTOCOL_ERROR
+
+    @pytest.mark.asyncio
+    async def test_rsv1_on_continuation(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        protocol.feed_data(
+            client_frame(OPCODE_TEXT, b"a", fin=False)
+            + client_frame(OPCODE_CONTINUATION, b"b", rsv1=True))
+        assert await protocol._read_frame() == (OPCODE_CONTINUATION, b"")
+        assert await protocol._read_frame() is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_compressed_data(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        protocol.feed_data(client_frame(OPCODE_TEXT, b"\xff\xff\xff\xff",
+                                        rsv1=True))
+        assert await protocol._read_frame() is None
+        close = protocol.transport.write.call_args_list[-1].args[0]
+        assert struct.unpack("!H", close[2:4])[0] == CLOSE_INVALID_DATA
+
+    @pytest.mark.asyncio
+    async def test_decompression_bomb(self):
+        protocol = make_protocol()
+        await protocol._send({"type": "websocket.accept"})
+        bomb = client_compress(b"\x00" * BOMB_SIZE)
+        protocol.feed_data(client_frame(OPCODE_BINARY, bomb, rsv1=True))
+        assert await protocol._read_frame() is None
+        close = protocol.transport.write.call_args_list[-1].args[0]
+        assert struct.unpack("!H", close[2:4])[0] == CLOSE_MESSAGE_TOO_BIG
+
+    @pytest.mark.asyncio
+    async def test_message_too_big(self):
+        protocol = make_protocol(offer=None, websocket_max_message_size=4)
+        await protocol._send({"type": "websocket.accept"})
+        protocol.feed_data(client_frame(OPCODE_TEXT, b"ab", fin=False)
+                           + client_frame(OPCODE_CONTINUATION, b"cde"))
+        assert await protocol._read_frame() == (OPCODE_CONTINUATION, b"")
+        assert await protocol._read_frame() is None
+        close = protocol.transport.write.call_args_list[-1].args[0]
+        assert struct.unpack("!H", close[2:4])[0] == CLOSE_MESSAGE_TOO_BIG
@@ -228,6 +228,20 @@ class TestWebSocketFrameMasking:
         unmasked = protocol._unmask(masked, masking_key)
         assert unmasked == original
 
+    def test_unmask_large_payload(self):
+        """Test unmasking a payload that is not a multiple of the mask,
+        with zero bytes at both ends."""
+        protocol = self._create_protocol()
+
+        masking_key = bytes([0x00, 0x9C, 0x00, 0x3E])
+        original = b"\x00\x00" + bytes(range(256)) * 391 + b"\x00"
+
+        masked = bytes(b ^ masking_key[i % 4] for i, b in enumerate(original))
+
+        unmasked = protocol._unmask(memoryview(masked), masking_key)
+        assert type(unmasked) is bytes
+        assert unmasked == original
+
 
 # ============================================================================
 # WebSocket Frame Format Tests (RFC 6455 Section 5.2)
@@ -717,13 +731,21 @@ class TestWebSocketCallbackDataFeeding:
         protocol.feed_data(None)
         # Should not raise, just be ignored
 
-    def test_feed_data_sets_event(self):
-        """Test that feed_data sets the data event."""
+    @pytest.mark.asyncio
+    async def test_feed_data_wakes_reader(self):
+        """Test that feed_data wakes a reader waiting for data."""
+        import asyncio
         protocol = self._create_protocol()
 
-        assert not protocol._data_event.is_set()
+        assert protocol._data_waiter is None
+        read_task = asyncio.create_task(protocol._read_exact(4))
+        await asyncio.sleep(0)
+        assert protocol._data_waiter is not None
+
         protocol.feed_data(b"data")
-        assert protocol._data_event.is_set()
+        assert protocol._data_waiter.done()
+        assert await read_task == b"data"
+        assert protocol._data_waiter is None
 
     def test_feed_eof_sets_flag(self):
         """Test that feed_eof sets the EOF flag."""
@@ -733,13 +755,17 @@ class TestWebSocketCallbackDataFeeding:
         protocol.feed_eof()
         assert protocol._eof is True
 
-    def test_feed_eof_sets_event(self):
-        """Test that feed_eof sets the data event."""
+    @pytest.mark.asyncio
+    async def test_feed_eof_wakes_reader(self):
+        """Test that feed_eof wakes a reader waiting for data."""
+        import asyncio
         protocol = self._create_protocol()
 
-        assert not protocol._data_event.is_set()
+        read_task = asyncio.create_task(protocol._read_exact(4))
+        await asyncio.sleep(0)
+
         protocol.feed_eof()
-        assert protocol._data_event.is_set()
+        assert await read_task is None
 
 
 class TestWebSocketReadExact:
@@ -782,6 +808,22 @@ class TestWebSocketReadExact:
 
         assert bytes(protocol._buffer) == b"GH"
 
+    @pytest.mark.asyncio
+    async def test_read_exact_unmasks(self):
+        """Test _read_exact unmasks the bytes it reads with a masking key."""
+        protocol = self._create_protocol()
+        masking_key = bytes([0x01, 0x02, 0x03, 0x04])
+
+        protocol.feed_data(bytes([0x41, 0x43, 0x45, 0x47, 0x44]) + b"rest")
+
+        result = await protocol._read_exact(5, masking_key)
+        assert result == b"@AFCE"
+        assert bytes(protocol._buffer) == b"rest"
+
+        # the buffer can still grow once the view is released
+        protocol.feed_data(b"!")
+        assert bytes(protocol._buffer) == b"rest!"
+
     @pytest.mark.asyncio
     async def test_read_exact_returns_none_on_eof(self):
         """Test _read_exact returns None when EOF with insufficient data."""
@@ -844,11 +886,12 @@ class TestWebSocketReadExact:
 
         This tests the fix for the race condition where:
         1. Task A checks buffer, needs more data
-        2. Task A clears _data_event
-        3. Task B (data_received) calls feed_data(), sets event
-        4. Task A would wait forever on cleared event - DEADLOCK
+        2. Task A waits for data
+        3. Task B (data_received) calls feed_data() before Task A waits
+        4. Task A would wait forever for data already buffered - DEADLOCK
 
-        The fix adds a buffer check after clear() to catch this case.
+        The length check and the wait run without yielding, so this cannot
+        happen.
         """
         import asyncio
         protocol = self._create_protocol()
@@ -1036,3 +1079,38 @@ class TestWebSocketFragmentedMessages:
         # Third read: complete reassembled message
         result3 = await asyncio.wait_for(protocol._read_frame(), timeout=1.0)
         assert result3 == (OPCODE_TEXT, b"Hello World")
+
+
+class TestWebSocketMessageQueue:
+    """Tests for the queue of the messages handed to the application."""
+
+    @pytest.mark.asyncio
+    async def test_get_waits_for_put(self):
+        import asyncio
+        from gunicorn.asgi.websocket import _MessageQueue
+        queue = _MessageQueue()
+        await queue.put(1)
+        assert await queue.get() == 1
+
+        get_task = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        assert not get_task.done()
+        queue.put_nowait(2)
+        queue.put_nowait(3)
+        assert await get_task == 2
+        assert await queue.get() == 3
+
+    @pytest.mark.asyncio
+    async def test_cancelled_getter_passes_the_message_on(self):
+        import asyncio
+        from gunicorn.asgi.websocket import _MessageQueue
+        queue = _MessageQueue()
+        first = asyncio.create_task(queue.get())
+        second = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+
+        # the first getter is woken, then cancelled before it runs
+        queue.put_nowait("message")
+        first.cancel()
+        assert await asyncio.wait_for(second, timeout=1.0) == "message"
+        assert first.cancelled()
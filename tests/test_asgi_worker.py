@@ -221,6 +221,96 @@ class TestASGIWorkerEventLoop:
         assert isinstance(worker.loop, uvloop.Loop)
         worker.loop.close()
 
+    def test_default_task_factory(self):
+        """Test that tasks are not eager by default."""
+        worker = self.create_worker(asgi_loop='asyncio')
+        worker._setup_event_loop()
+
+        assert worker.loop.get_task_factory() is None
+        worker.loop.close()
+
+    @pytest.mark.skipif(
+        not hasattr(asyncio, 'eager_task_factory'),
+        reason="eager tasks require Python 3.12+"
+    )
+    def test_eager_tasks(self):
+        """Test that asgi_eager_tasks sets the eager task factory."""
+        worker = self.create_worker(asgi_loop='asyncio', asgi_eager_tasks=True)
+        worker._setup_event_loop()
+
+        assert worker.loop.get_task_factory() is asyncio.eager_task_factory
+        worker.loop.close()
+
+    def test_eager_tasks_unavailable(self):
+        """Test that asgi_eager_tasks is ignored before Python 3.12."""
+        worker = self.create_worker(asgi_loop='asyncio', asgi_eager_tasks=True)
+        with mock.patch.object(asyncio, 'eager_task_factory', None,
+                               create=True):
+            worker._setup_event_loop()
+
+        assert worker.loop.get_task_factory() is None
+        assert worker.log.warning.called
+        worker.loop.close()
+
+
+class TestASGIWorkerBroadcast:
+    """Tests for joining the broadcast channel."""
+
+    def create_worker(self, **kwargs):
+        cfg = Config()
+        for key, value in kwargs.items():
+            cfg.set(key, value)
+        worker = gasgi.ASGIWorker(
+            age=1,
+            ppid=os.getpid(),
+            sockets=[],
+            app=FakeApp(),
+            timeout=30,
+            cfg=cfg,
+            log=mock.Mock(),
+        )
+        worker.loop = asyncio.new_event_loop()
+        return worker
+
+    def test_start_broadcast(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GUNICORN_BROADCAST_DIR", str(tmp_path))
+        worker = self.create_worker(websocket_broadcast=True)
+        try:
+            worker._start_broadcast()
+            assert worker.broadcast is not None
+            assert os.listdir(tmp_path) == ["%d.sock" % os.getpid()]
+            worker.broadcast.close()
+        finally:
+            worker.loop.close()
+
+    def test_broadcast_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GUNICORN_BROADCAST_DIR", str(tmp_path))
+        worker = self.create_worker()
+        try:
+            worker._start_broadcast()
+            assert worker.broadcast is None
+        finally:
+            worker.loop.close()
+
+    def test_broadcast_without_directory(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("GUNICORN_BROADCAST_DIR", raising=False)
+        worker = self.create_worker(websocket_broadcast=True)
+        try:
+            worker._start_broadcast()
+            assert worker.broadcast is None
+        finally:
+            worker.loop.close()
+
+    def test_broadcast_unavailable(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GUNICORN_BROADCAST_DIR", str(tmp_path / "gone"))
+        worker = self.create_worker(websocket_broadcast=True)
+        try:
+            worker._start_broadcast()
+            assert worker.broadcast is None
+            assert worker.log.error.called
+        finally:
+            worker.loop.close()
+
 
 class TestASGIWorkerSignals:
     """Tests for signal handling."""
@@ -0,0 +1,176 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for load-driven autoscaling of the workers."""
+
+from unittest import mock
+
+import pytest
+
+import gunicorn.app.base
+import gunicorn.arbiter
+from gunicorn import autoscale
+from gunicorn.scoreboard import Scoreboard
+from gunicorn.workers.gthread import ThreadWorker
+from gunicorn.workers.sync import SyncWorker
+
+
+class DummyApplication(gunicorn.app.base.BaseApplication):
+
+    def __init__(self, **settings):
+        self.settings = settings
+        super().__init__()
+
+    def init(self, parser, opts, args):
+        """No-op"""
+
+    def load(self):
+        """No-op"""
+
+    def load_config(self):
+        self.cfg.set("autoscale", True)
+        for name, value in self.settings.items():
+            self.cfg.set(name, value)
+
+
+def create_arbiter(nworkers=2, **settings):
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication(**settings))
+    arbiter.WORKERS = {}
+    arbiter.LISTENERS = []
+    board = Scoreboard(8)
+    for pid in range(100, 100 + nworkers):
+        arbiter.WORKERS[pid] = mock.Mock(score=board.slot(pid - 100))
+    arbiter.autoscaler.reset(0.0)
+    arbiter.log = mock.Mock()
+    return arbiter
+
+
+def busy(arbiter, seconds, in_flight=0):
+    """Have each worker spend ``seconds`` on requests and keep
+    ``in_flight`` of them running."""
+    for worker in arbiter.WORKERS.values():
+        worker.score.request_finished(worker.score.request_started() - seconds,
+                                      200, 0)
+        for _ in range(in_flight):
+            worker.score.request_started()
+
+
+def test_setup():
+    arbiter = create_arbiter(workers=3)
+    assert arbiter.autoscaler.bounds() == (1, 6)
+    assert arbiter.num_workers == 3
+
+    arbiter = create_arbiter(workers=10, autoscale_min_workers=2,
+                             autoscale_max_workers=4)
+    assert arbiter.autoscaler.bounds() == (2, 4)
+    assert arbiter.num_workers == 4
+
+    arbiter.cfg.set("autoscale", False)
+    arbiter.setup(arbiter.app)
+    assert arbiter.autoscaler is None
+    assert arbiter.num_workers == 10
+
+
+def test_capacity():
+    arbiter = create_arbiter(threads=8)
+    assert arbiter.worker_class is ThreadWorker
+    assert arbiter.autoscaler.capacity() == 8
+    arbiter.worker_class = SyncWorker
+    assert arbiter.autoscaler.capacity() == 1
+
+
+def test_measure():
+    arbiter = create_arbiter()
+    scaler = arbiter.autoscaler
+    scaler.sample()
+    assert scaler.measure(5.0) == 0.0
+
+    # each worker busy 4s out of 5
+    busy(arbiter, 4)
+    assert scaler.measure(5.0) == pytest.approx(0.8)
+
+    # a request running longer than the window counts as busy
+    scaler.reset(5.0)
+    busy(arbiter, 0, in_flight=1)
+    scaler.sample()
+    assert scaler.measure(10.0) == pytest.approx(1.0)
+
+
+def test_desired():
+    arbiter = create_arbiter(workers=4, autoscale_target=0.5)
+    scaler = arbiter.autoscaler
+    assert scaler.desired(0.0, 0) == 1
+    assert scaler.desired(0.5, 0) == 2
+    assert scaler.desired(1.0, 0) == 4
+    # the backlog asks for one more worker per pending connection
+    assert scaler.desired(1.0, 1) == 6
+    # within the bounds
+    assert scaler.desired(1.0, 100) == 8
+
+
+def test_backlog_is_the_peak_of_the_window():
+    arbiter = create_arbiter()
+    listener = mock.Mock()
+    arbiter.LISTENERS = [listener]
+    scaler = arbiter.autoscaler
+    for backlog in (3, 7, -1, 2):
+        listener.get_backlog.return_value = backlog
+        scaler.sample()
+    assert scaler.backlog == 7
+
+
+def test_scale_up_and_down_with_cooldowns():
+    arbiter = create_arbiter(workers=2, autoscale_cooldown_up=10,
+                             autoscale_cooldown_down=60)
+    scaler = arbiter.autoscaler
+
+    busy(arbiter, 5)
+    scaler.sample()
+    scaler.scale(5.0)
+    assert arbiter.num_workers == 3
+    assert scaler.last_decision["from"] == 2
+    assert scaler.last_decision["to"] == 3
+    assert scaler.last_decision["utilization"] == 1.0
+    arbiter.log.info.assert_called_once()
+
+    # busy again, but within the cooldown
+    scaler.reset(5.0)
+    busy(arbiter, 5)
+    scaler.sample()
+    scaler.scale(10.0)
+    assert arbiter.num_workers == 3
+
+    # idle: removing workers waits longer
+    scaler.reset(10.0)
+    scaler.sample()
+    scaler.scale(20.0)
+    assert arbiter.num_workers == 3
+    scaler.reset(60.0)
+    scaler.sample()
+    scaler.scale(65.0)
+    assert arbiter.num_workers == 1
+    assert scaler.status()["last_decision"]["to"] == 1
+
+
+def test_tick_waits_for_the_interval_and_reloads():
+    arbiter = create_arbiter()
+    scaler = arbiter.autoscaler
+    scaler.scale = mock.Mock()
+    with mock.patch("time.monotonic", return_value=1.0):
+        scaler.reset(1.0)
+        scaler.tick()
+    scaler.scale.assert_not_called()
+    assert scaler.samples == 1
+
+    arbiter.reload_cutoff = 0
+    with mock.patch("time.monotonic", return_value=1.0 + autoscale.INTERVAL):
+        scaler.tick()
+    scaler.scale.assert_not_called()
+    assert scaler.samples == 0
+
+    arbiter.reload_cutoff = None
+    with mock.patch("time.monotonic", return_value=2.0 + 2 * autoscale.INTERVAL):
+        scaler.tick()
+    scaler.scale.assert_called_once()
+    assert scaler.samples == 0
@@ -259,6 +259,15 @@ def test_reload_engine_validation():
     pytest.raises(ConfigError, c.set, "reload_engine", "invalid")
 
 
+def test_websocket_window_bits_validation():
+    c = config.Config()
+    assert c.websocket_compression_window_bits == 12
+    c.set("websocket_compression_window_bits", "15")
+    assert c.websocket_compression_window_bits == 15
+    pytest.raises(ValueError, c.set, "websocket_compression_window_bits", 8)
+    pytest.raises(ValueError, c.set, "websocket_compression_window_bits", 16)
+
+
 def test_callable_validation_for_string():
     from os.path import isdir as testfunc
     assert config.validate_callable(-1)("os.path.isdir") == testfunc
@@ -546,6 +555,35 @@ def test_bind_fd():
     assert app.cfg.bind == ["fd://42"]
 
 
+def test_worker_gc_threshold():
+    c = config.Config()
+    assert c.worker_gc_threshold is None
+    c.set("worker_gc_threshold", "50000, 20,20")
+    assert c.worker_gc_threshold == (50000, 20, 20)
+    c.set("worker_gc_threshold", [1000])
+    assert c.worker_gc_threshold == (1000,)
+    with pytest.raises(TypeError):
+        c.set("worker_gc_threshold", "1,2,3,4")
+    with pytest.raises(ValueError):
+        c.set("worker_gc_threshold", "-1")
+
+
+def test_cpu_affinity():
+    c = config.Config()
+    assert c.cpu_affinity == "off"
+    assert c.cpu_affinity_cpus is None
+    c.set("cpu_affinity", "NUMA")
+    assert c.cpu_affinity == "numa"
+    with pytest.raises(ValueError):
+        c.set("cpu_affinity", "socket")
+    c.set("cpu_affinity_cpus", "0-2,8")
+    assert c.cpu_affinity_cpus == [0, 1, 2, 8]
+    c.set("cpu_affinity_cpus", [3, 1])
+    assert c.cpu_affinity_cpus == [1, 3]
+    with pytest.raises(ValueError):
+        c.set("cpu_affinity_cpus", "4-2")
+
+
 def test_repr():
     c = config.Config()
     c.set("workers", 5)
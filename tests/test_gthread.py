@@ -1776,3 +1776,559 @@ class TestSlowClientResilience:
 
         # wait_for_data should not be called for initialized connections
         conn.wait_for_data.assert_not_called()
+
+
+class TestResponseBuffering:
+    """Tests for writing responses to slow clients from the main loop."""
+
+    def create_worker(self, **settings):
+        cfg = Config()
+        cfg.set('response_buffering', True)
+        cfg.set('threads', 2)
+        for name, value in settings.items():
+            cfg.set(name, value)
+
+        worker = gthread.ThreadWorker(
+            age=1,
+            ppid=os.getpid(),
+            sockets=[],
+            app=mock.Mock(),
+            timeout=30,
+            cfg=cfg,
+            log=mock.Mock(),
+        )
+        worker.poller = mock.Mock()
+        return worker
+
+    def socketpair(self):
+        import socket as stdlib_socket
+        server, client = stdlib_socket.socketpair()
+        server.setsockopt(stdlib_socket.SOL_SOCKET, stdlib_socket.SO_SNDBUF, 4096)
+        return server, client
+
+    def drain(self, client, size):
+        data = b''
+        client.settimeout(1)
+        while len(data) < size:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def test_sendall_queues_what_the_socket_does_not_take(self):
+        server, client = self.socketpair()
+        try:
+            budget = gthread.WriteBudget(1024 * 1024)
+            buf = gthread.ResponseBuffer(server, budget)
+            payload = b'x' * 512 * 1024
+
+            buf.sendall(payload)
+
+            assert buf.pending
+            assert 0 < budget.used < len(payload)
+            server.setblocking(False)
+            received = b''
+            while not buf.flush():
+                received += client.recv(65536)
+            received += self.drain(client, len(payload) - len(received))
+            assert received == payload
+            assert budget.used == 0
+        finally:
+            server.close()
+            client.close()
+
+    def test_sendall_blocks_when_budget_exhausted(self):
+        server, client = self.socketpair()
+        try:
+            budget = gthread.WriteBudget(0)
+            buf = gthread.ResponseBuffer(server, budget)
+            payload = b'y' * 256 * 1024
+            reader = threading.Thread(
+                target=lambda: result.append(self.drain(client, len(payload))))
+            result = []
+            reader.start()
+
+            buf.sendall(payload)
+            reader.join()
+
+            assert not buf.pending
+            assert result[0] == payload
+        finally:
+            server.close()
+            client.close()
+
+    def test_discard_releases_budget(self):
+        server, client = self.socketpair()
+        try:
+            budget = gthread.WriteBudget(1024 * 1024)
+            buf = gthread.ResponseBuffer(server, budget)
+            buf.sendall(b'z' * 512 * 1024)
+            assert budget.used > 0
+            buf.discard()
+            assert budget.used == 0
+            assert not buf.pending
+        finally:
+            server.close()
+            client.close()
+
+    def test_disabled_for_ssl(self):
+        worker = self.create_worker(certfile='cert.pem', keyfile='key.pem')
+        assert worker.response_buffering is False
+        assert self.create_worker().response_buffering is True
+
+    def test_finish_request_writes_back_pending_response(self):
+        worker = self.create_worker()
+        worker.nr_conns = 1
+        server, client = self.socketpair()
+        try:
+            conn = gthread.TConn(worker.cfg, server, ('127.0.0.1', 12345),
+                                 ('127.0.0.1', 8000))
+            conn.response_buffer = gthread.ResponseBuffer(server, worker.write_budget)
+            conn.response_buffer.pending.append(b'rest of the response')
+            fs = mock.Mock()
+            fs.cancelled.return_value = False
+            fs.result.return_value = True
+
+            worker.finish_request(conn, fs)
+
+            assert conn in worker.writing_conns
+            assert worker.poller.register.call_args[0][1] == selectors.EVENT_WRITE
+
+            worker.on_socket_writable(conn, fs, server)
+
+            assert conn not in worker.writing_conns
+            assert client.recv(1024) == b'rest of the response'
+            # back to keepalive once written
+            assert conn in worker.keepalived_conns
+            assert worker.nr_conns == 1
+        finally:
+            server.close()
+            client.close()
+
+    def test_write_back_client_gone(self):
+        worker = self.create_worker()
+        worker.nr_conns = 1
+        server, client = self.socketpair()
+        conn = gthread.TConn(worker.cfg, server, ('127.0.0.1', 12345),
+                             ('127.0.0.1', 8000))
+        conn.response_buffer = gthread.ResponseBuffer(server, worker.write_budget)
+        worker.write_budget.reserve(5)
+        conn.response_buffer.pending.append(b'hello')
+        worker.writing_conns.add(conn)
+        client.close()
+
+        worker.on_socket_writable(conn, mock.Mock(), server)
+
+        assert conn not in worker.writing_conns
+        assert worker.nr_conns == 0
+        assert worker.write_budget.used == 0
+
+
+class TestPipelining:
+    """Tests for serving pipelined requests from the same thread."""
+
+    def create_worker(self, **settings):
+        cfg = Config()
+        cfg.set('threads', 2)
+        cfg.set('keepalive', 5)
+        for name, value in settings.items():
+            cfg.set(name, value)
+
+        worker = gthread.ThreadWorker(
+            age=1,
+            ppid=os.getpid(),
+            sockets=[],
+            app=mock.Mock(),
+            timeout=30,
+            cfg=cfg,
+            log=mock.Mock(),
+        )
+        worker.poller = mock.Mock()
+        worker.tpool = mock.Mock()
+        worker.method_queue = mock.Mock()
+        worker.nr = 0
+        worker.alive = True
+
+        def app(environ, start_response):
+            body = environ['PATH_INFO'].encode()
+            start_response('200 OK', [('Content-Length', str(len(body)))])
+            return [body]
+        worker.wsgi = app
+        return worker
+
+    def make_conn(self, worker):
+        import socket as stdlib_socket
+        server, client = stdlib_socket.socketpair()
+        conn = gthread.TConn(worker.cfg, server, ('127.0.0.1', 12345),
+                             ('127.0.0.1', 8000))
+        conn.data_ready = True
+        return conn, client
+
+    def read_responses(self, client, count):
+        data = b''
+        client.settimeout(1)
+        while not data.endswith(b'/%d' % (count - 1)):
+            data += client.recv(65536)
+        return data
+
+    def test_pipelined_requests_served_in_one_call(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        try:
+            client.sendall(b''.join(
+                b'GET /%d HTTP/1.1\r\nHost: a\r\n\r\n' % i for i in range(3)))
+            with mock.patch.object(gthread.util, 'sendmsg_all',
+                                   wraps=gthread.util.sendmsg_all) as sendmsg_all:
+                assert worker.handle(conn) is True
+
+            assert worker.nr == 3
+            data = self.read_responses(client, 3)
+            assert data.index(b'\r\n/0') < data.index(b'\r\n/1') < data.index(b'\r\n/2')
+            # the responses to the first two requests go out together, and
+            # each header block along with its body
+            writes = [len(call[0][1]) for call in sendmsg_all.call_args_list
+                      if call[0][0] is conn.sock]
+            assert writes == [4, 2]
+        finally:
+            conn.close()
+            client.close()
+
+    def test_partial_pipelined_request_goes_back_to_poller(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        try:
+            client.sendall(b'GET /0 HTTP/1.1\r\n\r\nGET /1 HTTP/1.1\r\n')
+            assert worker.handle(conn) is True
+            assert worker.nr == 1
+            assert self.read_responses(client, 1).endswith(b'/0')
+        finally:
+            conn.close()
+            client.close()
+
+    def test_fairness_cap_requeues_connection(self):
+        worker = self.create_worker()
+        worker.nr_conns = 1
+        conn, client = self.make_conn(worker)
+        count = gthread.MAX_PIPELINED_REQUESTS + 1
+        try:
+            client.sendall(b''.join(
+                b'GET /%d HTTP/1.1\r\n\r\n' % i for i in range(count)))
+            result = worker.handle(conn)
+            assert result is gthread._PIPELINED
+            assert worker.nr == gthread.MAX_PIPELINED_REQUESTS
+
+            fs = mock.Mock()
+            fs.cancelled.return_value = False
+            fs.result.return_value = result
+            worker.finish_request(conn, fs)
+
+            # straight back to the thread pool, not to the poller
+            worker.tpool.submit.assert_called_once_with(worker.handle, conn)
+            worker.poller.register.assert_not_called()
+
+            assert worker.handle(conn) is True
+            assert worker.nr == count
+            self.read_responses(client, count)
+        finally:
+            conn.close()
+            client.close()
+
+    def test_request_with_body_is_not_corked(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        try:
+            client.sendall(b'POST /0 HTTP/1.1\r\nContent-Length: 2\r\n\r\nok'
+                           b'GET /1 HTTP/1.1\r\n\r\n')
+            conn.init()
+            req = next(conn.parser)
+            worker.cork(conn, req)
+            assert conn.writer is None
+        finally:
+            conn.close()
+            client.close()
+
+    def test_error_after_corked_response_keeps_order(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        try:
+            client.sendall(b'GET /0 HTTP/1.1\r\n\r\nBAD\r\n\r\n')
+            assert worker.handle(conn) is False
+            client.settimeout(1)
+            data = b''
+            while b'400' not in data:
+                data += client.recv(65536)
+            assert data.startswith(b'HTTP/1.1 200 OK')
+            assert data.index(b'\r\n/0') < data.index(b'400')
+        finally:
+            conn.close()
+            client.close()
+
+    def test_streamed_response_is_not_held_back(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        seen = threading.Event()
+        plain_app = worker.wsgi
+
+        def events():
+            yield b'first'
+            # the client only gets here if the first chunk was written
+            assert seen.wait(5)
+            yield b'last'
+
+        def app(environ, start_response):
+            if environ['PATH_INFO'] != '/0':
+                return plain_app(environ, start_response)
+            start_response('200 OK', [('Content-Type', 'text/event-stream')])
+            return events()
+        worker.wsgi = app
+
+        try:
+            client.sendall(b'GET /0 HTTP/1.1\r\n\r\nGET /1 HTTP/1.1\r\n\r\n')
+            handler = threading.Thread(target=worker.handle, args=(conn,))
+            handler.start()
+            client.settimeout(1)
+            data = b''
+            while b'first' not in data:
+                data += client.recv(65536)
+            seen.set()
+            while not data.endswith(b'/1'):
+                data += client.recv(65536)
+            handler.join(5)
+            assert worker.nr == 2
+            assert data.index(b'last') < data.index(b'\r\n/1')
+        finally:
+            seen.set()
+            conn.close()
+            client.close()
+
+    def test_disabled_for_ssl_and_uwsgi(self):
+        assert self.create_worker().pipelining is True
+        worker = self.create_worker(certfile='cert.pem', keyfile='key.pem')
+        assert worker.pipelining is False
+        assert self.create_worker(protocol='uwsgi').pipelining is False
+
+
+class TestWriteCoalescer:
+
+    def test_passes_writes_through_unless_corked(self):
+        sock = mock.Mock()
+        writer = gthread.WriteCoalescer(sock)
+        writer.sendall(b'a')
+        sock.sendall.assert_called_once_with(b'a')
+
+    def test_corked_writes_are_sent_together(self):
+        sock = mock.Mock()
+        sock.sendmsg.return_value = 6
+        writer = gthread.WriteCoalescer(sock)
+        writer.corked = True
+        writer.sendall(b'abc')
+        writer.sendall(bytearray(b'def'))
+        sock.sendall.assert_not_called()
+        writer.flush()
+        sock.sendmsg.assert_called_once_with([b'abc', b'def'])
+        assert not writer.pending
+
+    def test_flushes_before_direct_send(self):
+        sock = mock.Mock()
+        writer = gthread.WriteCoalescer(sock)
+        writer.corked = True
+        writer.sendall(b'response')
+        writer.send(b'HTTP/1.1 100 Continue\r\n\r\n')
+        assert sock.method_calls == [
+            mock.call.sendall(b'response'),
+            mock.call.send(b'HTTP/1.1 100 Continue\r\n\r\n'),
+        ]
+
+    def test_flushes_when_full(self):
+        sock = mock.Mock()
+        writer = gthread.WriteCoalescer(sock)
+        writer.corked = True
+        writer.sendall(b'x' * gthread.COALESCE_MAX_SIZE)
+        sock.sendall.assert_called_once()
+        assert not writer.pending
+
+
+class TestHTTP2Streams:
+    """Tests for answering the streams of an HTTP/2 connection concurrently."""
+
+    def create_worker(self):
+        pytest.importorskip('h2')
+        cfg = Config()
+        cfg.set('threads', 4)
+        cfg.set('http_protocols', 'h2,h1')
+        cfg.set('http2_cleartext', 'prior-knowledge')
+        worker = gthread.ThreadWorker(
+            age=1,
+            ppid=os.getpid(),
+            sockets=[],
+            app=mock.Mock(),
+            timeout=30,
+            cfg=cfg,
+            log=mock.Mock(),
+        )
+        worker.tpool = futures.ThreadPoolExecutor(max_workers=4)
+        worker.poller = selectors.DefaultSelector()
+        worker.method_queue.init()
+        worker.poller.register(worker.method_queue.fileno(),
+                               selectors.EVENT_READ,
+                               worker.method_queue.run_callbacks)
+        worker.nr = 0
+        worker.alive = True
+        worker.nr_conns = 1
+        return worker
+
+    def shutdown(self, worker):
+        worker.tpool.shutdown(wait=True)
+        worker.poller.close()
+        worker.method_queue.close()
+
+    def connect(self, worker, paths, settings=None):
+        import socket as stdlib_socket
+        import h2.config
+        import h2.connection
+        server, client = stdlib_socket.socketpair()
+        client_conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=True))
+        client_conn.initiate_connection()
+        if settings:
+            client_conn.update_settings(settings)
+        client.sendall(client_conn.data_to_send())
+        for path in paths:
+            client_conn.send_headers(
+                client_conn.get_next_available_stream_id(),
+                [(':method', 'GET'), (':path', path), (':scheme', 'http'),
+                 (':authority', 'localhost')],
+                end_stream=True)
+        client.sendall(client_conn.data_to_send())
+        conn = gthread.TConn(worker.cfg, server, ('127.0.0.1', 12345),
+                             ('127.0.0.1', 8000))
+        return conn, client, client_conn
+
+    def run_until(self, worker, client, client_conn, count):
+        import h2.events
+        client.setblocking(False)
+        bodies = {}
+        ended = set()
+        deadline = time.monotonic() + 5
+        while len(ended) < count and time.monotonic() < deadline:
+            worker.wait_for_and_dispatch_events(timeout=0.05)
+            try:
+                data = client.recv(65536)
+            except BlockingIOError:
+                continue
+            for event in client_conn.receive_data(data):
+                if isinstance(event, h2.events.DataReceived):
+                    bodies[event.stream_id] = (
+                        bodies.get(event.stream_id, b'') + event.data)
+                elif isinstance(event, h2.events.StreamEnded):
+                    ended.add(event.stream_id)
+            client.sendall(client_conn.data_to_send())
+        return bodies
+
+    def test_streams_run_concurrently(self):
+        worker = self.create_worker()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def app(environ, start_response):
+            # only returns if the other stream runs at the same time
+            barrier.wait()
+            body = environ['PATH_INFO'].encode()
+            start_response('200 OK', [('Content-Length', str(len(body)))])
+            return [body]
+        worker.wsgi = app
+
+        conn, client, client_conn = self.connect(worker, ['/a', '/b'])
+        try:
+            assert worker.handle(conn) is gthread._HTTP2
+            fs = futures.Future()
+            fs.set_result(gthread._HTTP2)
+            worker.finish_request(conn, fs)
+            assert conn in worker.http2_conns
+
+            bodies = self.run_until(worker, client, client_conn, 2)
+            assert bodies == {1: b'/a', 3: b'/b'}
+            assert worker.nr == 2
+            assert conn.http2_streams == 0
+        finally:
+            self.shutdown(worker)
+            conn.close()
+            client.close()
+
+    def test_shutdown_closes_idle_connection(self):
+        worker = self.create_worker()
+        conn, client, client_conn = self.connect(worker, [])
+        try:
+            assert worker.handle(conn) is gthread._HTTP2
+            fs = futures.Future()
+            fs.set_result(gthread._HTTP2)
+            worker.finish_request(conn, fs)
+
+            worker.shutdown_http2()
+
+            assert conn not in worker.http2_conns
+            assert worker.nr_conns == 0
+        finally:
+            self.shutdown(worker)
+            client.close()
+
+    def test_client_disconnect_closes_connection(self):
+        worker = self.create_worker()
+        conn, client, client_conn = self.connect(worker, [])
+        try:
+            assert worker.handle(conn) is gthread._HTTP2
+            fs = futures.Future()
+            fs.set_result(gthread._HTTP2)
+            worker.finish_request(conn, fs)
+            client.close()
+
+            worker.wait_for_and_dispatch_events(timeout=0.5)
+
+            assert conn not in worker.http2_conns
+            assert worker.nr_conns == 0
+        finally:
+            self.shutdown(worker)
+
+    def test_stalled_window_resets_stream(self, monkeypatch):
+        import h2.events
+        import h2.settings
+        from gunicorn.http2.connection import HTTP2ServerConnection
+        from gunicorn.http2.errors import HTTP2ErrorCode
+        monkeypatch.setattr(HTTP2ServerConnection, 'WINDOW_UPDATE_TIMEOUT', 0.2)
+        worker = self.create_worker()
+
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Length', '100')])
+            return [b'x' * 100]
+        worker.wsgi = app
+
+        # the client grants 10 bytes and never sends a WINDOW_UPDATE
+        conn, client, client_conn = self.connect(
+            worker, ['/'],
+            settings={h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: 10})
+        try:
+            assert worker.handle(conn) is gthread._HTTP2
+            fs = futures.Future()
+            fs.set_result(gthread._HTTP2)
+            worker.finish_request(conn, fs)
+
+            client.setblocking(False)
+            resets = []
+            deadline = time.monotonic() + 5
+            while not resets and time.monotonic() < deadline:
+                worker.wait_for_and_dispatch_events(timeout=0.05)
+                try:
+                    data = client.recv(65536)
+                except BlockingIOError:
+                    continue
+                for event in client_conn.receive_data(data):
+                    assert not isinstance(event, h2.events.StreamEnded)
+                    if isinstance(event, h2.events.StreamReset):
+                        resets.append(event)
+                client.sendall(client_conn.data_to_send())
+            assert [e.stream_id for e in resets] == [1]
+            assert resets[0].error_code == HTTP2ErrorCode.CANCEL
+        finally:
+            self.shutdown(worker)
+            conn.close()
+            client.close()
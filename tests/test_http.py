@@ -3,11 +3,15 @@
 # See the NOTICE for more information.
 
 import io
+import sys
+import socket
+import threading
 import t
 import pytest
 from unittest import mock
 
 from gunicorn import util
+from gunicorn.http import wsgi
 from gunicorn.http.body import Body, LengthReader, EOFReader
 from gunicorn.http.wsgi import FileWrapper, Response
 from gunicorn.http.unreader import Unreader, IterUnreader, SocketUnreader
@@ -375,6 +379,7 @@ def test_file_wrapper_iterable():
 
 def _make_response(method="GET", version=(1, 1), sendfile=False):
     sock = mock.MagicMock()
+    sock.sendmsg.side_effect = lambda buffers: sum(len(b) for b in buffers)
     req = mock.MagicMock()
     req.method = method
     req.version = version
@@ -480,3 +485,164 @@ def test_normal_response_unaffected():
     assert resp.response_length == 5
     resp.write(b"hello")
     assert resp.sent == 5
+
+
+def test_headers_go_out_with_first_body_write():
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [("Content-Type", "text/plain")])
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        resp.write(b"hello")
+    write_buffers.assert_called_once()
+    buffers = write_buffers.call_args[0][1]
+    assert buffers[0].startswith(b"HTTP/1.1 200 OK\r\n")
+    # chunk framing is sent as separate buffers, the body is not copied
+    assert buffers[1:] == [b"5\r\n", b"hello", b"\r\n"]
+
+
+def test_list_body_writes_are_batched():
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [("Content-Length", "10")])
+    resp.batch_writes([b"hello", b"world"])
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        resp.write(b"hello")
+        write_buffers.assert_not_called()
+        resp.write(b"world")
+    write_buffers.assert_called_once()
+    assert write_buffers.call_args[0][1][1:] == [b"hello", b"world"]
+
+
+def test_generator_body_writes_are_not_held():
+    def body():
+        yield b"hello"
+        yield b"world"
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [("Content-Length", "10")])
+    resp.batch_writes(body())
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        resp.write(b"hello")
+        write_buffers.assert_called_once()
+        assert resp.headers_sent
+        resp.write(b"world")
+    assert write_buffers.call_count == 2
+
+
+def test_batched_writes_flush_at_batch_size():
+    size = wsgi.WRITE_BATCH_SIZE
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [("Content-Length", str(size * 2))])
+    resp.batch_writes([])
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        resp.write(b"x" * (size - 1))
+        resp.write(b"x")
+        assert write_buffers.call_count == 1
+        resp.write(b"x" * size)
+    assert write_buffers.call_count == 2
+
+
+def test_close_sends_headers_and_last_chunk_together():
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [])
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        resp.close()
+    write_buffers.assert_called_once()
+    assert write_buffers.call_args[0][1][1:] == [b"0\r\n\r\n"]
+
+
+def test_batched_writes_flush_at_buffer_count():
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [("Content-Length", "20000")])
+    resp.batch_writes([b"x" * 10] * 2000)
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        for _ in range(2000):
+            resp.write(b"x" * 10)
+    assert all(len(call[0][1]) <= wsgi.WRITE_BATCH_BUFFERS
+               for call in write_buffers.call_args_list)
+
+
+def test_many_small_writes_reach_a_real_socket():
+    server, client = socket.socketpair()
+    try:
+        req = mock.MagicMock(method="GET", version=(1, 1))
+        req.should_close.return_value = False
+        resp = Response(req, server, mock.MagicMock(is_ssl=False))
+        resp.start_response("200 OK", [("Content-Length", "20000")])
+        resp.batch_writes([b"x" * 10] * 2000)
+        received = []
+        reader = threading.Thread(
+            target=lambda: received.append(read_until_closed(client)))
+        reader.start()
+        for _ in range(2000):
+            resp.write(b"x" * 10)
+        resp.close()
+        server.shutdown(socket.SHUT_WR)
+        reader.join()
+        assert received[0].endswith(b"\r\n\r\n" + b"x" * 20000)
+    finally:
+        server.close()
+        client.close()
+
+
+def read_until_closed(sock):
+    data = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b"".join(data)
+        data.append(chunk)
+
+
+def test_batched_headers_are_not_sent():
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [("Content-Length", "10")])
+    resp.batch_writes([b"hello", b"world"])
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        resp.write(b"hello")
+        write_buffers.assert_not_called()
+        assert not resp.headers_sent
+        resp.write(b"world")
+    assert resp.headers_sent
+
+
+def test_exc_info_replaces_unwritten_response():
+    resp, sock = _make_response()
+    resp.start_response("200 OK", [("Content-Length", "10")])
+    resp.batch_writes([b"hello", b"world"])
+    resp.write(b"hello")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        resp.start_response("500 Internal Server Error",
+                            [("Content-Length", "4")], sys.exc_info())
+    with mock.patch.object(util, "write_buffers") as write_buffers:
+        resp.write(b"oops")
+    buffers = write_buffers.call_args[0][1]
+    assert len(buffers) == 2
+    assert buffers[0].startswith(b"HTTP/1.1 500 Internal Server Error\r\n")
+    assert buffers[1] == b"oops"
+
+
+def test_generator_block_is_sent_before_the_next_one_is_produced():
+    from gunicorn.config import Config
+    from gunicorn.workers.sync import SyncWorker
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Length", "10")])
+        yield b"hello"
+        raise ValueError("boom")
+
+    cfg = Config()
+    worker = SyncWorker(1, 0, [], mock.Mock(), 30, cfg, mock.Mock())
+    worker.wsgi = app
+    server, client = socket.socketpair()
+    try:
+        client.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        listener = mock.Mock()
+        listener.getsockname.return_value = ("127.0.0.1", 8000)
+        worker.handle(listener, server, ("127.0.0.1", 1234))
+        response = read_until_closed(client)
+    finally:
+        server.close()
+        client.close()
+    # the block went out before the application raised: too late for a 500
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert response.endswith(b"\r\n\r\nhello")
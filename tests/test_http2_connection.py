@@ -1289,3 +1289,100 @@ class TestEndStream:
     def test_end_stream_on_unknown_stream(self):
         conn = self._conn()
         assert conn.end_stream(999) is False
+
+
+class TestOutputQueue:
+    """The socket I/O left to an event loop, streams answered by threads."""
+
+    def _conn(self):
+        import socket
+        from gunicorn.http2.connection import HTTP2ServerConnection
+        server, client = socket.socketpair()
+        conn = HTTP2ServerConnection(MockConfig(), server, ('127.0.0.1', 12345))
+        conn.initiate_connection()
+        server.setblocking(False)
+        ready = mock.Mock()
+        conn.use_output_queue(ready)
+        return conn, server, client, ready
+
+    def _request(self, conn, client):
+        client_conn = create_client_connection()
+        client_conn.send_headers(1, [
+            (':method', 'GET'),
+            (':path', '/'),
+            (':scheme', 'http'),
+            (':authority', 'localhost'),
+        ], end_stream=True)
+        client.sendall(client_conn.data_to_send())
+        return client_conn
+
+    def test_frames_are_queued_until_flushed(self):
+        conn, server, client, ready = self._conn()
+        try:
+            self._request(conn, client)
+            requests = conn.receive_available()
+            assert len(requests) == 1
+            # the SETTINGS acknowledgement waits in the queue
+            ready.assert_called_once_with()
+            assert conn._output
+
+            conn.send_response(1, 200, [('content-length', '2')], b'ok')
+            ready.assert_called_once_with()
+
+            assert conn.flush_output() is True
+            assert not conn._output
+            client.settimeout(1)
+            assert client.recv(65536)
+        finally:
+            server.close()
+            client.close()
+
+    def test_receive_available_without_data(self):
+        conn, server, client, _ = self._conn()
+        try:
+            assert conn.receive_available() == []
+            assert not conn.is_closed
+        finally:
+            server.close()
+            client.close()
+
+    def test_flow_control_wait_is_woken_by_receive(self):
+        import threading
+        conn, server, client, _ = self._conn()
+        try:
+            client_conn = self._request(conn, client)
+            conn.receive_available()
+            conn.send_response_headers(1, 200, [])
+
+            window = conn.h2_conn.local_flow_control_window(1)
+            result = []
+            sender = threading.Thread(target=lambda: result.append(
+                conn.send_data(1, b'x' * (window + 10), end_stream=True)))
+            sender.start()
+            time_limit = 50
+            while not conn._changed._waiters and time_limit:
+                time_limit -= 1
+                sender.join(0.01)
+            assert sender.is_alive()
+
+            # the event loop reads the WINDOW_UPDATE the client sends
+            client_conn.increment_flow_control_window(100, stream_id=1)
+            client_conn.increment_flow_control_window(100)
+            client.sendall(client_conn.data_to_send())
+            while sender.is_alive():
+                conn.receive_available()
+                sender.join(0.01)
+            assert result == [True]
+        finally:
+            server.close()
+            client.close()
+
+    def test_close_wakes_up_writers(self):
+        conn, server, client, _ = self._conn()
+        try:
+            conn._output += b'x' * (conn.OUTPUT_QUEUE_LIMIT + 1)
+            conn.close()
+            assert conn._wait_for_output_room() is False
+        finally:
+            server.close()
+            client.close()
@@ -6,11 +6,13 @@ import datetime
 import logging
 import logging.handlers
 from types import SimpleNamespace
+from unittest import mock
 
 import pytest
 
+import gunicorn.glogging
 from gunicorn.config import Config
-from gunicorn.glogging import Logger
+from gunicorn.glogging import AccessLogFormatter, Logger, SafeAtoms
 
 
 def test_atoms_defaults():
@@ -55,6 +57,192 @@ def test_atoms_zero_bytes():
     assert atoms['B'] == 0
 
 
+
+ALL_ATOMS_FORMAT = (
+    '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s %(B)s "%(f)s" "%(a)s" '
+    '%(m)s %(U)s %(q)s %(H)s %(T)d %(D)s %(M)s %(L)s %(p)s %(missing)s '
+    '%({accept}i)s %({X-Quoted}i)s %({absent}i)s %({content-type}o)s '
+    '%({path_info}e)s %({absent}e)s %%(h)s'
+)
+
+
+def test_access_log_formatter_matches_atoms():
+    response = SimpleNamespace(
+        status='200 OK', headers=[('Content-Type', 'application/json')],
+        sent=12,
+    )
+    request = SimpleNamespace(headers=[('Accept', 'text/html'),
+                                       ('X-Quoted', 'say "hi"')])
+    environ = {
+        'REQUEST_METHOD': 'GET', 'RAW_URI': '/my/path?foo=bar',
+        'PATH_INFO': '/my/path', 'QUERY_STRING': 'foo=bar',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_USER_AGENT': 'curl "8"',
+    }
+    request_time = datetime.timedelta(seconds=1, microseconds=2345)
+    logger = Logger(Config())
+    formatter = AccessLogFormatter(ALL_ATOMS_FORMAT)
+
+    atoms = formatter.atoms(logger, response, request, environ, request_time)
+    expected = SafeAtoms(
+        logger.atoms(response, request, environ, request_time))
+    assert ALL_ATOMS_FORMAT % atoms == ALL_ATOMS_FORMAT % expected
+    assert '{content-length}o' not in atoms
+
+
+def test_access_falls_back_to_overridden_atoms():
+    class CustomLogger(Logger):
+        def atoms(self, resp, req, environ, request_time):
+            atoms = super().atoms(resp, req, environ, request_time)
+            atoms['x'] = 'custom'
+            return atoms
+
+    cfg = Config()
+    cfg.set('accesslog', '-')
+    cfg.set('access_log_format', '%(x)s %(s)s')
+    logger = CustomLogger(cfg)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'RAW_URI': '/', 'SERVER_PROTOCOL': 'HTTP/1.1',
+    }
+    response = SimpleNamespace(status='200 OK', headers=[])
+    request = SimpleNamespace(headers=[])
+    with mock.patch.object(logger.access_log, 'info') as info:
+        logger.access(response, request, environ,
+                      datetime.timedelta(seconds=1))
+    fmt, atoms = info.call_args[0]
+    assert fmt % atoms == 'custom 200'
+
+
+def test_access_log_formatter_kind_is_case_insensitive():
+    request = SimpleNamespace(headers=[('X-Foo', 'bar')])
+    response = SimpleNamespace(status='200 OK', headers=[])
+    environ = {
+        'REQUEST_METHOD': 'GET', 'RAW_URI': '/', 'SERVER_PROTOCOL': 'HTTP/1.1',
+    }
+    request_time = datetime.timedelta(seconds=1)
+    logger = Logger(Config())
+    fmt = '%({X-Foo}I)s %({x-foo}i)s'
+    atoms = AccessLogFormatter(fmt).atoms(logger, response, request, environ,
+                                          request_time)
+    assert fmt % atoms == 'bar bar'
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _access_record(logger, monkeypatch, handler):
+    monkeypatch.setattr(logger.access_log, 'handlers', [handler])
+    environ = {
+        'REQUEST_METHOD': 'GET', 'RAW_URI': '/', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+    }
+    response = SimpleNamespace(status='200 OK', headers=[], sent=2)
+    request = SimpleNamespace(headers=[('Accept', 'text/html')])
+    logger.access(response, request, environ, datetime.timedelta(seconds=1))
+    [record] = handler.records
+    return record
+
+
+def test_access_record_has_all_atoms_for_other_handlers(monkeypatch):
+    cfg = Config()
+    cfg.set('accesslog', '-')
+    cfg.set('access_log_format', '%(s)s')
+    logger = Logger(cfg)
+    record = _access_record(logger, monkeypatch, RecordingHandler())
+    assert record.getMessage() == '200'
+    # atoms the format does not use, as SafeAtoms gives them
+    assert record.args['h'] == '127.0.0.1'
+    assert record.args['{Accept}I'] == 'text/html'
+    assert record.args['{absent}i'] == '-'
+    assert record.args['x'] == '-'
+
+
+def test_access_record_only_has_used_atoms_for_own_handlers(monkeypatch):
+    cfg = Config()
+    cfg.set('accesslog', '-')
+    cfg.set('access_log_format', '%(s)s')
+    logger = Logger(cfg)
+    handler = RecordingHandler()
+    handler._gunicorn = True
+    record = _access_record(logger, monkeypatch, handler)
+    assert record.getMessage() == '200'
+    assert set(record.args) == {'s'}
+
+
+def test_now_is_cached_per_second():
+    logger = Logger(Config())
+    with mock.patch('time.time', return_value=1000.2), \
+            mock.patch('time.strftime', return_value='[a]') as strftime:
+        assert logger.now() == '[a]'
+        assert logger.now() == '[a]'
+    assert strftime.call_count == 1
+    with mock.patch('time.time', return_value=1001.0), \
+            mock.patch('time.strftime', return_value='[b]'):
+        assert logger.now() == '[b]'
+
+
+
+def _access(logger, path='/'):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'RAW_URI': path,
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+    }
+    response = SimpleNamespace(status='200 OK', headers=[], sent=2)
+    request = SimpleNamespace(headers=[])
+    logger.access(response, request, environ, datetime.timedelta(seconds=1))
+
+
+def test_queued_access_log_is_written_in_batches(tmp_path, monkeypatch):
+    # leave out the handlers other tests added to the access logger
+    monkeypatch.setattr(logging.getLogger('gunicorn.access'), 'handlers', [])
+    path = tmp_path / 'access.log'
+    cfg = Config()
+    cfg.set('accesslog', str(path))
+    cfg.set('access_log_format', '"%(r)s" %(s)s')
+    cfg.set('access_log_queue_size', 100)
+    logger = Logger(cfg)
+    handler = logger.access_log.handlers[0]
+
+    # hold the writer thread back until all the records are queued
+    with handler.lock:
+        for i in range(3):
+            _access(logger, '/%d' % i)
+        writer = logger._access_writer
+        with mock.patch.object(handler.stream, 'write',
+                               wraps=handler.stream.write) as write:
+            handler.lock.release()
+            try:
+                writer.close()
+            finally:
+                handler.lock.acquire()
+
+    assert write.call_count == 1
+    assert path.read_text().splitlines() == [
+        '"GET /%d HTTP/1.1" 200' % i for i in range(3)
+    ]
+    handler.close()
+
+
+def test_full_access_log_queue_drops_records():
+    cfg = Config()
+    cfg.set('accesslog', '-')
+    cfg.set('access_log_queue_size', 1)
+    logger = Logger(cfg)
+    with mock.patch.object(gunicorn.glogging.AccessLogWriter, 'run'):
+        _access(logger)
+        _access(logger)
+        _access(logger)
+    assert logger._access_writer.queue.qsize() == 1
+    assert logger._access_writer.dropped == 2
+
+
 @pytest.mark.parametrize('auth', [
     # auth type is case in-sensitive
     'Basic YnJrMHY6',
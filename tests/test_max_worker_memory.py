@@ -0,0 +1,83 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for workers checking their memory against max_worker_memory."""
+
+from unittest import mock
+
+from gunicorn.config import Config
+from gunicorn.scoreboard import Scoreboard
+from gunicorn.workers.base import Worker
+
+MB = 1024 * 1024
+
+
+def make_worker(limit=100, jitter=0):
+    cfg = Config()
+    cfg.set("max_worker_memory", limit)
+    cfg.set("max_worker_memory_jitter", jitter)
+    worker = Worker(age=0, ppid=0, sockets=[], app=None, timeout=30,
+                    cfg=cfg, log=mock.Mock())
+    worker.score = Scoreboard(1).slot(0)
+    worker.score.set_ready()
+    worker.tmp = mock.Mock()
+    return worker
+
+
+def usage(uss):
+    return {"rss": uss + 50 * MB, "pss": uss, "uss": uss,
+            "shared": 50 * MB, "swap": 0}
+
+
+def test_limit_with_jitter():
+    with mock.patch("gunicorn.workers.base.randint", return_value=7) as r:
+        worker = make_worker(limit=100, jitter=10)
+    r.assert_called_once_with(0, 10)
+    assert worker.max_memory == 107 * MB
+    assert make_worker(limit=0).max_memory == 0
+
+
+@mock.patch("gunicorn.util.memory_usage")
+def test_disabled(memory_usage):
+    worker = make_worker(limit=0)
+    worker.notify()
+    memory_usage.assert_not_called()
+
+
+@mock.patch("gunicorn.util.memory_usage")
+def test_worker_over_the_limit_asks_to_be_replaced(memory_usage):
+    worker = make_worker(limit=100)
+
+    memory_usage.return_value = usage(90 * MB)
+    worker.notify()
+    assert not worker.score.recycling
+
+    # checked at most once per interval
+    memory_usage.return_value = usage(120 * MB)
+    worker.notify()
+    assert memory_usage.call_count == 1
+    assert not worker.score.recycling
+
+    worker.memory_checked -= worker.MEMORY_CHECK_INTERVAL
+    worker.notify()
+    assert worker.score.recycling
+    # keeps serving until the arbiter stops it
+    assert worker.alive
+
+
+@mock.patch("gunicorn.util.memory_usage", return_value=usage(120 * MB))
+def test_worker_off_the_scoreboard_exits(memory_usage):
+    worker = make_worker(limit=100)
+    worker.score = Worker.score
+    worker.notify()
+    assert not worker.alive
+
+
+@mock.patch("gunicorn.util.memory_usage", return_value=None)
+def test_unreadable_memory_disables_the_check(memory_usage):
+    worker = make_worker(limit=100)
+    worker.notify()
+    worker.log.warning.assert_called_once()
+    assert worker.max_memory == 0
+    assert worker.alive
@@ -0,0 +1,335 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for request buffering in the gthread worker."""
+
+import os
+import socket
+import time
+from unittest import mock
+
+import pytest
+
+from gunicorn.config import Config
+from gunicorn.http.buffering import RequestBuffer, MAX_BUFFERED_HEADERS
+from gunicorn.http.unreader import SocketUnreader
+from gunicorn.workers import gthread
+
+
+def make_cfg(**settings):
+    cfg = Config()
+    cfg.set('request_buffering', True)
+    for name, value in settings.items():
+        cfg.set(name, value)
+    return cfg
+
+
+def feed_bytewise(buf, data):
+    for i in range(len(data)):
+        assert not buf.ready
+        buf.feed(data[i:i + 1])
+
+
+class TestRequestBuffer:
+
+    def test_request_without_body(self):
+        buf = RequestBuffer(make_cfg())
+        buf.feed(b"GET / HTTP/1.1\r\nHost: a\r\n")
+        assert not buf.ready
+        buf.feed(b"\r\n")
+        assert buf.ready
+
+    def test_content_length_body(self):
+        buf = RequestBuffer(make_cfg())
+        buf.feed(b"POST / HTTP/1.1\r\nContent-Length: 5\r\n\r\nhel")
+        assert not buf.ready
+        buf.feed(b"lo")
+        assert buf.ready
+        assert buf.detach().read() == (
+            b"POST / HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello")
+
+    def test_content_length_byte_by_byte(self):
+        data = b"POST / HTTP/1.1\r\nContent-Length: 3\r\n\r\nabc"
+        buf = RequestBuffer(make_cfg())
+        feed_bytewise(buf, data[:-1])
+        buf.feed(data[-1:])
+        assert buf.ready
+
+    def test_chunked_body(self):
+        data = (b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                b"5\r\nhello\r\n6;ext=1\r\n world\r\n0\r\n\r\n")
+        buf = RequestBuffer(make_cfg())
+        feed_bytewise(buf, data[:-1])
+        buf.feed(data[-1:])
+        assert buf.ready
+        assert buf.detach().read() == data
+
+    def test_chunked_body_with_trailers(self):
+        data = (b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                b"3\r\nabc\r\n0\r\nX-Sum: 1\r\n\r\n")
+        buf = RequestBuffer(make_cfg())
+        feed_bytewise(buf, data[:-1])
+        buf.feed(data[-1:])
+        assert buf.ready
+
+    def test_pipelined_bytes_are_kept(self):
+        data = (b"POST / HTTP/1.1\r\nContent-Length: 2\r\n\r\nok"
+                b"GET /next HTTP/1.1\r\n\r\n")
+        buf = RequestBuffer(make_cfg(), data)
+        assert buf.ready
+        assert buf.detach().read() == data
+
+    @pytest.mark.parametrize("headers", [
+        b"Expect: 100-continue\r\nContent-Length: 10\r\n",
+        b"Upgrade: websocket\r\nConnection: upgrade\r\n",
+        b"Content-Length: 1\r\nContent-Length: 2\r\n",
+        b"Content-Length: -1\r\n",
+        b"Transfer-Encoding: gzip, chunked\r\n",
+        b"Transfer-Encoding: chunked\r\nContent-Length: 5\r\n",
+        b"Not a header line\r\n",
+    ])
+    def test_unknown_framing_is_handed_to_parser(self, headers):
+        buf = RequestBuffer(make_cfg())
+        buf.feed(b"POST / HTTP/1.1\r\n" + headers + b"\r\n")
+        assert buf.ready
+
+    def test_invalid_chunk_size_is_handed_to_parser(self):
+        buf = RequestBuffer(make_cfg())
+        buf.feed(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n")
+        assert not buf.ready
+        buf.feed(b"+5\r\n")
+        assert buf.ready
+
+    def test_oversized_headers_are_handed_to_parser(self):
+        buf = RequestBuffer(make_cfg())
+        buf.feed(b"GET / HTTP/1.1\r\nX-Big: ")
+        buf.feed(b"a" * MAX_BUFFERED_HEADERS)
+        assert buf.ready
+
+    def test_large_body_is_spooled_to_disk(self, tmp_path):
+        cfg = make_cfg(request_buffer_size=64, tmp_upload_dir=str(tmp_path))
+        body = b"x" * 100
+        buf = RequestBuffer(cfg)
+        buf.feed(b"POST / HTTP/1.1\r\nContent-Length: 100\r\n\r\n")
+        assert not buf.spool._rolled
+        buf.feed(body)
+        assert buf.ready
+        assert buf.spool._rolled
+        assert buf.detach().read().endswith(body)
+
+
+class TestSocketUnreaderSpool:
+
+    def test_spool_is_served_before_socket(self):
+        sock = mock.Mock()
+        sock.recv.return_value = b"from socket"
+        unreader = SocketUnreader(sock)
+        buf = RequestBuffer(make_cfg(), b"buffered")
+        unreader.set_spool(buf.detach())
+
+        assert unreader.read() == b"buffered"
+        sock.recv.assert_not_called()
+        assert unreader.read() == b"from socket"
+
+    def test_take_buffered(self):
+        sock = mock.Mock()
+        unreader = SocketUnreader(sock)
+        buf = RequestBuffer(make_cfg(), b"abcdef")
+        unreader.set_spool(buf.detach())
+
+        assert unreader.read(2) == b"ab"
+        assert unreader.take_buffered() == b"cdef"
+        assert unreader.spool is None
+        assert unreader.take_buffered() == b""
+        sock.recv.assert_not_called()
+
+
+class TestThreadWorkerBuffering:
+
+    def create_worker(self, cfg=None):
+        cfg = cfg or make_cfg()
+        cfg.set('threads', 2)
+        cfg.set('keepalive', 5)
+        worker = gthread.ThreadWorker(
+            age=1,
+            ppid=os.getpid(),
+            sockets=[],
+            app=mock.Mock(),
+            timeout=30,
+            cfg=cfg,
+            log=mock.Mock(),
+        )
+        worker.poller = mock.Mock()
+        worker.tpool = mock.Mock()
+        worker.method_queue = mock.Mock()
+        return worker
+
+    def make_conn(self, worker):
+        server, client = socket.socketpair()
+        conn = gthread.TConn(worker.cfg, server, ('127.0.0.1', 12345),
+                             ('127.0.0.1', 8000))
+        return conn, client
+
+    def test_enabled_only_for_plain_http(self):
+        assert self.create_worker().request_buffering is True
+        assert self.create_worker(Config()).request_buffering is False
+        cfg = make_cfg(protocol='uwsgi')
+        assert self.create_worker(cfg).request_buffering is False
+        cfg = make_cfg(proxy_protocol='v1')
+        assert self.create_worker(cfg).request_buffering is False
+
+    def test_partial_request_stays_on_poller(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        try:
+            worker.buffer_request(conn)
+            assert conn in worker.buffering_conns
+            worker.poller.register.assert_called_once()
+
+            client.sendall(b"POST / HTTP/1.1\r\nContent-Length: 4\r\n\r\nab")
+            worker.on_buffering_socket_readable(conn, conn.sock)
+
+            assert conn in worker.buffering_conns
+            worker.tpool.submit.assert_not_called()
+        finally:
+            conn.close()
+            client.close()
+
+    def test_complete_request_is_submitted(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        try:
+            worker.buffer_request(conn)
+            client.sendall(b"POST / HTTP/1.1\r\nContent-Length: 4\r\n\r\nabcd")
+            worker.on_buffering_socket_readable(conn, conn.sock)
+
+            assert conn not in worker.buffering_conns
+            worker.poller.unregister.assert_called_once_with(conn.sock)
+            worker.tpool.submit.assert_called_once_with(worker.handle, conn)
+            assert conn.data_ready is True
+        finally:
+            conn.close()
+            client.close()
+
+    def test_handle_reads_request_from_buffer(self):
+        worker = self.create_worker()
+        worker.nr = 0
+        worker.alive = True
+        seen = {}
+
+        def app(environ, start_response):
+            seen['body'] = environ['wsgi.input'].read()
+            start_response('200 OK', [('Content-Length', '2')])
+            return [b'ok']
+        worker.wsgi = app
+
+        conn, client = self.make_conn(worker)
+        try:
+            worker.buffer_request(conn)
+            client.sendall(b"POST / HTTP/1.1\r\nContent-Length: 4\r\n\r\nabcd"
+                           b"GET /next HTTP/1.1\r\n")
+            worker.on_buffering_socket_readable(conn, conn.sock)
+            assert conn.buffer.ready
+
+            assert worker.handle(conn) is True
+            assert seen['body'] == b"abcd"
+            assert client.recv(1024).startswith(b"HTTP/1.1 200 OK")
+
+            # the pipelined request goes back to buffering
+            fs = mock.Mock()
+            fs.cancelled.return_value = False
+            fs.result.return_value = True
+            worker.tpool.submit.reset_mock()
+            worker.finish_request(conn, fs)
+            assert conn in worker.buffering_conns
+            assert not conn.buffer.ready
+            client.sendall(b"\r\n")
+            worker.on_buffering_socket_readable(conn, conn.sock)
+            worker.tpool.submit.assert_called_once_with(worker.handle, conn)
+        finally:
+            conn.close()
+            client.close()
+
+    def test_only_keepalive_connections_count_against_max_keepalived(self):
+        worker = self.create_worker()
+        worker.nr = 0
+        worker.alive = True
+
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Length', '2')])
+            return [b'ok']
+        worker.wsgi = app
+
+        new, client1 = self.make_conn(worker)
+        conn, client2 = self.make_conn(worker)
+        try:
+            # a new connection sending its first request is not kept alive
+            worker.buffer_request(new)
+            assert worker.nr_keepalive_buffering == 0
+
+            worker.buffer_request(conn)
+            client2.sendall(b"GET / HTTP/1.1\r\n\r\n")
+            worker.on_buffering_socket_readable(conn, conn.sock)
+            assert worker.handle(conn) is True
+            fs = mock.Mock()
+            fs.cancelled.return_value = False
+            fs.result.return_value = True
+            worker.finish_request(conn, fs)
+            assert conn in worker.buffering_conns
+            assert worker.nr_keepalive_buffering == 1
+
+            client2.sendall(b"GET / HTTP/1.1\r\n\r\n")
+            worker.on_buffering_socket_readable(conn, conn.sock)
+            assert worker.nr_keepalive_buffering == 0
+        finally:
+            new.close()
+            conn.close()
+            client1.close()
+            client2.close()
+
+    def test_client_close_hands_connection_to_parser(self):
+        worker = self.create_worker()
+        conn, client = self.make_conn(worker)
+        try:
+            worker.buffer_request(conn)
+            client.close()
+            worker.on_buffering_socket_readable(conn, conn.sock)
+            assert conn not in worker.buffering_conns
+            worker.tpool.submit.assert_called_once_with(worker.handle, conn)
+        finally:
+            conn.close()
+
+    def test_murder_stalled(self):
+        worker = self.create_worker()
+        worker.nr_conns = 2
+        stalled, client1 = self.make_conn(worker)
+        active, client2 = self.make_conn(worker)
+        try:
+            worker.buffer_request(stalled)
+            worker.buffer_request(active)
+            stalled.timeout = time.monotonic() - 1
+
+            worker.murder_stalled()
+
+            assert worker.buffering_conns == {active}
+            assert worker.nr_conns == 1
+            assert stalled.buffer is None
+        finally:
+            stalled.close()
+            active.close()
+            client1.close()
+            client2.close()
+
+    def test_no_timeout_while_buffering_when_timeout_disabled(self):
+        worker = self.create_worker(make_cfg(timeout=0))
+        conn, client = self.make_conn(worker)
+        try:
+            worker.buffer_request(conn, b"POST / HTTP/1.1\r\n")
+            assert conn.timeout is None
+            worker._next_stalled_check = 0
+            worker.murder_stalled()
+            assert conn in worker.buffering_conns
+        finally:
+            conn.close()
+            client.close()
@@ -0,0 +1,118 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for the worker scoreboard."""
+
+import os
+import time
+
+import pytest
+
+from gunicorn.scoreboard import MAX_SLOTS, Scoreboard, private_slot
+from gunicorn.workers.workertmp import SharedHeartbeat
+
+
+def test_request_counters():
+    slot = private_slot()
+    started = slot.request_started()
+    score = slot.snapshot()
+    assert score["in_flight"] == 1
+    assert score["request_start"] == pytest.approx(time.time(), abs=5)
+
+    slot.request_finished(started, 200, 5)
+    slot.request_finished(slot.request_started(), 404, 7)
+    score = slot.snapshot()
+    assert score["requests"] == 2
+    assert score["in_flight"] == 0
+    assert score["request_start"] is None
+    assert score["last_status"] == 404
+    assert score["bytes_sent"] == 12
+    assert score["latency_total"] >= 0
+
+
+def test_connection_counters():
+    slot = private_slot()
+    slot.connection_opened()
+    slot.connection_opened()
+    slot.connection_closed()
+    assert slot.snapshot()["connections"] == 1
+    slot.set_connections(5)
+    assert slot.snapshot()["connections"] == 5
+
+
+def test_ready():
+    slot = private_slot()
+    assert not slot.ready
+    assert slot.snapshot()["ready"] is False
+    slot.set_ready()
+    assert slot.ready
+    assert slot.snapshot()["ready"] is True
+
+
+def test_recycling():
+    slot = private_slot()
+    slot.set_ready()
+    assert slot.snapshot()["recycling"] is False
+    slot.set_recycling()
+    # still serving until it is replaced
+    assert slot.ready
+    assert slot.recycling
+    assert slot.snapshot()["recycling"] is True
+
+
+def test_shared_heartbeat():
+    slot = Scoreboard(1).acquire()
+    assert slot.last_heartbeat == 0.0
+    tmp = SharedHeartbeat(slot)
+    # a worker is alive from the time it is spawned
+    started = tmp.last_update()
+    assert 0 < started <= time.monotonic()
+    tmp.notify()
+    assert tmp.last_update() >= started
+    assert tmp.fileno() is None
+    tmp.close()
+
+
+def test_slots_are_reused_and_zeroed():
+    board = Scoreboard(2)
+    first = board.acquire()
+    second = board.acquire()
+    assert {first.index, second.index} == {0, 1}
+    first.request_finished(first.request_started(), 200, 1)
+
+    board.release(first)
+    again = board.acquire()
+    assert again.index == first.index
+    assert again.snapshot()["requests"] == 0
+
+
+def test_full_scoreboard_hands_out_private_slots():
+    board = Scoreboard(1)
+    board.acquire()
+    extra = board.acquire()
+    assert extra.index is None
+    board.release(extra)
+    assert board.free == []
+
+
+def test_default_capacity():
+    assert Scoreboard().nslots == MAX_SLOTS
+
+
+def test_worker_writes_are_seen_by_the_parent():
+    board = Scoreboard(4)
+    slot = board.acquire()
+    before = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        slot.connection_opened()
+        slot.request_finished(slot.request_started(), 201, 3)
+        SharedHeartbeat(slot).notify()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert before <= slot.last_heartbeat <= time.monotonic()
+    score = slot.snapshot()
+    assert score["requests"] == 1
+    assert score["connections"] == 1
+    assert score["last_status"] == 201
@@ -2,8 +2,13 @@
 # This file is part of gunicorn released under the MIT license.
 # See the NOTICE for more information.
 
+import selectors
+import socket
+import time
 from unittest import mock
 
+import pytest
+
 from gunicorn import sock
 
 
@@ -54,3 +59,162 @@ def test_unix_socket_close_without_unlink(unlink):
     sock.close_sockets([listener], False)
     listener.close.assert_called_with()
     assert not unlink.called, 'unlink should not have been called'
+
+
+def test_set_incoming_cpu():
+    tcp = mock.Mock(spec=sock.TCPSocket)
+    unix = mock.Mock(spec=sock.UnixSocket)
+    tcp.sock = mock.Mock()
+    unix.sock = mock.Mock()
+    with mock.patch.object(sock, "SO_INCOMING_CPU", 49):
+        sock.set_incoming_cpu([tcp, unix], 3)
+    tcp.sock.setsockopt.assert_called_once_with(sock.socket.SOL_SOCKET, 49, 3)
+    unix.sock.setsockopt.assert_not_called()
+
+
+def test_cpu_steering_program():
+    assert sock.cpu_steering_program({2: 5}, [1, 5, 7]) == [
+        (0x20, 0, 0, 0xfffff000 + 36),  # A = cpu
+        (0x15, 0, 1, 2),                # if A == 2
+        (0x06, 0, 0, 5),                # return 5
+        (0x94, 0, 0, 3),                # A %= 3
+        (0x15, 0, 1, 0),                # if A == 0
+        (0x06, 0, 0, 1),                # return 1
+        (0x15, 0, 1, 1),                # if A == 1
+        (0x06, 0, 0, 5),                # return 5
+        (0x06, 0, 0, 7),                # return 7
+    ]
+
+
+@pytest.mark.skipif(sock.PLATFORM != "linux", reason="Linux only")
+def test_attach_cpu_steering():
+    conf = mock.Mock(reuse_port=True, backlog=16)
+    listeners = [sock.TCPSocket(("127.0.0.1", 0), conf, mock.Mock())]
+    log = mock.Mock()
+    try:
+        sock.attach_cpu_steering(listeners, sock.cpu_steering_program({}, [0]),
+                                 log)
+    finally:
+        listeners[0].close()
+    log.warning.assert_not_called()
+
+
+def steering_group(*keys):
+    group = sock.SteeringGroup(mock.Mock(address=[("127.0.0.1", 8000)]),
+                               mock.Mock())
+    with mock.patch.object(sock, "create_sockets",
+                           side_effect=lambda conf, log: [mock.Mock()]):
+        for key in keys:
+            group.get(key)
+    return group
+
+
+def test_steering_group_order():
+    group = steering_group(3, 0, 1, 2)
+    assert group.get(0) is group.listeners[0]
+    assert group.order == [3, 0, 1, 2]
+
+    closed = group.listeners[0][0]
+    group.remove(0)
+    closed.close.assert_called_once_with()
+    # like the kernel: the last listener takes the index left
+    assert group.order == [3, 2, 1]
+    group.remove(1)
+    assert group.order == [3, 2]
+
+
+def test_steering_group_steers_by_slot():
+    group = steering_group(0, 1, 2)
+    group.remove(0)
+    # slot 2 now has index 0, slot 1 index 1
+    with mock.patch.object(sock, "attach_cpu_steering") as attach:
+        group.steer({1: [4], 2: [6, 7]})
+        group.steer({1: [4], 2: [6, 7]})
+    # attached once, the program did not change
+    attach.assert_called_once()
+    listeners, program, _ = attach.call_args[0]
+    assert listeners is group.listeners[2]
+    assert program == sock.cpu_steering_program({4: 1, 6: 0, 7: 0}, [0, 1])
+
+
+def test_steering_group_spreads_the_cpus_of_a_shared_set():
+    group = steering_group(0, 1)
+    with mock.patch.object(sock, "attach_cpu_steering") as attach:
+        group.steer({0: [2, 3], 1: [2, 3]})
+    program = attach.call_args[0][1]
+    assert program == sock.cpu_steering_program({2: 0, 3: 1}, [0, 1])
+
+
+@pytest.mark.skipif(sock.PLATFORM != "linux", reason="Linux only")
+def test_steering_group_follows_the_kernel():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    conf = mock.Mock(address=[("127.0.0.1", port)], reuse_port=True,
+                     backlog=16, certfile=None, keyfile=None)
+    group = sock.SteeringGroup(conf, mock.Mock())
+    for key in (0, 1, 2):
+        group.get(key)
+    try:
+        # the kernel moves the listener of slot 2 to the index of slot 0
+        group.remove(0)
+        group.steer({2: None})
+        for _ in range(4):
+            client = socket.create_connection(("127.0.0.1", port))
+            client.close()
+        time.sleep(0.1)
+        listener = group.listeners[2][0].sock
+        listener.setblocking(False)
+        for _ in range(4):
+            listener.accept()[0].close()
+        with pytest.raises(BlockingIOError):
+            group.listeners[1][0].sock.accept()
+    finally:
+        group.close()
+
+
+@pytest.mark.skipif(sock.ExclusiveSelector is None,
+                    reason="requires EPOLLEXCLUSIVE")
+def test_exclusive_selector():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    other, peer = socket.socketpair()
+    selector = sock.ExclusiveSelector([listener])
+    try:
+        selector.register(listener, selectors.EVENT_READ, "accept")
+        selector.register(other, selectors.EVENT_READ, "read")
+        client = socket.create_connection(listener.getsockname())
+        events = selector.select(1)
+        assert [key.data for key, _ in events] == ["accept"]
+        client.close()
+        selector.unregister(listener)
+        selector.register(listener, selectors.EVENT_READ, "accept")
+    finally:
+        selector.close()
+        listener.close()
+        other.close()
+        peer.close()
+
+
+def test_listener_selector():
+    listeners = [mock.Mock(fileno=mock.Mock(return_value=99))]
+    conf = mock.Mock(epoll_exclusive=False, reuse_port=False)
+    selector = sock.listener_selector(conf, listeners)
+    assert type(selector) is selectors.DefaultSelector
+    selector.close()
+
+    # only the listeners shared by the workers
+    conf.reuse_port = True
+    conf.epoll_exclusive = True
+    selector = sock.listener_selector(conf, listeners)
+    assert type(selector) is selectors.DefaultSelector
+    selector.close()
+
+    if sock.ExclusiveSelector is not None:
+        conf.reuse_port = False
+        selector = sock.listener_selector(conf, listeners)
+        assert isinstance(selector, sock.ExclusiveSelector)
+        assert selector.exclusive == {99}
+        selector.close()
@@ -188,3 +188,70 @@ def test_prefix_nested():
 
     logger.info("Blah", extra={"mtype": "gauge", "metric": "gunicorn.test", "value": 666})
     assert logger.sock.msgs[0] == b"test.asdf.gunicorn.test:666|g"
+
+
+def make_aggregating_logger(**settings):
+    c = Config()
+    # long enough for the flusher thread to stay out of the way
+    c.set("statsd_flush_interval", 60000)
+    for name, value in settings.items():
+        c.set(name, value)
+    logger = Statsd(c)
+    logger.sock = MockSocket(False)
+    return logger
+
+
+def test_aggregated_metrics_are_sent_on_flush():
+    logger = make_aggregating_logger(dogstatsd_tags="env:test")
+    for _ in range(3):
+        logger.access(SimpleNamespace(status="200 OK"), None, {},
+                      timedelta(seconds=1))
+    logger.gauge("gunicorn.workers", 3)
+    logger.gauge("gunicorn.workers", 4)
+    assert logger.sock.msgs == []
+
+    logger.flush()
+    assert logger.sock.msgs == [b"\n".join([
+        b"gunicorn.requests:3|c|#env:test",
+        b"gunicorn.request.status.200:3|c|#env:test",
+        b"gunicorn.workers:4|g|#env:test",
+    ] + [b"gunicorn.request.duration:1000.0|ms|#env:test"] * 3)]
+
+    logger.sock.reset()
+    logger.flush()
+    assert logger.sock.msgs == []
+
+
+def test_flush_splits_datagrams_at_max_packet_size():
+    logger = make_aggregating_logger(statsd_max_packet_size=40)
+    for i in range(5):
+        logger.histogram("gunicorn.h", i)
+    logger.flush()
+    # each line is 14 bytes: two of them and a newline fit in 40
+    assert logger.sock.msgs == [
+        b"gunicorn.h:0|h\ngunicorn.h:1|h",
+        b"gunicorn.h:2|h\ngunicorn.h:3|h",
+        b"gunicorn.h:4|h",
+    ]
+
+
+def test_timer_sample_rate(monkeypatch):
+    c = Config()
+    c.set("statsd_timer_sample_rate", 0.25)
+    logger = Statsd(c)
+    logger.sock = MockSocket(False)
+
+    monkeypatch.setattr("random.random", lambda: 0.5)
+    logger.timer("gunicorn.t", 10)
+    assert logger.sock.msgs == []
+
+    monkeypatch.setattr("random.random", lambda: 0.1)
+    logger.timer("gunicorn.t", 10)
+    assert logger.sock.msgs == [b"gunicorn.t:10|ms|@0.25"]
+
+
+def test_aggregated_sampled_counter_is_scaled():
+    logger = make_aggregating_logger()
+    logger.increment("gunicorn.c", 1, sampling_rate=0.5)
+    logger.flush()
+    assert logger.sock.msgs == [b"gunicorn.c:2.0|c"]
@@ -1,7 +1,9 @@
 #
 # This file is part of gunicorn released under the MIT license.
 # See the NOTICE for more information.
+import io
 import os
+from unittest import mock
 
 import pytest
 
@@ -129,3 +131,72 @@ def test_to_bytestring():
 ])
 def test_split_request_uri(test_input, expected):
     assert util.split_request_uri(test_input) == expected
+
+
+def test_sendmsg_all_resumes_partial_sends():
+    sent = []
+
+    class Sock:
+        def sendmsg(self, buffers):
+            # take at most 3 bytes per call
+            data = b"".join(bytes(b) for b in buffers)[:3]
+            sent.append(data)
+            return len(data)
+
+    util.sendmsg_all(Sock(), [b"ab", b"", b"cdef", b"g"])
+    assert sent == [b"abc", b"def", b"g"]
+
+
+def test_write_buffers_joins_without_sendmsg():
+    sock = mock.Mock(spec=["sendall"])
+    util.write_buffers(sock, [b"ab", b"cd"])
+    sock.sendall.assert_called_once_with(b"abcd")
+
+
+def test_sendmsg_all_passes_at_most_iov_max_buffers(monkeypatch):
+    monkeypatch.setattr(util, "IOV_MAX", 2)
+    calls = []
+
+    class Sock:
+        def sendmsg(self, buffers):
+            calls.append(len(buffers))
+            return sum(len(b) for b in buffers)
+
+    util.sendmsg_all(Sock(), [b"a", b"b", b"c", b"d", b"e"])
+    assert calls == [2, 2, 1]
+
+
+def test_parse_cpu_list():
+    assert util.parse_cpu_list("0-3,8, 10-11\n".strip()) == [0, 1, 2, 3, 8, 10, 11]
+    assert util.parse_cpu_list("5") == [5]
+    assert util.parse_cpu_list("") == []
+    with pytest.raises(ValueError):
+        util.parse_cpu_list("3-1")
+
+
+def test_numa_nodes():
+    cpulists = {
+        "/sys/devices/system/node/node0/cpulist": "0-3\n",
+        "/sys/devices/system/node/node1/cpulist": "4-7\n",
+        "/sys/devices/system/node/node10/cpulist": "8-9\n",
+    }
+    names = ["possible", "node1", "node10", "node0", "online"]
+    with mock.patch("os.listdir", return_value=names), \
+            mock.patch("builtins.open",
+                       side_effect=lambda p: io.StringIO(cpulists[p])):
+        assert util.numa_nodes(range(10)) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+        # only the given CPUs, and the nodes that have some
+        assert util.numa_nodes([2, 3, 6]) == [[2, 3], [6]]
+
+    with mock.patch("os.listdir", side_effect=FileNotFoundError):
+        assert util.numa_nodes([0, 1]) == [[0, 1]]
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"),
+                    reason="requires sched_setaffinity")
+def test_cpu_sets():
+    assert util.cpu_sets("off", [0, 1]) == []
+    assert util.cpu_sets("cpu", [2, 0]) == [[0], [2]]
+    with mock.patch("gunicorn.util.numa_nodes", return_value=[[0], [1]]):
+        assert util.cpu_sets("numa", [0, 1]) == [[0], [1]]
+    assert util.cpu_sets("cpu") == [[cpu] for cpu in sorted(os.sched_getaffinity(0))]
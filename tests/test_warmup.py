@@ -0,0 +1,137 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for the warm-up requests workers run before serving."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from gunicorn import warmup
+from gunicorn.app.base import Application
+from gunicorn.config import Config
+from gunicorn.http.wsgi import FileWrapper
+from gunicorn.workers.base import Worker
+
+
+def test_parse_request():
+    assert warmup.parse_request("GET /health") == ("GET", "/health", "")
+    assert warmup.parse_request("post /a?b=c") == ("POST", "/a", "b=c")
+    assert warmup.parse_request("/search?q=x") == ("GET", "/search", "q=x")
+    assert warmup.parse_request("") == ("GET", "/", "")
+
+
+def test_wsgi_environ():
+    environ = warmup.wsgi_environ(Config(), "HEAD /a%20b?x=1")
+    assert environ["REQUEST_METHOD"] == "HEAD"
+    assert environ["PATH_INFO"] == "/a b"
+    assert environ["QUERY_STRING"] == "x=1"
+    assert environ["wsgi.input"].read() == b""
+    assert environ["wsgi.file_wrapper"] is FileWrapper
+    assert environ["gunicorn.warmup"] is True
+
+
+def test_wsgi_environ_from_dict():
+    environ = warmup.wsgi_environ(Config(), {"PATH_INFO": "/cache",
+                                             "HTTP_X_WARM": "1"})
+    assert environ["REQUEST_METHOD"] == "GET"
+    assert environ["PATH_INFO"] == "/cache"
+    assert environ["HTTP_X_WARM"] == "1"
+
+
+def test_run_wsgi_consumes_and_closes_the_response():
+    closed = []
+
+    class Body:
+        def __iter__(self):
+            yield b"a"
+            yield b"b"
+
+        def close(self):
+            closed.append(True)
+
+    def app(environ, start_response):
+        start_response("204 No Content", [])
+        return Body()
+
+    assert warmup.run_wsgi(app, warmup.wsgi_environ(Config(), "/")) == \
+        "204 No Content"
+    assert closed == [True]
+
+
+def test_run_asgi():
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["scope"] = scope
+        seen["request"] = await receive()
+        seen["disconnect"] = await receive()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    state = {"pool": object()}
+    scope = warmup.asgi_scope(Config(), "GET /items?page=2", state)
+    assert asyncio.run(warmup.run_asgi(app, scope)) == 200
+    assert seen["scope"]["path"] == "/items"
+    assert seen["scope"]["query_string"] == b"page=2"
+    assert seen["scope"]["state"] is state
+    assert "gunicorn.warmup" in seen["scope"]["extensions"]
+    assert seen["request"]["type"] == "http.request"
+    assert seen["disconnect"]["type"] == "http.disconnect"
+
+
+class WarmupApp(Application):
+    def __init__(self, requests):
+        self.requests = requests
+        self.calls = []
+        super().__init__("no usage", prog="gunicorn_test")
+
+    def do_load_config(self):
+        self.load_default_config()
+        self.cfg.set("warmup_requests", self.requests)
+
+    def wsgi(self):
+        def app(environ, start_response):
+            self.calls.append(environ["PATH_INFO"])
+            if environ["PATH_INFO"] == "/fail":
+                raise RuntimeError("boom")
+            start_response("200 OK", [])
+            return [b""]
+        return app
+
+
+class MyWorker(Worker):
+    def run(self):
+        self.ready_when_run = self.score.ready
+
+
+def test_worker_warms_up_before_serving():
+    app = WarmupApp(["/a", "/fail", "/b"])
+    log = mock.Mock()
+    worker = MyWorker(age=0, ppid=0, sockets=[], app=app, timeout=0,
+                      cfg=app.cfg, log=log)
+
+    with mock.patch.object(worker, "notify",
+                           side_effect=lambda: app.calls.append("notify")):
+        worker.init_process()
+
+    # the worker beats before each warm-up request
+    assert app.calls == ["notify", "/a", "notify", "/fail", "notify", "/b"]
+    assert worker.ready_when_run is True
+    log.exception.assert_called_once()
+    args, kwargs = log.info.call_args
+    assert args[0].startswith("Worker warmed up")
+    assert kwargs["extra"]["metric"] == "gunicorn.worker.warmup"
+
+
+def test_validate_warmup_requests():
+    cfg = Config()
+    cfg.set("warmup_requests", "/health")
+    assert cfg.warmup_requests == ["/health"]
+    cfg.set("warmup_requests", ["/a", {"PATH_INFO": "/b"}])
+    assert cfg.warmup_requests == ["/a", {"PATH_INFO": "/b"}]
+    with pytest.raises(TypeError):
+        cfg.set("warmup_requests", [1])
@@ -0,0 +1,166 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for the arbiter's pidfd watcher."""
+
+import os
+import signal
+import time
+from unittest import mock
+
+import pytest
+
+import gunicorn.app.base
+import gunicorn.arbiter
+from gunicorn.watcher import Watcher, pidfd_supported
+
+pytestmark = pytest.mark.skipif(not pidfd_supported(),
+                                reason="requires pidfd_open")
+
+
+class DummyApplication(gunicorn.app.base.BaseApplication):
+
+    def init(self, parser, opts, args):
+        """No-op"""
+
+    def load(self):
+        """No-op"""
+
+    def load_config(self):
+        """No-op"""
+
+
+def fork_child(exit_code=None):
+    """Fork a child sleeping until killed, or exiting with ``exit_code``."""
+    pid = os.fork()
+    if pid == 0:
+        if exit_code is None:
+            time.sleep(60)
+            exit_code = 0
+        os._exit(exit_code)
+    return pid
+
+
+@pytest.fixture
+def watcher():
+    w = Watcher()
+    yield w
+    w.close()
+
+
+def test_wait_returns_the_exited_process(watcher):
+    running = fork_child()
+    exiting = fork_child(3)
+    try:
+        assert watcher.add(running)
+        assert watcher.add(exiting)
+        assert watcher.wait(5) == [exiting]
+        # not reaped by the watcher
+        assert os.waitpid(exiting, 0)[1] >> 8 == 3
+        watcher.remove(exiting)
+        assert watcher.wait(0) == []
+    finally:
+        os.kill(running, signal.SIGKILL)
+        os.waitpid(running, 0)
+
+
+def test_wake_interrupts_wait(watcher):
+    watcher.wake()
+    started = time.monotonic()
+    assert watcher.wait(5) == []
+    assert time.monotonic() - started < 1
+    # drained
+    assert watcher.wait(0) == []
+
+
+def test_deadlines(watcher):
+    pid = fork_child()
+    try:
+        watcher.add(pid)
+        watcher.schedule(pid, 20.0)
+        watcher.schedule(pid, 10.0)
+        watcher.schedule(12345678, 5.0)  # not watched
+        assert watcher.next_deadline() == 10.0
+        assert watcher.expired(9.0) == []
+        assert watcher.expired(10.0) == [pid]
+        assert watcher.next_deadline() == 20.0
+        watcher.remove(pid)
+        assert watcher.next_deadline() is None
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+def create_arbiter():
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    arbiter.watcher = Watcher()
+    arbiter.WORKERS = {}
+    arbiter.timeout = 30
+    arbiter.num_workers = 1
+    return arbiter
+
+
+def add_worker(arbiter, pid, last_update):
+    worker = mock.Mock(pid=pid, aborted=False)
+    worker.tmp.last_update.return_value = last_update
+    arbiter.WORKERS[pid] = worker
+    arbiter.watcher.add(pid)
+    return worker
+
+
+def test_arbiter_reaps_exactly_the_exited_worker():
+    arbiter = create_arbiter()
+    pid = fork_child(0)
+    try:
+        worker = add_worker(arbiter, pid, time.monotonic())
+        assert arbiter.wait_for_signals(timeout=5) == []
+        worker.tmp.close.assert_called_once_with()
+        assert arbiter.WORKERS == {}
+        assert arbiter.watcher.pidfds == {}
+    finally:
+        arbiter.watcher.close()
+
+
+def test_arbiter_sleeps_until_a_heartbeat_is_due():
+    arbiter = create_arbiter()
+    pid = fork_child()
+    try:
+        now = time.monotonic()
+        worker = add_worker(arbiter, pid, now - 10)
+        arbiter.watcher.schedule(pid, now - 1)
+        arbiter.kill_worker = mock.Mock()
+
+        # the worker beat 10s ago: checked again when its deadline is due
+        arbiter.murder_workers()
+        arbiter.kill_worker.assert_not_called()
+        assert arbiter.watcher.next_deadline() == pytest.approx(now + 20)
+        assert 19 < arbiter.loop_timeout() <= 20
+
+        # polling while something is pending
+        arbiter.num_workers = 2
+        assert arbiter.loop_timeout() == 1.0
+        arbiter.num_workers = 1
+
+        worker.tmp.last_update.return_value = now - 40
+        arbiter.watcher.deadlines = [(now, pid)]
+        arbiter.murder_workers()
+        arbiter.kill_worker.assert_called_once_with(pid, signal.SIGABRT)
+        # and killed if still stuck a second later
+        assert arbiter.watcher.next_deadline() == pytest.approx(
+            time.monotonic() + 1.0, abs=0.5)
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        arbiter.watcher.close()
+
+
+def test_signal_wakes_the_watcher():
+    arbiter = create_arbiter()
+    try:
+        arbiter.signal(signal.SIGHUP, None)
+        started = time.monotonic()
+        assert arbiter.wait_for_signals(timeout=5) == [signal.SIGHUP]
+        assert time.monotonic() - started < 1
+    finally:
+        arbiter.watcher.close()
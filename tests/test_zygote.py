@@ -0,0 +1,395 @@
+#
+# This file is part of gunicorn released under the MIT license.
+# See the NOTICE for more information.
+
+"""Tests for forking workers from a zygote."""
+
+import os
+import pickle
+import socket
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+import gunicorn.app.base
+import gunicorn.arbiter
+import gunicorn.errors
+from gunicorn import zygote
+from gunicorn.config import Config
+from gunicorn.scoreboard import Scoreboard
+from gunicorn.watcher import Watcher
+from gunicorn.workers.workertmp import SharedHeartbeat, WorkerTmp
+
+
+class DummyApplication(gunicorn.app.base.BaseApplication):
+
+    def init(self, parser, opts, args):
+        """No-op"""
+
+    def load(self):
+        """No-op"""
+
+    def load_config(self):
+        self.cfg.set("zygote", True)
+
+
+def make_worker(age=3, index=2):
+    worker = mock.Mock(age=age)
+    worker.tmp = WorkerTmp(Config())
+    worker.score = Scoreboard(4).slot(index)
+    return worker
+
+
+def fake_zygote(sock, reply):
+    """Answer one spawn request, returning what was received."""
+    received = {}
+
+    def serve():
+        msg, fds, _, _ = socket.recv_fds(sock, zygote.MAX_REQUEST, zygote.MAX_FDS)
+        received["request"] = zygote.REQUEST.unpack_from(msg)
+        received["state"] = pickle.loads(msg[zygote.REQUEST.size:])
+        received["fds"] = fds
+        if reply is not None:
+            sock.send(zygote.REPLY.pack(reply))
+        else:
+            sock.close()
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread, received
+
+
+def test_spawn_sends_the_worker_and_returns_its_pid():
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=1, steering=None))
+    z.sock = parent
+    z.ready = True
+    worker = make_worker()
+    thread, received = fake_zygote(child, 4321)
+    try:
+        assert z.spawn(worker) == 4321
+        thread.join()
+        assert received["request"] == (3, 2)
+        # the zygote gets the worker's heartbeat file
+        fd = received["fds"][0]
+        assert os.fstat(fd).st_ino == os.fstat(worker.tmp.fileno()).st_ino
+        os.close(fd)
+    finally:
+        parent.close()
+        child.close()
+        worker.tmp.close()
+
+
+def test_spawn_sends_the_spawn_state():
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=6, steering=None))
+    z.sock = parent
+    z.ready = True
+    worker = make_worker()
+    thread, received = fake_zygote(child, 4321)
+    try:
+        assert z.spawn(worker, {"color": "blue"}) == 4321
+        thread.join()
+        assert received["state"] == {"num_workers": 6,
+                                     "attrs": {"color": "blue"},
+                                     "sockets": 0}
+        for fd in received["fds"]:
+            os.close(fd)
+    finally:
+        parent.close()
+        child.close()
+        worker.tmp.close()
+
+
+def test_spawn_sends_the_steered_listeners():
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=1, steering=mock.Mock()))
+    z.sock = parent
+    z.ready = True
+    worker = make_worker()
+    listener = socket.socket()
+    worker.sockets = [listener]
+    thread, received = fake_zygote(child, 4321)
+    try:
+        assert z.spawn(worker) == 4321
+        thread.join()
+        assert received["state"]["sockets"] == 1
+        tmp_fd, sock_fd = received["fds"]
+        assert os.fstat(sock_fd).st_ino == os.fstat(listener.fileno()).st_ino
+        os.close(tmp_fd)
+        os.close(sock_fd)
+    finally:
+        parent.close()
+        child.close()
+        listener.close()
+        worker.tmp.close()
+
+
+@pytest.mark.parametrize("attrs", [{"lock": threading.Lock()},
+                                   {"blob": b"x" * zygote.MAX_REQUEST}])
+def test_spawn_state_error(attrs):
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=1, steering=None))
+    z.sock = parent
+    z.ready = True
+    worker = make_worker()
+    try:
+        with pytest.raises(zygote.StateError):
+            z.spawn(worker, attrs)
+    finally:
+        parent.close()
+        child.close()
+        worker.tmp.close()
+
+
+class FakeWorker:
+
+    def __init__(self, age, ppid, sockets, app, timeout, cfg, log):
+        self.age = age
+        self.color = "red"
+        self.tmp = mock.Mock()
+
+
+def test_zygote_worker_gets_the_spawn_state():
+    arbiter = mock.Mock(pid=10, timeout=30, _num_workers=2,
+                        worker_class=FakeWorker, scoreboard=Scoreboard(4))
+    z = zygote.Zygote(arbiter)
+    state = {"num_workers": 5, "attrs": {"color": "blue", "extra": 1}}
+    with mock.patch("os.fork", return_value=0), \
+            mock.patch("os.getppid", return_value=10):
+        z.fork_worker(mock.Mock(), 7, 1, None, state)
+
+    worker = arbiter.boot_worker.call_args[0][0]
+    assert arbiter._num_workers == 5
+    assert (worker.age, worker.color, worker.extra) == (7, "blue", 1)
+    assert worker.score.index == 1
+
+
+def test_spawn_without_heartbeat_file():
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=1, steering=None))
+    z.sock = parent
+    z.ready = True
+    worker = make_worker()
+    worker.tmp.close()
+    worker.tmp = SharedHeartbeat(worker.score)
+    thread, received = fake_zygote(child, 4321)
+    try:
+        assert z.spawn(worker) == 4321
+        thread.join()
+        assert received["fds"] == []
+    finally:
+        parent.close()
+        child.close()
+
+
+@pytest.mark.parametrize("reply", [-1, None])
+def test_spawn_failure(reply):
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=1, steering=None))
+    z.sock = parent
+    z.ready = True
+    worker = make_worker()
+    thread, received = fake_zygote(child, reply)
+    try:
+        with pytest.raises(zygote.ZygoteError):
+            z.spawn(worker)
+        thread.join()
+        for fd in received["fds"]:
+            os.close(fd)
+    finally:
+        parent.close()
+        child.close()
+        worker.tmp.close()
+
+
+def test_poll_ready():
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=1, steering=None))
+    z.sock = parent
+    worker = make_worker()
+    try:
+        # importing the application takes a while: nothing blocks meanwhile
+        assert not z.poll_ready()
+        with pytest.raises(zygote.ZygoteError):
+            z.spawn(worker)
+        child.send(zygote.READY)
+        with mock.patch.object(zygote, "SPAWN_TIMEOUT", 0.05):
+            assert z.poll_ready()
+        assert z.ready
+        assert parent.gettimeout() == 0.05
+    finally:
+        parent.close()
+        child.close()
+        worker.tmp.close()
+
+
+def test_poll_ready_when_the_zygote_exits():
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    z = zygote.Zygote(mock.Mock(num_workers=1, steering=None))
+    z.sock = parent
+    child.close()
+    try:
+        with pytest.raises(zygote.ZygoteError):
+            z.poll_ready()
+        assert not z.ready
+    finally:
+        parent.close()
+
+
+def test_worker_tmp_from_fd():
+    tmp = WorkerTmp(Config())
+    try:
+        other = WorkerTmp.from_fd(os.dup(tmp.fileno()))
+        other.notify()
+        assert tmp.last_update() == other.last_update()
+        other.close()
+    finally:
+        tmp.close()
+
+
+def test_arbiter_falls_back_to_fork():
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    broken = mock.Mock()
+    broken.spawn.side_effect = zygote.ZygoteError("zygote exited")
+    arbiter.subreaper = True
+    arbiter.zygote = broken
+
+    with mock.patch("os.fork", return_value=777) as fork, \
+            mock.patch.object(arbiter.log, "warning") as warning:
+        assert arbiter.fork_worker(mock.Mock()) == 777
+
+    fork.assert_called_once_with()
+    warning.assert_called_once()
+    broken.stop.assert_called_once_with()
+    assert arbiter.zygote is None
+
+    # no new zygote is started for the next workers
+    with mock.patch.object(zygote.Zygote, "start") as start:
+        assert arbiter.get_zygote() is None
+    start.assert_not_called()
+
+
+def test_arbiter_forks_a_worker_with_unpicklable_state():
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    z = mock.Mock()
+    z.spawn.side_effect = zygote.StateError("cannot pickle")
+    arbiter.subreaper = True
+    arbiter.zygote = z
+
+    with mock.patch("os.fork", return_value=777) as fork, \
+            mock.patch.object(arbiter.log, "warning"):
+        assert arbiter.fork_worker(mock.Mock(), {"lock": None}) == 777
+
+    fork.assert_called_once_with()
+    # only that worker: the zygote keeps forking the next ones
+    z.stop.assert_not_called()
+    assert arbiter.get_zygote() is z
+
+
+def test_arbiter_sends_the_attributes_pre_fork_sets():
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    arbiter.pid = os.getpid()
+    arbiter.scoreboard = Scoreboard(4)
+
+    def pre_fork(server, worker):
+        worker.color = "blue"
+        worker.timeout = 7
+    arbiter.cfg.set("pre_fork", pre_fork)
+    with mock.patch.object(arbiter, "zygote_booting", return_value=False), \
+            mock.patch.object(arbiter, "fork_worker",
+                              return_value=888) as fork_worker:
+        assert arbiter.spawn_worker() == 888
+    worker, attrs = fork_worker.call_args[0]
+    assert attrs == {"color": "blue", "timeout": 7}
+    worker.tmp.close()
+
+
+def booting_arbiter():
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    arbiter.pid = os.getpid()
+    arbiter.scoreboard = Scoreboard(4)
+    arbiter.subreaper = True
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    arbiter.zygote = zygote.Zygote(arbiter)
+    arbiter.zygote.sock = parent
+    arbiter.zygote.started = time.monotonic()
+    return arbiter, child
+
+
+def test_arbiter_spawns_once_the_zygote_is_ready():
+    arbiter, child = booting_arbiter()
+    try:
+        with mock.patch.object(arbiter.zygote, "spawn",
+                               return_value=999) as spawn:
+            assert arbiter.spawn_worker() is None
+            assert arbiter.worker_age == 0
+            child.send(zygote.READY)
+            assert arbiter.spawn_worker() == 999
+        spawn.assert_called_once()
+        arbiter.WORKERS[999].tmp.close()
+    finally:
+        arbiter.stop_zygote()
+        child.close()
+
+
+def test_arbiter_gives_up_on_a_zygote_not_booting():
+    arbiter, child = booting_arbiter()
+    arbiter.zygote.started -= arbiter.timeout + 1
+    try:
+        with mock.patch.object(arbiter.zygote, "stop") as stop, \
+                mock.patch.object(arbiter.log, "warning") as warning:
+            assert not arbiter.zygote_booting()
+        stop.assert_called_once_with()
+        warning.assert_called_once()
+        assert arbiter.zygote is None
+        assert arbiter.zygote_disabled
+    finally:
+        child.close()
+
+
+def test_arbiter_waits_to_reap_a_zygote_exiting_while_booting():
+    arbiter, child = booting_arbiter()
+    child.close()
+    try:
+        assert arbiter.zygote_booting()
+        assert not arbiter.zygote_disabled
+    finally:
+        arbiter.stop_zygote()
+
+
+def test_zygote_socket_wakes_the_arbiter():
+    arbiter, child = booting_arbiter()
+    arbiter.watcher = Watcher()
+    try:
+        arbiter.watcher.add_fd(arbiter.zygote.sock.fileno())
+        child.send(zygote.READY)
+        started = time.monotonic()
+        assert arbiter.watcher.wait(5) == []
+        assert time.monotonic() - started < 1
+        assert not arbiter.zygote_booting()
+        assert arbiter.watcher.fds == set()
+    finally:
+        arbiter.stop_zygote()
+        arbiter.watcher.close()
+        child.close()
+
+
+def test_arbiter_forks_without_subreaper():
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    with mock.patch.object(gunicorn.arbiter, "set_child_subreaper",
+                           return_value=False), \
+            mock.patch.object(arbiter.log, "warning") as warning:
+        assert arbiter.get_zygote() is None
+        assert arbiter.get_zygote() is None
+    warning.assert_called_once()
+
+
+def test_zygote_exit_halts_on_app_load_error():
+    arbiter = gunicorn.arbiter.Arbiter(DummyApplication())
+    arbiter.zygote = mock.Mock(pid=55)
+    status = arbiter.APP_LOAD_ERROR << 8
+    with pytest.raises(gunicorn.errors.HaltServer):
+        arbiter.handle_zygote_exit(55, status)
+    assert arbiter.zygote is None